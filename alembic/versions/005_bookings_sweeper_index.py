@@ -0,0 +1,47 @@
+"""Booking sweeper index (status, booking_date, booking_end_time).
+
+Revision ID: 005_bookings_sweeper
+Revises: 004_bookings_keyset
+Create Date: 2026-10-19
+
+Idempotent: skips when index already exists.
+Also mirrored in app/db_schema._apply_hot_path_indexes for patch-only deploys.
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "005_bookings_sweeper"
+down_revision = "004_bookings_keyset"
+branch_labels = None
+depends_on = None
+
+_TABLE = "bookings"
+_NAME = "ix_bookings_status_date_end"
+_COLS = ["status", "booking_date", "booking_end_time"]
+
+
+def _has_index(inspector, table: str, name: str) -> bool:
+    try:
+        return any(ix.get("name") == name for ix in inspector.get_indexes(table))
+    except Exception:
+        return False
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table(_TABLE) or _has_index(inspector, _TABLE, _NAME):
+        return
+    if bind.dialect.name == "mysql":
+        op.execute(f"CREATE INDEX {_NAME} ON {_TABLE} ({', '.join(_COLS)})")
+    else:
+        op.create_index(_NAME, _TABLE, _COLS)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if inspector.has_table(_TABLE) and _has_index(inspector, _TABLE, _NAME):
+        op.drop_index(_NAME, table_name=_TABLE)
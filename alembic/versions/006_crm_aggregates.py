@@ -0,0 +1,86 @@
+"""CRM aggregates: per-card booking stats columns, consultant counter table, list indexes.
+
+Revision ID: 006_crm_aggregates
+Revises: 005_bookings_sweeper
+Create Date: 2026-10-19
+
+Idempotent: skips columns/tables/indexes that already exist.
+Also mirrored in app/db_schema for patch-only deploys. Populate with
+``python -m app.commands.crm_aggregates`` after upgrading.
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "006_crm_aggregates"
+down_revision = "005_bookings_sweeper"
+branch_labels = None
+depends_on = None
+
+_CARDS = "consultant_client_cards"
+_COUNTERS = "consultant_crm_counters"
+
+_COLUMNS: list[sa.Column] = [
+    sa.Column("booking_count", sa.Integer(), nullable=False, server_default="0"),
+    sa.Column("last_booking_date", sa.Date(), nullable=True),
+    sa.Column("next_booking_date", sa.Date(), nullable=True),
+]
+
+# (table, index_name, columns)
+_INDEXES: list[tuple[str, str, list[str]]] = [
+    ("bookings", "ix_bookings_client_card_id", ["client_card_id"]),
+    (_CARDS, "ix_client_cards_consultant_updated", ["consultant_id", "updated_at"]),
+    (_CARDS, "ix_client_cards_consultant_created", ["consultant_id", "created_at"]),
+    (_CARDS, "ix_client_cards_consultant_last_booking", ["consultant_id", "last_booking_date"]),
+]
+
+
+def _has_index(inspector, table: str, name: str) -> bool:
+    try:
+        return any(ix.get("name") == name for ix in inspector.get_indexes(table))
+    except Exception:
+        return False
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if inspector.has_table(_CARDS):
+        existing = {c["name"] for c in inspector.get_columns(_CARDS)}
+        for column in _COLUMNS:
+            if column.name not in existing:
+                op.add_column(_CARDS, column.copy())
+    if not inspector.has_table(_COUNTERS):
+        op.create_table(
+            _COUNTERS,
+            sa.Column("consultant_id", sa.Integer(), sa.ForeignKey("consultants.id"), primary_key=True),
+            sa.Column("cards_total", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("completeness_sum", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("last_card_created_at", sa.DateTime(), nullable=True),
+            sa.Column("last_card_updated_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+        )
+    inspector = sa.inspect(bind)
+    for table, name, cols in _INDEXES:
+        if not inspector.has_table(table) or _has_index(inspector, table, name):
+            continue
+        if bind.dialect.name == "mysql":
+            op.execute(f"CREATE INDEX {name} ON {table} ({', '.join(cols)})")
+        else:
+            op.create_index(name, table, cols)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    for table, name, _cols in reversed(_INDEXES):
+        if inspector.has_table(table) and _has_index(inspector, table, name):
+            op.drop_index(name, table_name=table)
+    if inspector.has_table(_COUNTERS):
+        op.drop_table(_COUNTERS)
+    if inspector.has_table(_CARDS):
+        existing = {c["name"] for c in inspector.get_columns(_CARDS)}
+        for column in reversed(_COLUMNS):
+            if column.name in existing:
+                op.drop_column(_CARDS, column.name)
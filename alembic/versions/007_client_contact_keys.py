@@ -0,0 +1,74 @@
+"""Normalized contact keys on client cards with (consultant_id, key) indexes.
+
+Revision ID: 007_client_contact_keys
+Revises: 006_crm_aggregates
+Create Date: 2026-10-19
+
+Idempotent: skips columns/indexes that already exist.
+Also mirrored in app/db_schema for patch-only deploys. Populate with
+``python -m app.commands.client_contact_keys`` after upgrading.
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "007_client_contact_keys"
+down_revision = "006_crm_aggregates"
+branch_labels = None
+depends_on = None
+
+_TABLE = "consultant_client_cards"
+
+_COLUMNS: list[sa.Column] = [
+    sa.Column("phone_key", sa.String(30), nullable=True),
+    sa.Column("email_key", sa.String(254), nullable=True),
+    sa.Column("telegram_key", sa.String(255), nullable=True),
+]
+
+# (index_name, columns)
+_INDEXES: list[tuple[str, list[str]]] = [
+    ("ix_client_cards_consultant_phone_key", ["consultant_id", "phone_key"]),
+    ("ix_client_cards_consultant_email_key", ["consultant_id", "email_key"]),
+    ("ix_client_cards_consultant_telegram_key", ["consultant_id", "telegram_key"]),
+]
+
+
+def _has_index(inspector, table: str, name: str) -> bool:
+    try:
+        return any(ix.get("name") == name for ix in inspector.get_indexes(table))
+    except Exception:
+        return False
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table(_TABLE):
+        return
+    existing = {c["name"] for c in inspector.get_columns(_TABLE)}
+    for column in _COLUMNS:
+        if column.name not in existing:
+            op.add_column(_TABLE, column.copy())
+    inspector = sa.inspect(bind)
+    for name, cols in _INDEXES:
+        if _has_index(inspector, _TABLE, name):
+            continue
+        if bind.dialect.name == "mysql":
+            op.execute(f"CREATE INDEX {name} ON {_TABLE} ({', '.join(cols)})")
+        else:
+            op.create_index(name, _TABLE, cols)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table(_TABLE):
+        return
+    for name, _cols in reversed(_INDEXES):
+        if _has_index(inspector, _TABLE, name):
+            op.drop_index(name, table_name=_TABLE)
+    existing = {c["name"] for c in inspector.get_columns(_TABLE)}
+    for column in reversed(_COLUMNS):
+        if column.name in existing:
+            op.drop_column(_TABLE, column.name)
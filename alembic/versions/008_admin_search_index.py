@@ -0,0 +1,74 @@
+"""Admin Ctrl+K search index: documents table + MySQL FULLTEXT (ngram) / SQLite FTS5.
+
+Revision ID: 008_admin_search_index
+Revises: 007_client_contact_keys
+Create Date: 2026-10-19
+
+Idempotent: skips the table/indexes that already exist.
+Also mirrored in app/db_schema for patch-only deploys. Populate with
+``python -m app.commands.admin_search_index`` after upgrading.
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "008_admin_search_index"
+down_revision = "007_client_contact_keys"
+branch_labels = None
+depends_on = None
+
+_TABLE = "admin_search_documents"
+_FULLTEXT = "ft_admin_search_body"
+
+_SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS admin_search_fts USING fts5("
+    "body, content='admin_search_documents', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS admin_search_fts_ai AFTER INSERT ON admin_search_documents BEGIN "
+    "INSERT INTO admin_search_fts(rowid, body) VALUES (new.id, new.body); END",
+    "CREATE TRIGGER IF NOT EXISTS admin_search_fts_ad AFTER DELETE ON admin_search_documents BEGIN "
+    "INSERT INTO admin_search_fts(admin_search_fts, rowid, body) VALUES ('delete', old.id, old.body); END",
+    "CREATE TRIGGER IF NOT EXISTS admin_search_fts_au AFTER UPDATE ON admin_search_documents BEGIN "
+    "INSERT INTO admin_search_fts(admin_search_fts, rowid, body) VALUES ('delete', old.id, old.body); "
+    "INSERT INTO admin_search_fts(rowid, body) VALUES (new.id, new.body); END",
+)
+
+
+def _has_index(inspector, table: str, name: str) -> bool:
+    try:
+        return any(ix.get("name") == name for ix in inspector.get_indexes(table))
+    except Exception:
+        return False
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table(_TABLE):
+        op.create_table(
+            _TABLE,
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("entity_type", sa.String(20), nullable=False),
+            sa.Column("entity_id", sa.Integer(), nullable=False),
+            sa.Column("title", sa.String(255), nullable=False, server_default=""),
+            sa.Column("subtitle", sa.String(255), nullable=False, server_default=""),
+            sa.Column("url", sa.String(255), nullable=False, server_default=""),
+            sa.Column("body", sa.Text(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.UniqueConstraint("entity_type", "entity_id", name="uq_admin_search_entity"),
+        )
+    if bind.dialect.name == "mysql":
+        if not _has_index(sa.inspect(bind), _TABLE, _FULLTEXT):
+            op.execute(f"ALTER TABLE {_TABLE} ADD FULLTEXT INDEX {_FULLTEXT} (body) WITH PARSER ngram")
+    elif bind.dialect.name == "sqlite":
+        for ddl in _SQLITE_DDL:
+            op.execute(ddl)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        op.execute("DROP TABLE IF EXISTS admin_search_fts")
+    if sa.inspect(bind).has_table(_TABLE):
+        op.drop_table(_TABLE)
@@ -0,0 +1,74 @@
+"""Admin analytics daily rollups: platform_daily_rollups + platform_specialist_daily.
+
+Revision ID: 009_analytics_rollups
+Revises: 008_admin_search_index
+Create Date: 2026-10-19
+
+Idempotent: skips the tables/indexes that already exist.
+Also mirrored in app/db_schema for patch-only deploys. Backfill with
+``python -m app.commands.analytics_rollup --backfill`` after upgrading.
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "009_analytics_rollups"
+down_revision = "008_admin_search_index"
+branch_labels = None
+depends_on = None
+
+_COUNTS = (
+    "active_users", "wau", "mau", "signups", "bookings_created", "bookings_scheduled",
+    "bookings_pending", "bookings_confirmed", "bookings_completed", "bookings_cancelled",
+)
+_INDEXES = (
+    ("platform_user_activity", "ix_platform_user_activity_date_user", ["activity_date", "user_id"]),
+    ("bookings", "ix_bookings_created_at", ["created_at"]),
+)
+
+
+def _has_index(inspector, table: str, name: str) -> bool:
+    try:
+        return any(ix.get("name") == name for ix in inspector.get_indexes(table))
+    except Exception:
+        return False
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("platform_daily_rollups"):
+        op.create_table(
+            "platform_daily_rollups",
+            sa.Column("day", sa.Date(), primary_key=True),
+            *(sa.Column(name, sa.Integer(), nullable=True) for name in _COUNTS),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+        )
+    if not inspector.has_table("platform_specialist_daily"):
+        op.create_table(
+            "platform_specialist_daily",
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("consultant_id", sa.Integer(), primary_key=True),
+            sa.Column("bookings", sa.Integer(), nullable=True),
+            sa.Column("completed", sa.Integer(), nullable=True),
+            sa.Column("cancelled", sa.Integer(), nullable=True),
+        )
+        op.create_index(
+            "ix_platform_specialist_daily_consultant_id", "platform_specialist_daily", ["consultant_id"]
+        )
+    inspector = sa.inspect(bind)
+    for table, name, columns in _INDEXES:
+        if inspector.has_table(table) and not _has_index(inspector, table, name):
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    for table, name, _ in _INDEXES:
+        if _has_index(inspector, table, name):
+            op.drop_index(name, table_name=table)
+    for table in ("platform_specialist_daily", "platform_daily_rollups"):
+        if inspector.has_table(table):
+            op.drop_table(table)
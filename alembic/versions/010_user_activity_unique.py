@@ -0,0 +1,48 @@
+"""platform_user_activity: one row per (user, day) for buffered activity upserts.
+
+Revision ID: 010_user_activity_unique
+Revises: 009_analytics_rollups
+Create Date: 2026-10-19
+
+Idempotent: removes duplicate (user_id, activity_date) rows, keeping the
+earliest, then adds the unique index if it is missing.
+Also mirrored in app/db_schema for patch-only deploys.
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "010_user_activity_unique"
+down_revision = "009_analytics_rollups"
+branch_labels = None
+depends_on = None
+
+_TABLE = "platform_user_activity"
+_INDEX = "uq_platform_user_activity_user_day"
+
+
+def _has_index(inspector, table: str, name: str) -> bool:
+    try:
+        return any(ix.get("name") == name for ix in inspector.get_indexes(table))
+    except Exception:
+        return False
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table(_TABLE) or _has_index(inspector, _TABLE, _INDEX):
+        return
+    op.execute(
+        "DELETE FROM platform_user_activity WHERE id NOT IN ("
+        "SELECT id FROM (SELECT MIN(id) AS id FROM platform_user_activity "
+        "GROUP BY user_id, activity_date) AS keep_rows)"
+    )
+    op.create_index(_INDEX, _TABLE, ["user_id", "activity_date"], unique=True)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if _has_index(sa.inspect(bind), _TABLE, _INDEX):
+        op.drop_index(_INDEX, table_name=_TABLE)
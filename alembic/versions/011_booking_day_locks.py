@@ -0,0 +1,38 @@
+"""booking_day_locks: per (calendar, day) lock rows for the booking commit path.
+
+Revision ID: 011_booking_day_locks
+Revises: 010_user_activity_unique
+Create Date: 2026-10-19
+
+Idempotent: skips the table if it already exists. Rows are created on demand by
+app/services/booking_locks and pruned by app.services.housekeeping.
+Also mirrored in app/db_schema for patch-only deploys.
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "011_booking_day_locks"
+down_revision = "010_user_activity_unique"
+branch_labels = None
+depends_on = None
+
+_TABLE = "booking_day_locks"
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table(_TABLE):
+        return
+    op.create_table(
+        _TABLE,
+        sa.Column("calendar_id", sa.Integer(), sa.ForeignKey("calendars.id"), primary_key=True),
+        sa.Column("booking_date", sa.Date(), primary_key=True),
+        sa.Column("version", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table(_TABLE):
+        op.drop_table(_TABLE)
@@ -0,0 +1,43 @@
+"""idempotency_keys: stored responses for booking POSTs sent with an Idempotency-Key.
+
+Revision ID: 012_idempotency_keys
+Revises: 011_booking_day_locks
+Create Date: 2026-10-19
+
+Idempotent: skips the table if it already exists. Expired rows are pruned by
+app.services.housekeeping. Also mirrored in app/db_schema for patch-only deploys.
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+revision = "012_idempotency_keys"
+down_revision = "011_booking_day_locks"
+branch_labels = None
+depends_on = None
+
+_TABLE = "idempotency_keys"
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table(_TABLE):
+        return
+    op.create_table(
+        _TABLE,
+        sa.Column("key", sa.String(64), primary_key=True),
+        sa.Column("scope", sa.String(64), nullable=False),
+        sa.Column("status", sa.String(16), nullable=False),
+        sa.Column("response_status", sa.Integer(), nullable=True),
+        sa.Column("response_media_type", sa.String(64), nullable=True),
+        sa.Column("response_body", sa.Text().with_variant(mysql.MEDIUMTEXT(), "mysql"), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_idempotency_keys_expires_at", _TABLE, ["expires_at"])
+
+
+def downgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table(_TABLE):
+        op.drop_table(_TABLE)
@@ -0,0 +1,39 @@
+"""web_sessions: server-side session data (the cookie carries only a signed id).
+
+Revision ID: 013_web_sessions
+Revises: 012_idempotency_keys
+Create Date: 2026-10-19
+
+Idempotent: skips the table if it already exists. Used when SESSION_BACKEND is
+db, or auto without Redis; expired rows are pruned by housekeeping.
+Also mirrored in app/db_schema for patch-only deploys.
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "013_web_sessions"
+down_revision = "012_idempotency_keys"
+branch_labels = None
+depends_on = None
+
+_TABLE = "web_sessions"
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table(_TABLE):
+        return
+    op.create_table(
+        _TABLE,
+        sa.Column("id", sa.String(64), primary_key=True),
+        sa.Column("data", sa.Text(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_web_sessions_expires_at", _TABLE, ["expires_at"])
+
+
+def downgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table(_TABLE):
+        op.drop_table(_TABLE)
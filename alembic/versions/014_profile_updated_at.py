@@ -0,0 +1,37 @@
+"""updated_at on auth_user, account_emailaddress, socialaccount_socialaccount, consultant_menu_category.
+
+Revision ID: 014_profile_updated_at
+Revises: 013_web_sessions
+Create Date: 2026-10-19
+
+The profile payload ETag is derived from max(updated_at) of the rows it reads.
+Nullable: existing rows stay NULL until their next edit. Idempotent: skips
+columns that already exist. Also mirrored in app/db_schema for patch-only deploys.
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "014_profile_updated_at"
+down_revision = "013_web_sessions"
+branch_labels = None
+depends_on = None
+
+_TABLES = ("auth_user", "account_emailaddress", "socialaccount_socialaccount", "consultant_menu_category")
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for table in _TABLES:
+        if not inspector.has_table(table):
+            continue
+        if "updated_at" not in {c["name"] for c in inspector.get_columns(table)}:
+            op.add_column(table, sa.Column("updated_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for table in _TABLES:
+        if inspector.has_table(table) and "updated_at" in {c["name"] for c in inspector.get_columns(table)}:
+            op.drop_column(table, "updated_at")
@@ -18,6 +18,8 @@ class AuthUser:
     password_hash: str
     is_staff: bool = False
     is_superuser: bool = False
+    # Set when built from an auth snapshot (the hash itself is not cached).
+    password_usable: bool | None = None
 
     @property
     def is_authenticated(self) -> bool:
@@ -25,6 +27,8 @@ class AuthUser:
 
     @property
     def has_usable_password(self) -> bool:
+        if self.password_usable is not None:
+            return self.password_usable
         return has_usable_password(self.password_hash)
 
     @property
@@ -51,6 +55,32 @@ def user_from_model(user: User | None) -> AuthUser | None:
     )
 
 
+def user_from_snapshot(snap: dict | None) -> AuthUser | None:
+    if not snap or not snap.get("is_active"):
+        return None
+    return AuthUser(
+        id=snap["id"],
+        username=snap["username"],
+        email=snap["email"],
+        first_name=snap["first_name"],
+        last_name=snap["last_name"],
+        is_active=True,
+        password_hash="",
+        is_staff=snap["is_staff"],
+        is_superuser=snap["is_superuser"],
+        password_usable=snap["has_usable_password"],
+    )
+
+
+def _session_version_ok(request: Request, snap: dict) -> bool:
+    if "session" not in request.scope:
+        return True
+    stored = request.session.get("session_version")
+    if stored is None:
+        return snap["session_version"] == 0
+    return int(stored) == snap["session_version"]
+
+
 def get_session_user_id(request: Request) -> int | None:
     if "session" not in request.scope:
         return None
@@ -168,58 +198,49 @@ def logout_user(request: Request) -> None:
 
 
 def get_current_user(request: Request, db: Session) -> AuthUser | None:
-    """Resolve session user once per request (cached on request.state)."""
+    """Resolve session user once per request (cached on request.state, and across
+    requests in the per-user auth snapshot)."""
+    from app.services.auth_snapshot import load_auth_snapshot
+
     state = getattr(request, "state", None)
     if state is not None and getattr(state, "_auth_user_resolved", False):
         return getattr(state, "_auth_user", None)
 
     user_id = get_session_user_id(request)
     auth: AuthUser | None = None
+    snap = None
     if user_id:
-        user = db.get(User, user_id)
-        if user and user.is_active:
-            if "session" in request.scope:
-                expected = int(getattr(user, "session_version", 0) or 0)
-                stored = request.session.get("session_version")
-                if stored is None:
-                    if expected == 0:
-                        auth = user_from_model(user)
-                elif int(stored) == expected:
-                    auth = user_from_model(user)
-            else:
-                auth = user_from_model(user)
+        snap = load_auth_snapshot(db, user_id)
+        if snap and _session_version_ok(request, snap):
+            auth = user_from_snapshot(snap)
 
     if state is not None:
         state._auth_user_resolved = True
         state._auth_user = auth
+        state._auth_snapshot = snap if auth else None
     return auth
 
 
 async def get_current_user_async(request: Request, db) -> AuthUser | None:
     """AsyncSession variant of get_current_user."""
+    from app.services.auth_snapshot import load_auth_snapshot_async
+
     state = getattr(request, "state", None)
     if state is not None and getattr(state, "_auth_user_resolved", False):
         return getattr(state, "_auth_user", None)
 
     user_id = get_session_user_id(request)
     auth: AuthUser | None = None
+    snap = None
     if user_id:
-        user = await db.get(User, user_id)
-        if user and user.is_active:
-            if "session" in request.scope:
-                expected = int(getattr(user, "session_version", 0) or 0)
-                stored = request.session.get("session_version")
-                if stored is None:
-                    if expected == 0:
-                        auth = user_from_model(user)
-                elif int(stored) == expected:
-                    auth = user_from_model(user)
-            else:
-                auth = user_from_model(user)
+        snap = await load_auth_snapshot_async(db, user_id)
+        if snap and _session_version_ok(request, snap):
+            auth = user_from_snapshot(snap)
 
     if state is not None:
         state._auth_user_resolved = True
         state._auth_user = auth
+        state._auth_snapshot = snap if auth else None
     return auth
 
 
@@ -228,3 +249,4 @@ def clear_request_user_cache(request: Request) -> None:
     if state is not None:
         state._auth_user_resolved = False
         state._auth_user = None
+        state._auth_snapshot = None
@@ -0,0 +1,250 @@
+"""Server-side sessions: the cookie carries only a signed opaque id.
+
+ServerSessionMiddleware is a drop-in replacement for Starlette's SessionMiddleware
+(same arguments, same ``request.session`` dict).
+
+- Backends: Redis (``sess:v1:<id>`` with a TTL) or the ``web_sessions`` table,
+  chosen by SESSION_BACKEND (``auto`` = Redis when REDIS_URL answers, else DB).
+- A request with a signed id loads its session once, in the threadpool, before the
+  app runs (no blocking store call on the event loop); requests without a session
+  cookie never touch the store. It is written only when the data changed.
+- Sliding expiry: the TTL and the cookie's Max-Age are refreshed once less than
+  half of SESSION_MAX_AGE is left. An emptied session is deleted and its cookie
+  cleared.
+- The id is rotated whenever ``user_id`` changes (login, logout,
+  impersonation), so a pre-login id cannot be fixed on a victim.
+- Migration: a legacy signed-cookie session (Starlette format, same
+  SECRET_KEY) is still accepted. It is copied into the store and its cookie is
+  replaced on the same response.
+- Expired ``web_sessions`` rows are dropped by the "web_sessions" housekeeping prune
+  (Redis expires its keys itself).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import secrets
+import time
+from base64 import b64decode
+from datetime import datetime, timedelta
+from typing import Any
+
+import itsdangerous
+from itsdangerous.exc import BadSignature
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+
+from app.services.housekeeping import register_prune
+
+logger = logging.getLogger(__name__)
+
+REDIS_PREFIX = "sess:v1:"
+_SALT = "server-session"
+
+
+def _dump(data: dict) -> str:
+    return json.dumps(data, sort_keys=True, separators=(",", ":"))
+
+
+# --- stores ----------------------------------------------------------------
+
+
+class RedisSessionStore:
+    def __init__(self, client):
+        self.client = client
+
+    def load(self, sid: str) -> tuple[dict, float] | None:
+        """(data, expires_at as epoch seconds) or None."""
+        pipe = self.client.pipeline()
+        pipe.get(REDIS_PREFIX + sid)
+        pipe.ttl(REDIS_PREFIX + sid)
+        raw, ttl = pipe.execute()
+        if raw is None:
+            return None
+        return json.loads(raw), time.time() + max(0, int(ttl or 0))
+
+    def save(self, sid: str, payload: str, ttl: int) -> None:
+        self.client.setex(REDIS_PREFIX + sid, max(1, int(ttl)), payload)
+
+    def delete(self, sid: str) -> None:
+        self.client.delete(REDIS_PREFIX + sid)
+
+
+class DbSessionStore:
+    """web_sessions rows on the primary engine; expired rows are pruned by housekeeping."""
+
+    def __init__(self, engine=None):
+        if engine is None:
+            from app.database import engine
+        self.engine = engine
+
+    def load(self, sid: str) -> tuple[dict, float] | None:
+        from app.models import WebSession
+
+        table = WebSession.__table__
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                table.select().with_only_columns(table.c.data, table.c.expires_at).where(table.c.id == sid)
+            ).one_or_none()
+        if row is None or row.expires_at <= datetime.utcnow():
+            return None
+        return json.loads(row.data or "{}"), time.time() + (row.expires_at - datetime.utcnow()).total_seconds()
+
+    def save(self, sid: str, payload: str, ttl: int) -> None:
+        from app.models import WebSession
+
+        table = WebSession.__table__
+        now = datetime.utcnow()
+        row = {"id": sid, "data": payload, "expires_at": now + timedelta(seconds=ttl), "updated_at": now}
+        changes = {"data": payload, "expires_at": row["expires_at"], "updated_at": now}
+        with self.engine.begin() as conn:
+            dialect = conn.dialect.name
+            if dialect == "mysql":
+                from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+                conn.execute(mysql_insert(table).values(**row).on_duplicate_key_update(**changes))
+            elif dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+                conn.execute(
+                    sqlite_insert(table).values(**row).on_conflict_do_update(index_elements=[table.c.id], set_=changes)
+                )
+            elif not conn.execute(table.update().where(table.c.id == sid).values(**changes)).rowcount:
+                conn.execute(table.insert().values(**row))
+
+    def delete(self, sid: str) -> None:
+        from app.models import WebSession
+
+        table = WebSession.__table__
+        with self.engine.begin() as conn:
+            conn.execute(table.delete().where(table.c.id == sid))
+
+
+def make_session_store(backend: str | None = None):
+    """Store for SESSION_BACKEND (auto | redis | db)."""
+    from app.config import get_settings
+    from app.services.redis_client import get_redis
+
+    backend = backend or get_settings().session_backend
+    if backend in ("auto", "redis"):
+        client = get_redis()
+        if client is not None:
+            return RedisSessionStore(client)
+        if backend == "redis":
+            logger.warning("SESSION_BACKEND=redis but Redis is unavailable; using web_sessions")
+    return DbSessionStore()
+
+
+def prune_web_sessions(now: datetime | None = None):
+    """Statement dropping expired DB-backed sessions."""
+    from sqlalchemy import delete
+
+    from app.models import WebSession
+
+    return delete(WebSession).where(WebSession.expires_at < (now or datetime.utcnow()))
+
+
+register_prune("web_sessions", prune_web_sessions)
+
+
+# --- middleware ------------------------------------------------------------
+
+
+class ServerSessionMiddleware:
+    def __init__(
+        self,
+        app,
+        secret_key: str,
+        session_cookie: str = "session",
+        max_age: int = 14 * 24 * 60 * 60,
+        path: str = "/",
+        same_site: str = "lax",
+        https_only: bool = False,
+        store=None,
+    ) -> None:
+        self.app = app
+        self.signer = itsdangerous.Signer(str(secret_key), salt=_SALT)
+        self.legacy_signer = itsdangerous.TimestampSigner(str(secret_key))
+        self.session_cookie = session_cookie
+        self.max_age = int(max_age)
+        self.path = path
+        self.security_flags = "httponly; samesite=" + same_site
+        if https_only:
+            self.security_flags += "; secure"
+        self._store = store
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = make_session_store()
+        return self._store
+
+    def _read_cookie(self, raw: str) -> tuple[str | None, dict | None]:
+        """(session id, None) for a current cookie, (None, data) for a legacy one, else (None, None)."""
+        try:
+            return self.signer.unsign(raw).decode("ascii"), None
+        except BadSignature:
+            pass
+        try:
+            data = json.loads(b64decode(self.legacy_signer.unsign(raw, max_age=self.max_age)))
+            return None, data if isinstance(data, dict) else None
+        except (BadSignature, ValueError):
+            return None, None
+
+    def _cookie(self, value: str, *, clear: bool = False) -> str:
+        lifetime = "expires=Thu, 01 Jan 1970 00:00:00 GMT; " if clear else f"Max-Age={self.max_age}; "
+        return f"{self.session_cookie}={value}; path={self.path}; {lifetime}{self.security_flags}"
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        raw = HTTPConnection(scope).cookies.get(self.session_cookie)
+        sid, legacy = self._read_cookie(raw) if raw else (None, None)
+        loaded: dict[str, Any] = {"data": None, "expires": 0.0}
+        if sid:
+            try:
+                found = await run_in_threadpool(self.store.load, sid)
+            except Exception:
+                logger.exception("session load failed")
+                found = None
+            if found is not None:
+                loaded["data"], loaded["expires"] = found
+
+        session = dict(legacy if legacy is not None else loaded["data"] or {})
+        scope["session"] = session
+
+        async def send_wrapper(message) -> None:
+            if message["type"] == "http.response.start":
+                header = await self._persist(scope.get("session"), sid, raw, legacy, loaded)
+                if header:
+                    MutableHeaders(scope=message).append("Set-Cookie", header)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _persist(self, session, sid, raw, legacy, loaded) -> str | None:
+        """Save/delete as needed; returns the Set-Cookie value to send, if any."""
+        data = dict(session or {})
+        before = legacy if legacy is not None else (loaded["data"] or {})
+        changed = legacy is not None or _dump(data) != _dump(before)
+        try:
+            if not data:
+                if sid and loaded["data"] is not None:
+                    await run_in_threadpool(self.store.delete, sid)
+                return self._cookie("null", clear=True) if raw else None
+            refresh = loaded["expires"] - time.time() < self.max_age / 2
+            if not changed and not refresh:
+                return None
+            new_sid = sid
+            if sid is None or loaded["data"] is None or data.get("user_id") != before.get("user_id"):
+                new_sid = secrets.token_urlsafe(32)
+                if sid and loaded["data"] is not None:
+                    await run_in_threadpool(self.store.delete, sid)
+            await run_in_threadpool(self.store.save, new_sid, _dump(data), self.max_age)
+        except Exception:
+            logger.exception("session save failed")
+            return None
+        return self._cookie(self.signer.sign(new_sid).decode("ascii"))
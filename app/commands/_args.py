@@ -0,0 +1,25 @@
+"""argv and progress helpers shared by the app.commands CLIs."""
+from __future__ import annotations
+
+import sys
+from typing import Any
+
+
+def arg_value(argv: list[str], name: str) -> str | None:
+    """``--name VALUE`` / ``--name=VALUE`` from a command's argv."""
+    for i, arg in enumerate(argv):
+        if arg == name and i + 1 < len(argv):
+            return argv[i + 1]
+        if arg.startswith(f"{name}="):
+            return arg.split("=", 1)[1]
+    return None
+
+
+def print_progress(data: dict[str, Any]) -> None:
+    """progress= callback for batched_backfill runs: one stderr line per chunk."""
+    rate = data.get("rows_per_sec")
+    print(
+        f"[{data['name']}] chunk {data['chunks']}: {data['rows']} rows, last id {data['last_id']}"
+        + (f", {rate} rows/s" if rate is not None else ""),
+        file=sys.stderr,
+    )
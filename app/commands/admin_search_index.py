@@ -0,0 +1,33 @@
+"""Rebuild the admin Ctrl+K search index: python -m app.commands.admin_search_index [--type user,booking] [--json]"""
+from __future__ import annotations
+
+import json
+import sys
+
+from app.commands._args import arg_value
+from app.database import SessionLocal
+from app.services.admin_search_index import LOADERS, rebuild_search_index
+
+
+def main() -> int:
+    argv = sys.argv[1:]
+    raw = arg_value(argv, "--type")
+    entity_types = [t.strip() for t in raw.split(",") if t.strip()] if raw else None
+    unknown = [t for t in entity_types or () if t not in LOADERS]
+    if unknown:
+        print(f"bad --type: {', '.join(unknown)} (known: {', '.join(LOADERS)})", file=sys.stderr)
+        return 2
+    db = SessionLocal()
+    try:
+        report = rebuild_search_index(db, entity_types=entity_types)
+    finally:
+        db.close()
+    if "--json" in argv:
+        print(json.dumps({"ok": True, "indexed": report}))
+    else:
+        print("Indexed: " + ", ".join(f"{k}={v}" for k, v in report.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
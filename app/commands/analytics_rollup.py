@@ -0,0 +1,42 @@
+"""Roll up admin analytics: python -m app.commands.analytics_rollup [--days 7 | --from YYYY-MM-DD | --backfill] [--json]"""
+from __future__ import annotations
+
+import json
+import sys
+from datetime import date
+
+from app.commands._args import arg_value
+from app.database import SessionLocal
+from app.services.analytics_rollup import ROLLUP_REFRESH_DAYS, earliest_data_date, run_rollups
+
+
+def main() -> int:
+    argv = sys.argv[1:]
+    raw_from = arg_value(argv, "--from")
+    raw_days = arg_value(argv, "--days")
+    start = None
+    if raw_from:
+        try:
+            start = date.fromisoformat(raw_from)
+        except ValueError:
+            print("bad --from (expected YYYY-MM-DD)", file=sys.stderr)
+            return 2
+    if raw_days and not raw_days.isdigit():
+        print("bad --days", file=sys.stderr)
+        return 2
+    db = SessionLocal()
+    try:
+        if "--backfill" in argv and start is None:
+            start = earliest_data_date(db) or date.today()
+        report = run_rollups(db, start=start, refresh_days=int(raw_days) if raw_days else ROLLUP_REFRESH_DAYS)
+    finally:
+        db.close()
+    if "--json" in argv:
+        print(json.dumps({"ok": True, **report}))
+    else:
+        print(f"Rolled up {report['days']} days ({report['from']}..{report['to']})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
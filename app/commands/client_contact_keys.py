@@ -0,0 +1,33 @@
+"""Backfill normalized client card contact keys: python -m app.commands.client_contact_keys [--batch N] [--json]"""
+from __future__ import annotations
+
+import json
+import sys
+
+from app.commands._args import arg_value
+from app.database import SessionLocal
+from app.services.client_contacts import BACKFILL_BATCH, backfill_contact_keys
+
+
+def main() -> int:
+    argv = sys.argv[1:]
+    raw = arg_value(argv, "--batch")
+    try:
+        batch = max(int(raw), 1) if raw else BACKFILL_BATCH
+    except ValueError:
+        print(f"bad --batch: {raw}", file=sys.stderr)
+        return 2
+    db = SessionLocal()
+    try:
+        report = backfill_contact_keys(db, batch=batch)
+    finally:
+        db.close()
+    if "--json" in argv:
+        print(json.dumps({"ok": True, **report}))
+    else:
+        print(f"Cards scanned: {report['scanned']}, keys updated: {report['updated']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
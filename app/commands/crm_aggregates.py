@@ -0,0 +1,33 @@
+"""Backfill / reconcile CRM aggregates: python -m app.commands.crm_aggregates [--consultant ID] [--json]"""
+from __future__ import annotations
+
+import json
+import sys
+
+from app.commands._args import arg_value
+from app.database import SessionLocal
+from app.services.crm_aggregates import reconcile_crm_aggregates
+
+
+def main() -> int:
+    argv = sys.argv[1:]
+    raw = arg_value(argv, "--consultant")
+    try:
+        consultant_id = int(raw) if raw else None
+    except ValueError:
+        print(f"bad --consultant: {raw}", file=sys.stderr)
+        return 2
+    db = SessionLocal()
+    try:
+        report = reconcile_crm_aggregates(db, consultant_id=consultant_id)
+    finally:
+        db.close()
+    if "--json" in argv:
+        print(json.dumps({"ok": True, "consultant_id": consultant_id, **report}))
+    else:
+        print(f"Cards refreshed: {report['cards']}, consultant counters: {report['consultants']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
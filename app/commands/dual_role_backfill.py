@@ -1,38 +1,39 @@
-"""Phase 2 backfill: python -m app.commands.dual_role_backfill [--dry-run] [--limit N]"""
+"""Phase 2 backfill: python -m app.commands.dual_role_backfill [--apply] [--resume] [--limit N] [--chunk N] [--rate ROWS_PER_SEC] [--json]"""
 from __future__ import annotations
 
 import json
 import sys
 
 from app.database import SessionLocal
+from app.commands._args import arg_value, print_progress
+from app.services.batched_backfill import DEFAULT_CHUNK_SIZE
 from app.services.dual_role_backfill import backfill_booking_client_user_ids, format_backfill_report
 
 
-def _parse_limit(argv: list[str]) -> int | None:
-    for i, arg in enumerate(argv):
-        if arg == "--limit" and i + 1 < len(argv):
-            try:
-                return int(argv[i + 1])
-            except ValueError:
-                return None
-        if arg.startswith("--limit="):
-            try:
-                return int(arg.split("=", 1)[1])
-            except ValueError:
-                return None
-    return None
-
-
 def main() -> int:
     argv = sys.argv[1:]
     # Default dry-run unless --apply
     dry_run = "--apply" not in argv
     as_json = "--json" in argv
-    limit = _parse_limit(argv)
+    try:
+        limit = int(arg_value(argv, "--limit") or 0) or None
+        chunk_size = int(arg_value(argv, "--chunk") or DEFAULT_CHUNK_SIZE)
+        rate = float(arg_value(argv, "--rate") or 0) or None
+    except ValueError:
+        print("bad --limit / --chunk / --rate", file=sys.stderr)
+        return 2
 
     db = SessionLocal()
     try:
-        data = backfill_booking_client_user_ids(db, dry_run=dry_run, limit=limit)
+        data = backfill_booking_client_user_ids(
+            db,
+            dry_run=dry_run,
+            limit=limit,
+            chunk_size=chunk_size,
+            rows_per_sec=rate,
+            resume="--resume" in argv,
+            progress=print_progress,
+        )
         if as_json:
             print(json.dumps(data, ensure_ascii=False, indent=2))
         else:
@@ -1,18 +1,27 @@
-"""Phase 0 inventory: python -m app.commands.dual_role_inventory"""
+"""Phase 0 inventory: python -m app.commands.dual_role_inventory [--chunk N] [--json]"""
 from __future__ import annotations
 
 import json
 import sys
 
 from app.database import SessionLocal
+from app.commands._args import arg_value, print_progress
+from app.services.batched_backfill import DEFAULT_CHUNK_SIZE
 from app.services.dual_role_inventory import collect_dual_role_inventory, format_inventory_report
 
 
 def main() -> int:
-    as_json = "--json" in sys.argv
+    argv = sys.argv[1:]
+    as_json = "--json" in argv
+    raw = arg_value(argv, "--chunk")
+    try:
+        chunk_size = int(raw) if raw else DEFAULT_CHUNK_SIZE
+    except ValueError:
+        print(f"bad --chunk: {raw}", file=sys.stderr)
+        return 1
     db = SessionLocal()
     try:
-        data = collect_dual_role_inventory(db)
+        data = collect_dual_role_inventory(db, chunk_size=chunk_size, progress=print_progress)
         if as_json:
             print(json.dumps(data, ensure_ascii=False, indent=2))
         else:
@@ -0,0 +1,26 @@
+"""Run the registered expiry prunes: python -m app.commands.housekeeping [--json]"""
+from __future__ import annotations
+
+import json
+import sys
+
+from app.database import SessionLocal
+from app.services.housekeeping import prune_expired
+
+
+def main() -> int:
+    argv = sys.argv[1:]
+    db = SessionLocal()
+    try:
+        report = prune_expired(db)
+    finally:
+        db.close()
+    if "--json" in argv:
+        print(json.dumps({"ok": True, **report}))
+    else:
+        print(", ".join(f"{name}: {count}" for name, count in report.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,34 @@
+"""Start-up import budget: python -m app.commands.import_profile [--json] [--top N] [--target app.main]"""
+from __future__ import annotations
+
+import json
+import sys
+
+from app.commands._args import arg_value
+from app.services.import_profile import format_import_report, run_import_profile
+
+
+def main() -> int:
+    argv = sys.argv[1:]
+    as_json = "--json" in argv
+    target = arg_value(argv, "--target") or "app.main"
+    try:
+        top_n = int(arg_value(argv, "--top") or 20)
+    except ValueError:
+        top_n = 20
+    budget_raw = arg_value(argv, "--budget-ms")
+    try:
+        budget = float(budget_raw) if budget_raw else None
+    except ValueError:
+        budget = None
+
+    data = run_import_profile(target, top_n=top_n, budget_ms=budget)
+    if as_json:
+        print(json.dumps(data, ensure_ascii=False, indent=2))
+    else:
+        print(format_import_report(data))
+    return 0 if data["ok"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
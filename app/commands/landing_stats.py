@@ -0,0 +1,29 @@
+"""Recount landing counters from the source tables: python -m app.commands.landing_stats [--json]
+
+Run it with the web workers stopped (deploy does); their buffered deltas would be counted twice.
+"""
+from __future__ import annotations
+
+import json
+import sys
+
+from app.database import SessionLocal
+from app.services.landing_stats import reconcile_landing_counters
+
+
+def main() -> int:
+    argv = sys.argv[1:]
+    db = SessionLocal()
+    try:
+        totals = reconcile_landing_counters(db)
+    finally:
+        db.close()
+    if "--json" in argv:
+        print(json.dumps({"ok": True, "counters": totals}))
+    else:
+        print("Landing counters: " + ", ".join(f"{k}={v}" for k, v in totals.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
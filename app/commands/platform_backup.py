@@ -0,0 +1,39 @@
+"""DB backup for cron: python -m app.commands.platform_backup [--verify NAME] [--json]"""
+from __future__ import annotations
+
+import json
+import sys
+
+from app.commands._args import arg_value
+from app.config import get_settings
+from app.services.platform_backup import BackupError, backups_dir, run_backup, verify_backup
+
+
+def _progress(done: int, total: int | None, unit: str) -> None:
+    print(f"[backup] {done}" + (f"/{total}" if total else "") + f" {unit}", file=sys.stderr)
+
+
+def main() -> int:
+    argv = sys.argv[1:]
+    as_json = "--json" in argv
+    name = arg_value(argv, "--verify")
+    if name:
+        ok, message = verify_backup(backups_dir(get_settings()) / name)
+        print(json.dumps({"ok": ok, "message": message}, ensure_ascii=False) if as_json else message)
+        return 0 if ok else 1
+    try:
+        result = run_backup(progress=None if as_json else _progress)
+    except BackupError as e:
+        print(json.dumps({"ok": False, "error": str(e)}, ensure_ascii=False) if as_json else str(e), file=sys.stderr)
+        return 1
+    if as_json:
+        print(json.dumps({"ok": True, **result}, ensure_ascii=False))
+    else:
+        print(f"Backup: {result['path']} ({result['size']} bytes, sha256 {result['sha256']})")
+        if result["removed"]:
+            print(f"Rotated out: {', '.join(result['removed'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,6 +3,7 @@ import logging
 import sys
 
 from app.database import SessionLocal
+from app.services.booking_sweeper import sweep_completed_bookings
 from app.services.telegram import send_reminders
 
 logging.basicConfig(level=logging.INFO, stream=sys.stdout)
@@ -11,6 +12,7 @@ logging.basicConfig(level=logging.INFO, stream=sys.stdout)
 def main():
     db = SessionLocal()
     try:
+        print(f"Bookings completed: {sweep_completed_bookings(db)}")
         sent = send_reminders(db)
         print(f"Reminders sent: {sent}")
     finally:
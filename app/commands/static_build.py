@@ -0,0 +1,31 @@
+"""Fingerprint + precompress app/static: python -m app.commands.static_build [--json] [--out DIR] [--top N]"""
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+from app.commands._args import arg_value
+from app.services.static_assets import build_static_assets, format_static_report, page_savings
+
+
+def main() -> int:
+    argv = sys.argv[1:]
+    as_json = "--json" in argv
+    out = arg_value(argv, "--out")
+    try:
+        top_n = int(arg_value(argv, "--top") or 30)
+    except ValueError:
+        top_n = 30
+
+    data = build_static_assets(out=Path(out) if out else None)
+    data["pages"] = page_savings(data["assets"])
+    if as_json:
+        print(json.dumps(data, ensure_ascii=False, indent=2))
+    else:
+        print(format_static_report(data, top_n=top_n))
+    return 0 if data["ok"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,33 @@
+"""Complete ended confirmed bookings: python -m app.commands.sweep_bookings [--calendar ID] [--json]"""
+from __future__ import annotations
+
+import json
+import sys
+
+from app.commands._args import arg_value
+from app.database import SessionLocal
+from app.services.booking_sweeper import sweep_completed_bookings
+
+
+def main() -> int:
+    argv = sys.argv[1:]
+    raw = arg_value(argv, "--calendar")
+    try:
+        calendar_id = int(raw) if raw else None
+    except ValueError:
+        print(f"bad --calendar: {raw}", file=sys.stderr)
+        return 2
+    db = SessionLocal()
+    try:
+        completed = sweep_completed_bookings(db, calendar_id=calendar_id)
+    finally:
+        db.close()
+    if "--json" in argv:
+        print(json.dumps({"ok": True, "completed": completed, "calendar_id": calendar_id}))
+    else:
+        print(f"Bookings completed: {completed}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -40,6 +40,15 @@ class Settings:
     db_connect_timeout: int = _env_int("DB_CONNECT_TIMEOUT", 10)
     db_pool_size: int = _env_int("DB_POOL_SIZE", 5)
     db_max_overflow: int = _env_int("DB_MAX_OVERFLOW", 10)
+    # Total DB connections all workers may open (keep under MySQL max_connections). 0 = use
+    # DB_POOL_SIZE / DB_MAX_OVERFLOW as is; otherwise pools are sized from budget / WEB_CONCURRENCY.
+    db_connection_budget: int = _env_int("DB_CONNECTION_BUDGET", 0)
+    # Worker processes sharing the budget (uvicorn --workers / Passenger max pool size).
+    web_workers: int = _env_int("WEB_CONCURRENCY", 1)
+    # Optional read replica (sync SQLAlchemy URL, e.g. mysql+pymysql://...). Empty = reads use the primary.
+    db_read_url: str = (os.getenv("DB_READ_URL", "") or "").strip()
+    # After a write, that browser's replica-routed reads stay on the primary this long (replication lag).
+    db_read_after_write_sec: int = _env_int("DB_READ_AFTER_WRITE_SEC", 10)
     # Optional shared cache / rate-limit. Empty = in-process memory fallback.
     redis_url: str = (os.getenv("REDIS_URL", "") or "").strip()
     # Phase F: log + count requests slower than this (ms). 0 = disable slow flag.
@@ -51,6 +60,20 @@ class Settings:
         "yes",
     )
 
+    # app_counters / platform_user_activity writes are buffered and upserted every N seconds.
+    # 0 = write through on the caller's thread (no background flusher).
+    write_buffer_flush_sec: float = float(os.getenv("WRITE_BUFFER_FLUSH_SEC", "5") or "5")
+
+    # Booking POSTs with an Idempotency-Key: how long the stored response is replayed.
+    idempotency_ttl_sec: int = int(os.getenv("IDEMPOTENCY_TTL_SEC", "86400") or "86400")
+
+    # Platform DB backups (var/backups, never under MEDIA_ROOT): how many to keep, and mysqldump compression (gzip | zstd | none).
+    backup_keep: int = int(os.getenv("BACKUP_KEEP", "10") or "10")
+    backup_compression: str = (os.getenv("BACKUP_COMPRESSION", "gzip") or "gzip").strip().lower()
+
+    # Cold `import app.main` budget (ms) for app.commands.import_profile and the CI guard.
+    import_budget_ms: float = float(os.getenv("IMPORT_BUDGET_MS", "3000") or "3000")
+
     google_oauth_client_id: str = os.getenv("GOOGLE_OAUTH_CLIENT_ID", "")
     google_oauth_client_secret: str = os.getenv("GOOGLE_OAUTH_CLIENT_SECRET", "")
     google_calendar_scopes: list[str] = ["https://www.googleapis.com/auth/calendar.events"]
@@ -105,9 +128,22 @@ class Settings:
     media_root: Path = BASE_DIR / "media"
     static_dir: Path = BASE_DIR / "app" / "static"
     templates_dir: Path = BASE_DIR / "app" / "templates"
+    # Output of `python -m app.commands.static_build`; used for /static once it has a
+    # manifest. Empty = always serve app/static as-is.
+    static_build_dir: str = (os.getenv("STATIC_BUILD_DIR", str(BASE_DIR / "build" / "static")) or "").strip()
+    # Compiled Jinja2 bytecode shared by all workers. Empty = compile in memory only.
+    jinja_bytecode_cache_dir: str = (
+        os.getenv("JINJA_BYTECODE_CACHE_DIR", str(BASE_DIR / ".cache" / "jinja")) or ""
+    ).strip()
 
     session_cookie: str = "session"
     session_max_age: int = 60 * 60 * 24 * 14
+    # Where session data lives: auto (Redis when REDIS_URL works, else the web_sessions table),
+    # redis, db, or cookie (legacy: the whole session signed into the cookie).
+    session_backend: str = (os.getenv("SESSION_BACKEND", "auto") or "auto").strip().lower()
+    # Per-user identity snapshot (user, consultant, primary email) cached in Redis between requests; 0 = off.
+    # Without Redis it is always off.
+    auth_snapshot_ttl_sec: int = _env_int("AUTH_SNAPSHOT_TTL_SEC", 30)
     # none = Telegram Mini App WebView can keep session (requires HTTPS / Secure cookie).
     # Override with SESSION_SAME_SITE=lax for local http:// testing.
     session_same_site: str = (
@@ -134,6 +170,18 @@ class Settings:
         # aiosqlite path must be absolute-ish for SQLAlchemy URL
         return f"sqlite+aiosqlite:///{self.base_dir / 'data.db'}"
 
+    @property
+    def async_read_database_url(self) -> str:
+        """DB_READ_URL with the async driver the primary uses (aiosqlite / asyncmy); empty when unset."""
+        if not self.db_read_url:
+            return ""
+        from sqlalchemy.engine import make_url
+
+        url = make_url(self.db_read_url)
+        backend = url.get_backend_name()
+        driver = "aiosqlite" if backend == "sqlite" else "asyncmy"
+        return url.set(drivername=f"{backend}+{driver}").render_as_string(hide_password=False)
+
 
 @lru_cache
 def get_settings() -> Settings:
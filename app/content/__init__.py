@@ -0,0 +1,32 @@
+"""Static marketing and legal copy."""
+from __future__ import annotations
+
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+
+_COPY_MODULES = ("landing_copy.py", "legal_copy.py", "apps_copy.py")
+
+
+@lru_cache
+def content_version() -> str:
+    """Short hash of the copy modules + settings rendered into public pages."""
+    from app.config import get_settings
+
+    settings = get_settings()
+    h = hashlib.sha1()
+    root = Path(__file__).resolve().parent
+    for name in _COPY_MODULES:
+        try:
+            h.update((root / name).read_bytes())
+        except OSError:
+            h.update(name.encode("utf-8"))
+    for value in (
+        settings.site_brand_name,
+        settings.site_url,
+        settings.support_email,
+        settings.admin_telegram_username,
+        settings.telegram_bot_username,
+    ):
+        h.update(b"\0" + str(value or "").encode("utf-8"))
+    return h.hexdigest()[:12]
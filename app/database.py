@@ -1,70 +1,193 @@
+import time
 from collections.abc import AsyncGenerator, Generator
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
+from starlette.requests import Request
 
 from app.config import get_settings
+from app.services.pool_metrics import instrument_engine, plan_pool_size, timed_pool_class
 
 settings = get_settings()
 
-_is_sqlite = settings.database_url.startswith("sqlite")
-_is_mysql = settings.database_url.startswith("mysql")
-
-connect_args: dict = {}
-if _is_sqlite:
-    connect_args = {"check_same_thread": False}
-elif _is_mysql:
-    connect_args = {
-        "connect_timeout": settings.db_connect_timeout,
-        "read_timeout": 30,
-        "write_timeout": 30,
+# Async driver -> sync driver on the same database (write_buffer's sync twin of an AsyncEngine).
+_SYNC_DRIVERS = {"sqlite+aiosqlite": "sqlite", "mysql+asyncmy": "mysql+pymysql"}
+
+
+def sync_url(async_url) -> str:
+    url = make_url(async_url)
+    url = url.set(drivername=_SYNC_DRIVERS.get(url.drivername, url.get_backend_name()))
+    return url.render_as_string(hide_password=False)
+
+
+def pooled_engines(s) -> list[str]:
+    """Labels of the pooled engines one worker opens; the connection budget is split between them."""
+    engines = ["primary", "primary_async"]
+    if s.db_read_url:
+        engines += ["replica", "replica_async"]
+    if sync_url(s.async_database_url) != make_url(s.database_url).render_as_string(hide_password=False):
+        engines.append("sync_twin")  # buffered writes from async sessions get their own sync engine
+    return engines
+
+
+POOL_PLAN = plan_pool_size(settings, engines=len(pooled_engines(settings)))
+
+
+def _sync_engine_kwargs(url: str) -> dict:
+    connect_args: dict = {}
+    if url.startswith("sqlite"):
+        connect_args = {"check_same_thread": False}
+    elif url.startswith("mysql"):
+        connect_args = {
+            "connect_timeout": settings.db_connect_timeout,
+            "read_timeout": 30,
+            "write_timeout": 30,
+        }
+    kwargs: dict = {
+        "connect_args": connect_args,
+        "pool_pre_ping": True,
+        "pool_recycle": 3600,
     }
+    if not url.startswith("sqlite"):
+        from sqlalchemy.pool import QueuePool
+
+        kwargs["poolclass"] = timed_pool_class(QueuePool)
+        kwargs["pool_size"] = POOL_PLAN["pool_size"]
+        kwargs["max_overflow"] = POOL_PLAN["max_overflow"]
+    return kwargs
+
 
-_engine_kwargs: dict = {
-    "connect_args": connect_args,
-    "pool_pre_ping": True,
-    "pool_recycle": 3600,
-}
-if not _is_sqlite:
-    _engine_kwargs["pool_size"] = settings.db_pool_size
-    _engine_kwargs["max_overflow"] = settings.db_max_overflow
+def _async_engine_kwargs(url: str) -> dict:
+    kwargs: dict = {
+        "connect_args": {"check_same_thread": False} if url.startswith("sqlite") else {},
+        "pool_pre_ping": True,
+        "pool_recycle": 3600,
+    }
+    if not url.startswith("sqlite"):
+        from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-engine = create_engine(settings.database_url, **_engine_kwargs)
+        kwargs["poolclass"] = timed_pool_class(AsyncAdaptedQueuePool)
+        kwargs["pool_size"] = POOL_PLAN["pool_size"]
+        kwargs["max_overflow"] = POOL_PLAN["max_overflow"]
+    return kwargs
+
+
+def _make_read_only(sync_engine) -> None:
+    """Replica connections refuse writes, so a mis-routed write fails loudly instead of diverging."""
+    statement = (
+        "PRAGMA query_only = ON"
+        if sync_engine.dialect.name == "sqlite"
+        else "SET SESSION TRANSACTION READ ONLY"
+    )
+
+    @event.listens_for(sync_engine, "connect")
+    def _read_only(dbapi_connection, _record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(statement)
+        finally:
+            cursor.close()
+
+
+engine = create_engine(settings.database_url, **_sync_engine_kwargs(settings.database_url))
+instrument_engine(engine, "primary")
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 
+# DB_READ_URL: read-only replica for heavy reads (admin, analytics, search, export, EXPLAIN).
+if settings.db_read_url:
+    read_engine = create_engine(settings.db_read_url, **_sync_engine_kwargs(settings.db_read_url))
+    _make_read_only(read_engine)
+    instrument_engine(read_engine, "replica")
+else:
+    read_engine = engine
+ReadSessionLocal = sessionmaker(bind=read_engine, autocommit=False, autoflush=False)
+
 _async_engine = None
 _AsyncSessionLocal = None
+_async_read_engine = None
+_AsyncReadSessionLocal = None
 
 
-def _ensure_async_engine():
-    """Lazy async engine so sync-only deploys can import app before async deps are installed."""
-    global _async_engine, _AsyncSessionLocal
-    if _AsyncSessionLocal is not None:
-        return _AsyncSessionLocal
-    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+def _async_session_factory(bind):
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-    async_connect_args: dict = {}
-    if settings.async_database_url.startswith("sqlite"):
-        async_connect_args = {"check_same_thread": False}
-    async_kwargs: dict = {
-        "connect_args": async_connect_args,
-        "pool_pre_ping": True,
-        "pool_recycle": 3600,
-    }
-    if not settings.async_database_url.startswith("sqlite"):
-        async_kwargs["pool_size"] = settings.db_pool_size
-        async_kwargs["max_overflow"] = settings.db_max_overflow
-    _async_engine = create_async_engine(settings.async_database_url, **async_kwargs)
-    _AsyncSessionLocal = async_sessionmaker(
-        bind=_async_engine,
+    return async_sessionmaker(
+        bind=bind,
         class_=AsyncSession,
         expire_on_commit=False,
         autocommit=False,
         autoflush=False,
     )
+
+
+def _ensure_async_engine():
+    """Lazy async engine so sync-only deploys can import app before async deps are installed."""
+    global _async_engine, _AsyncSessionLocal
+    if _AsyncSessionLocal is not None:
+        return _AsyncSessionLocal
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = settings.async_database_url
+    _async_engine = create_async_engine(url, **_async_engine_kwargs(url))
+    instrument_engine(_async_engine.sync_engine, "primary_async")
+    _AsyncSessionLocal = _async_session_factory(_async_engine)
     return _AsyncSessionLocal
 
 
+def _ensure_async_read_engine():
+    """Lazy async replica engine; the primary factory when DB_READ_URL is unset."""
+    global _async_read_engine, _AsyncReadSessionLocal
+    if not settings.db_read_url:
+        return _ensure_async_engine()
+    if _AsyncReadSessionLocal is not None:
+        return _AsyncReadSessionLocal
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = settings.async_read_database_url
+    _async_read_engine = create_async_engine(url, **_async_engine_kwargs(url))
+    _make_read_only(_async_read_engine.sync_engine)
+    instrument_engine(_async_read_engine.sync_engine, "replica_async")
+    _AsyncReadSessionLocal = _async_session_factory(_async_read_engine)
+    return _AsyncReadSessionLocal
+
+
+# Read-your-writes: a successful unsafe request sets this cookie (expiry timestamp), and
+# replica-routed reads from that browser go to the primary until it lapses.
+PRIMARY_PIN_COOKIE = "db_primary_until"
+_UNSAFE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+
+def primary_pinned(request) -> bool:
+    try:
+        return float(request.cookies.get(PRIMARY_PIN_COOKIE) or 0) > time.time()
+    except ValueError:
+        return False
+
+
+def pin_primary_after_write(request, response) -> None:
+    """Called by middleware on every response: pin this browser to the primary after a write."""
+    if not settings.db_read_url or request.method not in _UNSAFE_METHODS or response.status_code >= 400:
+        return
+    ttl = max(1, settings.db_read_after_write_sec)
+    same_site = settings.session_same_site if settings.session_same_site in ("lax", "strict", "none") else "lax"
+    response.set_cookie(
+        PRIMARY_PIN_COOKIE,
+        str(int(time.time()) + ttl),
+        max_age=ttl,
+        httponly=True,
+        samesite=same_site,  # same as the session cookie, so Telegram WebView sends it too
+        secure=settings.site_url.startswith("https://") or same_site == "none",
+    )
+
+
+def read_session_factory(request=None):
+    """Async factory for read-only work: the replica, unless unset or the request is pinned."""
+    if request is not None and primary_pinned(request):
+        return _ensure_async_engine()
+    return _ensure_async_read_engine()
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -85,3 +208,12 @@ async def get_async_db() -> AsyncGenerator:
             yield session
         finally:
             await session.close()
+
+
+async def get_async_read_db(request: Request) -> AsyncGenerator:
+    """Read-only routes (admin lists, analytics, search, export, CRM dashboards). Never write through it."""
+    async with read_session_factory(request)() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
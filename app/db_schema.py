@@ -104,6 +104,14 @@ def _schema_migration_lock(*, wait_seconds: int = _SCHEMA_LOCK_WAIT_SEC):
         conn.close()
 
 
+# Derived table so MySQL accepts a subquery on the table being deleted from.
+_DEDUPE_USER_ACTIVITY_SQL = (
+    "DELETE FROM platform_user_activity WHERE id NOT IN ("
+    "SELECT id FROM (SELECT MIN(id) AS id FROM platform_user_activity "
+    "GROUP BY user_id, activity_date) AS keep_rows)"
+)
+
+
 def _add_column(table: str, column: str, ddl: str) -> None:
     if not _table_exists(table):
         return
@@ -150,6 +158,21 @@ def _add_index(table: str, index_name: str, column: str) -> None:
         logger.exception("Could not create index %s", index_name)
 
 
+def _add_fulltext_index(table: str, index_name: str, column: str) -> None:
+    """MySQL only: FULLTEXT with the ngram parser (CJK/Cyrillic substrings); idempotent."""
+    if engine.dialect.name != "mysql" or not _table_exists(table):
+        return
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {table} ADD FULLTEXT INDEX {index_name} ({column}) WITH PARSER ngram"))
+        logger.info("Created fulltext index %s", index_name)
+    except Exception as exc:
+        msg = str(exc).lower()
+        if "duplicate" in msg or "exists" in msg or "already" in msg:
+            return
+        logger.exception("Could not create fulltext index %s", index_name)
+
+
 def _apply_hot_path_indexes() -> None:
     """Phase E: additive indexes for booking/slots/auth hot paths (idempotent)."""
     # Already in alembic 001; keep here for deploys that only run db_schema patches.
@@ -174,6 +197,22 @@ def _apply_hot_path_indexes() -> None:
         "ix_client_cards_consultant_id",
         "consultant_id",
     )
+    # Bookings hub keyset pages: ORDER BY (booking_date, booking_time, id) per calendar.
+    _add_index("bookings", "ix_bookings_calendar_date_time", "calendar_id, booking_date, booking_time, id")
+    # Booking sweeper: UPDATE ... WHERE status='confirmed' AND booking_date <= today.
+    _add_index("bookings", "ix_bookings_status_date_end", "status, booking_date, booking_end_time")
+    # CRM aggregates: per-card refresh by client_card_id; server-side list sorts per consultant.
+    _add_index("bookings", "ix_bookings_client_card_id", "client_card_id")
+    _add_index("consultant_client_cards", "ix_client_cards_consultant_updated", "consultant_id, updated_at")
+    _add_index("consultant_client_cards", "ix_client_cards_consultant_created", "consultant_id, created_at")
+    _add_index("consultant_client_cards", "ix_client_cards_consultant_last_booking", "consultant_id, last_booking_date")
+    # find_or_create_client_card: equality probes on normalized contact keys.
+    _add_index("consultant_client_cards", "ix_client_cards_consultant_phone_key", "consultant_id, phone_key")
+    _add_index("consultant_client_cards", "ix_client_cards_consultant_email_key", "consultant_id, email_key")
+    _add_index("consultant_client_cards", "ix_client_cards_consultant_telegram_key", "consultant_id, telegram_key")
+    # analytics_rollup: covering distinct-user range counts and bookings-created per day.
+    _add_index("platform_user_activity", "ix_platform_user_activity_date_user", "activity_date, user_id")
+    _add_index("bookings", "ix_bookings_created_at", "created_at")
 
 
 def _refresh_schema_health() -> None:
@@ -236,6 +275,80 @@ def _apply_app_schema_patches() -> None:
     except Exception:
         logger.exception("consultant_client_cards.client_user_id patch failed")
 
+    # CRM aggregates (denormalized per-card booking stats + per-consultant counters)
+    try:
+        _add_column("consultant_client_cards", "booking_count", "INTEGER NOT NULL DEFAULT 0")
+        _add_column("consultant_client_cards", "last_booking_date", "DATE NULL")
+        _add_column("consultant_client_cards", "next_booking_date", "DATE NULL")
+        from app.models import ConsultantCrmCounter
+
+        Base.metadata.create_all(bind=engine, tables=[ConsultantCrmCounter.__table__])
+    except Exception:
+        logger.exception("consultant_client_cards CRM aggregates patch failed")
+
+    # Normalized contact keys (backfill: python -m app.commands.client_contact_keys)
+    try:
+        _add_column("consultant_client_cards", "phone_key", "VARCHAR(30) NULL")
+        _add_column("consultant_client_cards", "email_key", "VARCHAR(254) NULL")
+        _add_column("consultant_client_cards", "telegram_key", "VARCHAR(255) NULL")
+    except Exception:
+        logger.exception("consultant_client_cards contact keys patch failed")
+
+    # Admin Ctrl+K search index (SQLite FTS5 mirror is created by the table's DDL hooks).
+    # Populate with: python -m app.commands.admin_search_index
+    try:
+        from app.models import AdminSearchDocument
+
+        Base.metadata.create_all(bind=engine, tables=[AdminSearchDocument.__table__])
+        _add_fulltext_index("admin_search_documents", "ft_admin_search_body", "body")
+    except Exception:
+        logger.exception("admin search index patch failed")
+
+    # Buffered activity upserts need one row per (user, day): drop racing duplicates first.
+    try:
+        if _table_exists("platform_user_activity"):
+            with engine.begin() as conn:
+                conn.execute(text(_DEDUPE_USER_ACTIVITY_SQL))
+        _add_unique_index(
+            "platform_user_activity", "uq_platform_user_activity_user_day", "user_id, activity_date"
+        )
+    except Exception:
+        logger.exception("platform_user_activity unique patch failed")
+
+    # Per-day booking locks (bookings serialize on (calendar_id, booking_date), not the calendar row).
+    try:
+        from app.models import BookingDayLock
+
+        Base.metadata.create_all(bind=engine, tables=[BookingDayLock.__table__])
+    except Exception:
+        logger.exception("booking_day_locks patch failed")
+
+    # Stored responses for Idempotency-Key booking POSTs (expired rows pruned by housekeeping).
+    try:
+        from app.models import IdempotencyKey
+
+        Base.metadata.create_all(bind=engine, tables=[IdempotencyKey.__table__])
+    except Exception:
+        logger.exception("idempotency_keys patch failed")
+
+    # Server-side session data (SESSION_BACKEND=db / auto without Redis); expired rows pruned by housekeeping.
+    try:
+        from app.models import WebSession
+
+        Base.metadata.create_all(bind=engine, tables=[WebSession.__table__])
+    except Exception:
+        logger.exception("web_sessions patch failed")
+
+    # Admin analytics daily rollups. Backfill with: python -m app.commands.analytics_rollup --backfill
+    try:
+        from app.models import PlatformDailyRollup, PlatformSpecialistDaily
+
+        Base.metadata.create_all(
+            bind=engine, tables=[PlatformDailyRollup.__table__, PlatformSpecialistDaily.__table__]
+        )
+    except Exception:
+        logger.exception("analytics rollup tables patch failed")
+
     # Admin A0 / Phase 10
     try:
         _add_column("auth_user", "notify_broadcast", "BOOLEAN NOT NULL DEFAULT 0")
@@ -247,6 +360,13 @@ def _apply_app_schema_patches() -> None:
     except Exception:
         logger.exception("auth_user.session_version patch failed")
 
+    # Profile ETag: edit timestamps on the rows the profile payload reads (NULL until first edit).
+    for table in ("auth_user", "account_emailaddress", "socialaccount_socialaccount", "consultant_menu_category"):
+        try:
+            _add_column(table, "updated_at", "DATETIME NULL")
+        except Exception:
+            logger.exception("%s.updated_at patch failed", table)
+
     try:
         _add_column("bookings", "vk_user_id", "BIGINT NULL")
         _add_index("bookings", "ix_bookings_vk_user_id", "vk_user_id")
@@ -51,8 +51,14 @@ def require_specialist_mode(request: Request, db: Session, user: AuthUser) -> Co
 
 async def require_specialist_mode_async(request: Request, db, user: AuthUser) -> Consultant:
     from app.services.active_mode import MODE_SPECIALIST, get_active_mode_async
+    from app.services.auth_snapshot import request_auth_snapshot
 
-    consultant = await get_consultant_async(db, user)
+    snap = request_auth_snapshot(request, user.id)
+    if snap is not None and snap["consultant_id"] is None:
+        raise HTTPException(status_code=302, headers={"Location": "/become-specialist/"})
+    consultant = await db.get(Consultant, snap["consultant_id"]) if snap is not None else None
+    if consultant is None:
+        consultant = await get_consultant_async(db, user)
     mode = await get_active_mode_async(request, db, user.id, has_consultant=True)
     if mode != MODE_SPECIALIST:
         raise HTTPException(status_code=302, headers={"Location": "/dashboard/?need_mode=specialist"})
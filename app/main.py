@@ -6,6 +6,7 @@ from fastapi.staticfiles import StaticFiles
 from starlette.middleware.sessions import SessionMiddleware
 from starlette.middleware.trustedhost import TrustedHostMiddleware
 
+from app.auth.session_store import ServerSessionMiddleware
 from app.config import get_settings
 from app.database import engine
 from app.routers import (
@@ -21,6 +22,8 @@ from app.routers import (
     telegram_webhook,
 )
 from app.security.hardening import AbuseProtectionMiddleware
+from app.services.platform_backup import move_legacy_backups
+from app.services.static_assets import is_fingerprinted, make_static_app
 
 settings = get_settings()
 logging.basicConfig(level=logging.DEBUG if settings.debug else logging.INFO)
@@ -38,14 +41,18 @@ _session_same_site = settings.session_same_site if settings.session_same_site in
 _https_only = settings.site_url.startswith("https://") or _session_same_site == "none"
 
 # add_middleware: last added = outermost on the request path.
-app.add_middleware(
-    SessionMiddleware,
+_session_options = dict(
     secret_key=settings.secret_key,
     session_cookie=settings.session_cookie,
     max_age=settings.session_max_age,
     https_only=_https_only,
     same_site=_session_same_site,
 )
+if settings.session_backend == "cookie":
+    app.add_middleware(SessionMiddleware, **_session_options)
+else:
+    # Cookie holds only a signed session id; data in Redis or web_sessions (accepts legacy cookies).
+    app.add_middleware(ServerSessionMiddleware, **_session_options)
 app.add_middleware(AbuseProtectionMiddleware)
 if not settings.debug and settings.allowed_hosts:
     # Protect Host-header attacks in production; keep localhost for health probes.
@@ -53,7 +60,9 @@ if not settings.debug and settings.allowed_hosts:
     app.add_middleware(TrustedHostMiddleware, allowed_hosts=_hosts)
 
 settings.media_root.mkdir(parents=True, exist_ok=True)
-app.mount("/static", StaticFiles(directory=str(settings.static_dir)), name="static")
+# DB backups used to sit under media/; nothing private may stay in the public mount.
+move_legacy_backups(settings)
+app.mount("/static", make_static_app(), name="static")
 app.mount("/media", StaticFiles(directory=str(settings.media_root)), name="media")
 
 app.include_router(pages.router)
@@ -126,26 +135,92 @@ async def cron_send_reminders(request: Request):
     if not _internal_secret_ok(request):
         return JSONResponse({"ok": False, "error": "forbidden"}, status_code=403)
 
+    completed = None
+    try:
+        from app.database import _ensure_async_engine
+        from app.services.booking_sweeper import sweep_completed_bookings_async
+
+        async with _ensure_async_engine()() as db:
+            completed = await sweep_completed_bookings_async(db)
+    except Exception:
+        logger.exception("cron booking sweep failed")
+
     try:
         from app.services.telegram import send_reminders_async
 
         sent = await send_reminders_async()
-        return {"ok": True, "sent": sent}
+        return {"ok": True, "sent": sent, "completed": completed}
     except Exception as exc:
         logger.exception("cron reminders failed")
         return JSONResponse({"ok": False, "error": str(exc)}, status_code=500)
 
 
+@app.get("/internal/cron/sweep-bookings/")
+@app.post("/internal/cron/sweep-bookings/")
+async def cron_sweep_bookings(request: Request):
+    """Mark ended confirmed bookings completed; `?calendar_id=` sweeps one calendar on demand."""
+    from fastapi.responses import JSONResponse
+
+    from app.database import _ensure_async_engine
+    from app.services.booking_sweeper import sweep_completed_bookings_async
+
+    if not _internal_secret_ok(request):
+        return JSONResponse({"ok": False, "error": "forbidden"}, status_code=403)
+    raw = (request.query_params.get("calendar_id") or "").strip()
+    if raw and not raw.isdigit():
+        return JSONResponse({"ok": False, "error": "bad calendar_id"}, status_code=400)
+    async with _ensure_async_engine()() as db:
+        completed = await sweep_completed_bookings_async(db, calendar_id=int(raw) if raw else None)
+    return {"ok": True, "completed": completed}
+
+
+@app.get("/internal/cron/housekeeping/")
+@app.post("/internal/cron/housekeeping/")
+async def cron_housekeeping(request: Request):
+    """Run the registered expiry prunes (app.services.housekeeping)."""
+    from fastapi.responses import JSONResponse
+
+    from app.database import _ensure_async_engine
+    from app.services.housekeeping import prune_expired_async
+
+    if not _internal_secret_ok(request):
+        return JSONResponse({"ok": False, "error": "forbidden"}, status_code=403)
+    async with _ensure_async_engine()() as db:
+        report = await prune_expired_async(db)
+    return {"ok": True, **report}
+
+
+@app.get("/internal/cron/analytics-rollup/")
+@app.post("/internal/cron/analytics-rollup/")
+async def cron_analytics_rollup(request: Request):
+    """Re-roll the trailing admin analytics days; `?days=` widens the window (max 90)."""
+    from fastapi.responses import JSONResponse
+
+    from app.database import _ensure_async_engine
+    from app.services.analytics_rollup import ROLLUP_REFRESH_DAYS, run_rollups
+
+    if not _internal_secret_ok(request):
+        return JSONResponse({"ok": False, "error": "forbidden"}, status_code=403)
+    raw = (request.query_params.get("days") or "").strip()
+    if raw and not (raw.isdigit() and 1 <= int(raw) <= 90):
+        return JSONResponse({"ok": False, "error": "bad days"}, status_code=400)
+    days = int(raw) if raw else ROLLUP_REFRESH_DAYS
+    async with _ensure_async_engine()() as db:
+        report = await db.run_sync(lambda session: run_rollups(session, refresh_days=days))
+    return {"ok": True, **report}
+
+
 @app.get("/internal/metrics/")
 async def internal_metrics(request: Request):
-    """Process request latency snapshot. Auth: CRON_SECRET or BOT_API_SECRET."""
+    """Process request latency and DB pool snapshot. Auth: CRON_SECRET or BOT_API_SECRET."""
     from fastapi.responses import JSONResponse
 
     from app.services.perf_metrics import snapshot as perf_snapshot
+    from app.services.pool_metrics import pool_snapshot
 
     if not _internal_secret_ok(request):
         return JSONResponse({"ok": False, "error": "forbidden"}, status_code=403)
-    return {"ok": True, "perf": perf_snapshot(top_n=25)}
+    return {"ok": True, "perf": perf_snapshot(top_n=25), "db_pool": pool_snapshot()}
 
 
 @app.get("/internal/explain/")
@@ -153,12 +228,12 @@ async def internal_explain(request: Request):
     """EXPLAIN hot queries (Phase E acceptance). Auth: CRON_SECRET or BOT_API_SECRET."""
     from fastapi.responses import JSONResponse
 
-    from app.database import SessionLocal
+    from app.database import ReadSessionLocal
     from app.services.query_explain import explain_hot_queries, list_expected_indexes
 
     if not _internal_secret_ok(request):
         return JSONResponse({"ok": False, "error": "forbidden"}, status_code=403)
-    db = SessionLocal()
+    db = ReadSessionLocal()
     try:
         return {
             "ok": True,
@@ -177,6 +252,13 @@ async def startup():
         ensure_all_schema()
     except Exception:
         logger.exception("ensure_all_schema failed on startup")
+    from app.database import POOL_PLAN
+
+    logger.info(
+        "db pool: %s+%s per engine, up to %s connections for %s worker(s) (%s)",
+        POOL_PLAN["pool_size"], POOL_PLAN["max_overflow"], POOL_PLAN["max_connections"],
+        POOL_PLAN["workers"], POOL_PLAN["source"],
+    )
     if not settings.debug:
         if settings.secret_key in ("", "change-me-in-production"):
             logger.critical("SECRET_KEY is weak or default — set a long random value in production")
@@ -198,6 +280,16 @@ async def startup():
     logger.info("FastAPI app started. SITE_URL=%s", settings.site_url)
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    from app.services.write_buffer import WRITE_BUFFER
+
+    try:
+        WRITE_BUFFER.flush()
+    except Exception:
+        logger.exception("write buffer flush failed on shutdown")
+
+
 from app.db_schema import bootstrap_on_import
 
 bootstrap_on_import()
@@ -237,13 +329,24 @@ async def perf_timing_middleware(request: Request, call_next):
     return response
 
 
+@app.middleware("http")
+async def read_after_write_middleware(request: Request, call_next):
+    """DB_READ_URL: after a successful write, keep this browser's reads on the primary for a while."""
+    from app.database import pin_primary_after_write
+
+    response = await call_next(request)
+    pin_primary_after_write(request, response)
+    return response
+
+
 @app.middleware("http")
 async def static_cache_middleware(request: Request, call_next):
     response = await call_next(request)
     path = request.url.path
     if path.startswith("/static/"):
-        # Versioned assets (?v=) can be cached long-term; unversioned get 1 day.
-        if request.url.query and "v=" in request.url.query:
+        # Fingerprinted (name.<hash>.ext) and versioned (?v=) assets are immutable;
+        # unversioned get 1 day.
+        if is_fingerprinted(path) or (request.url.query and "v=" in request.url.query):
             response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
         else:
             response.headers.setdefault("Cache-Control", "public, max-age=86400")
@@ -1,12 +1,15 @@
-from app.models.auth import EmailAddress, EmailVerificationToken, NativeAuthHandoff, PasswordResetToken, SocialAccount, TelegramLoginRequest, TelegramUiPreference, User
+from app.models.auth import EmailAddress, EmailVerificationToken, NativeAuthHandoff, PasswordResetToken, SocialAccount, TelegramLoginRequest, TelegramUiPreference, User, WebSession
 from app.models.core import (
     AppCounter,
     Booking,
+    BookingDayLock,
     Calendar,
     Category,
     Client,
     ClientCard,
     Consultant,
+    ConsultantCrmCounter,
+    IdempotencyKey,
     Integration,
     IntegrationTelegramAudit,
     Service,
@@ -15,10 +18,13 @@ from app.models.core import (
 from app.models.platform import (
     AdminAuditLog,
     AdminRoleAssignment,
+    AdminSearchDocument,
     AdminTwoFactor,
     BillingPlan,
     EmailDeliveryLog,
+    PlatformDailyRollup,
     PlatformErrorLog,
+    PlatformSpecialistDaily,
     PlatformUserActivity,
     SupportTicket,
     SupportTicketMessage,
@@ -37,6 +43,7 @@ __all__ = [
     "TelegramLoginRequest",
     "NativeAuthHandoff",
     "TelegramUiPreference",
+    "WebSession",
     "Category",
     "Consultant",
     "Calendar",
@@ -44,17 +51,23 @@ __all__ = [
     "Service",
     "ClientCard",
     "Booking",
+    "BookingDayLock",
     "Integration",
+    "IdempotencyKey",
     "IntegrationTelegramAudit",
     "AppCounter",
+    "ConsultantCrmCounter",
     "Client",
     "AdminAuditLog",
     "AdminRoleAssignment",
+    "AdminSearchDocument",
     "AdminTwoFactor",
     "UserTwoFactor",
     "BillingPlan",
     "EmailDeliveryLog",
     "PlatformUserActivity",
+    "PlatformDailyRollup",
+    "PlatformSpecialistDaily",
     "SupportTicket",
     "SupportTicketMessage",
     "TelegramBroadcastJob",
@@ -1,7 +1,7 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, Text
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, Text, event
+from sqlalchemy.orm import Mapped, Session, mapped_column, relationship
 
 from app.database import Base
 
@@ -24,6 +24,10 @@ class User(Base):
     notify_broadcast: Mapped[bool] = mapped_column(Boolean, default=False)
     # Bump to invalidate all cookie sessions (Admin A7)
     session_version: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Profile ETag version (profile_hub.profile_version_stmt); NULL on rows not edited since it was added.
+    updated_at: Mapped[datetime | None] = mapped_column(
+        DateTime, nullable=True, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
 
     consultant = relationship("Consultant", back_populates="user", uselist=False)
     social_accounts = relationship("SocialAccount", back_populates="user")
@@ -42,6 +46,9 @@ class SocialAccount(Base):
     uid: Mapped[str] = mapped_column(String(191))
     user_id: Mapped[int] = mapped_column(ForeignKey("auth_user.id"))
     extra_data: Mapped[str] = mapped_column(Text, default="{}")
+    updated_at: Mapped[datetime | None] = mapped_column(
+        DateTime, nullable=True, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
 
     user = relationship("User", back_populates="social_accounts")
 
@@ -54,6 +61,9 @@ class EmailAddress(Base):
     verified: Mapped[bool] = mapped_column(Boolean, default=False)
     primary: Mapped[bool] = mapped_column("primary", Boolean, default=False)
     user_id: Mapped[int] = mapped_column(ForeignKey("auth_user.id"))
+    updated_at: Mapped[datetime | None] = mapped_column(
+        DateTime, nullable=True, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
 
 
 class EmailVerificationToken(Base):
@@ -125,3 +135,28 @@ class TelegramUiPreference(Base):
     chat_id: Mapped[str] = mapped_column(String(64), primary_key=True)
     mode: Mapped[str] = mapped_column(String(20), default="client")
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class WebSession(Base):
+    """Server-side session data (DB backend); the session cookie carries only the signed id."""
+
+    __tablename__ = "web_sessions"
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    data: Mapped[str] = mapped_column(Text, default="{}")
+    expires_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+@event.listens_for(Session, "after_flush")
+def _auth_snapshot_after_flush(session, flush_context) -> None:
+    from app.services.auth_snapshot import note_flushed_users
+
+    note_flushed_users(session)
+
+
+@event.listens_for(Session, "after_commit")
+def _auth_snapshot_after_commit(session) -> None:
+    from app.services.auth_snapshot import invalidate_committed_users
+
+    invalidate_committed_users(session)
@@ -12,8 +12,10 @@ from sqlalchemy import (
     String,
     Text,
     Time,
+    event,
 )
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.dialects.mysql import MEDIUMTEXT
+from sqlalchemy.orm import Mapped, Session, mapped_column, relationship
 
 from app.database import Base
 
@@ -23,6 +25,9 @@ class Category(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name_category: Mapped[str] = mapped_column(String(255), default="")
+    updated_at: Mapped[datetime | None] = mapped_column(
+        DateTime, nullable=True, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
 
 
 class Consultant(Base):
@@ -128,8 +133,16 @@ class ClientCard(Base):
     phone: Mapped[str | None] = mapped_column(String(30), nullable=True)
     telegram: Mapped[str | None] = mapped_column(String(255), nullable=True)
     notes: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Normalized contact keys for indexed matching (app.services.client_contacts)
+    phone_key: Mapped[str | None] = mapped_column(String(30), nullable=True)
+    email_key: Mapped[str | None] = mapped_column(String(254), nullable=True)
+    telegram_key: Mapped[str | None] = mapped_column(String(255), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # CRM aggregates maintained by booking writes (app.services.crm_aggregates)
+    booking_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    last_booking_date: Mapped[date | None] = mapped_column(Date, nullable=True)
+    next_booking_date: Mapped[date | None] = mapped_column(Date, nullable=True)
 
     consultant = relationship("Consultant", back_populates="client_cards")
     bookings = relationship("Booking", back_populates="client_card")
@@ -151,7 +164,7 @@ class IntegrationTelegramAudit(Base):
 
 
 class AppCounter(Base):
-    """Simple persistent counters (e.g. notify dedup hits)."""
+    """Simple persistent counters (e.g. notify dedup hits, landing totals)."""
 
     __tablename__ = "app_counters"
 
@@ -160,6 +173,19 @@ class AppCounter(Base):
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
+class ConsultantCrmCounter(Base):
+    """Per-consultant CRM dashboard counters, refreshed on client card writes."""
+
+    __tablename__ = "consultant_crm_counters"
+
+    consultant_id: Mapped[int] = mapped_column(ForeignKey("consultants.id"), primary_key=True)
+    cards_total: Mapped[int] = mapped_column(Integer, default=0)
+    completeness_sum: Mapped[int] = mapped_column(Integer, default=0)
+    last_card_created_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    last_card_updated_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class Booking(Base):
     __tablename__ = "bookings"
 
@@ -199,6 +225,32 @@ class Booking(Base):
     time_slot = relationship("TimeSlot")
 
 
+class BookingDayLock(Base):
+    """Per (calendar, day) lock row: booking writers serialize here instead of on the calendar."""
+
+    __tablename__ = "booking_day_locks"
+
+    calendar_id: Mapped[int] = mapped_column(ForeignKey("calendars.id"), primary_key=True)
+    booking_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class IdempotencyKey(Base):
+    """Stored response of a write request keyed by its Idempotency-Key (hashed with scope and actor)."""
+
+    __tablename__ = "idempotency_keys"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    scope: Mapped[str] = mapped_column(String(64))
+    status: Mapped[str] = mapped_column(String(16), default="pending")
+    response_status: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    response_media_type: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    response_body: Mapped[str | None] = mapped_column(Text().with_variant(MEDIUMTEXT(), "mysql"), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+
+
 class Integration(Base):
     __tablename__ = "integrations"
 
@@ -228,3 +280,25 @@ class Client(Base):
     number: Mapped[int] = mapped_column(Integer)
     telegram_nickname: Mapped[str] = mapped_column(String(255), default="")
     who_your_consultant_name_id: Mapped[int] = mapped_column(ForeignKey("consultants.id"))
+
+
+@event.listens_for(Session, "after_flush")
+def _landing_counters_after_flush(session, flush_context) -> None:
+    from app.services.landing_stats import note_counter_deltas
+
+    note_counter_deltas(session)
+
+
+@event.listens_for(Session, "after_commit")
+def _landing_counters_after_commit(session) -> None:
+    from app.services.landing_stats import buffer_committed_deltas
+
+    buffer_committed_deltas(session)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _landing_counters_after_transaction_end(session, transaction) -> None:
+    if transaction.parent is None:  # after_commit has already taken the committed deltas
+        from app.services.landing_stats import discard_deltas
+
+        discard_deltas(session)
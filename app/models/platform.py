@@ -3,8 +3,8 @@ from __future__ import annotations
 
 from datetime import date, datetime
 
-from sqlalchemy import Boolean, Date, DateTime, ForeignKey, Integer, String, Text
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import DDL, Boolean, Date, DateTime, ForeignKey, Integer, String, Text, UniqueConstraint, event
+from sqlalchemy.orm import Mapped, Session, mapped_column
 
 from app.database import Base
 
@@ -90,6 +90,8 @@ class PlatformUserActivity(Base):
     """One row per user per day for DAU/WAU (Admin A4)."""
 
     __tablename__ = "platform_user_activity"
+    # Upsert target for the buffered activity writer (app.services.write_buffer).
+    __table_args__ = (UniqueConstraint("user_id", "activity_date", name="uq_platform_user_activity_user_day"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(Integer, index=True)
@@ -98,6 +100,41 @@ class PlatformUserActivity(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
 
+class PlatformDailyRollup(Base):
+    """Per-day platform aggregates for admin analytics (Admin A4 rollups).
+
+    Filled by app.services.analytics_rollup; bookings_* by status count bookings
+    scheduled on ``day`` (booking_date), bookings_created by created_at.
+    """
+
+    __tablename__ = "platform_daily_rollups"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    active_users: Mapped[int] = mapped_column(Integer, default=0)
+    wau: Mapped[int] = mapped_column(Integer, default=0)
+    mau: Mapped[int] = mapped_column(Integer, default=0)
+    signups: Mapped[int] = mapped_column(Integer, default=0)
+    bookings_created: Mapped[int] = mapped_column(Integer, default=0)
+    bookings_scheduled: Mapped[int] = mapped_column(Integer, default=0)
+    bookings_pending: Mapped[int] = mapped_column(Integer, default=0)
+    bookings_confirmed: Mapped[int] = mapped_column(Integer, default=0)
+    bookings_completed: Mapped[int] = mapped_column(Integer, default=0)
+    bookings_cancelled: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class PlatformSpecialistDaily(Base):
+    """Per-day, per-specialist booking counts (by booking_date) for analytics rankings."""
+
+    __tablename__ = "platform_specialist_daily"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    consultant_id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    bookings: Mapped[int] = mapped_column(Integer, default=0)
+    completed: Mapped[int] = mapped_column(Integer, default=0)
+    cancelled: Mapped[int] = mapped_column(Integer, default=0)
+
+
 class SupportTicket(Base):
     """Support inbox (Admin A5+)."""
 
@@ -187,3 +224,60 @@ class UserSubscription(Base):
     started_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     ends_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class AdminSearchDocument(Base):
+    """Admin Ctrl+K search index row: one per user/specialist/client card/booking/ticket.
+
+    ``body`` carries the searchable text; MySQL indexes it with FULLTEXT (ngram),
+    SQLite mirrors it into the ``admin_search_fts`` FTS5 table via triggers.
+    """
+
+    __tablename__ = "admin_search_documents"
+    __table_args__ = (UniqueConstraint("entity_type", "entity_id", name="uq_admin_search_entity"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    entity_type: Mapped[str] = mapped_column(String(20))
+    entity_id: Mapped[int] = mapped_column(Integer)
+    title: Mapped[str] = mapped_column(String(255), default="")
+    subtitle: Mapped[str] = mapped_column(String(255), default="")
+    url: Mapped[str] = mapped_column(String(255), default="")
+    body: Mapped[str] = mapped_column(Text, default="")
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+# SQLite/dev: external-content FTS5 mirror of ``body``. MySQL gets a FULLTEXT ngram
+# index from db_schema / alembic 008 instead (parser availability varies by server).
+ADMIN_SEARCH_SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS admin_search_fts USING fts5("
+    "body, content='admin_search_documents', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS admin_search_fts_ai AFTER INSERT ON admin_search_documents BEGIN "
+    "INSERT INTO admin_search_fts(rowid, body) VALUES (new.id, new.body); END",
+    "CREATE TRIGGER IF NOT EXISTS admin_search_fts_ad AFTER DELETE ON admin_search_documents BEGIN "
+    "INSERT INTO admin_search_fts(admin_search_fts, rowid, body) VALUES ('delete', old.id, old.body); END",
+    "CREATE TRIGGER IF NOT EXISTS admin_search_fts_au AFTER UPDATE ON admin_search_documents BEGIN "
+    "INSERT INTO admin_search_fts(admin_search_fts, rowid, body) VALUES ('delete', old.id, old.body); "
+    "INSERT INTO admin_search_fts(rowid, body) VALUES (new.id, new.body); END",
+)
+for _ddl in ADMIN_SEARCH_SQLITE_DDL:
+    event.listen(AdminSearchDocument.__table__, "after_create", DDL(_ddl).execute_if(dialect="sqlite"))
+event.listen(
+    AdminSearchDocument.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS admin_search_fts").execute_if(dialect="sqlite"),
+)
+
+
+@event.listens_for(Session, "after_flush")
+def _admin_search_after_flush(session, flush_context) -> None:
+    from app.services.admin_search_index import note_flushed_objects
+
+    note_flushed_objects(session)
+
+
+@event.listens_for(Session, "after_commit")
+def _admin_search_after_commit(session) -> None:
+    from app.services.admin_search_index import reindex_committed_objects
+
+    reindex_committed_objects(session)
@@ -143,8 +143,17 @@ class CalendarSettingsBody(BaseModel):
 async def get_schedule(
     calendar_id: int, request: Request, db: AsyncSession = Depends(get_async_db)
 ):
+    from app.services.calendar_schedule import schedule_version_stmt
+    from app.services.response_cache import schedule_key, versioned_json
+
     _, calendar = await _require_calendar(request, db, calendar_id)
-    return JSONResponse(await _schedule_response(calendar, db))
+    return await versioned_json(
+        request,
+        db,
+        schedule_key(calendar.id),
+        schedule_version_stmt(calendar.id),
+        lambda: _schedule_response(calendar, db),
+    )
 
 
 @router.get("/calendars/{calendar_id}/day/{weekday}")
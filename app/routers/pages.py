@@ -16,7 +16,7 @@ from starlette.datastructures import UploadFile
 from app.auth.passwords import hash_password, verify_password
 from app.auth.session import logout_user
 from app.config import get_settings
-from app.database import get_async_db
+from app.database import get_async_db, get_async_read_db
 from app.deps import get_consultant, normalize_phone, normalize_url, require_specialist_mode, require_specialist_mode_async
 from app.models import (
     Booking,
@@ -177,18 +177,28 @@ def _login_redirect(request: Request) -> RedirectResponse:
     return RedirectResponse(login_url_with_next(request.url.path), status_code=302)
 
 
+async def _public_page(request: Request, template: str, context_builder, **extra):
+    """Marketing page: guests get the page cache (ETag/304); session users render fresh."""
+    from app.services.page_cache import page_key, serve_cached_page
+
+    async def render():
+        db, user = await _async_session_if_logged_in(request)
+        try:
+            return templates.TemplateResponse(
+                template,
+                await context_builder(request, db, user, **extra),
+            )
+        finally:
+            if db is not None:
+                await db.close()
+
+    return await serve_cached_page(request, page_key(request.url.path), render)
+
+
 @router.get("/")
 async def landing_page(request: Request):
     """Public landing: skip MySQL when guest (no session user) for faster TTFB."""
-    db, user = await _async_session_if_logged_in(request)
-    try:
-        return templates.TemplateResponse(
-            "landing/index.html",
-            await landing_context_async(request, db, user),
-        )
-    finally:
-        if db is not None:
-            await db.close()
+    return await _public_page(request, "landing/index.html", landing_context_async)
 
 
 @router.get("/tg/")
@@ -277,48 +287,37 @@ async def robots_txt():
 
 
 @router.get("/sitemap.xml")
-async def sitemap_xml():
-    base = settings.site_url.rstrip("/")
-    urls = ["/", "/guide/", "/apps/", "/privacy/", "/terms/", "/login/", "/register/", "/book/"]
-    body = [
-        '<?xml version="1.0" encoding="UTF-8"?>',
-        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
-    ]
-    for path in urls:
-        body.append(f"  <url><loc>{base}{path}</loc></url>")
-    body.append("</urlset>")
-    return Response("\n".join(body), media_type="application/xml")
+async def sitemap_xml(request: Request):
+    from app.services.page_cache import page_key, serve_cached_page
+
+    async def render():
+        base = settings.site_url.rstrip("/")
+        urls = ["/", "/guide/", "/apps/", "/privacy/", "/terms/", "/login/", "/register/", "/book/"]
+        body = [
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+        ]
+        for path in urls:
+            body.append(f"  <url><loc>{base}{path}</loc></url>")
+        body.append("</urlset>")
+        return Response("\n".join(body), media_type="application/xml")
+
+    return await serve_cached_page(request, page_key("/sitemap.xml"), render)
 
 
 @router.get("/guide/")
 async def guide_page(request: Request):
-    db, user = await _async_session_if_logged_in(request)
-    try:
-        return templates.TemplateResponse(
-            "landing/guide.html",
-            await guide_context_async(request, db, user),
-        )
-    finally:
-        if db is not None:
-            await db.close()
+    return await _public_page(request, "landing/guide.html", guide_context_async)
 
 
 @router.get("/apps/")
 async def apps_page(request: Request):
     """How to install / use on Android (RuStore soon) and iPhone (Mini App + PWA)."""
-    db, user = await _async_session_if_logged_in(request)
-    try:
-        return templates.TemplateResponse(
-            "landing/apps.html",
-            await apps_context_async(request, db, user),
-        )
-    finally:
-        if db is not None:
-            await db.close()
+    return await _public_page(request, "landing/apps.html", apps_context_async)
 
 
 @router.get("/dashboard/")
-async def dashboard_page(request: Request, db: AsyncSession = Depends(get_async_db)):
+async def dashboard_page(request: Request, db: AsyncSession = Depends(get_async_read_db)):
     user = await _require_user_async(request, db)
     if not user:
         return _login_redirect(request)
@@ -334,29 +333,23 @@ async def dashboard_page(request: Request, db: AsyncSession = Depends(get_async_
         need_mode_specialist=need_mode,
     )
     if has_c and mode == MODE_SPECIALIST:
-        from app.services.clients_crm import build_crm_payload_async
+        from app.services.clients_crm import (
+            crm_dashboard_async,
+            recent_activity,
+            recent_cards_async,
+            serialize_card,
+        )
 
         consultant = (
             await db.execute(select(Consultant).where(Consultant.user_id == user.id))
         ).scalar_one_or_none()
         if consultant:
-            cards = list(
-                (
-                    await db.execute(
-                        select(ClientCard)
-                        .where(ClientCard.consultant_id == consultant.id)
-                        .order_by(ClientCard.updated_at.desc(), ClientCard.id.desc())
-                    )
-                )
-                .scalars()
-                .all()
-            )
-            crm = await build_crm_payload_async(db, consultant.id, cards)
+            recent = await recent_cards_async(db, consultant.id)
             ctx.update(
                 {
-                    "dash_kpi": crm["dashboard"],
-                    "dash_recent_clients": crm["clients"][:8],
-                    "dash_activity": crm["activity"],
+                    "dash_kpi": await crm_dashboard_async(db, consultant.id),
+                    "dash_recent_clients": [serialize_card(c) for c in recent],
+                    "dash_activity": recent_activity(recent),
                 }
             )
         else:
@@ -455,35 +448,27 @@ async def legal_pages(request: Request):
         format_legal_sections,
     )
 
-    db, user = await _async_session_if_logged_in(request)
-    try:
-        template = "privacy.html" if request.url.path.startswith("/privacy") else "terms.html"
-        brand = settings.site_brand_name
-        site = settings.site_url.rstrip("/")
-        support = settings.support_email
-        telegram = (settings.admin_telegram_username or "").lstrip("@")
+    template = "privacy.html" if request.url.path.startswith("/privacy") else "terms.html"
+
+    async def legal_context(request, db, user):
         ctx = {
-            "brand": brand,
-            "site_url": site,
-            "support_email": support,
-            "telegram": telegram,
+            "brand": settings.site_brand_name,
+            "site_url": settings.site_url.rstrip("/"),
+            "support_email": settings.support_email,
+            "telegram": (settings.admin_telegram_username or "").lstrip("@"),
         }
-        return templates.TemplateResponse(
-            template,
-            await landing_context_async(
-                request,
-                db,
-                user,
-                legal_updated="23.07.2026",
-                privacy_intro=PRIVACY_INTRO.format(**ctx),
-                privacy_sections=format_legal_sections(PRIVACY_SECTIONS, **ctx),
-                terms_intro=TERMS_INTRO.format(**ctx),
-                terms_sections=format_legal_sections(TERMS_SECTIONS, **ctx),
-            ),
+        return await landing_context_async(
+            request,
+            db,
+            user,
+            legal_updated="23.07.2026",
+            privacy_intro=PRIVACY_INTRO.format(**ctx),
+            privacy_sections=format_legal_sections(PRIVACY_SECTIONS, **ctx),
+            terms_intro=TERMS_INTRO.format(**ctx),
+            terms_sections=format_legal_sections(TERMS_SECTIONS, **ctx),
         )
-    finally:
-        if db is not None:
-            await db.close()
+
+    return await _public_page(request, template, legal_context)
 
 
 @router.get("/register/")
@@ -1456,20 +1441,17 @@ async def available_slots(
 async def specialist_bookings(request: Request, db: AsyncSession = Depends(get_async_db)):
     from app.auth.session import get_current_user_async
     from app.deps import require_specialist_mode_async
-    from app.services.bookings import mark_past_bookings_completed_async
-    from app.services.bookings_hub import build_bookings_payload_async
+    from app.services.bookings_hub import STATUS_FILTERS, build_bookings_hub_async
     from sqlalchemy.orm import selectinload
 
     user = await get_current_user_async(request, db)
     if not user:
         return _login_redirect(request)
     consultant = await require_specialist_mode_async(request, db, user)
-    calendars = list(
-        (await db.execute(select(Calendar).where(Calendar.consultant_id == consultant.id))).scalars().all()
+    # Read-only: confirmed bookings are completed by the booking sweeper (cron), not here.
+    cal_ids = list(
+        (await db.execute(select(Calendar.id).where(Calendar.consultant_id == consultant.id))).scalars().all()
     )
-    cal_ids = [c.id for c in calendars]
-    if cal_ids:
-        await mark_past_bookings_completed_async(db, calendars)
     status_filter = request.query_params.get("status", "all")
     success = error = None
 
@@ -1491,23 +1473,14 @@ async def specialist_bookings(request: Request, db: AsyncSession = Depends(get_a
             if booking:
                 old_status = booking.status
                 action = form.get("action")
-                if action == "confirm":
-                    booking.status = "confirmed"
-                    await db.commit()
-                    from app.services.notify_bridge import schedule_status_changed
-
-                    schedule_status_changed(booking.id, old_status)
-                elif action == "cancel":
-                    booking.status = "cancelled"
-                    await db.commit()
+                new_status = {"confirm": "confirmed", "cancel": "cancelled", "complete": "completed"}.get(action)
+                if new_status:
+                    from app.services.crm_aggregates import refresh_card_aggregates_async
                     from app.services.notify_bridge import schedule_status_changed
 
-                    schedule_status_changed(booking.id, old_status)
-                elif action == "complete":
-                    booking.status = "completed"
+                    booking.status = new_status
+                    await refresh_card_aggregates_async(db, [booking.client_card_id])
                     await db.commit()
-                    from app.services.notify_bridge import schedule_status_changed
-
                     schedule_status_changed(booking.id, old_status)
                 elif action == "reschedule":
                     new_date = _parse_date(form.get("new_date"))
@@ -1522,8 +1495,6 @@ async def specialist_bookings(request: Request, db: AsyncSession = Depends(get_a
                             error = err
                         else:
                             success = "Запись перенесена"
-        if cal_ids:
-            await mark_past_bookings_completed_async(db, calendars)
 
     from zoneinfo import ZoneInfo
 
@@ -1531,66 +1502,9 @@ async def specialist_bookings(request: Request, db: AsyncSession = Depends(get_a
     now_dt = datetime.now(tz)
     today = now_dt.date()
     now = now_dt.time()
-    booking_opts = (selectinload(Booking.service), selectinload(Booking.calendar))
-    if not cal_ids:
-        upcoming = []
-        past = []
-    elif status_filter == "cancelled":
-        upcoming = list(
-            (
-                await db.execute(
-                    select(Booking)
-                    .options(*booking_opts)
-                    .where(Booking.calendar_id.in_(cal_ids), Booking.status == "cancelled")
-                    .order_by(Booking.booking_date.desc())
-                )
-            ).scalars().unique().all()
-        )
-        past = []
-    else:
-        upcoming = list(
-            (
-                await db.execute(
-                    select(Booking)
-                    .options(*booking_opts)
-                    .where(
-                        Booking.calendar_id.in_(cal_ids),
-                        Booking.status.in_(["pending", "confirmed"]),
-                        or_(
-                            Booking.booking_date > today,
-                            and_(Booking.booking_date == today, Booking.booking_time >= now),
-                            and_(Booking.status == "pending", Booking.booking_date >= today),
-                        ),
-                    )
-                    .order_by(Booking.booking_date, Booking.booking_time)
-                )
-            ).scalars().unique().all()
-        )
-        past = list(
-            (
-                await db.execute(
-                    select(Booking)
-                    .options(*booking_opts)
-                    .where(
-                        Booking.calendar_id.in_(cal_ids),
-                        or_(
-                            Booking.booking_date < today,
-                            and_(
-                                Booking.booking_date == today,
-                                Booking.booking_time < now,
-                                Booking.status != "pending",
-                            ),
-                        ),
-                    )
-                    .order_by(Booking.booking_date.desc())
-                )
-            ).scalars().unique().all()
-        )
-        if status_filter != "all":
-            upcoming = [b for b in upcoming if b.status == status_filter]
-            past = [b for b in past if b.status == status_filter]
-
-    hub_payload = await build_bookings_payload_async(db, cal_ids, upcoming, past, today, now)
+    if status_filter not in STATUS_FILTERS:
+        status_filter = "all"
+    hub_payload = await build_bookings_hub_async(db, cal_ids, today, now, status=status_filter)
 
     return templates.TemplateResponse(
         "booking.html",
@@ -1598,8 +1512,6 @@ async def specialist_bookings(request: Request, db: AsyncSession = Depends(get_a
             request,
             db,
             user,
-            upcoming_bookings=upcoming,
-            past_bookings=past,
             status_filter=status_filter,
             today=today,
             hub_dashboard=hub_payload["dashboard"],
@@ -1612,6 +1524,46 @@ async def specialist_bookings(request: Request, db: AsyncSession = Depends(get_a
         ),
     )
 
+@router.get("/api/booking/list/")
+async def bookings_list_page(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Next keyset page of the bookings hub ("Показать ещё"): rendered groups + cursor."""
+    from zoneinfo import ZoneInfo
+
+    from app.auth.session import get_current_user_async
+    from app.deps import require_specialist_mode_async
+    from app.security.csrf import ensure_csrf_token
+    from app.services.bookings_hub import (
+        SECTIONS,
+        STATUS_FILTERS,
+        bookings_page_groups,
+        fetch_bookings_page_async,
+    )
+
+    user = await get_current_user_async(request, db)
+    if not user:
+        return JSONResponse({"success": False, "error": "unauthorized"}, status_code=401)
+    consultant = await require_specialist_mode_async(request, db, user)
+    section = request.query_params.get("section", "upcoming")
+    status = request.query_params.get("status", "all")
+    if section not in SECTIONS or status not in STATUS_FILTERS:
+        return JSONResponse({"success": False, "error": "bad request"}, status_code=400)
+    cal_ids = list(
+        (await db.execute(select(Calendar.id).where(Calendar.consultant_id == consultant.id))).scalars().all()
+    )
+    now_dt = datetime.now(ZoneInfo(get_settings().timezone or "Europe/Moscow"))
+    today, now = now_dt.date(), now_dt.time()
+    bookings, next_cursor = await fetch_bookings_page_async(
+        db, cal_ids, section, today, now, status=status, after=request.query_params.get("after")
+    )
+    groups = bookings_page_groups(section, status, bookings, today, now)
+    html = templates.get_template("components/booking_day_groups.html").render(
+        groups=groups,
+        is_past=section == "past",
+        csrf_token=ensure_csrf_token(request),
+    )
+    return JSONResponse({"success": True, "groups": groups, "html": html, "next": next_cursor})
+
+
 @router.get("/api/booking/calendar-events/")
 async def calendar_events(request: Request, db: AsyncSession = Depends(get_async_db)):
     from app.auth.session import get_current_user_async
@@ -1649,39 +1601,60 @@ async def calendar_events(request: Request, db: AsyncSession = Depends(get_async
     )
     if not cal_ids:
         return {"success": True, "events": []}
-    bookings = list(
-        (
-            await db.execute(
-                select(Booking)
-                .options(selectinload(Booking.service))
-                .where(
-                    Booking.calendar_id.in_(cal_ids),
-                    Booking.booking_date >= start_date,
-                    Booking.booking_date <= end_date,
+    in_month = (
+        Booking.calendar_id.in_(cal_ids),
+        Booking.booking_date >= start_date,
+        Booking.booking_date <= end_date,
+    )
+    # Version = row count + newest updated_at (+ newest service edit for names/colors):
+    # one aggregate query decides 304 before loading any booking rows.
+    from app.services.page_cache import make_etag
+    from app.services.response_cache import conditional_json
+
+    services_stamp = (
+        select(func.max(Service.updated_at)).where(Service.consultant_id == consultant.id).scalar_subquery()
+    )
+    count, last_updated, services_updated = (
+        await db.execute(
+            select(func.count(Booking.id), func.max(Booking.updated_at), services_stamp).where(*in_month)
+        )
+    ).one()
+    etag = make_etag(
+        f"events:{consultant.id}:{year}-{month}:{count}:{last_updated}:{services_updated}".encode("utf-8")
+    )
+
+    async def build() -> dict:
+        bookings = list(
+            (
+                await db.execute(
+                    select(Booking)
+                    .options(selectinload(Booking.service))
+                    .where(*in_month)
+                    .order_by(Booking.booking_date, Booking.booking_time)
                 )
-                .order_by(Booking.booking_date, Booking.booking_time)
             )
+            .scalars()
+            .unique()
+            .all()
         )
-        .scalars()
-        .unique()
-        .all()
-    )
-    events = [
-        {
-            "id": b.id,
-            "date": b.booking_date.isoformat(),
-            "time": b.booking_time.strftime("%H:%M") if b.booking_time else "",
-            "end_time": b.booking_end_time.strftime("%H:%M") if b.booking_end_time else "",
-            "client_name": b.client_name or "",
-            "client_phone": b.client_phone or "",
-            "client_email": b.client_email or "",
-            "client_telegram": b.client_telegram or "",
-            "status": b.status,
-            "service": b.service.name if b.service else "",
-        }
-        for b in bookings
-    ]
-    return {"success": True, "events": events}
+        return {"success": True, "events": [_calendar_event(b) for b in bookings]}
+
+    return await conditional_json(request, etag, build)
+
+
+def _calendar_event(b: Booking) -> dict:
+    return {
+        "id": b.id,
+        "date": b.booking_date.isoformat(),
+        "time": b.booking_time.strftime("%H:%M") if b.booking_time else "",
+        "end_time": b.booking_end_time.strftime("%H:%M") if b.booking_end_time else "",
+        "client_name": b.client_name or "",
+        "client_phone": b.client_phone or "",
+        "client_email": b.client_email or "",
+        "client_telegram": b.client_telegram or "",
+        "status": b.status,
+        "service": b.service.name if b.service else "",
+    }
 
 
 @router.get("/profile/")
@@ -1850,7 +1823,7 @@ async def profile_page(request: Request, db: AsyncSession = Depends(get_async_db
         invalidate_profile(consultant.id, user.id)
         clear_header_cache(request)
     from app.services.public_client import ensure_public_slug_async, specialist_public_url
-    from app.services.profile_hub import build_profile_payload_async, completion_meta_async, completeness_async, dashboard_stats_async
+    from app.services.profile_hub import build_profile_payload_async
     from app.services.yandex_auth import yandex_oauth_configured
 
     slug = await ensure_public_slug_async(db, consultant)
@@ -1868,9 +1841,6 @@ async def profile_page(request: Request, db: AsyncSession = Depends(get_async_db
             )
         )
     ).scalar_one_or_none()
-    profile_completeness = await completeness_async(consultant, db, consultant.id)
-    profile_dashboard = await dashboard_stats_async(db, consultant.id)
-    profile_dashboard["completeness"] = profile_completeness["percent"]
     profile_initial_data = await build_profile_payload_async(
         db,
         consultant,
@@ -1881,6 +1851,8 @@ async def profile_page(request: Request, db: AsyncSession = Depends(get_async_db
         has_usable_password=user.has_usable_password,
         yandex_oauth_enabled=yandex_oauth_configured(),
     )
+    profile_completeness = profile_initial_data["completeness"]
+    profile_dashboard = profile_initial_data["dashboard"]
     profile_photo_url = profile_initial_data["profile"].get("photo_url")
     profile_initials = (
         (consultant.first_name or consultant.last_name or "?")[:1].upper()
@@ -1907,7 +1879,7 @@ async def profile_page(request: Request, db: AsyncSession = Depends(get_async_db
             has_usable_password=user.has_usable_password,
             profile_completeness=profile_completeness,
             profile_dashboard=profile_dashboard,
-            profile_completion_meta=await completion_meta_async(consultant, db, consultant.id),
+            profile_completion_meta=profile_initial_data["completion_meta"],
             profile_initial_data=profile_initial_data,
             profile_photo_url=profile_photo_url,
             profile_initials=profile_initials,
@@ -1931,16 +1903,20 @@ async def client_cards_list(request: Request, db: AsyncSession = Depends(get_asy
         if not _form_csrf_ok(request, form):
             error = "Ошибка безопасности. Обновите страницу и попробуйте снова."
         elif form.get("action") == "create":
-            db.add(
-                ClientCard(
-                    consultant_id=consultant.id,
-                    name=(form.get("name") or "").strip() or None,
-                    email=(form.get("email") or "").strip() or None,
-                    phone=(form.get("phone") or "").strip() or None,
-                    telegram=(form.get("telegram") or "").strip() or None,
-                    notes=(form.get("notes") or "").strip() or None,
-                )
+            from app.services.client_contacts import apply_contact_keys
+            from app.services.crm_aggregates import card_percent, record_card_change_async
+
+            card = ClientCard(
+                consultant_id=consultant.id,
+                name=(form.get("name") or "").strip() or None,
+                email=(form.get("email") or "").strip() or None,
+                phone=(form.get("phone") or "").strip() or None,
+                telegram=(form.get("telegram") or "").strip() or None,
+                notes=(form.get("notes") or "").strip() or None,
             )
+            apply_contact_keys(card)
+            db.add(card)
+            await record_card_change_async(db, consultant.id, "created", card_percent(card))
             await db.commit()
             success = "Карточка клиента создана."
         elif form.get("action") == "delete":
@@ -1960,20 +1936,9 @@ async def client_cards_list(request: Request, db: AsyncSession = Depends(get_asy
                 success, error = (msg, None) if ok else (None, msg)
             else:
                 error = "Карточка не найдена"
-    cards = list(
-        (
-            await db.execute(
-                select(ClientCard)
-                .where(ClientCard.consultant_id == consultant.id)
-                .order_by(ClientCard.updated_at.desc())
-            )
-        )
-        .scalars()
-        .all()
-    )
     from app.services.clients_crm import build_crm_payload_async
 
-    crm_payload = await build_crm_payload_async(db, consultant.id, cards)
+    crm_payload = await build_crm_payload_async(db, consultant.id)
     return templates.TemplateResponse(
         "client_cards_list.html",
         await page_context_async(
@@ -1981,7 +1946,6 @@ async def client_cards_list(request: Request, db: AsyncSession = Depends(get_asy
             db,
             user,
             consultant=consultant,
-            cards=cards,
             success=success,
             error=error,
             crm_dashboard=crm_payload["dashboard"],
@@ -1992,6 +1956,41 @@ async def client_cards_list(request: Request, db: AsyncSession = Depends(get_asy
     )
 
 
+@router.get("/api/clients/list/")
+async def client_cards_list_page(request: Request, db: AsyncSession = Depends(get_async_read_db)):
+    """CRM list page (filter / sort / search / "Показать ещё"): rendered cards + next page."""
+    from app.auth.session import get_current_user_async
+    from app.security.csrf import ensure_csrf_token
+    from app.services.clients_crm import FILTERS, SORTS, fetch_clients_page_async, serialize_card
+
+    user = await get_current_user_async(request, db)
+    if not user:
+        return JSONResponse({"success": False, "error": "unauthorized"}, status_code=401)
+    consultant = await require_specialist_mode_async(request, db, user)
+    sort = request.query_params.get("sort", "recent")
+    flt = request.query_params.get("filter", "all")
+    page = _form_int(request.query_params, "page", 1)
+    if sort not in SORTS or flt not in FILTERS or page < 1:
+        return JSONResponse({"success": False, "error": "bad request"}, status_code=400)
+    cards, has_more = await fetch_clients_page_async(
+        db, consultant.id, sort=sort, flt=flt, q=request.query_params.get("q", ""), page=page
+    )
+    clients = [serialize_card(c) for c in cards]
+    html = templates.get_template("components/client_cards.html").render(
+        clients=clients,
+        csrf_token=ensure_csrf_token(request),
+    )
+    return JSONResponse(
+        {
+            "success": True,
+            "clients": clients,
+            "html": html,
+            "page": page,
+            "next_page": page + 1 if has_more else None,
+        }
+    )
+
+
 @router.get("/clients/{card_id}/")
 @router.post("/clients/{card_id}/")
 async def client_card_detail(request: Request, card_id: int, db: AsyncSession = Depends(get_async_db)):
@@ -2052,6 +2051,10 @@ async def client_card_detail(request: Request, card_id: int, db: AsyncSession =
         if not _form_csrf_ok(request, form):
             error = "Ошибка безопасности. Обновите страницу и попробуйте снова."
         elif form.get("action") == "update":
+            from app.services.client_contacts import apply_contact_keys
+            from app.services.crm_aggregates import card_percent, record_card_change_async
+
+            before = card_percent(card)
             if "name" in form:
                 card.name = (form.get("name") or "").strip() or None
             if "email" in form:
@@ -2062,6 +2065,8 @@ async def client_card_detail(request: Request, card_id: int, db: AsyncSession =
                 card.telegram = (form.get("telegram") or "").strip() or None
             if "notes" in form:
                 card.notes = (form.get("notes") or "").strip() or None
+            apply_contact_keys(card)
+            await record_card_change_async(db, consultant.id, "updated", card_percent(card) - before)
             await db.commit()
             success = "Изменения сохранены."
         elif form.get("action") == "delete":
@@ -2100,11 +2105,10 @@ async def client_card_detail(request: Request, card_id: int, db: AsyncSession =
 
     from datetime import date as date_cls
 
-    from app.services.clients_crm import booking_stats_async, serialize_card
+    from app.services.clients_crm import serialize_card
 
-    stats = await booking_stats_async(db, consultant.id, [card.id])
-    crm_client = serialize_card(card, stats, date_cls.today())
     today = date_cls.today()
+    crm_client = serialize_card(card, today)
     upcoming_bookings = [
         b
         for b in history
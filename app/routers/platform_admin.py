@@ -8,7 +8,7 @@ from fastapi import APIRouter, Depends, Request
 from fastapi.responses import JSONResponse, RedirectResponse, Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_async_db
+from app.database import get_async_db, get_async_read_db
 from app.deps import require_platform_admin_async
 from app.models import TelegramBroadcastJob, User
 from app.models.core import Calendar
@@ -65,7 +65,7 @@ async def _ctx(request: Request, db, user, **extra):
 
 
 @router.get("/api/search/")
-async def admin_api_search(request: Request, db: AsyncSession = Depends(get_async_db)):
+async def admin_api_search(request: Request, db: AsyncSession = Depends(get_async_read_db)):
     user = await _admin(request, db)
     from app.services.platform_admin_search import admin_global_search_async
 
@@ -77,7 +77,7 @@ async def admin_api_search(request: Request, db: AsyncSession = Depends(get_asyn
 
 
 @router.get("/api/kpi/")
-async def admin_api_kpi(request: Request, db: AsyncSession = Depends(get_async_db)):
+async def admin_api_kpi(request: Request, db: AsyncSession = Depends(get_async_read_db)):
     await _admin(request, db, PERM_USERS_READ)
     from app.services.platform_admin_users import dashboard_kpi_async
 
@@ -85,14 +85,14 @@ async def admin_api_kpi(request: Request, db: AsyncSession = Depends(get_async_d
 
 
 @router.get("/api/kpi/stream/")
-async def admin_api_kpi_stream(request: Request, db: AsyncSession = Depends(get_async_db)):
+async def admin_api_kpi_stream(request: Request, db: AsyncSession = Depends(get_async_read_db)):
     await _admin(request, db, PERM_USERS_READ)
-    from app.database import _ensure_async_engine
+    from app.database import read_session_factory
     from app.services.platform_admin_users import dashboard_kpi_async
 
     async def generate():
         try:
-            factory = _ensure_async_engine()
+            factory = read_session_factory(request)
             while True:
                 if await request.is_disconnected():
                     break
@@ -111,7 +111,7 @@ async def admin_api_kpi_stream(request: Request, db: AsyncSession = Depends(get_
 
 
 @router.get("/")
-async def admin_dashboard(request: Request, db: AsyncSession = Depends(get_async_db)):
+async def admin_dashboard(request: Request, db: AsyncSession = Depends(get_async_read_db)):
     user = await _admin(request, db)
     home = await admin_home_url_async(db, user)
     if home != "/platform-admin/":
@@ -331,7 +331,7 @@ async def admin_telegram_job(request: Request, job_id: int, db: AsyncSession = D
 
 
 @router.get("/users/")
-async def admin_users(request: Request, db: AsyncSession = Depends(get_async_db)):
+async def admin_users(request: Request, db: AsyncSession = Depends(get_async_read_db)):
     user = await _admin(request, db, PERM_USERS_READ)
     from app.services.platform_admin_users import search_users
 
@@ -622,7 +622,7 @@ async def admin_errors(request: Request, db: AsyncSession = Depends(get_async_db
 
 
 @router.get("/specialists/")
-async def admin_specialists(request: Request, db: AsyncSession = Depends(get_async_db)):
+async def admin_specialists(request: Request, db: AsyncSession = Depends(get_async_read_db)):
     user = await _admin(request, db, PERM_USERS_READ)
     from app.services.platform_admin_domain import search_specialists_async
 
@@ -635,7 +635,7 @@ async def admin_specialists(request: Request, db: AsyncSession = Depends(get_asy
 
 
 @router.get("/specialists/{consultant_id}/")
-async def admin_specialist_detail(request: Request, consultant_id: int, db: AsyncSession = Depends(get_async_db)):
+async def admin_specialist_detail(request: Request, consultant_id: int, db: AsyncSession = Depends(get_async_read_db)):
     user = await _admin(request, db, PERM_USERS_READ)
     from app.config import get_settings
     from app.services.platform_admin_domain import specialist_admin_card_async
@@ -653,7 +653,7 @@ async def admin_specialist_detail(request: Request, consultant_id: int, db: Asyn
 
 
 @router.get("/clients/")
-async def admin_clients(request: Request, db: AsyncSession = Depends(get_async_db)):
+async def admin_clients(request: Request, db: AsyncSession = Depends(get_async_read_db)):
     user = await _admin(request, db, PERM_USERS_READ)
     from app.services.platform_admin_domain import search_platform_clients
 
@@ -666,7 +666,7 @@ async def admin_clients(request: Request, db: AsyncSession = Depends(get_async_d
 
 
 @router.get("/clients/user/{user_id}/")
-async def admin_client_user_detail(request: Request, user_id: int, db: AsyncSession = Depends(get_async_db)):
+async def admin_client_user_detail(request: Request, user_id: int, db: AsyncSession = Depends(get_async_read_db)):
     user = await _admin(request, db, PERM_USERS_READ)
     from app.services.platform_admin_domain import platform_client_detail_async
 
@@ -680,7 +680,7 @@ async def admin_client_user_detail(request: Request, user_id: int, db: AsyncSess
 
 
 @router.get("/clients/card/{card_id}/")
-async def admin_client_card_detail(request: Request, card_id: int, db: AsyncSession = Depends(get_async_db)):
+async def admin_client_card_detail(request: Request, card_id: int, db: AsyncSession = Depends(get_async_read_db)):
     user = await _admin(request, db, PERM_USERS_READ)
     from app.services.platform_admin_domain import platform_client_detail_async
 
@@ -783,7 +783,7 @@ async def admin_bookings_calendar(request: Request, db: AsyncSession = Depends(g
 
 
 @router.get("/calendars/{calendar_id}/week/")
-async def admin_calendar_week(request: Request, calendar_id: int, db: AsyncSession = Depends(get_async_db)):
+async def admin_calendar_week(request: Request, calendar_id: int, db: AsyncSession = Depends(get_async_read_db)):
     user = await _admin(request, db, PERM_USERS_READ)
     cal = await db.get(Calendar, calendar_id)
     if not cal:
@@ -1211,13 +1211,18 @@ async def admin_email(request: Request, db: AsyncSession = Depends(get_async_db)
 
 
 @router.get("/analytics/")
-async def admin_analytics(request: Request, db: AsyncSession = Depends(get_async_db)):
+async def admin_analytics(
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db),
+    write_db: AsyncSession = Depends(get_async_db),
+):
     user = await _admin(request, db, PERM_USERS_READ)
-    from app.services.platform_admin_analytics import analytics_snapshot
+    from app.services.platform_admin_analytics import analytics_range, analytics_snapshot_async
 
+    days = analytics_range(request.query_params.get("days"))
     return templates.TemplateResponse(
         "platform_admin/analytics.html",
-        await _ctx(request, db, user, nav="analytics", metrics=await analytics_snapshot_async(db)),
+        await _ctx(request, db, user, nav="analytics", metrics=await analytics_snapshot_async(db, days=days, write_db=write_db)),
     )
 
 
@@ -1242,7 +1247,7 @@ async def admin_settings(request: Request, db: AsyncSession = Depends(get_async_
 
 
 @router.get("/audit/")
-async def admin_audit(request: Request, db: AsyncSession = Depends(get_async_db)):
+async def admin_audit(request: Request, db: AsyncSession = Depends(get_async_read_db)):
     user = await _admin(request, db, PERM_AUDIT)
     from app.services.platform_admin_audit import audit_action_choices, list_admin_audit
 
@@ -1268,8 +1273,11 @@ async def admin_audit(request: Request, db: AsyncSession = Depends(get_async_db)
 @router.post("/ops/")
 async def admin_ops(request: Request, db: AsyncSession = Depends(get_async_db)):
     user = await _admin(request, db, PERM_OPS)
+    from pathlib import Path
+
     from app.config import get_settings
-    from app.services.platform_admin_ops import create_platform_backup, system_snapshot
+    from app.services.platform_admin_ops import system_snapshot_async
+    from app.services.platform_backup import backups_dir, is_backup_file, start_backup_job, verify_backup
 
     settings = get_settings()
     success = error = None
@@ -1282,7 +1290,7 @@ async def admin_ops(request: Request, db: AsyncSession = Depends(get_async_db)):
         else:
             action = (form.get("action") or "").strip()
             if action == "backup":
-                path, err = create_platform_backup(settings)
+                job, err = start_backup_job(settings)
                 if err:
                     error = err
                 else:
@@ -1291,11 +1299,21 @@ async def admin_ops(request: Request, db: AsyncSession = Depends(get_async_db)):
                         actor_user_id=user.id,
                         action="platform_backup",
                         entity="backup",
-                        entity_id=path,
+                        entity_id=job["id"],
                         request=request,
                     )
                     await db.commit()
-                    success = f"Backup создан: {path}"
+                    success = "Backup запущен, статус обновится на этой странице."
+            elif action == "verify_backup":
+                path = backups_dir(settings) / Path(form.get("name") or "").name
+                if not is_backup_file(path):
+                    error = "Файл backup не найден."
+                else:
+                    ok, message = await asyncio.to_thread(verify_backup, path)
+                    if ok:
+                        success = message
+                    else:
+                        error = message
             else:
                 error = "Неизвестное действие"
 
@@ -1306,8 +1324,43 @@ async def admin_ops(request: Request, db: AsyncSession = Depends(get_async_db)):
     )
 
 
+@router.get("/ops/backups/{name}")
+async def admin_backup_download(name: str, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Backups hold the whole DB: superuser only, never cached; the files live outside /media."""
+    user = await _admin(request, db, PERM_OPS)
+    if not user.is_superuser:
+        return JSONResponse({"ok": False, "error": "Backup только для superuser."}, status_code=403)
+    from pathlib import Path
+
+    from fastapi.responses import FileResponse
+
+    from app.services.platform_backup import backups_dir, is_backup_file
+
+    path = backups_dir() / Path(name).name
+    if not is_backup_file(path):
+        return JSONResponse({"ok": False, "error": "Файл backup не найден."}, status_code=404)
+    await write_admin_audit_async(
+        db,
+        actor_user_id=user.id,
+        action="platform_backup_download",
+        entity="backup",
+        entity_id=path.name,
+        request=request,
+    )
+    await db.commit()
+    return FileResponse(path, filename=path.name, headers={"Cache-Control": "no-store"})
+
+
+@router.get("/api/backup/")
+async def admin_api_backup_status(request: Request, db: AsyncSession = Depends(get_async_db)):
+    await _admin(request, db, PERM_OPS)
+    from app.services.platform_backup import read_backup_job
+
+    return JSONResponse({"job": read_backup_job()})
+
+
 @router.get("/support/")
-async def admin_support_list(request: Request, db: AsyncSession = Depends(get_async_db)):
+async def admin_support_list(request: Request, db: AsyncSession = Depends(get_async_read_db)):
     user = await _admin(request, db, PERM_SUPPORT)
     from app.services.platform_support import TICKET_STATUSES, TICKET_STATUS_LABELS, list_support_tickets_async
 
@@ -1493,27 +1546,45 @@ async def admin_billing(request: Request, db: AsyncSession = Depends(get_async_d
     )
 
 
-@router.get("/export/users.csv")
-async def admin_export_users(request: Request, db: AsyncSession = Depends(get_async_db)):
-    await _admin(request, db, PERM_USERS_READ)
-    from app.services.platform_admin_export import export_filename, export_users_csv
+@router.get("/export/")
+@router.get("/export/{name}")
+async def admin_export(request: Request, name: str = "", db: AsyncSession = Depends(get_async_read_db)):
+    """Streaming export: /export/users.csv, /export/bookings.ndjson or /export/?kind=&format=.
 
-    content = await export_users_csv_async(db)
-    return Response(
-        content=content,
-        media_type="text/csv; charset=utf-8",
-        headers={"Content-Disposition": f'attachment; filename="{export_filename("users")}"'},
+    Filters: ?date_from=&date_to=YYYY-MM-DD, ?status=a,b; ?gzip=1 downloads a .gz file.
+    """
+    await _admin(request, db, PERM_USERS_READ)
+    from app.database import read_session_factory
+    from app.services.platform_admin_export import (
+        FORMATS,
+        encode_stream_async,
+        export_filename,
+        export_options,
+        iter_export_async,
     )
 
+    params = dict(request.query_params)
+    kind = params.get("kind") or ""
+    if name:
+        kind, _, ext = name.partition(".")
+        params["format"] = ext or params.get("format") or "csv"
+    opts, error = export_options(kind, params)
+    if error:
+        return JSONResponse({"ok": False, "error": error}, status_code=400)
 
-@router.get("/export/bookings.csv")
-async def admin_export_bookings(request: Request, db: AsyncSession = Depends(get_async_db)):
-    await _admin(request, db, PERM_USERS_READ)
-    from app.services.platform_admin_export import export_filename, export_bookings_csv
+    async def generate():
+        # Own session: the request-scoped one is closed once the response starts streaming.
+        async with read_session_factory(request)() as session:
+            async for chunk in iter_export_async(session, opts["kind"], fmt=opts["fmt"], **opts["filters"]):
+                yield chunk
 
-    content = await export_bookings_csv_async(db)
-    return Response(
-        content=content,
-        media_type="text/csv; charset=utf-8",
-        headers={"Content-Disposition": f'attachment; filename="{export_filename("bookings")}"'},
+    filename = export_filename(opts["kind"], opts["fmt"], gzip=opts["gzip"])
+    return StreamingResponse(
+        encode_stream_async(generate(), gzip=opts["gzip"]),
+        media_type="application/gzip" if opts["gzip"] else FORMATS[opts["fmt"]],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Cache-Control": "no-store",
+            "X-Accel-Buffering": "no",
+        },
     )
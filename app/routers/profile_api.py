@@ -17,9 +17,18 @@ from app.database import get_async_db
 from app.deps import get_consultant_async, normalize_url, require_specialist_mode_async
 from app.models import EmailAddress, SocialAccount
 from app.security.csrf import validate_csrf_token
-from app.services.profile_hub import apply_profile_fields, build_profile_payload_async
+from app.services.profile_hub import (
+    apply_profile_fields,
+    build_profile_payload_async,
+    build_profile_preview_async,
+    profile_version_stmt,
+)
 from app.services.public_client import ensure_public_slug_async
-from app.services.response_cache import invalidate_profile
+from app.services.response_cache import (
+    invalidate_profile,
+    profile_key,
+    versioned_json,
+)
 
 router = APIRouter(tags=["profile-api"])
 settings = get_settings()
@@ -30,8 +39,9 @@ def _csrf_ok(request: Request, token: str | None) -> bool:
     return validate_csrf_token(request, token)
 
 
-async def _profile_context(request: Request, db: AsyncSession, user):
-    consultant = await require_specialist_mode_async(request, db, user)
+async def _profile_context(request: Request, db: AsyncSession, user, consultant=None):
+    if consultant is None:
+        consultant = await require_specialist_mode_async(request, db, user)
     connected = {
         sa.provider
         for sa in (
@@ -60,6 +70,17 @@ async def _profile_context(request: Request, db: AsyncSession, user):
     )
 
 
+async def _conditional_profile(request: Request, db: AsyncSession, user, variant: str, pick):
+    consultant = await require_specialist_mode_async(request, db, user)
+
+    async def build():
+        return pick(await _profile_context(request, db, user, consultant))
+
+    return await versioned_json(
+        request, db, profile_key(consultant.id, user.id), profile_version_stmt(consultant.id, user.id), build, variant
+    )
+
+
 class ProfileUpdateBody(BaseModel):
     first_name: str | None = None
     last_name: str | None = None
@@ -83,7 +104,7 @@ async def get_profile_data(request: Request, db: AsyncSession = Depends(get_asyn
     user = await get_current_user_async(request, db)
     if not user:
         raise HTTPException(status_code=401, detail="Unauthorized")
-    return JSONResponse(await _profile_context(request, db, user))
+    return await _conditional_profile(request, db, user, "data", lambda data: data)
 
 
 @router.put("/profile/data")
@@ -148,8 +169,16 @@ async def get_profile_preview(request: Request, db: AsyncSession = Depends(get_a
     user = await get_current_user_async(request, db)
     if not user:
         raise HTTPException(status_code=401, detail="Unauthorized")
-    data = await _profile_context(request, db, user)
-    return JSONResponse(data["preview"])
+    consultant = await require_specialist_mode_async(request, db, user)
+    # Lightweight: no counts, socials or email lookups — just slug and top services.
+    return await versioned_json(
+        request,
+        db,
+        profile_key(consultant.id, user.id),
+        profile_version_stmt(consultant.id, user.id),
+        lambda: build_profile_preview_async(db, consultant),
+        "preview",
+    )
 
 
 @router.get("/profile/completion")
@@ -157,8 +186,9 @@ async def get_profile_completion(request: Request, db: AsyncSession = Depends(ge
     user = await get_current_user_async(request, db)
     if not user:
         raise HTTPException(status_code=401, detail="Unauthorized")
-    data = await _profile_context(request, db, user)
-    return JSONResponse(data["completeness"])
+    return await _conditional_profile(
+        request, db, user, "completion", lambda data: data["completeness"]
+    )
 
 
 @router.get("/profile/qrcode")
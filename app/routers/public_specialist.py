@@ -1,4 +1,5 @@
 """Public specialist pages: share link → client gate → calendars → services → book."""
+import uuid
 from datetime import date, datetime
 from urllib.parse import urlencode
 
@@ -69,41 +70,62 @@ async def specialist_public_home(request: Request, slug: str, db: AsyncSession =
     if gate:
         return gate
 
-    calendars = list(
-        (
-            await db.execute(
-                select(Calendar)
-                .where(Calendar.consultant_id == consultant.id, Calendar.is_active.is_(True))
-                .order_by(Calendar.name)
-            )
-        )
-        .scalars()
-        .all()
+    from app.services.page_cache import (
+        PRIVATE_CACHE_CONTROL,
+        serve_cached_page,
+        specialist_page_key,
+        variant_hash,
     )
-    calendars_data = []
-    for cal in calendars:
-        svc_count = (
-            await db.execute(
-                select(func.count(Service.id)).where(
-                    Service.calendar_id == cal.id,
-                    Service.is_active.is_(True),
+
+    client_name = request.session.get("pc_name", "")
+    client_email = request.session.get("pc_email", "")
+    client_telegram = request.session.get("pc_telegram", "")
+
+    async def render():
+        calendars = list(
+            (
+                await db.execute(
+                    select(Calendar)
+                    .where(Calendar.consultant_id == consultant.id, Calendar.is_active.is_(True))
+                    .order_by(Calendar.name)
                 )
             )
-        ).scalar_one()
-        calendars_data.append({"calendar": cal, "services_count": svc_count})
+            .scalars()
+            .all()
+        )
+        calendars_data = []
+        for cal in calendars:
+            svc_count = (
+                await db.execute(
+                    select(func.count(Service.id)).where(
+                        Service.calendar_id == cal.id,
+                        Service.is_active.is_(True),
+                    )
+                )
+            ).scalar_one()
+            calendars_data.append({"calendar": cal, "services_count": svc_count})
 
-    return templates.TemplateResponse(
-        "public/specialist.html",
-        await page_context_async(
-            request,
-            db,
-            None,
-            consultant=consultant,
-            calendars_data=calendars_data,
-            client_name=request.session.get("pc_name", ""),
-            client_email=request.session.get("pc_email", ""),
-            client_telegram=request.session.get("pc_telegram", ""),
-        ),
+        return templates.TemplateResponse(
+            "public/specialist.html",
+            await page_context_async(
+                request,
+                db,
+                None,
+                consultant=consultant,
+                calendars_data=calendars_data,
+                client_name=client_name,
+                client_email=client_email,
+                client_telegram=client_telegram,
+            ),
+        )
+
+    # Page embeds the visitor's gate contacts, so each contact set is its own variant.
+    variant = f"{slug}:{variant_hash(client_name, client_email, client_telegram)}"
+    return await serve_cached_page(
+        request,
+        specialist_page_key(consultant.id, variant),
+        render,
+        cache_control=PRIVATE_CACHE_CONTROL,
     )
 
 
@@ -293,25 +315,38 @@ async def specialist_calendar_book(
         if not error and form.get("accept_privacy") != "1":
             error = "Нужно согласие на обработку персональных данных"
         if not error:
+            from app.services import idempotency
+
             auth_user = await get_current_user_async(request, db)
-            booking, err = await create_public_booking_async(
-                db,
-                calendar,
-                service_id,
-                booking_date,
-                booking_time,
-                booking_end,
-                request.session.get("pc_name", ""),
-                request.session.get("pc_phone", ""),
-                request.session.get("pc_email", ""),
-                request.session.get("pc_telegram", ""),
-                client_user_id=(auth_user.id if auth_user else None),
-                consultant=consultant,
+            actor = f"u{auth_user.id}" if auth_user else f"p{request.session.get('pc_phone', '')}"
+            claim = await idempotency.begin(
+                db, f"public_booking:{calendar.id}", actor, idempotency.request_idempotency_key(request, form)
             )
+            if claim.state == "replay":
+                return claim.stored.to_response()
+            if claim.state == "busy":
+                error = idempotency.BUSY_MESSAGE
+        if not error:
+            async with claim.releasing(db):
+                booking, err = await create_public_booking_async(
+                    db,
+                    calendar,
+                    service_id,
+                    booking_date,
+                    booking_time,
+                    booking_end,
+                    request.session.get("pc_name", ""),
+                    request.session.get("pc_phone", ""),
+                    request.session.get("pc_email", ""),
+                    request.session.get("pc_telegram", ""),
+                    client_user_id=(auth_user.id if auth_user else None),
+                    consultant=consultant,
+                )
             if err:
                 error = err
+                await claim.release(db)
             else:
-                return templates.TemplateResponse(
+                response = templates.TemplateResponse(
                     "booking_success.html",
                     await page_context_async(
                         request,
@@ -324,6 +359,8 @@ async def specialist_calendar_book(
                         back_url=f"/s/{slug}/",
                     ),
                 )
+                await claim.store(db, response)
+                return response
 
     import json
 
@@ -356,6 +393,7 @@ async def specialist_calendar_book(
             slug=slug,
             today=date.today().isoformat(),
             weekly_windows_json=json.dumps(weekly, ensure_ascii=False),
+            idempotency_key=uuid.uuid4().hex,
         ),
     )
 
@@ -120,8 +120,13 @@ class ReorderBody(BaseModel):
 
 @router.get("/services/catalog")
 async def get_catalog(request: Request, db: AsyncSession = Depends(get_async_db)):
+    from app.services.response_cache import catalog_key, versioned_json
+    from app.services.services_catalog import catalog_version_stmt
+
     _, consultant_id = await _require_consultant(request, db)
-    return JSONResponse(await _catalog(db, consultant_id))
+    return await versioned_json(
+        request, db, catalog_key(consultant_id), catalog_version_stmt(consultant_id), lambda: _catalog(db, consultant_id)
+    )
 
 
 @router.get("/services/{service_id}")
@@ -150,21 +150,34 @@ async def create_booking(request: Request, db: AsyncSession = Depends(get_async_
         except (TypeError, ValueError):
             return JSONResponse({"error": "Некорректная карточка клиента"}, status_code=400)
 
-    booking, err, matches = await create_specialist_booking_async(
-        db,
-        consultant,
-        calendar_id=calendar_id,
-        service_id=service_id,
-        booking_date=booking_date,
-        booking_time_str=(data.get("booking_time") or "").strip(),
-        booking_end_time_str=(data.get("booking_end_time") or "").strip(),
-        client_name=(data.get("client_name") or "").strip(),
-        client_phone=(data.get("client_phone") or "").strip(),
-        client_email=(data.get("client_email") or "").strip(),
-        client_telegram=(data.get("client_telegram") or "").strip(),
-        client_card_id=client_card_id,
-        force_new_client=bool(data.get("force_new_client")),
+    from app.services import idempotency
+
+    claim = await idempotency.begin(
+        db, "specialist_booking", f"u{user.id}", idempotency.request_idempotency_key(request)
     )
+    if claim.state == "replay":
+        return claim.stored.to_response()
+    if claim.state == "busy":
+        return JSONResponse({"error": idempotency.BUSY_MESSAGE}, status_code=409)
+
+    async with claim.releasing(db):
+        booking, err, matches = await create_specialist_booking_async(
+            db,
+            consultant,
+            calendar_id=calendar_id,
+            service_id=service_id,
+            booking_date=booking_date,
+            booking_time_str=(data.get("booking_time") or "").strip(),
+            booking_end_time_str=(data.get("booking_end_time") or "").strip(),
+            client_name=(data.get("client_name") or "").strip(),
+            client_phone=(data.get("client_phone") or "").strip(),
+            client_email=(data.get("client_email") or "").strip(),
+            client_telegram=(data.get("client_telegram") or "").strip(),
+            client_card_id=client_card_id,
+            force_new_client=bool(data.get("force_new_client")),
+        )
+    if err or not booking:
+        await claim.release(db)
     if err == "found_matches":
         return JSONResponse(
             {
@@ -177,16 +190,20 @@ async def create_booking(request: Request, db: AsyncSession = Depends(get_async_
     if err or not booking:
         return JSONResponse({"error": err or "Не удалось создать запись"}, status_code=400)
 
-    return {
-        "ok": True,
-        "booking": {
-            "id": booking.id,
-            "client_name": booking.client_name,
-            "booking_date": booking.booking_date.isoformat(),
-            "booking_time": booking.booking_time.strftime("%H:%M"),
-            "status": booking.status,
-            "source": booking.source,
-            "service": booking.service.name if booking.service else None,
-            "calendar": booking.calendar.name if booking.calendar else None,
-        },
-    }
+    response = JSONResponse(
+        {
+            "ok": True,
+            "booking": {
+                "id": booking.id,
+                "client_name": booking.client_name,
+                "booking_date": booking.booking_date.isoformat(),
+                "booking_time": booking.booking_time.strftime("%H:%M"),
+                "status": booking.status,
+                "source": booking.source,
+                "service": booking.service.name if booking.service else None,
+                "calendar": booking.calendar.name if booking.calendar else None,
+            },
+        }
+    )
+    await claim.store(db, response)
+    return response
@@ -4,7 +4,6 @@ from __future__ import annotations
 import logging
 import secrets
 
-from aiogram.types import Update
 from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import JSONResponse
 
@@ -24,6 +23,9 @@ async def telegram_webhook(secret: str, request: Request):
     ):
         raise HTTPException(status_code=403, detail="forbidden")
 
+    # aiogram.types costs seconds to import; load it only when Telegram actually calls us.
+    from aiogram.types import Update
+
     from bot.aiogram_app import get_bot, get_dispatcher
 
     bot = get_bot()
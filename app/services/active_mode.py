@@ -24,11 +24,20 @@ async def user_has_consultant_async(db, user_id: int) -> bool:
     return row.first() is not None
 
 
+def _snapshot_has_consultant(request: Request, user_id: int) -> bool | None:
+    from app.services.auth_snapshot import request_auth_snapshot
+
+    snap = request_auth_snapshot(request, user_id)
+    return None if snap is None else snap["consultant_id"] is not None
+
+
 def get_cached_has_consultant(request: Request, db: Session, user_id: int) -> bool:
-    """Prefer session flag to avoid Consultant EXISTS on every page render."""
+    """Prefer session flag / auth snapshot to avoid Consultant EXISTS on every page render."""
     if "session" in request.scope and "has_consultant" in request.session:
         return bool(request.session.get("has_consultant"))
-    has_c = user_has_consultant(db, user_id)
+    has_c = _snapshot_has_consultant(request, user_id)
+    if has_c is None:
+        has_c = user_has_consultant(db, user_id)
     if "session" in request.scope:
         request.session["has_consultant"] = has_c
     return has_c
@@ -37,7 +46,9 @@ def get_cached_has_consultant(request: Request, db: Session, user_id: int) -> bo
 async def get_cached_has_consultant_async(request: Request, db, user_id: int) -> bool:
     if "session" in request.scope and "has_consultant" in request.session:
         return bool(request.session.get("has_consultant"))
-    has_c = await user_has_consultant_async(db, user_id)
+    has_c = _snapshot_has_consultant(request, user_id)
+    if has_c is None:
+        has_c = await user_has_consultant_async(db, user_id)
     if "session" in request.scope:
         request.session["has_consultant"] = has_c
     return has_c
@@ -102,6 +113,10 @@ def set_active_mode(request: Request, mode: str, *, has_consultant: bool) -> str
     if mode == MODE_SPECIALIST and not has_consultant:
         mode = MODE_CLIENT
     if "session" in request.scope:
+        if request.session.get("active_mode") != mode:
+            from app.services.auth_snapshot import invalidate_auth_snapshot
+
+            invalidate_auth_snapshot(request.session.get("user_id"))  # re-read consultant on the next request
         request.session["active_mode"] = mode
         request.session["has_consultant"] = bool(has_consultant)
     return mode
@@ -0,0 +1,350 @@
+"""Admin Ctrl+K search index: one ranked full-text query over every searchable entity.
+
+Each user, specialist, client card, booking and support ticket has one row in
+``admin_search_documents`` (title/subtitle/url ready to render, ``body`` = searchable
+text). MySQL searches ``body`` through a FULLTEXT ngram index, SQLite through the
+``admin_search_fts`` FTS5 table kept in sync by triggers. An ORM after_flush hook notes
+which entities changed in ``session.info``; after commit they are re-indexed on a fresh
+connection, outside the business transaction (see app.models.platform). Rebuild:
+``python -m app.commands.admin_search_index``.
+
+Digit-only queries (phone fragments) also run a substring scan over the documents, since
+token prefixes do not match digits in the middle of a number.
+"""
+from __future__ import annotations
+
+import logging
+import re
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable
+
+from sqlalchemy import bindparam, delete, inspect, insert, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.models import AdminSearchDocument, Booking, ClientCard, Consultant, SocialAccount, SupportTicket, User
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "admin_search_fts"
+REBUILD_BATCH = 500
+MAX_TOKENS = 6
+MIN_DIGITS = 4
+_PENDING_KEY = "admin_search_dirty"
+
+_DOCS = AdminSearchDocument.__table__
+
+# ORM class -> (entity type, attributes whose change re-indexes the row)
+_WATCHED: dict[type, tuple[str, tuple[str, ...]]] = {
+    User: ("user", ("username", "email", "first_name", "last_name")),
+    SocialAccount: ("user", ("uid", "user_id")),
+    Consultant: ("specialist", ("first_name", "last_name", "email", "phone")),
+    ClientCard: ("client", ("name", "email", "phone", "telegram", "client_user_id")),
+    Booking: ("booking", ("client_name", "client_phone", "client_email", "booking_date", "booking_time")),
+    SupportTicket: ("support", ("subject", "contact_email", "contact_name")),
+}
+
+
+def _body(*parts: Any) -> str:
+    return " ".join(str(p) for p in parts if p not in (None, "")).casefold()
+
+
+def _user_docs(conn, ids: list[int]) -> list[dict[str, Any]]:
+    uids: dict[int, list[str]] = {}
+    for user_id, uid in conn.execute(
+        select(SocialAccount.user_id, SocialAccount.uid).where(SocialAccount.user_id.in_(ids))
+    ):
+        uids.setdefault(user_id, []).append(uid)
+    docs = []
+    for u in conn.execute(
+        select(User.id, User.username, User.email, User.first_name, User.last_name).where(User.id.in_(ids))
+    ):
+        label = u.email or u.username
+        name = f"{u.first_name or ''} {u.last_name or ''}".strip()
+        docs.append(
+            {
+                "entity_id": u.id,
+                "title": f"{name} · {label}" if name else label,
+                "subtitle": f"User #{u.id}",
+                "url": f"/platform-admin/users/{u.id}/",
+                "body": _body(u.id, u.username, u.email, name, *uids.get(u.id, ())),
+            }
+        )
+    return docs
+
+
+def _specialist_docs(conn, ids: list[int]) -> list[dict[str, Any]]:
+    rows = conn.execute(
+        select(Consultant.id, Consultant.first_name, Consultant.last_name, Consultant.email, Consultant.phone)
+        .where(Consultant.id.in_(ids))
+    )
+    return [
+        {
+            "entity_id": c.id,
+            "title": f"{c.first_name or ''} {c.last_name or ''}".strip() or f"Consultant #{c.id}",
+            "subtitle": f"Специалист · {c.email}" if c.email else "Специалист",
+            "url": f"/platform-admin/specialists/{c.id}/",
+            "body": _body(c.id, c.first_name, c.last_name, c.email, c.phone, re.sub(r"\D", "", c.phone or "")),
+        }
+        for c in rows
+    ]
+
+
+def _client_docs(conn, ids: list[int]) -> list[dict[str, Any]]:
+    rows = conn.execute(
+        select(
+            ClientCard.id, ClientCard.name, ClientCard.email, ClientCard.phone,
+            ClientCard.telegram, ClientCard.client_user_id,
+        ).where(ClientCard.id.in_(ids))
+    )
+    return [
+        {
+            "entity_id": c.id,
+            "title": c.name or c.phone or c.email or f"Карточка #{c.id}",
+            "subtitle": "Клиент",
+            "url": (
+                f"/platform-admin/clients/user/{c.client_user_id}/"
+                if c.client_user_id
+                else f"/platform-admin/clients/card/{c.id}/"
+            ),
+            "body": _body(c.id, c.name, c.email, c.phone, c.telegram, re.sub(r"\D", "", c.phone or "")),
+        }
+        for c in rows
+    ]
+
+
+def _booking_docs(conn, ids: list[int]) -> list[dict[str, Any]]:
+    rows = conn.execute(
+        select(
+            Booking.id, Booking.client_name, Booking.client_phone, Booking.client_email,
+            Booking.booking_date, Booking.booking_time,
+        ).where(Booking.id.in_(ids))
+    )
+    # Status is left out on purpose: it changes in bulk (sweeper) without ORM flushes.
+    return [
+        {
+            "entity_id": b.id,
+            "title": f"#{b.id} {b.client_name}",
+            "subtitle": f"{b.booking_date} {b.booking_time}",
+            "url": f"/platform-admin/bookings/{b.id}/",
+            "body": _body(
+                b.id, b.client_name, b.client_phone, b.client_email, re.sub(r"\D", "", b.client_phone or "")
+            ),
+        }
+        for b in rows
+    ]
+
+
+def _support_docs(conn, ids: list[int]) -> list[dict[str, Any]]:
+    rows = conn.execute(
+        select(SupportTicket.id, SupportTicket.subject, SupportTicket.contact_email, SupportTicket.contact_name)
+        .where(SupportTicket.id.in_(ids))
+    )
+    return [
+        {
+            "entity_id": t.id,
+            "title": t.subject,
+            "subtitle": f"Тикет · {t.contact_email}",
+            "url": f"/platform-admin/support/{t.id}/",
+            "body": _body(t.id, t.subject, t.contact_email, t.contact_name),
+        }
+        for t in rows
+    ]
+
+
+# entity type -> (source id column, document loader); order = rebuild order
+LOADERS: dict[str, tuple[Any, Callable[[Any, list[int]], list[dict[str, Any]]]]] = {
+    "user": (User.id, _user_docs),
+    "specialist": (Consultant.id, _specialist_docs),
+    "client": (ClientCard.id, _client_docs),
+    "booking": (Booking.id, _booking_docs),
+    "support": (SupportTicket.id, _support_docs),
+}
+
+
+def refresh_documents(conn, entity_type: str, ids: list[int]) -> int:
+    """Replace the documents for ``ids`` with fresh ones; rows that no longer exist are dropped."""
+    ids = sorted({int(i) for i in ids if i})
+    if not ids:
+        return 0
+    docs = LOADERS[entity_type][1](conn, ids)
+    conn.execute(delete(_DOCS).where(_DOCS.c.entity_type == entity_type, _DOCS.c.entity_id.in_(ids)))
+    if docs:
+        now = datetime.utcnow()
+        conn.execute(insert(_DOCS), [{**d, "entity_type": entity_type, "updated_at": now} for d in docs])
+    return len(docs)
+
+
+def _changed(obj: Any, fields: tuple[str, ...]) -> bool:
+    attrs = inspect(obj).attrs
+    return any(attrs[f].history.has_changes() for f in fields)
+
+
+def note_flushed_objects(session: Session) -> None:
+    """after_flush hook: remember entities whose searchable fields were written in this flush."""
+    keys: dict[str, set[int]] = session.info.get(_PENDING_KEY) or {}
+
+    def _add(obj: Any) -> None:
+        entity_type, _ = _WATCHED[type(obj)]
+        ref = obj.user_id if isinstance(obj, SocialAccount) else obj.id
+        if ref:
+            keys.setdefault(entity_type, set()).add(ref)
+
+    for obj in session.new:
+        if type(obj) in _WATCHED:
+            _add(obj)
+    for obj in session.deleted:
+        if type(obj) in _WATCHED:
+            _add(obj)
+    for obj in session.dirty:
+        watched = _WATCHED.get(type(obj))
+        if watched and _changed(obj, watched[1]):
+            _add(obj)
+    if keys:
+        session.info[_PENDING_KEY] = keys
+
+
+def reindex_committed_objects(session: Session) -> None:
+    """after_commit hook: refresh documents noted by note_flushed_objects.
+
+    Runs on its own connection once the business transaction is committed, so index
+    writes never hold its locks or fail it. For an AsyncSession this still runs inside
+    its greenlet, so the async engine can be used synchronously here.
+    """
+    keys = session.info.pop(_PENDING_KEY, None)
+    if not keys:
+        return
+    bind = session.get_bind()
+    if isinstance(bind, Connection):
+        bind = bind.engine
+    try:
+        with bind.begin() as conn:
+            for entity_type, ids in keys.items():
+                refresh_documents(conn, entity_type, list(ids))
+    except Exception:
+        logger.exception("admin search index update failed for %s", sorted(keys))
+
+
+def rebuild_search_index(db: Session, *, entity_types: list[str] | None = None, batch: int = REBUILD_BATCH) -> dict:
+    """Re-create documents for every entity (id-keyset batches, commit per batch) and drop orphans."""
+    report: dict[str, int] = {}
+    for entity_type in entity_types or list(LOADERS):
+        id_col = LOADERS[entity_type][0]
+        last_id, indexed = 0, 0
+        while True:
+            ids = list(
+                db.execute(select(id_col).where(id_col > last_id).order_by(id_col).limit(batch)).scalars().all()
+            )
+            if not ids:
+                break
+            indexed += refresh_documents(db.connection(), entity_type, ids)
+            db.commit()
+            last_id = ids[-1]
+        db.execute(
+            delete(_DOCS).where(
+                _DOCS.c.entity_type == entity_type,
+                _DOCS.c.entity_id.not_in(select(id_col).scalar_subquery()),
+            )
+        )
+        db.commit()
+        report[entity_type] = indexed
+    if db.get_bind().dialect.name == "sqlite":
+        db.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+        db.commit()
+    logger.info("admin search index rebuilt: %s", report)
+    return report
+
+
+def _tokens(q: str) -> list[str]:
+    return re.findall(r"\w+", (q or "").casefold())[:MAX_TOKENS]
+
+
+def search_statement(dialect: str, q: str, entity_types: list[str], limit: int):
+    """Ranked prefix search over the index for one dialect; None when ``q`` has no tokens."""
+    tokens = _tokens(q)
+    if not tokens or not entity_types:
+        return None
+    cols = "d.entity_type, d.entity_id, d.title, d.subtitle, d.url"
+    params: dict[str, Any] = {"types": list(entity_types), "limit": limit}
+    if dialect == "sqlite":
+        params["match"] = " ".join(f'"{t}"*' for t in tokens)
+        sql = (
+            f"SELECT {cols} FROM {FTS_TABLE} f JOIN admin_search_documents d ON d.id = f.rowid "
+            f"WHERE {FTS_TABLE} MATCH :match AND d.entity_type IN :types "
+            f"ORDER BY bm25({FTS_TABLE}), d.id DESC LIMIT :limit"
+        )
+    elif dialect == "mysql":
+        params["match"] = " ".join(f"+{t}*" for t in tokens)
+        sql = (
+            f"SELECT {cols} FROM admin_search_documents d "
+            "WHERE MATCH(d.body) AGAINST(:match IN BOOLEAN MODE) AND d.entity_type IN :types "
+            "ORDER BY MATCH(d.body) AGAINST(:match IN BOOLEAN MODE) DESC, d.id DESC LIMIT :limit"
+        )
+    else:
+        likes = []
+        for i, token in enumerate(tokens):
+            params[f"t{i}"] = f"%{token}%"
+            likes.append(f"d.body LIKE :t{i}")
+        sql = (
+            f"SELECT {cols} FROM admin_search_documents d "
+            f"WHERE {' AND '.join(likes)} AND d.entity_type IN :types ORDER BY d.id DESC LIMIT :limit"
+        )
+    return text(sql).bindparams(bindparam("types", expanding=True)), params
+
+
+def _results(rows, limit_per_type: int) -> list[dict[str, Any]]:
+    out: list[dict[str, Any]] = []
+    per_type: Counter = Counter()
+    seen_urls: set[str] = set()
+    for entity_type, entity_id, title, subtitle, url in rows:
+        if url in seen_urls or per_type[entity_type] >= limit_per_type:
+            continue
+        seen_urls.add(url)
+        per_type[entity_type] += 1
+        out.append({"type": entity_type, "id": entity_id, "title": title, "subtitle": subtitle, "url": url})
+    return out
+
+
+def _digits(q: str) -> str | None:
+    digits = re.sub(r"[\s()+\-]", "", q or "")
+    return digits if digits.isdigit() and len(digits) >= MIN_DIGITS else None
+
+
+def digits_statement(q: str, entity_types: list[str], limit: int):
+    """Substring match for a phone fragment (LIKE scan of the documents); None for other queries."""
+    digits = _digits(q)
+    if digits is None or not entity_types:
+        return None
+    return (
+        select(_DOCS.c.entity_type, _DOCS.c.entity_id, _DOCS.c.title, _DOCS.c.subtitle, _DOCS.c.url)
+        .where(_DOCS.c.entity_type.in_(entity_types), _DOCS.c.body.contains(digits, autoescape=True))
+        .order_by(_DOCS.c.id.desc())
+        .limit(limit)
+    )
+
+
+def search_index(db: Session, q: str, entity_types: list[str], *, limit_per_type: int = 5) -> list[dict[str, Any]]:
+    limit = limit_per_type * len(entity_types) * 2
+    built = search_statement(db.get_bind().dialect.name, q, entity_types, limit)
+    if built is None:
+        return []
+    stmt, params = built
+    rows = db.execute(stmt, params).all()
+    substring = digits_statement(q, entity_types, limit)
+    if substring is not None:
+        rows += db.execute(substring).all()
+    return _results(rows, limit_per_type)
+
+
+async def search_index_async(db, q: str, entity_types: list[str], *, limit_per_type: int = 5) -> list[dict[str, Any]]:
+    limit = limit_per_type * len(entity_types) * 2
+    built = search_statement(db.get_bind().dialect.name, q, entity_types, limit)
+    if built is None:
+        return []
+    stmt, params = built
+    rows = (await db.execute(stmt, params)).all()
+    substring = digits_statement(q, entity_types, limit)
+    if substring is not None:
+        rows += (await db.execute(substring)).all()
+    return _results(rows, limit_per_type)
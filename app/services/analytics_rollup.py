@@ -0,0 +1,163 @@
+"""Daily analytics rollups: per-day platform and per-specialist aggregates (Admin A4).
+
+rollup_days() recomputes a closed date range from the raw tables with grouped
+queries (DAU, signups, bookings created, bookings by status and per specialist;
+WAU/MAU per day as rolling distinct counts) and replaces the stored rows. The
+scheduled job re-rolls the trailing ROLLUP_REFRESH_DAYS so late status changes
+land; --from / --backfill walks history in ROLLUP_CHUNK_DAYS chunks.
+"""
+from __future__ import annotations
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models import Booking, Calendar, PlatformDailyRollup, PlatformSpecialistDaily, PlatformUserActivity, User
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_REFRESH_DAYS = 7
+ROLLUP_CHUNK_DAYS = 31
+TODAY_TTL = timedelta(minutes=10)
+
+STATUS_COLUMNS = {
+    "pending": "bookings_pending",
+    "confirmed": "bookings_confirmed",
+    "completed": "bookings_completed",
+    "cancelled": "bookings_cancelled",
+}
+COUNT_COLUMNS = (
+    "active_users", "wau", "mau", "signups", "bookings_created", "bookings_scheduled", *STATUS_COLUMNS.values(),
+)
+
+
+def _as_date(value: Any) -> date:
+    """func.date() returns a string on SQLite and a date on MySQL."""
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def _distinct_users(db: Session, start: date, end: date) -> int:
+    return int(
+        db.execute(
+            select(func.count(func.distinct(PlatformUserActivity.user_id))).where(
+                PlatformUserActivity.activity_date >= start, PlatformUserActivity.activity_date <= end
+            )
+        ).scalar()
+        or 0
+    )
+
+
+def rollup_days(db: Session, start: date, end: date, *, commit: bool = True) -> int:
+    """Recompute and replace rollup rows for [start, end]; returns the number of days written."""
+    if end < start:
+        return 0
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    rows: dict[date, dict[str, Any]] = {d: {"day": d, **dict.fromkeys(COUNT_COLUMNS, 0)} for d in days}
+    lo = datetime.combine(start, datetime.min.time())
+    hi = datetime.combine(end + timedelta(days=1), datetime.min.time())
+
+    for day, n in db.execute(
+        select(PlatformUserActivity.activity_date, func.count(func.distinct(PlatformUserActivity.user_id)))
+        .where(PlatformUserActivity.activity_date >= start, PlatformUserActivity.activity_date <= end)
+        .group_by(PlatformUserActivity.activity_date)
+    ):
+        rows[_as_date(day)]["active_users"] = int(n)
+    # Rolling distinct users cannot be summed from DAU: one indexed range count per day.
+    for d in days:
+        rows[d]["wau"] = _distinct_users(db, d - timedelta(days=6), d)
+        rows[d]["mau"] = _distinct_users(db, d - timedelta(days=29), d)
+
+    for column, ts_col, table_id in (
+        ("signups", User.date_joined, User.id),
+        ("bookings_created", Booking.created_at, Booking.id),
+    ):
+        day_col = func.date(ts_col)
+        for day, n in db.execute(
+            select(day_col, func.count(table_id)).where(ts_col >= lo, ts_col < hi).group_by(day_col)
+        ):
+            if day is not None and _as_date(day) in rows:
+                rows[_as_date(day)][column] = int(n)
+
+    for day, status, n in db.execute(
+        select(Booking.booking_date, Booking.status, func.count(Booking.id))
+        .where(Booking.booking_date >= start, Booking.booking_date <= end)
+        .group_by(Booking.booking_date, Booking.status)
+    ):
+        row = rows[_as_date(day)]
+        row["bookings_scheduled"] += int(n)
+        if status in STATUS_COLUMNS:
+            row[STATUS_COLUMNS[status]] = int(n)
+
+    specialist_rows = [
+        {
+            "day": _as_date(day),
+            "consultant_id": int(consultant_id),
+            "bookings": int(total),
+            "completed": int(completed or 0),
+            "cancelled": int(cancelled or 0),
+        }
+        for day, consultant_id, total, completed, cancelled in db.execute(
+            select(
+                Booking.booking_date,
+                Calendar.consultant_id,
+                func.count(Booking.id),
+                func.sum(case((Booking.status == "completed", 1), else_=0)),
+                func.sum(case((Booking.status == "cancelled", 1), else_=0)),
+            )
+            .join(Calendar, Calendar.id == Booking.calendar_id)
+            .where(Booking.booking_date >= start, Booking.booking_date <= end)
+            .group_by(Booking.booking_date, Calendar.consultant_id)
+        )
+    ]
+
+    now = datetime.utcnow()
+    db.execute(delete(PlatformDailyRollup).where(PlatformDailyRollup.day >= start, PlatformDailyRollup.day <= end))
+    db.execute(insert(PlatformDailyRollup), [{**r, "updated_at": now} for r in rows.values()])
+    db.execute(
+        delete(PlatformSpecialistDaily).where(PlatformSpecialistDaily.day >= start, PlatformSpecialistDaily.day <= end)
+    )
+    if specialist_rows:
+        db.execute(insert(PlatformSpecialistDaily), specialist_rows)
+    if commit:
+        db.commit()
+    return len(days)
+
+
+def earliest_data_date(db: Session) -> date | None:
+    """First day with any signup, activity, booking or booking creation — the start of a full backfill."""
+    candidates = [
+        db.execute(select(func.min(PlatformUserActivity.activity_date))).scalar(),
+        db.execute(select(func.min(func.date(User.date_joined)))).scalar(),
+        db.execute(select(func.min(Booking.booking_date))).scalar(),
+        db.execute(select(func.min(func.date(Booking.created_at)))).scalar(),
+    ]
+    found = [_as_date(c) for c in candidates if c is not None]
+    return min(found) if found else None
+
+
+def run_rollups(
+    db: Session,
+    *,
+    start: date | None = None,
+    end: date | None = None,
+    refresh_days: int = ROLLUP_REFRESH_DAYS,
+) -> dict:
+    """Scheduled entry point: re-roll the trailing window, or [start, end] in committed chunks."""
+    end = end or date.today()
+    start = start or end - timedelta(days=max(refresh_days, 1) - 1)
+    written = 0
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=ROLLUP_CHUNK_DAYS - 1), end)
+        written += rollup_days(db, chunk_start, chunk_end)
+        chunk_start = chunk_end + timedelta(days=1)
+    logger.info("analytics rollup %s..%s: %s days", start, end, written)
+    return {"from": start.isoformat(), "to": end.isoformat(), "days": written}
+
+
+def rollup_is_stale(row: Any) -> bool:
+    """True when today's rollup row (ORM object or column row) is missing or older than TODAY_TTL."""
+    return row is None or row.updated_at is None or datetime.utcnow() - row.updated_at > TODAY_TTL
@@ -3,6 +3,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.models import AppCounter
@@ -11,18 +12,27 @@ DEDUP_HITS_KEY = "notify_dedup_hits"
 
 
 def increment_counter(db: Session, key: str, *, by: int = 1, commit: bool = False) -> int:
+    """Atomic upsert (no read-modify-write race between workers); returns the new value."""
+    from app.services.write_buffer import upsert_counters
+
+    upsert_counters(db.connection(), {key: int(by)})
+    value = db.execute(select(AppCounter.value).where(AppCounter.key == key)).scalar()
+    if commit:
+        db.commit()
+    return int(value or 0)
+
+
+def set_counter(db: Session, key: str, value: int, *, commit: bool = False) -> None:
     row = db.get(AppCounter, key)
     if not row:
-        row = AppCounter(key=key, value=0, updated_at=datetime.utcnow())
+        row = AppCounter(key=key, value=0)
         db.add(row)
-        db.flush()
-    row.value = int(row.value or 0) + int(by)
+    row.value = int(value)
     row.updated_at = datetime.utcnow()
     if commit:
         db.commit()
     else:
         db.flush()
-    return int(row.value)
 
 
 def get_counter(db: Session, key: str) -> int:
@@ -31,10 +41,12 @@ def get_counter(db: Session, key: str) -> int:
 
 
 def record_notify_dedup_hit(db: Session | None = None) -> None:
-    """Best-effort: bump counter (flush only; caller commits)."""
+    """Best-effort: buffered +1, upserted by the write buffer (never blocks the send loop)."""
     if db is None:
         return
     try:
-        increment_counter(db, DEDUP_HITS_KEY, by=1, commit=False)
+        from app.services.write_buffer import buffer_counter
+
+        buffer_counter(db, DEDUP_HITS_KEY)
     except Exception:
         pass
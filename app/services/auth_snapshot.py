@@ -0,0 +1,189 @@
+"""Per-user auth snapshot: who the session user is, without a DB round-trip per request.
+
+One cached dict per user in Redis (``ayc:auth:<id>``) holds the User fields AuthUser needs, session_version, the Consultant id / name / email and
+the primary EmailAddress. A miss is filled with a single joined query.
+
+- get_current_user(_async) read it; require_specialist_mode_async, the has_consultant check
+  and the header block reuse the copy resolved for the request (``request.state``).
+- Active mode stays in the session (it is per browser); the snapshot only answers
+  "has a Consultant" for it.
+- Invalidation: any committed ORM change to the watched User / Consultant / EmailAddress
+  fields (profile edits, invalidate_user_sessions, admin block/unblock, become-specialist)
+  drops the user's entry after commit; a mode switch drops it too. Core bulk updates
+  bypass the flush hook and call invalidate_auth_snapshot_on_commit() themselves.
+- Without Redis nothing is cached between requests: a per-worker copy would keep a blocked
+  user or a revoked session_version alive in the other workers until the TTL ran out. The
+  request still resolves the user once and shares it via ``request.state``.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from sqlalchemy import and_, inspect, select
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.services.redis_client import get_redis
+from app.services.ttl_cache import TtlCache
+
+logger = logging.getLogger(__name__)
+
+AUTH_SNAPSHOT_CACHE = TtlCache(default_ttl=30.0, max_entries=4096, redis_prefix="ayc:auth:")
+
+_USER_FIELDS = (
+    "username", "email", "first_name", "last_name", "password",
+    "is_active", "is_staff", "is_superuser", "session_version",
+)
+_CONSULTANT_FIELDS = ("user_id", "first_name", "middle_name", "last_name", "email")
+_EMAIL_FIELDS = ("user_id", "email", "primary")
+_PENDING_KEY = "auth_snapshot_dirty"
+
+
+def _ttl() -> int:
+    if get_redis() is None:  # invalidation must reach every worker
+        return 0
+    return max(0, int(get_settings().auth_snapshot_ttl_sec or 0))
+
+
+def _snapshot_query(user_id: int):
+    from app.models import Consultant, EmailAddress, User
+
+    return (
+        select(
+            User.id,
+            User.username,
+            User.email,
+            User.first_name,
+            User.last_name,
+            User.password,
+            User.is_active,
+            User.is_staff,
+            User.is_superuser,
+            User.session_version,
+            Consultant.id.label("consultant_id"),
+            Consultant.first_name.label("c_first_name"),
+            Consultant.middle_name.label("c_middle_name"),
+            Consultant.last_name.label("c_last_name"),
+            Consultant.email.label("c_email"),
+            EmailAddress.email.label("primary_email"),
+        )
+        .outerjoin(Consultant, Consultant.user_id == User.id)
+        .outerjoin(EmailAddress, and_(EmailAddress.user_id == User.id, EmailAddress.primary.is_(True)))
+        .where(User.id == user_id)
+        .limit(1)
+    )
+
+
+def _from_row(row) -> dict[str, Any]:
+    from app.auth.passwords import has_usable_password
+
+    consultant_name = " ".join(
+        p for p in (row.c_first_name or "", row.c_middle_name or "", row.c_last_name or "") if p
+    ).strip()
+    return {
+        "id": row.id,
+        "username": row.username or "",
+        "email": row.email or "",
+        "first_name": row.first_name or "",
+        "last_name": row.last_name or "",
+        "is_active": bool(row.is_active),
+        "is_staff": bool(row.is_staff),
+        "is_superuser": bool(row.is_superuser),
+        "has_usable_password": has_usable_password(row.password or ""),
+        "session_version": int(row.session_version or 0),
+        "consultant_id": row.consultant_id,
+        "consultant_name": consultant_name,
+        "consultant_email": row.c_email or "",
+        "primary_email": row.primary_email or "",
+    }
+
+
+def load_auth_snapshot(db: Session, user_id: int) -> dict[str, Any] | None:
+    ttl = _ttl()
+    if ttl:
+        hit = AUTH_SNAPSHOT_CACHE.get(str(user_id))
+        if hit is not None:
+            return hit
+    row = db.execute(_snapshot_query(user_id)).first()
+    if row is None:
+        return None
+    snap = _from_row(row)
+    if ttl:
+        AUTH_SNAPSHOT_CACHE.set(str(user_id), snap, ttl=ttl)
+    return snap
+
+
+async def load_auth_snapshot_async(db, user_id: int) -> dict[str, Any] | None:
+    ttl = _ttl()
+    if ttl:
+        hit = AUTH_SNAPSHOT_CACHE.get(str(user_id))
+        if hit is not None:
+            return hit
+    row = (await db.execute(_snapshot_query(user_id))).first()
+    if row is None:
+        return None
+    snap = _from_row(row)
+    if ttl:
+        AUTH_SNAPSHOT_CACHE.set(str(user_id), snap, ttl=ttl)
+    return snap
+
+
+def invalidate_auth_snapshot(user_id: int | None) -> None:
+    if user_id:
+        AUTH_SNAPSHOT_CACHE.delete(str(user_id))
+
+
+def invalidate_auth_snapshot_on_commit(db, user_id: int | None) -> None:
+    """For Core ``update()``/``delete()`` on watched tables, which the flush hook never sees:
+    drop the entry now and again after ``db`` (Session or AsyncSession) commits."""
+    if not user_id:
+        return
+    invalidate_auth_snapshot(user_id)
+    db.info.setdefault(_PENDING_KEY, set()).add(user_id)
+
+
+def request_auth_snapshot(request, user_id: int | None) -> dict[str, Any] | None:
+    """Snapshot resolved by get_current_user(_async) for this request, if it is for user_id."""
+    state = getattr(request, "state", None)
+    snap = getattr(state, "_auth_snapshot", None) if state is not None else None
+    if snap is not None and user_id is not None and snap.get("id") == user_id:
+        return snap
+    return None
+
+
+# --- invalidation hooks (registered in app.models.auth) ---------------------
+
+
+def _watched() -> dict[type, tuple[str, ...]]:
+    from app.models import Consultant, EmailAddress, User
+
+    return {User: _USER_FIELDS, Consultant: _CONSULTANT_FIELDS, EmailAddress: _EMAIL_FIELDS}
+
+
+def note_flushed_users(session: Session) -> None:
+    """after_flush hook: remember users whose snapshot fields were written in this flush."""
+    watched = _watched()
+    ids: set[int] = set()
+    for objs, any_change in ((session.new, True), (session.deleted, True), (session.dirty, False)):
+        for obj in objs:
+            fields = watched.get(type(obj))
+            if not fields:
+                continue
+            attrs = inspect(obj).attrs
+            if any_change or any(attrs[f].history.has_changes() for f in fields):
+                ids.add(obj.id if fields is _USER_FIELDS else obj.user_id)
+            if "user_id" in fields:
+                ids.update(attrs["user_id"].history.deleted)  # moved to another user
+    ids.discard(None)
+    if ids:
+        session.info.setdefault(_PENDING_KEY, set()).update(ids)
+
+
+def invalidate_committed_users(session: Session) -> None:
+    """after_commit hook: drop snapshots noted by note_flushed_users."""
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        try:
+            invalidate_auth_snapshot(user_id)
+        except Exception:
+            logger.exception("auth snapshot invalidation failed user_id=%s", user_id)
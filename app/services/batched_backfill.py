@@ -0,0 +1,95 @@
+"""Chunked, resumable runner for app/commands backfills.
+
+Walks a statement in primary-key order, one keyset chunk at a time
+(``id > last_id ORDER BY id LIMIT chunk_size``, streamed with yield_per), so
+memory stays bounded by the chunk size. Writing jobs commit once per chunk,
+together with their checkpoint: app_counters row ``backfill:<name>:last_id``,
+written in the same transaction as the chunk's changes. ``resume=True``
+continues after the checkpoint. The run can be throttled to a target rows/sec
+and reports progress after every chunk.
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Callable
+
+from sqlalchemy.orm import Session
+
+from app.services.app_counters import get_counter, set_counter
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def checkpoint_key(name: str) -> str:
+    return f"backfill:{name}:last_id"
+
+
+def run_batched(
+    db: Session,
+    *,
+    name: str,
+    stmt,
+    id_column,
+    handle_chunk: Callable[[list[Any]], None],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    rows_per_sec: float | None = None,
+    limit: int | None = None,
+    resume: bool = False,
+    commit: bool = False,
+    progress: Callable[[dict[str, Any]], None] | None = None,
+) -> dict[str, Any]:
+    """
+    Feed `stmt` rows (first column: `id_column`) to `handle_chunk` in id order; returns run stats.
+
+    commit=True: the job writes. Each chunk is committed with the checkpoint.
+    commit=False: read-only or dry-run. Leaves the caller's transaction and
+    the checkpoint alone.
+    """
+    chunk_size = max(1, int(chunk_size))
+    resumed_from = get_counter(db, checkpoint_key(name)) if resume else 0
+    last_id = resumed_from
+    rows_total = 0
+    chunks = 0
+    started = time.monotonic()
+    while limit is None or rows_total < limit:
+        size = chunk_size if limit is None else min(chunk_size, limit - rows_total)
+        chunk_stmt = (
+            stmt.where(id_column > last_id)
+            .order_by(id_column.asc())
+            .limit(size)
+            .execution_options(yield_per=size)
+        )
+        rows = list(db.execute(chunk_stmt))
+        if not rows:
+            break
+        handle_chunk(rows)
+        last_id = int(rows[-1][0])
+        rows_total += len(rows)
+        chunks += 1
+        if commit:
+            set_counter(db, checkpoint_key(name), last_id)
+            db.commit()
+        elapsed = time.monotonic() - started
+        if rows_per_sec:
+            ahead = rows_total / float(rows_per_sec) - elapsed
+            if ahead > 0:
+                time.sleep(ahead)
+                elapsed += ahead
+        if progress is not None:
+            progress({
+                "name": name,
+                "chunks": chunks,
+                "rows": rows_total,
+                "last_id": last_id,
+                "rows_per_sec": round(rows_total / elapsed, 1) if elapsed > 0 else None,
+            })
+        if len(rows) < size:
+            break
+    return {
+        "name": name,
+        "chunks": chunks,
+        "rows": rows_total,
+        "last_id": last_id,
+        "resumed_from": resumed_from,
+        "elapsed_sec": round(time.monotonic() - started, 3),
+    }
@@ -0,0 +1,124 @@
+"""Per-day booking locks: writers serialize on (calendar_id, booking_date), not on the calendar.
+
+lock_booking_day() is one upsert into booking_day_locks (MySQL ON DUPLICATE KEY
+UPDATE, SQLite ON CONFLICT) that bumps the row's version. The row lock it takes
+(InnoDB X lock; the database write lock on SQLite) is held until commit, so two
+writers for the same calendar and day cannot both pass the overlap check, while
+other days of the same calendar stay writable. The same call then reads the
+day's active bookings as bare (start, end) columns with a locking read, which
+sees rows committed after the transaction's snapshot (REPEATABLE READ).
+Other dialects bump with UPDATE and create a missing row with INSERT in a savepoint;
+a writer that loses the insert race retries the UPDATE, which waits on the winner's
+row lock. Past-day rows are pruned by the "day_locks" housekeeping prune registered here.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+from typing import Any
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import Booking, BookingDayLock
+from app.services.housekeeping import register_prune
+
+ACTIVE_STATUSES = ("pending", "confirmed")
+
+_LOCKS = BookingDayLock.__table__
+
+
+def _lock_statements(dialect: str, calendar_id: int, day: date) -> list[Any]:
+    now = datetime.utcnow()
+    row = {"calendar_id": int(calendar_id), "booking_date": day, "version": 1, "updated_at": now}
+    bump = {"version": _LOCKS.c.version + 1, "updated_at": now}
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        return [mysql_insert(_LOCKS).values(**row).on_duplicate_key_update(**bump)]
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        return [
+            sqlite_insert(_LOCKS)
+            .values(**row)
+            .on_conflict_do_update(index_elements=[_LOCKS.c.calendar_id, _LOCKS.c.booking_date], set_=bump)
+        ]
+    # Generic: bump, and create the row when the day has never been booked.
+    where = (_LOCKS.c.calendar_id == int(calendar_id), _LOCKS.c.booking_date == day)
+    return [update(_LOCKS).where(*where).values(**bump), insert(_LOCKS).values(**row)]
+
+
+def _day_bookings_stmt(calendar_id: int, day: date, exclude_booking_id: int | None):
+    where = [
+        Booking.calendar_id == calendar_id,
+        Booking.booking_date == day,
+        Booking.status.in_(ACTIVE_STATUSES),
+    ]
+    if exclude_booking_id is not None:
+        where.append(Booking.id != exclude_booking_id)
+    return select(Booking.booking_time, Booking.booking_end_time).where(*where).with_for_update(read=True)
+
+
+def lock_booking_day(
+    db: Session, calendar_id: int, day: date, *, exclude_booking_id: int | None = None
+) -> list[tuple[time, time | None]]:
+    """Take the (calendar, day) lock; returns the day's active bookings as (start, end)."""
+    upsert, *fallback = _lock_statements(db.get_bind().dialect.name, calendar_id, day)
+    if not db.execute(upsert).rowcount and fallback:
+        try:
+            with db.begin_nested():
+                db.execute(fallback[0])
+        except IntegrityError:
+            db.execute(upsert)  # another writer created the row first
+    return [tuple(r) for r in db.execute(_day_bookings_stmt(calendar_id, day, exclude_booking_id)).all()]
+
+
+async def lock_booking_day_async(
+    db, calendar_id: int, day: date, *, exclude_booking_id: int | None = None
+) -> list[tuple[time, time | None]]:
+    """AsyncSession twin of lock_booking_day."""
+    upsert, *fallback = _lock_statements(db.bind.dialect.name, calendar_id, day)
+    if not (await db.execute(upsert)).rowcount and fallback:
+        try:
+            async with db.begin_nested():
+                await db.execute(fallback[0])
+        except IntegrityError:
+            await db.execute(upsert)
+    rows = (await db.execute(_day_bookings_stmt(calendar_id, day, exclude_booking_id))).all()
+    return [tuple(r) for r in rows]
+
+
+def day_conflict(
+    rows: list[tuple[time, time | None]], calendar, start_dt: datetime, end_dt: datetime
+) -> str | None:
+    """Error message if [start_dt, end_dt) cannot be booked next to the day's active bookings."""
+    day = start_dt.date()
+    if any(start == start_dt.time() for start, _ in rows):
+        return "Это время уже занято. Выберите другой слот."
+    max_per_day = calendar.max_services_per_day or 0
+    if max_per_day > 0 and len(rows) >= max_per_day:
+        return "Достигнут лимит записей на этот день."
+    break_delta = timedelta(minutes=calendar.break_between_services_minutes or 0)
+    for start, end in rows:
+        if not end:
+            continue
+        other_start = datetime.combine(day, start)
+        other_end = datetime.combine(day, end)
+        if not (end_dt + break_delta <= other_start or start_dt >= other_end + break_delta):
+            return "Это время уже занято или слишком близко к другой записи."
+    return None
+
+
+def prune_day_locks(before: date):
+    """Statement dropping lock rows for days that can no longer be booked."""
+    return delete(BookingDayLock).where(BookingDayLock.booking_date < before)
+
+
+def _prune_past_days(now: datetime):
+    from app.services.booking_sweeper import local_now
+
+    return prune_day_locks(local_now().date())  # booking_date is site-local, not UTC
+
+
+register_prune("day_locks", _prune_past_days)
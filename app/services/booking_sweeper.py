@@ -0,0 +1,75 @@
+"""Set-based sweeper: confirmed bookings whose end time has passed become `completed`.
+
+One UPDATE per run over ix_bookings_status_date_end (status, booking_date,
+booking_end_time). Runs from the reminders cron (endpoint + command) and on demand for a
+single calendar; page views only read. Client cards whose next booking date is no
+longer upcoming get their CRM aggregates re-derived in the same transaction. Expiry
+pruning of other tables lives in app.services.housekeeping.
+"""
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models import Booking
+from app.services.crm_aggregates import refresh_stale_next_bookings, refresh_stale_next_bookings_async
+
+logger = logging.getLogger(__name__)
+
+
+def local_now() -> datetime:
+    """Naive wall-clock in the site timezone (booking_date/time are stored naive-local)."""
+    return datetime.now(ZoneInfo(get_settings().timezone or "Europe/Moscow")).replace(tzinfo=None)
+
+
+def _sweep_statement(now: datetime, calendar_id: int | None):
+    today, t = now.date(), now.time()
+    # Explicit OR instead of COALESCE(end, start) keeps booking_end_time sargable.
+    ended = or_(
+        Booking.booking_date < today,
+        and_(
+            Booking.booking_date == today,
+            or_(
+                and_(Booking.booking_end_time.is_not(None), Booking.booking_end_time <= t),
+                and_(Booking.booking_end_time.is_(None), Booking.booking_time <= t),
+            ),
+        ),
+    )
+    where = [Booking.status == "confirmed", ended]
+    if calendar_id is not None:
+        where.append(Booking.calendar_id == int(calendar_id))
+    return (
+        update(Booking)
+        .where(*where)
+        .values(status="completed", updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def sweep_completed_bookings(db: Session, *, calendar_id: int | None = None, now: datetime | None = None) -> int:
+    now = now or local_now()
+    result = db.execute(_sweep_statement(now, calendar_id))
+    refresh_stale_next_bookings(db, today=now.date())
+    db.commit()
+    count = int(result.rowcount or 0)
+    if count:
+        logger.info("booking sweeper: %s bookings marked completed (calendar=%s)", count, calendar_id)
+    return count
+
+
+async def sweep_completed_bookings_async(
+    db, *, calendar_id: int | None = None, now: datetime | None = None
+) -> int:
+    now = now or local_now()
+    result = await db.execute(_sweep_statement(now, calendar_id))
+    await refresh_stale_next_bookings_async(db, today=now.date())
+    await db.commit()
+    count = int(result.rowcount or 0)
+    if count:
+        logger.info("booking sweeper: %s bookings marked completed (calendar=%s)", count, calendar_id)
+    return count
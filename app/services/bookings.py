@@ -2,10 +2,19 @@ import re
 import uuid
 from datetime import date, datetime, timedelta
 
-from sqlalchemy import or_
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.models import Booking, Calendar, ClientCard, Consultant, Service, TimeSlot
+from app.services.booking_locks import day_conflict, lock_booking_day, lock_booking_day_async
+from app.services.client_contacts import apply_contact_keys, contact_match_clause
+from app.services.crm_aggregates import (
+    card_percent,
+    record_card_change,
+    record_card_change_async,
+    refresh_card_aggregates,
+    refresh_card_aggregates_async,
+)
 from app.services.telegram import on_booking_created, on_booking_updated, notify_booking_rescheduled
 
 
@@ -42,6 +51,7 @@ def find_or_create_client_card(
 
     Phase 9: when client_user_id is set, match by user first and never merge into
     another card that already belongs to a different client_user_id.
+    Contacts match by indexed equality on the normalized keys (client_contacts).
     """
     card = None
     if client_user_id is not None:
@@ -54,20 +64,13 @@ def find_or_create_client_card(
             .first()
         )
 
-    if not card and (client_phone or client_email or client_telegram):
-        conditions = []
-        if client_phone:
-            conditions.append(ClientCard.phone == client_phone)
-        if client_email:
-            conditions.append(ClientCard.email == client_email)
-        if client_telegram:
-            tg_norm = client_telegram.lstrip("@").split("/")[-1].split("?")[0]
-            if tg_norm:
-                conditions.append(ClientCard.telegram.ilike(f"%{tg_norm}%"))
-        if conditions:
+    if not card:
+        match = contact_match_clause(client_phone, client_email, client_telegram)
+        if match is not None:
             candidates = (
                 db.query(ClientCard)
-                .filter(ClientCard.consultant_id == consultant.id, or_(*conditions))
+                .filter(ClientCard.consultant_id == consultant.id, match)
+                .order_by(ClientCard.id)
                 .all()
             )
             for cand in candidates:
@@ -90,10 +93,13 @@ def find_or_create_client_card(
             email=client_email or None,
             telegram=client_telegram or None,
         )
+        apply_contact_keys(card)
         db.add(card)
         db.flush()
+        record_card_change(db, consultant.id, "created", card_percent(card))
         return card
 
+    before = card_percent(card)
     updated = False
     if client_user_id is not None and card.client_user_id is None:
         card.client_user_id = client_user_id
@@ -111,7 +117,9 @@ def find_or_create_client_card(
         card.telegram = client_telegram
         updated = True
     if updated:
+        apply_contact_keys(card)
         db.flush()
+        record_card_change(db, consultant.id, "updated", card_percent(card) - before)
     return card
 
 
@@ -138,24 +146,15 @@ async def find_or_create_client_card_async(
             )
         ).scalar_one_or_none()
 
-    if not card and (client_phone or client_email or client_telegram):
-        conditions = []
-        if client_phone:
-            conditions.append(ClientCard.phone == client_phone)
-        if client_email:
-            conditions.append(ClientCard.email == client_email)
-        if client_telegram:
-            tg_norm = client_telegram.lstrip("@").split("/")[-1].split("?")[0]
-            if tg_norm:
-                conditions.append(ClientCard.telegram.ilike(f"%{tg_norm}%"))
-        if conditions:
+    if not card:
+        match = contact_match_clause(client_phone, client_email, client_telegram)
+        if match is not None:
             candidates = list(
                 (
                     await db.execute(
-                        select(ClientCard).where(
-                            ClientCard.consultant_id == consultant.id,
-                            or_(*conditions),
-                        )
+                        select(ClientCard)
+                        .where(ClientCard.consultant_id == consultant.id, match)
+                        .order_by(ClientCard.id)
                     )
                 )
                 .scalars()
@@ -180,10 +179,13 @@ async def find_or_create_client_card_async(
             email=client_email or None,
             telegram=client_telegram or None,
         )
+        apply_contact_keys(card)
         db.add(card)
         await db.flush()
+        await record_card_change_async(db, consultant.id, "created", card_percent(card))
         return card
 
+    before = card_percent(card)
     updated = False
     if client_user_id is not None and card.client_user_id is None:
         card.client_user_id = client_user_id
@@ -201,7 +203,9 @@ async def find_or_create_client_card_async(
         card.telegram = client_telegram
         updated = True
     if updated:
+        apply_contact_keys(card)
         await db.flush()
+        await record_card_change_async(db, consultant.id, "updated", card_percent(card) - before)
     return card
 
 
@@ -236,8 +240,6 @@ def create_public_booking(
     if phone_err:
         return None, phone_err
 
-    db.query(Calendar).filter(Calendar.id == calendar.id).with_for_update().one()
-
     start_time_obj = datetime.strptime(booking_time_str, "%H:%M").time()
     end_time_obj = datetime.strptime(booking_end_time_str, "%H:%M").time()
     start_dt = datetime.combine(booking_date, start_time_obj)
@@ -261,34 +263,6 @@ def create_public_booking(
     if not time_slot:
         return None, "Выбранное время не входит в доступные окна приёма."
 
-    slot_taken = (
-        db.query(Booking)
-        .filter(
-            Booking.calendar_id == calendar.id,
-            Booking.booking_date == booking_date,
-            Booking.booking_time == start_time_obj,
-            Booking.status.in_(["pending", "confirmed"]),
-        )
-        .with_for_update()
-        .first()
-    )
-    if slot_taken:
-        return None, "Это время уже занято. Выберите другой слот."
-
-    max_per_day = calendar.max_services_per_day or 0
-    existing_bookings = (
-        db.query(Booking)
-        .filter(
-            Booking.calendar_id == calendar.id,
-            Booking.booking_date == booking_date,
-            Booking.status.in_(["pending", "confirmed"]),
-        )
-        .with_for_update()
-        .all()
-    )
-    if max_per_day > 0 and len(existing_bookings) >= max_per_day:
-        return None, "Достигнут лимит записей на этот день."
-
     from zoneinfo import ZoneInfo
 
     from app.config import get_settings
@@ -300,16 +274,15 @@ def create_public_booking(
     if start_aware < min_start:
         return None, f"Запись доступна минимум за {book_ahead_hours} ч. до начала."
 
-    break_minutes = calendar.break_between_services_minutes or 0
-    break_delta = timedelta(minutes=break_minutes)
+    from app.services.vk_auth import resolve_vk_user_id_for_user
 
-    for booking in existing_bookings:
-        if not booking.booking_end_time:
-            continue
-        booking_start = datetime.combine(booking_date, booking.booking_time)
-        booking_end = datetime.combine(booking_date, booking.booking_end_time)
-        if not (end_dt + break_delta <= booking_start or start_dt >= booking_end + break_delta):
-            return None, "Это время уже занято или слишком близко к другой записи."
+    vk_user_id = resolve_vk_user_id_for_user(db, client_user_id)
+
+    # Serialize on (calendar, day) only; the lock row is held until commit.
+    rows = lock_booking_day(db, calendar.id, booking_date)
+    conflict = day_conflict(rows, calendar, start_dt, end_dt)
+    if conflict:
+        return None, conflict
 
     card = find_or_create_client_card(
         db,
@@ -321,9 +294,6 @@ def create_public_booking(
         client_user_id=client_user_id,
     )
     link_token = uuid.uuid4().hex[:24]
-    from app.services.vk_auth import resolve_vk_user_id_for_user
-
-    vk_user_id = resolve_vk_user_id_for_user(db, client_user_id)
     booking = Booking(
         service_id=service.id,
         time_slot_id=time_slot.id,
@@ -343,6 +313,8 @@ def create_public_booking(
         source="client",
     )
     db.add(booking)
+    db.flush()
+    refresh_card_aggregates(db, [card.id])
     db.commit()
     db.refresh(booking)
     on_booking_created(db, booking)
@@ -366,7 +338,6 @@ async def create_public_booking_async(
 ) -> tuple[Booking | None, str | None]:
     """AsyncSession twin of create_public_booking. Notify/Google still via sync bridge."""
     from sqlalchemy import select
-    from sqlalchemy.orm import selectinload
 
     if consultant is None:
         consultant = (
@@ -396,10 +367,6 @@ async def create_public_booking_async(
     if phone_err:
         return None, phone_err
 
-    (
-        await db.execute(select(Calendar).where(Calendar.id == calendar.id).with_for_update())
-    ).scalar_one()
-
     start_time_obj = datetime.strptime(booking_time_str, "%H:%M").time()
     end_time_obj = datetime.strptime(booking_end_time_str, "%H:%M").time()
     start_dt = datetime.combine(booking_date, start_time_obj)
@@ -423,40 +390,6 @@ async def create_public_booking_async(
     if not time_slot:
         return None, "Выбранное время не входит в доступные окна приёма."
 
-    slot_taken = (
-        await db.execute(
-            select(Booking)
-            .where(
-                Booking.calendar_id == calendar.id,
-                Booking.booking_date == booking_date,
-                Booking.booking_time == start_time_obj,
-                Booking.status.in_(["pending", "confirmed"]),
-            )
-            .with_for_update()
-        )
-    ).scalar_one_or_none()
-    if slot_taken:
-        return None, "Это время уже занято. Выберите другой слот."
-
-    max_per_day = calendar.max_services_per_day or 0
-    existing_bookings = list(
-        (
-            await db.execute(
-                select(Booking)
-                .where(
-                    Booking.calendar_id == calendar.id,
-                    Booking.booking_date == booking_date,
-                    Booking.status.in_(["pending", "confirmed"]),
-                )
-                .with_for_update()
-            )
-        )
-        .scalars()
-        .all()
-    )
-    if max_per_day > 0 and len(existing_bookings) >= max_per_day:
-        return None, "Достигнут лимит записей на этот день."
-
     from zoneinfo import ZoneInfo
 
     from app.config import get_settings
@@ -468,16 +401,14 @@ async def create_public_booking_async(
     if start_aware < min_start:
         return None, f"Запись доступна минимум за {book_ahead_hours} ч. до начала."
 
-    break_minutes = calendar.break_between_services_minutes or 0
-    break_delta = timedelta(minutes=break_minutes)
+    from app.services.vk_auth import resolve_vk_user_id_for_user_async
 
-    for booking in existing_bookings:
-        if not booking.booking_end_time:
-            continue
-        booking_start = datetime.combine(booking_date, booking.booking_time)
-        booking_end = datetime.combine(booking_date, booking.booking_end_time)
-        if not (end_dt + break_delta <= booking_start or start_dt >= booking_end + break_delta):
-            return None, "Это время уже занято или слишком близко к другой записи."
+    vk_user_id = await resolve_vk_user_id_for_user_async(db, client_user_id)
+
+    rows = await lock_booking_day_async(db, calendar.id, booking_date)
+    conflict = day_conflict(rows, calendar, start_dt, end_dt)
+    if conflict:
+        return None, conflict
 
     card = await find_or_create_client_card_async(
         db,
@@ -489,9 +420,6 @@ async def create_public_booking_async(
         client_user_id=client_user_id,
     )
     link_token = uuid.uuid4().hex[:24]
-    from app.services.vk_auth import resolve_vk_user_id_for_user_async
-
-    vk_user_id = await resolve_vk_user_id_for_user_async(db, client_user_id)
     booking = Booking(
         service_id=service.id,
         time_slot_id=time_slot.id,
@@ -511,15 +439,12 @@ async def create_public_booking_async(
         source="client",
     )
     db.add(booking)
+    await db.flush()
+    await refresh_card_aggregates_async(db, [card.id])
     await db.commit()
-
-    booking = (
-        await db.execute(
-            select(Booking)
-            .options(selectinload(Booking.service), selectinload(Booking.calendar))
-            .where(Booking.id == booking.id)
-        )
-    ).scalar_one()
+    # Already loaded in this session: no re-select after commit (expire_on_commit=False).
+    set_committed_value(booking, "service", service)
+    set_committed_value(booking, "calendar", calendar)
 
     from app.services.notify_bridge import schedule_on_booking_created
 
@@ -559,19 +484,13 @@ async def find_matching_client_cards_async(
 ) -> list[ClientCard]:
     from sqlalchemy import select
 
-    conditions = []
-    if phone:
-        conditions.append(ClientCard.phone == phone)
-    if email:
-        conditions.append(ClientCard.email == email)
-    if telegram:
-        conditions.append(ClientCard.telegram.ilike(f"%{telegram}%"))
-    if not conditions:
+    match = contact_match_clause(phone, email, telegram)
+    if match is None:
         return []
     rows = (
         await db.execute(
             select(ClientCard)
-            .where(ClientCard.consultant_id == consultant_id, or_(*conditions))
+            .where(ClientCard.consultant_id == consultant_id, match)
             .order_by(ClientCard.updated_at.desc())
             .limit(limit)
         )
@@ -597,7 +516,6 @@ async def create_specialist_booking_async(
 ) -> tuple[Booking | None, str | None, list[dict] | None]:
     """Create booking as specialist. Returns (booking, error, matches_if_conflict)."""
     from sqlalchemy import select
-    from sqlalchemy.orm import selectinload
 
     name = (client_name or "").strip()
     if not name:
@@ -650,10 +568,6 @@ async def create_specialist_booking_async(
     if abs(duration_minutes - service.duration_minutes) > 1:
         return None, "Неверная длительность. Выберите время из списка доступных слотов.", None
 
-    (
-        await db.execute(select(Calendar).where(Calendar.id == calendar.id).with_for_update())
-    ).scalar_one()
-
     day_of_week = booking_date.weekday()
     time_slot = (
         await db.execute(
@@ -669,49 +583,10 @@ async def create_specialist_booking_async(
     if not time_slot:
         return None, "Выбранное время не входит в доступные окна приёма.", None
 
-    slot_taken = (
-        await db.execute(
-            select(Booking)
-            .where(
-                Booking.calendar_id == calendar.id,
-                Booking.booking_date == booking_date,
-                Booking.booking_time == start_time_obj,
-                Booking.status.in_(["pending", "confirmed"]),
-            )
-            .with_for_update()
-        )
-    ).scalar_one_or_none()
-    if slot_taken:
-        return None, "Это время уже занято. Выберите другой слот.", None
-
-    existing_bookings = list(
-        (
-            await db.execute(
-                select(Booking)
-                .where(
-                    Booking.calendar_id == calendar.id,
-                    Booking.booking_date == booking_date,
-                    Booking.status.in_(["pending", "confirmed"]),
-                )
-                .with_for_update()
-            )
-        )
-        .scalars()
-        .all()
-    )
-    max_per_day = calendar.max_services_per_day or 0
-    if max_per_day > 0 and len(existing_bookings) >= max_per_day:
-        return None, "Достигнут лимит записей на этот день.", None
-
-    break_minutes = calendar.break_between_services_minutes or 0
-    break_delta = timedelta(minutes=break_minutes)
-    for booking in existing_bookings:
-        if not booking.booking_end_time:
-            continue
-        booking_start = datetime.combine(booking_date, booking.booking_time)
-        booking_end = datetime.combine(booking_date, booking.booking_end_time)
-        if not (end_dt + break_delta <= booking_start or start_dt >= booking_end + break_delta):
-            return None, "Это время уже занято или слишком близко к другой записи.", None
+    rows = await lock_booking_day_async(db, calendar.id, booking_date)
+    conflict = day_conflict(rows, calendar, start_dt, end_dt)
+    if conflict:
+        return None, conflict, None
 
     card = None
     if client_card_id is not None:
@@ -754,8 +629,10 @@ async def create_specialist_booking_async(
                 email=email,
                 telegram=telegram,
             )
+            apply_contact_keys(card)
             db.add(card)
             await db.flush()
+            await record_card_change_async(db, consultant.id, "created", card_percent(card))
         else:
             card = await find_or_create_client_card_async(
                 db,
@@ -785,15 +662,12 @@ async def create_specialist_booking_async(
         source="specialist",
     )
     db.add(booking)
+    await db.flush()
+    await refresh_card_aggregates_async(db, [card.id])
     await db.commit()
-
-    booking = (
-        await db.execute(
-            select(Booking)
-            .options(selectinload(Booking.service), selectinload(Booking.calendar))
-            .where(Booking.id == booking.id)
-        )
-    ).scalar_one()
+    # Already loaded in this session: no re-select after commit (expire_on_commit=False).
+    set_committed_value(booking, "service", service)
+    set_committed_value(booking, "calendar", calendar)
 
     from app.services.notify_bridge import schedule_on_booking_created
 
@@ -801,60 +675,6 @@ async def create_specialist_booking_async(
     return booking, None, None
 
 
-def mark_past_bookings_completed(db: Session, calendars: list[Calendar]) -> None:
-    from zoneinfo import ZoneInfo
-
-    from app.config import get_settings
-
-    tz = ZoneInfo(get_settings().timezone or "Europe/Moscow")
-    now = datetime.now(tz).replace(tzinfo=None)
-    calendar_ids = [c.id for c in calendars]
-    bookings = (
-        db.query(Booking)
-        .filter(Booking.calendar_id.in_(calendar_ids), Booking.status == "confirmed")
-        .all()
-    )
-    for b in bookings:
-        end_time = b.booking_end_time or b.booking_time
-        end_dt = datetime.combine(b.booking_date, end_time)
-        if end_dt <= now:
-            b.status = "completed"
-    db.commit()
-
-
-async def mark_past_bookings_completed_async(db, calendars: list[Calendar]) -> None:
-    from zoneinfo import ZoneInfo
-
-    from sqlalchemy import select
-
-    from app.config import get_settings
-
-    tz = ZoneInfo(get_settings().timezone or "Europe/Moscow")
-    now = datetime.now(tz).replace(tzinfo=None)
-    calendar_ids = [c.id for c in calendars]
-    if not calendar_ids:
-        return
-    bookings = list(
-        (
-            await db.execute(
-                select(Booking).where(
-                    Booking.calendar_id.in_(calendar_ids),
-                    Booking.status == "confirmed",
-                )
-            )
-        ).scalars().all()
-    )
-    changed = False
-    for b in bookings:
-        end_time = b.booking_end_time or b.booking_time
-        end_dt = datetime.combine(b.booking_date, end_time)
-        if end_dt <= now:
-            b.status = "completed"
-            changed = True
-    if changed:
-        await db.commit()
-
-
 def reschedule_booking(
     db: Session,
     booking: Booking,
@@ -894,21 +714,12 @@ def reschedule_booking(
     break_delta = timedelta(minutes=break_minutes)
     start_dt = datetime.combine(new_date, start_time_obj)
 
-    existing = (
-        db.query(Booking)
-        .filter(
-            Booking.calendar_id == calendar.id,
-            Booking.booking_date == new_date,
-            Booking.status.in_(["pending", "confirmed"]),
-            Booking.id != booking.id,
-        )
-        .all()
-    )
-    for other in existing:
-        if not other.booking_end_time:
+    existing = lock_booking_day(db, calendar.id, new_date, exclude_booking_id=booking.id)
+    for other_time, other_end_time in existing:
+        if not other_end_time:
             continue
-        other_start = datetime.combine(new_date, other.booking_time)
-        other_end = datetime.combine(new_date, other.booking_end_time)
+        other_start = datetime.combine(new_date, other_time)
+        other_end = datetime.combine(new_date, other_end_time)
         if not (end_dt + break_delta <= other_start or start_dt >= other_end + break_delta):
             return "Это время уже занято."
 
@@ -925,6 +736,7 @@ def reschedule_booking(
     booking.reminder_1h_sent = False
     booking.specialist_reminder_24h_sent = False
     booking.specialist_reminder_1h_sent = False
+    refresh_card_aggregates(db, [booking.client_card_id])
     db.commit()
     db.refresh(booking)
     on_booking_updated(db, booking, created=False)
@@ -996,25 +808,12 @@ async def reschedule_booking_async(
     break_delta = timedelta(minutes=break_minutes)
     start_dt = datetime.combine(new_date, start_time_obj)
 
-    existing = list(
-        (
-            await db.execute(
-                select(Booking).where(
-                    Booking.calendar_id == calendar.id,
-                    Booking.booking_date == new_date,
-                    Booking.status.in_(["pending", "confirmed"]),
-                    Booking.id != booking.id,
-                )
-            )
-        )
-        .scalars()
-        .all()
-    )
-    for other in existing:
-        if not other.booking_end_time:
+    existing = await lock_booking_day_async(db, calendar.id, new_date, exclude_booking_id=booking.id)
+    for other_time, other_end_time in existing:
+        if not other_end_time:
             continue
-        other_start = datetime.combine(new_date, other.booking_time)
-        other_end = datetime.combine(new_date, other.booking_end_time)
+        other_start = datetime.combine(new_date, other_time)
+        other_end = datetime.combine(new_date, other_end_time)
         if not (end_dt + break_delta <= other_start or start_dt >= other_end + break_delta):
             return "Это время уже занято."
 
@@ -1030,6 +829,7 @@ async def reschedule_booking_async(
     booking.reminder_1h_sent = False
     booking.specialist_reminder_24h_sent = False
     booking.specialist_reminder_1h_sent = False
+    await refresh_card_aggregates_async(db, [booking.client_card_id])
     await db.commit()
 
     from app.services.notify_bridge import schedule_rescheduled
@@ -1,12 +1,23 @@
-"""Bookings hub: dashboard, grouping, sidebar, serialization."""
+"""Bookings hub: dashboard, grouping, sidebar, serialization.
+
+The `/booking/` page reads upcoming/past lists in keyset pages of (date, time, id) with
+the status filter in SQL; dashboard and sidebar come from aggregate / bounded queries.
+"""
 from __future__ import annotations
 
 from datetime import date, datetime, time, timedelta
 from decimal import Decimal
 
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, func, or_, select
+from sqlalchemy.orm import selectinload
+
+from app.models.core import Booking, Service
 
-from app.models.core import Booking
+PAGE_SIZE = 30
+SECTIONS = ("upcoming", "past")
+STATUS_FILTERS = ("all", "pending", "confirmed", "completed", "cancelled")
+_UPCOMING_STATUSES = ("pending", "confirmed")
+_REVENUE_STATUSES = ("pending", "confirmed", "completed")
 
 MONTH_NAMES = (
     "января", "февраля", "марта", "апреля", "мая", "июня",
@@ -170,68 +181,200 @@ def sidebar_data(upcoming: list[Booking], today: date, now: time) -> dict:
     }
 
 
-def stats_bookings(db: Session, cal_ids: list[int]) -> list[Booking]:
-    if not cal_ids:
-        return []
-    from sqlalchemy.orm import joinedload
-
-    return (
-        db.query(Booking)
-        .options(joinedload(Booking.service), joinedload(Booking.calendar))
-        .filter(
-            Booking.calendar_id.in_(cal_ids),
-            Booking.status.in_(["pending", "confirmed", "completed"]),
+# --- keyset pages -----------------------------------------------------------------------
+
+
+def encode_cursor(booking: Booking) -> str:
+    return f"{booking.booking_date.isoformat()}_{booking.booking_time.strftime('%H%M%S')}_{booking.id}"
+
+
+def decode_cursor(raw: str | None) -> tuple[date, time, int] | None:
+    if not raw:
+        return None
+    try:
+        d, t, i = raw.split("_")
+        return date.fromisoformat(d), datetime.strptime(t, "%H%M%S").time(), int(i)
+    except (ValueError, TypeError):
+        return None
+
+
+def _section_where(section: str, status: str, cal_ids: list[int], today: date, now: time) -> list | None:
+    """WHERE for one list; None when the status filter makes the list empty."""
+    where = [Booking.calendar_id.in_(cal_ids)]
+    if status == "cancelled":
+        # Cancelled view: one list of all cancelled bookings, newest first.
+        if section != "upcoming":
+            return None
+        return where + [Booking.status == "cancelled"]
+    if section == "upcoming":
+        if status != "all" and status not in _UPCOMING_STATUSES:
+            return None
+        where += [
+            Booking.status == status if status != "all" else Booking.status.in_(_UPCOMING_STATUSES),
+            or_(
+                Booking.booking_date > today,
+                and_(Booking.booking_date == today, Booking.booking_time >= now),
+                and_(Booking.status == "pending", Booking.booking_date >= today),
+            ),
+        ]
+        return where
+    where.append(
+        or_(
+            Booking.booking_date < today,
+            and_(Booking.booking_date == today, Booking.booking_time < now, Booking.status != "pending"),
         )
-        .all()
     )
+    if status != "all":
+        where.append(Booking.status == status)
+    return where
 
 
-async def stats_bookings_async(db, cal_ids: list[int]) -> list[Booking]:
-    if not cal_ids:
-        return []
-    from sqlalchemy import select
-    from sqlalchemy.orm import selectinload
+def _section_descending(section: str, status: str) -> bool:
+    return section == "past" or status == "cancelled"
 
-    result = await db.execute(
-        select(Booking)
-        .options(selectinload(Booking.service), selectinload(Booking.calendar))
-        .where(
-            Booking.calendar_id.in_(cal_ids),
-            Booking.status.in_(["pending", "confirmed", "completed"]),
+
+def _after(cursor: tuple[date, time, int], descending: bool):
+    d, t, i = cursor
+    if descending:
+        return or_(
+            Booking.booking_date < d,
+            and_(Booking.booking_date == d, Booking.booking_time < t),
+            and_(Booking.booking_date == d, Booking.booking_time == t, Booking.id < i),
         )
+    return or_(
+        Booking.booking_date > d,
+        and_(Booking.booking_date == d, Booking.booking_time > t),
+        and_(Booking.booking_date == d, Booking.booking_time == t, Booking.id > i),
     )
-    return list(result.scalars().unique().all())
 
 
-def build_bookings_payload(
-    db: Session,
+async def fetch_bookings_page_async(
+    db,
     cal_ids: list[int],
-    upcoming: list[Booking],
-    past: list[Booking],
+    section: str,
     today: date,
     now: time,
-) -> dict:
-    all_stats = stats_bookings(db, cal_ids)
+    *,
+    status: str = "all",
+    after: str | None = None,
+    limit: int = PAGE_SIZE,
+) -> tuple[list[Booking], str | None]:
+    """One keyset page of a bookings list + cursor of the next page (None = last page)."""
+    if not cal_ids:
+        return [], None
+    where = _section_where(section, status, cal_ids, today, now)
+    if where is None:
+        return [], None
+    descending = _section_descending(section, status)
+    cursor = decode_cursor(after)
+    if cursor is not None:
+        where.append(_after(cursor, descending))
+    order = [Booking.booking_date, Booking.booking_time, Booking.id]
+    if descending:
+        order = [col.desc() for col in order]
+    stmt = (
+        select(Booking)
+        .options(selectinload(Booking.service), selectinload(Booking.calendar))
+        .where(*where)
+        .order_by(*order)
+        .limit(limit + 1)
+    )
+    rows = list((await db.execute(stmt)).scalars().unique().all())
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def bookings_page_groups(section: str, status: str, bookings: list[Booking], today: date, now: time) -> list[dict]:
+    return group_by_day(bookings, today, now, reverse=_section_descending(section, status))
+
+
+async def dashboard_stats_async(db, cal_ids: list[int], today: date) -> dict:
+    """Dashboard counters in one aggregate over the 7-day window (no rows loaded)."""
+    empty = {"today_count": 0, "tomorrow_count": 0, "week_count": 0, "week_revenue": 0.0, "today_revenue": 0.0}
+    if not cal_ids:
+        return empty
+    tomorrow = today + timedelta(days=1)
+    week_end = today + timedelta(days=6)
+    price = func.coalesce(Service.price, 0)
+    row = (
+        await db.execute(
+            select(
+                func.sum(case((Booking.booking_date == today, 1), else_=0)),
+                func.sum(case((Booking.booking_date == tomorrow, 1), else_=0)),
+                func.count(Booking.id),
+                func.sum(price),
+                func.sum(case((Booking.booking_date == today, price), else_=0)),
+            )
+            .select_from(Booking)
+            .outerjoin(Service, Service.id == Booking.service_id)
+            .where(
+                Booking.calendar_id.in_(cal_ids),
+                Booking.status.in_(_REVENUE_STATUSES),
+                Booking.booking_date >= today,
+                Booking.booking_date <= week_end,
+            )
+        )
+    ).one()
     return {
-        "dashboard": dashboard_stats(all_stats, today),
-        "upcoming_groups": group_by_day(upcoming, today, now),
-        "past_groups": group_by_day(past, today, now, reverse=True),
-        "sidebar": sidebar_data(upcoming, today, now),
+        "today_count": int(row[0] or 0),
+        "tomorrow_count": int(row[1] or 0),
+        "week_count": int(row[2] or 0),
+        "week_revenue": float(row[3] or 0),
+        "today_revenue": float(row[4] or 0),
     }
 
 
-async def build_bookings_payload_async(
+async def sidebar_data_async(db, cal_ids: list[int], today: date, now: time) -> dict:
+    """Sidebar from today's upcoming rows + the single next booking (bounded queries)."""
+    if not cal_ids:
+        return sidebar_data([], today, now)
+    upcoming_where = _section_where("upcoming", "all", cal_ids, today, now)
+    todays = list(
+        (
+            await db.execute(
+                select(Booking)
+                .options(selectinload(Booking.service))
+                .where(*upcoming_where, Booking.booking_date == today)
+                .order_by(Booking.booking_time, Booking.id)
+            )
+        ).scalars().unique().all()
+    )
+    if not todays:
+        nearest = (
+            await db.execute(
+                select(Booking)
+                .options(selectinload(Booking.service))
+                .where(*upcoming_where)
+                .order_by(Booking.booking_date, Booking.booking_time, Booking.id)
+                .limit(1)
+            )
+        ).scalars().first()
+        todays = [nearest] if nearest is not None else []
+    return sidebar_data(todays, today, now)
+
+
+async def build_bookings_hub_async(
     db,
     cal_ids: list[int],
-    upcoming: list[Booking],
-    past: list[Booking],
     today: date,
     now: time,
+    *,
+    status: str = "all",
+    limit: int = PAGE_SIZE,
 ) -> dict:
-    all_stats = await stats_bookings_async(db, cal_ids)
+    """First page of both lists + counters + sidebar for `/booking/`."""
+    upcoming, upcoming_next = await fetch_bookings_page_async(
+        db, cal_ids, "upcoming", today, now, status=status, limit=limit
+    )
+    past, past_next = await fetch_bookings_page_async(
+        db, cal_ids, "past", today, now, status=status, limit=limit
+    )
     return {
-        "dashboard": dashboard_stats(all_stats, today),
-        "upcoming_groups": group_by_day(upcoming, today, now),
-        "past_groups": group_by_day(past, today, now, reverse=True),
-        "sidebar": sidebar_data(upcoming, today, now),
+        "dashboard": await dashboard_stats_async(db, cal_ids, today),
+        "upcoming_groups": bookings_page_groups("upcoming", status, upcoming, today, now),
+        "past_groups": bookings_page_groups("past", status, past, today, now),
+        "upcoming_next": upcoming_next,
+        "past_next": past_next,
+        "sidebar": await sidebar_data_async(db, cal_ids, today, now),
+        "status": status,
     }
@@ -6,7 +6,6 @@ import time
 from datetime import datetime
 from typing import Any
 
-import requests
 from sqlalchemy.orm import Session
 
 from app.config import get_settings
@@ -251,6 +250,8 @@ def cancel_broadcast_job(db: Session, job_id: int) -> tuple[TelegramBroadcastJob
 
 
 def send_telegram_with_retry(chat_id: str, text: str, *, retries: int = 3) -> tuple[bool, str | None]:
+    import requests
+
     settings = get_settings()
     token = settings.telegram_bot_token
     if not token:
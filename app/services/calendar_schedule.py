@@ -122,6 +122,26 @@ def slots_by_day(db: Session, calendar_id: int) -> list[list[TimeSlot]]:
     return grouped
 
 
+def schedule_version_stmt(calendar_id: int):
+    """Source rows of the schedule payload: calendar settings stamp + the slot rows themselves
+    (TimeSlot has no updated_at, and a calendar only has a few dozen slots)."""
+    from sqlalchemy import select
+
+    return (
+        select(
+            Calendar.updated_at,
+            TimeSlot.id,
+            TimeSlot.day_of_week,
+            TimeSlot.start_time,
+            TimeSlot.end_time,
+            TimeSlot.is_available,
+        )
+        .outerjoin(TimeSlot, TimeSlot.calendar_id == Calendar.id)
+        .where(Calendar.id == calendar_id)
+        .order_by(TimeSlot.id)
+    )
+
+
 async def slots_by_day_async(db, calendar_id: int) -> list[list[TimeSlot]]:
     from sqlalchemy import select
 
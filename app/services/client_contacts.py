@@ -0,0 +1,92 @@
+"""Normalized contact keys on client cards: indexed lookups for find_or_create_client_card.
+
+phone_key = digits only, email_key = trimmed lower-case, telegram_key = canonical
+handle (no @, no t.me/ prefix or query, lower-case). Each is indexed with
+consultant_id, so matching a booking to a card is an equality probe instead of a
+leading-wildcard ILIKE over every card of the specialist. Keys are set on every card
+write via apply_contact_keys(); backfill_contact_keys() fills legacy rows.
+"""
+from __future__ import annotations
+
+import logging
+import re
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import flag_modified
+
+from app.models import ClientCard
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH = 500
+
+
+def phone_key(raw: str | None) -> str | None:
+    return re.sub(r"\D", "", raw or "")[:30] or None
+
+
+def email_key(raw: str | None) -> str | None:
+    return (raw or "").strip().lower()[:254] or None
+
+
+def telegram_key(raw: str | None) -> str | None:
+    value = (raw or "").strip().lstrip("@").rstrip("/")
+    if "/" in value:
+        value = value.split("/")[-1]
+    value = value.split("?")[0].lstrip("@")
+    return value.lower()[:255] or None
+
+
+def apply_contact_keys(card: ClientCard) -> bool:
+    """Sync the key columns from phone/email/telegram; True when anything changed."""
+    keys = {
+        "phone_key": phone_key(card.phone),
+        "email_key": email_key(card.email),
+        "telegram_key": telegram_key(card.telegram),
+    }
+    changed = False
+    for attr, value in keys.items():
+        if getattr(card, attr) != value:
+            setattr(card, attr, value)
+            changed = True
+    return changed
+
+
+def contact_match_clause(phone: str | None, email: str | None, telegram: str | None):
+    """OR of indexed key equalities for the given raw contacts; None when nothing to match."""
+    conditions = []
+    for column, key in (
+        (ClientCard.phone_key, phone_key(phone)),
+        (ClientCard.email_key, email_key(email)),
+        (ClientCard.telegram_key, telegram_key(telegram)),
+    ):
+        if key:
+            conditions.append(column == key)
+    return or_(*conditions) if conditions else None
+
+
+def backfill_contact_keys(db: Session, *, batch: int = BACKFILL_BATCH) -> dict:
+    """Walk cards by id in batches, filling/repairing keys; commits per batch."""
+    last_id, scanned, updated = 0, 0, 0
+    while True:
+        cards = list(
+            db.execute(
+                select(ClientCard).where(ClientCard.id > last_id).order_by(ClientCard.id).limit(batch)
+            )
+            .scalars()
+            .all()
+        )
+        if not cards:
+            break
+        for card in cards:
+            if apply_contact_keys(card):
+                # Key sync is not a card edit: keep CRM "recent" ordering intact.
+                flag_modified(card, "updated_at")
+                updated += 1
+        db.commit()
+        scanned += len(cards)
+        last_id = cards[-1].id
+        db.expunge_all()
+    logger.info("client contact keys backfill: %s scanned, %s updated", scanned, updated)
+    return {"scanned": scanned, "updated": updated}
@@ -1,13 +1,16 @@
-"""Client CRM: dashboard stats, card serialization, badges."""
+"""Client CRM: paged card list, dashboard KPIs, card serialization, badges."""
 from __future__ import annotations
 
 from datetime import date, datetime, timedelta
 
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, func, not_, or_, select
 
 from app.models import Booking, Calendar, ClientCard
+from app.services.crm_aggregates import local_today
 
+PAGE_SIZE = 24
+SORTS = ("recent", "name", "created", "last_visit")
+FILTERS = ("all", "new", "active", "vip", "archive")
 NEW_DAYS = 14
 INACTIVE_DAYS = 90
 VIP_BOOKINGS = 5
@@ -32,18 +35,21 @@ def avatar_color(card_id: int) -> str:
     return palette[card_id % len(palette)]
 
 
+# (field, label, weight) — mirrored in SQL by completeness_sql() for the counter row.
+COMPLETENESS_FIELDS = (
+    ("name", "Имя", 20),
+    ("phone", "Телефон", 25),
+    ("email", "Email", 25),
+    ("telegram", "Telegram", 15),
+    ("notes", "Заметки", 15),
+)
+
+
 def card_completeness(card: ClientCard) -> dict:
     checks = []
     score = 0
-    fields = (
-        ("name", "Имя", 20, _text(card.name)),
-        ("phone", "Телефон", 25, _text(card.phone)),
-        ("email", "Email", 25, _text(card.email)),
-        ("telegram", "Telegram", 15, _text(card.telegram)),
-        ("notes", "Заметки", 15, _text(card.notes)),
-    )
-    for key, label, weight, val in fields:
-        done = bool(val)
+    for key, label, weight in COMPLETENESS_FIELDS:
+        done = bool(_text(getattr(card, key)))
         if done:
             score += weight
         checks.append({"id": key, "label": label, "weight": weight, "done": done})
@@ -52,6 +58,18 @@ def card_completeness(card: ClientCard) -> dict:
     return {"percent": percent, "checks": checks, "missing": missing[:3]}
 
 
+def completeness_sql():
+    """SQL twin of card_completeness()["percent"] (weights sum to 100)."""
+    terms = [
+        case((func.trim(func.coalesce(getattr(ClientCard, key), "")) != "", weight), else_=0)
+        for key, _, weight in COMPLETENESS_FIELDS
+    ]
+    expr = terms[0]
+    for term in terms[1:]:
+        expr = expr + term
+    return expr
+
+
 def _derive_badge(
     card: ClientCard,
     booking_count: int,
@@ -86,172 +104,159 @@ def _status_label(badge: str | None) -> tuple[str, str]:
     return "active", "Активный"
 
 
-def _calendar_ids(db: Session, consultant_id: int) -> list[int]:
-    rows = db.query(Calendar.id).filter(Calendar.consultant_id == consultant_id).all()
-    return [r[0] for r in rows]
-
-
-async def _calendar_ids_async(db, consultant_id: int) -> list[int]:
-    from sqlalchemy import select
-
-    return list(
-        (await db.execute(select(Calendar.id).where(Calendar.consultant_id == consultant_id)))
-        .scalars()
-        .all()
-    )
-
-
-def booking_stats(db: Session, consultant_id: int, card_ids: list[int]) -> dict[int, dict]:
-    cal_ids = _calendar_ids(db, consultant_id)
-    if not cal_ids or not card_ids:
-        return {}
-    rows = (
-        db.query(
-            Booking.client_card_id,
-            func.count(Booking.id),
-            func.max(Booking.booking_date),
-        )
-        .filter(
-            Booking.calendar_id.in_(cal_ids),
-            Booking.client_card_id.in_(card_ids),
-        )
-        .group_by(Booking.client_card_id)
-        .all()
-    )
-    return {
-        cid: {"booking_count": cnt, "last_booking": last_date}
-        for cid, cnt, last_date in rows
-        if cid is not None
-    }
-
-
-async def booking_stats_async(db, consultant_id: int, card_ids: list[int]) -> dict[int, dict]:
-    from sqlalchemy import select
-
-    cal_ids = await _calendar_ids_async(db, consultant_id)
-    if not cal_ids or not card_ids:
-        return {}
-    rows = (
+async def consultant_booking_counts_async(db, consultant_id: int, today: date | None = None) -> tuple[int, int]:
+    today = today or local_today()
+    today_count, upcoming = (
         await db.execute(
             select(
-                Booking.client_card_id,
-                func.count(Booking.id),
-                func.max(Booking.booking_date),
-            )
-            .where(
-                Booking.calendar_id.in_(cal_ids),
-                Booking.client_card_id.in_(card_ids),
+                func.coalesce(func.sum(case((Booking.booking_date == today, 1), else_=0)), 0),
+                func.coalesce(
+                    func.sum(case((Booking.status.in_(["pending", "confirmed"]), 1), else_=0)), 0
+                ),
             )
-            .group_by(Booking.client_card_id)
+            .select_from(Booking)
+            .join(Calendar, Calendar.id == Booking.calendar_id)
+            .where(Calendar.consultant_id == consultant_id, Booking.booking_date >= today)
         )
-    ).all()
-    return {
-        cid: {"booking_count": cnt, "last_booking": last_date}
-        for cid, cnt, last_date in rows
-        if cid is not None
-    }
+    ).one()
+    return int(today_count or 0), int(upcoming or 0)
 
 
-def consultant_booking_counts(db: Session, consultant_id: int) -> tuple[int, int]:
-    cal_ids = _calendar_ids(db, consultant_id)
-    if not cal_ids:
-        return 0, 0
-    today = date.today()
-    today_count = (
-        db.query(func.count(Booking.id))
-        .filter(Booking.calendar_id.in_(cal_ids), Booking.booking_date == today)
-        .scalar()
-    ) or 0
-    upcoming = (
-        db.query(func.count(Booking.id))
-        .filter(
-            Booking.calendar_id.in_(cal_ids),
-            Booking.booking_date >= today,
-            Booking.status.in_(["pending", "confirmed"]),
-        )
-        .scalar()
-    ) or 0
-    return today_count, upcoming
-
+async def crm_dashboard_async(db, consultant_id: int, today: date | None = None) -> dict:
+    """KPI row: totals from the counter row, time-window counts from indexed aggregates."""
+    from app.services.crm_aggregates import read_crm_counter_async
 
-async def consultant_booking_counts_async(db, consultant_id: int) -> tuple[int, int]:
-    from sqlalchemy import select
-
-    cal_ids = await _calendar_ids_async(db, consultant_id)
-    if not cal_ids:
-        return 0, 0
-    today = date.today()
-    today_count = (
-        await db.execute(
-            select(func.count(Booking.id)).where(
-                Booking.calendar_id.in_(cal_ids),
-                Booking.booking_date == today,
-            )
-        )
-    ).scalar_one() or 0
-    upcoming = (
+    today = today or local_today()
+    counter = await read_crm_counter_async(db, consultant_id)
+    total = counter["cards_total"]
+    new_count = (
         await db.execute(
-            select(func.count(Booking.id)).where(
-                Booking.calendar_id.in_(cal_ids),
-                Booking.booking_date >= today,
-                Booking.status.in_(["pending", "confirmed"]),
+            select(func.count(ClientCard.id)).where(
+                ClientCard.consultant_id == consultant_id,
+                ClientCard.created_at >= _day_start(today - timedelta(days=NEW_DAYS)),
             )
         )
     ).scalar_one() or 0
-    return today_count, upcoming
-
-
-def dashboard_stats(db: Session, consultant_id: int, cards: list[ClientCard]) -> dict:
-    today = date.today()
-    total = len(cards)
-    new_count = sum(
-        1 for c in cards
-        if c.created_at and (today - c.created_at.date()).days <= NEW_DAYS
-    )
-    today_bookings, upcoming = consultant_booking_counts(db, consultant_id)
-    completeness_vals = [card_completeness(c)["percent"] for c in cards]
-    avg_completeness = round(sum(completeness_vals) / total) if total else 0
-    last_updated = max((c.updated_at for c in cards if c.updated_at), default=None)
-    last_created = max((c.created_at for c in cards if c.created_at), default=None)
+    today_bookings, upcoming = await consultant_booking_counts_async(db, consultant_id, today)
+    last_updated = counter["last_card_updated_at"]
+    last_created = counter["last_card_created_at"]
     return {
         "total": total,
-        "new_count": new_count,
+        "new_count": int(new_count),
         "today_bookings": today_bookings,
         "upcoming": upcoming,
-        "avg_completeness": avg_completeness,
+        "avg_completeness": round(counter["completeness_sum"] / total) if total else 0,
         "last_updated": last_updated.isoformat() if last_updated else None,
         "last_created": last_created.isoformat() if last_created else None,
     }
 
 
-async def dashboard_stats_async(db, consultant_id: int, cards: list[ClientCard]) -> dict:
-    today = date.today()
-    total = len(cards)
-    new_count = sum(
-        1 for c in cards
-        if c.created_at and (today - c.created_at.date()).days <= NEW_DAYS
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, datetime.min.time())
+
+
+def _filter_clause(flt: str, today: date):
+    """SQL twin of _derive_badge()/_status_label() for the list filters."""
+    new_cutoff = _day_start(today - timedelta(days=NEW_DAYS))
+    inactive_cutoff = today - timedelta(days=INACTIVE_DAYS)
+    is_new = and_(ClientCard.created_at.is_not(None), ClientCard.created_at >= new_cutoff)
+    not_new = or_(ClientCard.created_at.is_(None), ClientCard.created_at < new_cutoff)
+    inactive = and_(
+        not_new,
+        ClientCard.booking_count < VIP_BOOKINGS,
+        or_(
+            and_(ClientCard.last_booking_date.is_not(None), ClientCard.last_booking_date < inactive_cutoff),
+            and_(
+                ClientCard.booking_count == 0,
+                ClientCard.created_at.is_not(None),
+                ClientCard.created_at < _day_start(inactive_cutoff),
+            ),
+        ),
+    )
+    if flt == "new":
+        return is_new
+    if flt == "vip":
+        return and_(not_new, ClientCard.booking_count >= VIP_BOOKINGS)
+    if flt == "archive":
+        return inactive
+    if flt == "active":
+        return not_(inactive)
+    return None
+
+
+def _search_clause(q: str):
+    q = _text(q)
+    if not q:
+        return None
+    like = f"%{q}%"
+    return or_(
+        ClientCard.name.ilike(like),
+        ClientCard.phone.ilike(like),
+        ClientCard.email.ilike(like),
+        ClientCard.telegram.ilike(like),
     )
-    today_bookings, upcoming = await consultant_booking_counts_async(db, consultant_id)
-    completeness_vals = [card_completeness(c)["percent"] for c in cards]
-    avg_completeness = round(sum(completeness_vals) / total) if total else 0
-    last_updated = max((c.updated_at for c in cards if c.updated_at), default=None)
-    last_created = max((c.created_at for c in cards if c.created_at), default=None)
-    return {
-        "total": total,
-        "new_count": new_count,
-        "today_bookings": today_bookings,
-        "upcoming": upcoming,
-        "avg_completeness": avg_completeness,
-        "last_updated": last_updated.isoformat() if last_updated else None,
-        "last_created": last_created.isoformat() if last_created else None,
-    }
 
 
-def serialize_card(card: ClientCard, stats: dict, today: date | None = None) -> dict:
-    today = today or date.today()
-    bstats = stats.get(card.id, {})
-    booking_count = bstats.get("booking_count", 0)
-    last_booking = bstats.get("last_booking")
+def _sort_order(sort: str) -> tuple:
+    if sort == "name":
+        return (ClientCard.name.asc(), ClientCard.id.asc())
+    if sort == "created":
+        return (ClientCard.created_at.desc(), ClientCard.id.desc())
+    if sort == "last_visit":
+        return (ClientCard.last_booking_date.desc(), ClientCard.id.desc())
+    return (ClientCard.updated_at.desc(), ClientCard.id.desc())
+
+
+async def fetch_clients_page_async(
+    db,
+    consultant_id: int,
+    *,
+    sort: str = "recent",
+    flt: str = "all",
+    q: str = "",
+    page: int = 1,
+    limit: int = PAGE_SIZE,
+    today: date | None = None,
+) -> tuple[list[ClientCard], bool]:
+    """One page of cards, filtered and ordered in SQL; returns (cards, has_more)."""
+    today = today or local_today()
+    page = max(int(page or 1), 1)
+    stmt = select(ClientCard).where(ClientCard.consultant_id == consultant_id)
+    for clause in (_filter_clause(flt, today), _search_clause(q)):
+        if clause is not None:
+            stmt = stmt.where(clause)
+    rows = list(
+        (
+            await db.execute(
+                stmt.order_by(*_sort_order(sort)).offset((page - 1) * limit).limit(limit + 1)
+            )
+        )
+        .scalars()
+        .all()
+    )
+    return rows[:limit], len(rows) > limit
+
+
+async def recent_cards_async(db, consultant_id: int, limit: int = 8) -> list[ClientCard]:
+    return list(
+        (
+            await db.execute(
+                select(ClientCard)
+                .where(ClientCard.consultant_id == consultant_id)
+                .order_by(ClientCard.updated_at.desc(), ClientCard.id.desc())
+                .limit(limit)
+            )
+        )
+        .scalars()
+        .all()
+    )
+
+
+def serialize_card(card: ClientCard, today: date | None = None) -> dict:
+    today = today or local_today()
+    booking_count = int(card.booking_count or 0)
+    last_booking = card.last_booking_date
+    next_booking = card.next_booking_date
     badge = _derive_badge(card, booking_count, last_booking, today)
     status_key, status_label = _status_label(badge)
     comp = card_completeness(card)
@@ -267,6 +272,7 @@ def serialize_card(card: ClientCard, stats: dict, today: date | None = None) ->
         "avatar_color": avatar_color(card.id),
         "booking_count": booking_count,
         "last_booking": last_booking.isoformat() if last_booking else None,
+        "next_booking": next_booking.isoformat() if next_booking else None,
         "created_at": card.created_at.isoformat() if card.created_at else None,
         "updated_at": card.updated_at.isoformat() if card.updated_at else None,
         "badge": badge,
@@ -297,27 +303,23 @@ def recent_activity(cards: list[ClientCard], limit: int = 8) -> list[dict]:
     return activity
 
 
-def build_crm_payload(db: Session, consultant_id: int, cards: list[ClientCard]) -> dict:
-    card_ids = [c.id for c in cards]
-    stats = booking_stats(db, consultant_id, card_ids)
-    today = date.today()
-    serialized = [serialize_card(c, stats, today) for c in cards]
-    dash = dashboard_stats(db, consultant_id, cards)
-    return {
-        "dashboard": dash,
-        "clients": serialized,
-        "activity": recent_activity(cards),
-    }
-
-
-async def build_crm_payload_async(db, consultant_id: int, cards: list[ClientCard]) -> dict:
-    card_ids = [c.id for c in cards]
-    stats = await booking_stats_async(db, consultant_id, card_ids)
-    today = date.today()
-    serialized = [serialize_card(c, stats, today) for c in cards]
-    dash = await dashboard_stats_async(db, consultant_id, cards)
+async def build_crm_payload_async(
+    db,
+    consultant_id: int,
+    *,
+    sort: str = "recent",
+    flt: str = "all",
+    q: str = "",
+    page: int = 1,
+) -> dict:
+    today = local_today()
+    cards, has_more = await fetch_clients_page_async(
+        db, consultant_id, sort=sort, flt=flt, q=q, page=page, today=today
+    )
     return {
-        "dashboard": dash,
-        "clients": serialized,
-        "activity": recent_activity(cards),
+        "dashboard": await crm_dashboard_async(db, consultant_id, today),
+        "clients": [serialize_card(c, today) for c in cards],
+        "activity": recent_activity(await recent_cards_async(db, consultant_id)),
+        "page": page,
+        "next_page": page + 1 if has_more else None,
     }
@@ -0,0 +1,235 @@
+"""Denormalized CRM aggregates: per-card booking stats and per-consultant counters.
+
+Booking writes recompute only the cards they touch (one UPDATE with correlated
+subqueries over bookings.client_card_id); client card writes apply their delta to the
+consultant's ConsultantCrmCounter row with one atomic upsert (cards ±1, completeness
++Δ). Reads on /clients/ and /dashboard/ never scan every card. ``reconcile_crm_aggregates``
+rebuilds both from scratch (deploy backfill, drift repair) and the booking sweeper
+re-derives stale next dates. "Today" is the site-local date, like booking_date.
+"""
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable
+from datetime import date, datetime
+from typing import Literal
+
+from sqlalchemy import and_, case, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import Booking, ClientCard, ConsultantCrmCounter
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("pending", "confirmed")
+
+
+def local_today() -> date:
+    """Site-local date: booking_date and the CRM "today" windows are in the site timezone."""
+    from app.services.booking_sweeper import local_now
+
+    return local_now().date()
+
+
+def _card_ids(card_ids: Iterable[int | None]) -> list[int]:
+    return sorted({int(cid) for cid in card_ids if cid})
+
+
+def _aggregates_statement(where, today: date):
+    by_card = Booking.client_card_id == ClientCard.id
+    return (
+        update(ClientCard)
+        .where(where)
+        .values(
+            booking_count=select(func.count(Booking.id)).where(by_card).scalar_subquery(),
+            last_booking_date=select(func.max(Booking.booking_date)).where(by_card).scalar_subquery(),
+            next_booking_date=select(func.min(Booking.booking_date))
+            .where(
+                by_card,
+                Booking.booking_date >= today,
+                Booking.status.in_(ACTIVE_STATUSES),
+            )
+            .scalar_subquery(),
+            # Aggregates are not a card edit: keep "recent" ordering and activity intact.
+            updated_at=ClientCard.updated_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def refresh_card_aggregates(db: Session, card_ids: Iterable[int | None], *, today: date | None = None) -> None:
+    """Recompute booking_count / last / next booking for the given cards (caller commits)."""
+    ids = _card_ids(card_ids)
+    if ids:
+        db.flush()
+        db.execute(_aggregates_statement(ClientCard.id.in_(ids), today or local_today()))
+
+
+async def refresh_card_aggregates_async(db, card_ids: Iterable[int | None], *, today: date | None = None) -> None:
+    ids = _card_ids(card_ids)
+    if ids:
+        await db.flush()
+        await db.execute(_aggregates_statement(ClientCard.id.in_(ids), today or local_today()))
+
+
+def _stale_next_where(today: date):
+    return and_(ClientCard.next_booking_date.is_not(None), ClientCard.next_booking_date <= today)
+
+
+def refresh_stale_next_bookings(db: Session, *, today: date | None = None) -> int:
+    """Cards whose next booking is today or already past (sweeper follow-up)."""
+    today = today or local_today()
+    return int(db.execute(_aggregates_statement(_stale_next_where(today), today)).rowcount or 0)
+
+
+async def refresh_stale_next_bookings_async(db, *, today: date | None = None) -> int:
+    today = today or local_today()
+    return int((await db.execute(_aggregates_statement(_stale_next_where(today), today))).rowcount or 0)
+
+
+def _counter_statement(consultant_id: int):
+    from app.services.clients_crm import completeness_sql
+
+    return select(
+        func.count(ClientCard.id),
+        func.coalesce(func.sum(completeness_sql()), 0),
+        func.max(ClientCard.created_at),
+        func.max(ClientCard.updated_at),
+    ).where(ClientCard.consultant_id == consultant_id)
+
+
+def counter_values(row) -> dict:
+    total, completeness_sum, last_created, last_updated = row
+    return {
+        "cards_total": int(total or 0),
+        "completeness_sum": int(completeness_sum or 0),
+        "last_card_created_at": last_created,
+        "last_card_updated_at": last_updated,
+    }
+
+
+def refresh_crm_counter(db: Session, consultant_id: int) -> ConsultantCrmCounter:
+    """Re-derive the consultant's counter row from all their cards (reconcile only; caller commits)."""
+    db.flush()
+    values = counter_values(db.execute(_counter_statement(consultant_id)).one())
+    row = db.get(ConsultantCrmCounter, consultant_id) or ConsultantCrmCounter(consultant_id=consultant_id)
+    for key, value in values.items():
+        setattr(row, key, value)
+    row.updated_at = datetime.utcnow()
+    db.add(row)
+    db.flush()
+    return row
+
+
+CardChange = Literal["created", "updated", "deleted"]
+_COUNTER = ConsultantCrmCounter.__table__
+
+
+def card_percent(card: ClientCard) -> int:
+    from app.services.clients_crm import card_completeness
+
+    return int(card_completeness(card)["percent"])
+
+
+def _counter_delta_statements(dialect: str, consultant_id: int, change: CardChange, completeness: int) -> list:
+    """INSERT .. ON DUPLICATE KEY / ON CONFLICT applying one card write to the counter row.
+
+    Other dialects get [UPDATE, INSERT]: apply the delta, and create the row when the
+    consultant has none yet. A missing row is created from the delta alone:
+    reconcile_crm_aggregates (run on deploy) creates rows for consultants that already had cards.
+    """
+    now = datetime.utcnow()
+    cards = {"created": 1, "updated": 0, "deleted": -1}[change]
+    c = _COUNTER.c
+    if dialect == "mysql":
+        latest = func.greatest
+    elif dialect == "sqlite":
+        latest = func.max  # two-argument max() is scalar in SQLite
+    else:
+        def latest(a, b):
+            return case((a > b, a), else_=b)
+
+    row = {
+        "consultant_id": int(consultant_id),
+        "cards_total": max(cards, 0),
+        "completeness_sum": max(completeness, 0),
+        "last_card_created_at": now if change == "created" else None,
+        "last_card_updated_at": now if change != "deleted" else None,
+        "updated_at": now,
+    }
+    delta = {
+        "cards_total": c.cards_total + cards,
+        "completeness_sum": c.completeness_sum + completeness,
+        "updated_at": now,
+    }
+    if change != "deleted":
+        delta["last_card_updated_at"] = latest(func.coalesce(c.last_card_updated_at, now), now)
+    if change == "created":
+        delta["last_card_created_at"] = latest(func.coalesce(c.last_card_created_at, now), now)
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        return [mysql_insert(_COUNTER).values(**row).on_duplicate_key_update(**delta)]
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        return [
+            sqlite_insert(_COUNTER).values(**row).on_conflict_do_update(index_elements=[c.consultant_id], set_=delta)
+        ]
+    where = c.consultant_id == int(consultant_id)
+    return [update(_COUNTER).where(where).values(**delta), insert(_COUNTER).values(**row)]
+
+
+def record_card_change(db: Session, consultant_id: int, change: CardChange, completeness: int = 0) -> None:
+    """Apply one card write to the counter row; ``completeness`` is the card's percent delta (caller commits)."""
+    upsert, *fallback = _counter_delta_statements(db.get_bind().dialect.name, consultant_id, change, completeness)
+    if not db.execute(upsert).rowcount and fallback:
+        try:
+            with db.begin_nested():
+                db.execute(fallback[0])
+        except IntegrityError:
+            db.execute(upsert)  # another writer created the row first
+
+
+async def record_card_change_async(db, consultant_id: int, change: CardChange, completeness: int = 0) -> None:
+    upsert, *fallback = _counter_delta_statements(db.bind.dialect.name, consultant_id, change, completeness)
+    if not (await db.execute(upsert)).rowcount and fallback:
+        try:
+            async with db.begin_nested():
+                await db.execute(fallback[0])
+        except IntegrityError:
+            await db.execute(upsert)
+
+
+async def read_crm_counter_async(db, consultant_id: int) -> dict:
+    """Counter row values; computed on the fly (not stored) until the first card write."""
+    row = await db.get(ConsultantCrmCounter, consultant_id)
+    if row is not None:
+        return {
+            "cards_total": int(row.cards_total or 0),
+            "completeness_sum": int(row.completeness_sum or 0),
+            "last_card_created_at": row.last_card_created_at,
+            "last_card_updated_at": row.last_card_updated_at,
+        }
+    return counter_values((await db.execute(_counter_statement(consultant_id))).one())
+
+
+def reconcile_crm_aggregates(db: Session, *, consultant_id: int | None = None, today: date | None = None) -> dict:
+    """Rebuild card aggregates and counter rows (all consultants or one). Commits."""
+    today = today or local_today()
+    where = ClientCard.consultant_id == consultant_id if consultant_id is not None else ClientCard.id.is_not(None)
+    cards = int(db.execute(_aggregates_statement(where, today)).rowcount or 0)
+    if consultant_id is not None:
+        consultant_ids = [consultant_id]
+    else:
+        # Include existing counter rows too: a consultant whose last card was deleted drops to zero.
+        consultant_ids = sorted(
+            set(db.execute(select(ClientCard.consultant_id).distinct()).scalars().all())
+            | set(db.execute(select(ConsultantCrmCounter.consultant_id)).scalars().all())
+        )
+    for cid in consultant_ids:
+        refresh_crm_counter(db, cid)
+    db.commit()
+    logger.info("crm aggregates reconciled: %s cards, %s consultants", cards, len(consultant_ids))
+    return {"cards": cards, "consultants": len(consultant_ids)}
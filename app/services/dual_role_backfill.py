@@ -4,16 +4,18 @@ Does NOT create Users. Skips ambiguous telegram uids linked to multiple users.
 
 Run:
   python -m app.commands.dual_role_backfill --dry-run
-  python -m app.commands.dual_role_backfill
+  python -m app.commands.dual_role_backfill --apply [--resume] [--chunk N] [--rate ROWS_PER_SEC]
 """
 from __future__ import annotations
 
 from collections import defaultdict
-from typing import Any
+from typing import Any, Callable
 
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 
 from app.models import Booking, SocialAccount
+from app.services.batched_backfill import DEFAULT_CHUNK_SIZE, run_batched
 
 
 def _norm_uid(value: Any) -> str | None:
@@ -23,11 +25,13 @@ def _norm_uid(value: Any) -> str | None:
     return s or None
 
 
-def build_telegram_uid_to_user_ids(db: Session) -> dict[str, set[int]]:
+def _telegram_user_ids(db: Session, keys: set[str]) -> dict[str, set[int]]:
     mapping: dict[str, set[int]] = defaultdict(set)
+    if not keys:
+        return mapping
     rows = (
         db.query(SocialAccount.uid, SocialAccount.user_id)
-        .filter(SocialAccount.provider == "telegram")
+        .filter(SocialAccount.provider == "telegram", SocialAccount.uid.in_(sorted(keys)))
         .all()
     )
     for uid, user_id in rows:
@@ -42,63 +46,76 @@ def backfill_booking_client_user_ids(
     *,
     dry_run: bool = True,
     limit: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    rows_per_sec: float | None = None,
+    resume: bool = False,
+    progress: Callable[[dict[str, Any]], None] | None = None,
 ) -> dict[str, Any]:
     """
     Set Booking.client_user_id where telegram_id matches exactly one User via SocialAccount.
 
     Idempotent: rows that already have client_user_id are left unchanged.
+    Runs in id-ordered chunks (batched_backfill): each chunk looks up only its own
+    telegram ids and, unless dry_run, is committed with the resume checkpoint.
     """
-    uid_map = build_telegram_uid_to_user_ids(db)
-    q = (
-        db.query(Booking)
-        .filter(Booking.telegram_id.isnot(None))
-        .filter(Booking.client_user_id.is_(None))
-        .order_by(Booking.id.asc())
-    )
-    if limit is not None:
-        q = q.limit(int(limit))
-    bookings = q.all()
-
     updated = 0
     skipped_no_user = 0
     skipped_ambiguous = 0
     samples_updated: list[dict[str, int]] = []
     samples_ambiguous: list[dict[str, Any]] = []
 
-    for booking in bookings:
-        key = _norm_uid(booking.telegram_id)
-        if not key:
-            skipped_no_user += 1
-            continue
-        user_ids = uid_map.get(key) or set()
-        if len(user_ids) == 0:
-            skipped_no_user += 1
-            continue
-        if len(user_ids) > 1:
-            skipped_ambiguous += 1
-            if len(samples_ambiguous) < 20:
-                samples_ambiguous.append(
-                    {"booking_id": int(booking.id), "telegram_id": key, "user_ids": sorted(user_ids)}
-                )
-            continue
-        user_id = next(iter(user_ids))
-        if not dry_run:
-            booking.client_user_id = user_id
-        updated += 1
-        if len(samples_updated) < 20:
-            samples_updated.append({"booking_id": int(booking.id), "user_id": user_id})
-
-    if not dry_run and updated:
-        db.commit()
+    def handle_chunk(rows) -> None:
+        nonlocal updated, skipped_no_user, skipped_ambiguous
+        uid_map = _telegram_user_ids(db, {k for _, tg in rows if (k := _norm_uid(tg))})
+        changes: list[dict[str, int]] = []
+        for booking_id, telegram_id in rows:
+            key = _norm_uid(telegram_id)
+            user_ids = (uid_map.get(key) or set()) if key else set()
+            if len(user_ids) == 0:
+                skipped_no_user += 1
+                continue
+            if len(user_ids) > 1:
+                skipped_ambiguous += 1
+                if len(samples_ambiguous) < 20:
+                    samples_ambiguous.append(
+                        {"booking_id": int(booking_id), "telegram_id": key, "user_ids": sorted(user_ids)}
+                    )
+                continue
+            user_id = next(iter(user_ids))
+            changes.append({"id": int(booking_id), "client_user_id": user_id})
+            updated += 1
+            if len(samples_updated) < 20:
+                samples_updated.append({"booking_id": int(booking_id), "user_id": user_id})
+        if changes and not dry_run:
+            db.execute(update(Booking), changes)  # ORM bulk UPDATE by primary key
+
+    run = run_batched(
+        db,
+        name="dual_role_backfill",
+        stmt=select(Booking.id, Booking.telegram_id).where(
+            Booking.telegram_id.isnot(None), Booking.client_user_id.is_(None)
+        ),
+        id_column=Booking.id,
+        handle_chunk=handle_chunk,
+        chunk_size=chunk_size,
+        rows_per_sec=rows_per_sec,
+        limit=limit,
+        resume=resume,
+        commit=not dry_run,
+        progress=progress,
+    )
 
     return {
         "dry_run": dry_run,
-        "candidates": len(bookings),
+        "candidates": run["rows"],
         "updated": updated,
         "skipped_no_user": skipped_no_user,
         "skipped_ambiguous": skipped_ambiguous,
         "samples_updated": samples_updated,
         "samples_ambiguous": samples_ambiguous,
+        "chunks": run["chunks"],
+        "last_id": run["last_id"],
+        "resumed_from": run["resumed_from"],
     }
 
 
@@ -155,6 +172,8 @@ def format_backfill_report(data: dict[str, Any]) -> str:
         f"Skipped (ambiguous uid -> many users): {data['skipped_ambiguous']}",
         f"Samples updated: {data['samples_updated']}",
         f"Samples ambiguous: {data['samples_ambiguous']}",
+        f"Chunks: {data.get('chunks', 0)}, last booking id: {data.get('last_id', 0)}"
+        + (f" (resumed after {data['resumed_from']})" if data.get("resumed_from") else ""),
         "=== end ===",
     ]
     return "\n".join(lines)
@@ -5,13 +5,14 @@ Run: python -m app.commands.dual_role_inventory
 from __future__ import annotations
 
 from collections import Counter
-from typing import Any
+from typing import Any, Callable
 
-from sqlalchemy import func
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from app.models import Booking, Consultant, Integration, SocialAccount, User
 from app.services.app_counters import DEDUP_HITS_KEY, get_counter
+from app.services.batched_backfill import DEFAULT_CHUNK_SIZE, run_batched
 
 
 def _norm_chat(value: Any) -> str | None:
@@ -23,8 +24,17 @@ def _norm_chat(value: Any) -> str | None:
     return s
 
 
-def collect_dual_role_inventory(db: Session) -> dict[str, Any]:
-    """Return counts and sample IDs for dual-role migration planning. Read-only."""
+def collect_dual_role_inventory(
+    db: Session,
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    progress: Callable[[dict[str, Any]], None] | None = None,
+) -> dict[str, Any]:
+    """Return counts and sample IDs for dual-role migration planning. Read-only.
+
+    The bookings scan runs in id chunks (batched_backfill), so memory does not grow
+    with the bookings table.
+    """
     users_total = db.query(func.count(User.id)).scalar() or 0
     consultants_total = db.query(func.count(Consultant.id)).scalar() or 0
     consultants_with_user = (
@@ -69,19 +79,6 @@ def collect_dual_role_inventory(db: Session) -> dict[str, Any]:
         if chat_counter[chat] > 1
     }
 
-    # Bookings with telegram_id that also match an Integration chat (already dual channel)
-    integration_chats = set(chat_to_consultants.keys())
-    bookings_with_tg = (
-        db.query(Booking.id, Booking.telegram_id)
-        .filter(Booking.telegram_id.isnot(None))
-        .all()
-    )
-    dual_channel_booking_ids: list[int] = []
-    for booking_id, telegram_id in bookings_with_tg:
-        key = _norm_chat(telegram_id)
-        if key and key in integration_chats:
-            dual_channel_booking_ids.append(int(booking_id))
-
     # Bookings linkable to User via SocialAccount(telegram)
     sa_rows = (
         db.query(SocialAccount.uid, SocialAccount.user_id, SocialAccount.id)
@@ -100,25 +97,43 @@ def collect_dual_role_inventory(db: Session) -> dict[str, Any]:
         uid: sorted(users) for uid, users in uid_to_users.items() if uid_counter[uid] > 1
     }
 
-    linkable = 0
+    # Bookings with telegram_id, streamed in id chunks: dual channel (tg_id == some
+    # Integration chat) and linkable via SocialAccount.
+    integration_chats = set(chat_to_consultants.keys())
+    dual_channel_booking_ids: list[int] = []
+    tg_counts = {"dual_channel": 0, "linkable": 0}
+
+    def scan_bookings(rows) -> None:
+        for booking_id, telegram_id in rows:
+            key = _norm_chat(telegram_id)
+            if not key:
+                continue
+            if key in integration_chats:
+                tg_counts["dual_channel"] += 1
+                if len(dual_channel_booking_ids) < 30:
+                    dual_channel_booking_ids.append(int(booking_id))
+            if key in uid_to_users:
+                tg_counts["linkable"] += 1
+
+    scan = run_batched(
+        db,
+        name="dual_role_inventory",
+        stmt=select(Booking.id, Booking.telegram_id).where(Booking.telegram_id.isnot(None)),
+        id_column=Booking.id,
+        handle_chunk=scan_bookings,
+        chunk_size=chunk_size,
+        progress=progress,
+    )
+    linkable = tg_counts["linkable"]
     already_linked = 0
     has_client_user_col = hasattr(Booking, "client_user_id")
-    for booking_id, telegram_id in bookings_with_tg:
-        key = _norm_chat(telegram_id)
-        if not key:
-            continue
-        if key in uid_to_users:
-            linkable += 1
-        if has_client_user_col:
-            # cheap sample via attribute if loaded; count separately below
-            pass
 
     if has_client_user_col:
         already_linked = (
             db.query(func.count(Booking.id)).filter(Booking.client_user_id.isnot(None)).scalar() or 0
         )
 
-    bookings_tg_total = len(bookings_with_tg)
+    bookings_tg_total = scan["rows"]
     bookings_tg_without_user = bookings_tg_total - linkable
 
     # Dual users: have Consultant profile AND client signal (client bookings or TG SocialAccount)
@@ -162,8 +177,8 @@ def collect_dual_role_inventory(db: Session) -> dict[str, Any]:
             k: v for i, (k, v) in enumerate(shared_chats.items()) if i < 20
         },
         "bookings_with_telegram_id": bookings_tg_total,
-        "dual_channel_bookings_count": len(dual_channel_booking_ids),
-        "dual_channel_booking_ids_sample": dual_channel_booking_ids[:30],
+        "dual_channel_bookings_count": tg_counts["dual_channel"],
+        "dual_channel_booking_ids_sample": dual_channel_booking_ids,
         "telegram_social_accounts": len(sa_rows),
         "duplicate_telegram_social_uids_count": len(duplicate_social_uids),
         "duplicate_telegram_social_uids_sample": {
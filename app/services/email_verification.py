@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 
 from app.config import get_settings
 from app.models import EmailAddress, EmailVerificationToken, User
+from app.services.auth_snapshot import invalidate_auth_snapshot_on_commit
 from app.services.email import send_verification_email
 
 settings = get_settings()
@@ -47,9 +48,11 @@ def ensure_email_address(db: Session, user: User, email: str, verified: bool = F
                 EmailAddress.user_id == user.id,
                 EmailAddress.id != row.id,
             ).update({"primary": False})
+            invalidate_auth_snapshot_on_commit(db, user.id)
         return
     if verified:
         db.query(EmailAddress).filter(EmailAddress.user_id == user.id).update({"primary": False})
+        invalidate_auth_snapshot_on_commit(db, user.id)
     db.add(EmailAddress(email=email, verified=verified, primary=True, user_id=user.id))
 
 
@@ -76,11 +79,13 @@ async def ensure_email_address_async(db, user: User, email: str, verified: bool
                 .where(EmailAddress.user_id == user.id, EmailAddress.id != row.id)
                 .values(primary=False)
             )
+            invalidate_auth_snapshot_on_commit(db, user.id)
         return
     if verified:
         await db.execute(
             update(EmailAddress).where(EmailAddress.user_id == user.id).values(primary=False)
         )
+        invalidate_auth_snapshot_on_commit(db, user.id)
     db.add(EmailAddress(email=email, verified=verified, primary=True, user_id=user.id))
 
 
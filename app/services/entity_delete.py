@@ -97,6 +97,9 @@ def delete_client_card(db: Session, card: ClientCard) -> tuple[bool, str]:
         {Booking.client_card_id: None}, synchronize_session=False
     )
     db.delete(card)
+    from app.services.crm_aggregates import card_percent, record_card_change
+
+    record_card_change(db, card.consultant_id, "deleted", -card_percent(card))
     try:
         db.commit()
         return True, "Карточка удалена."
@@ -112,6 +115,9 @@ async def delete_client_card_async(db, card: ClientCard) -> tuple[bool, str]:
         update(Booking).where(Booking.client_card_id == card.id).values(client_card_id=None)
     )
     await db.delete(card)
+    from app.services.crm_aggregates import card_percent, record_card_change_async
+
+    await record_card_change_async(db, card.consultant_id, "deleted", -card_percent(card))
     try:
         await db.commit()
         return True, "Карточка удалена."
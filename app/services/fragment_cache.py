@@ -0,0 +1,78 @@
+"""Jinja2 `{% cache key[, ttl] %}...{% endcache %}` fragment cache backed by TtlCache.
+
+Keys are namespaced by the content version (copy modules + public settings) and by a
+fingerprint of the template source, so a deploy that edits copy or markup never serves
+a stale fragment from Redis. Only wrap markup that does not depend on the request/user.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+from typing import Any
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from app.services.ttl_cache import TtlCache
+
+logger = logging.getLogger(__name__)
+
+FRAGMENT_TTL_SEC = 3600.0
+
+FRAGMENT_CACHE = TtlCache(default_ttl=FRAGMENT_TTL_SEC, max_entries=256, redis_prefix="ayc:frag:")
+
+
+def _key_part(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return ":".join(_key_part(v) for v in value)
+    return str(value)
+
+
+class FragmentCacheExtension(Extension):
+    """Configure via env.extend(fragment_cache=TtlCache, fragment_cache_version=callable)."""
+
+    tags = {"cache"}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None, fragment_cache_version=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        if parser.stream.skip_if("comma"):
+            args.append(parser.parse_expression())
+        else:
+            args.append(nodes.Const(None))
+        args.append(nodes.Const(self._source_fingerprint(parser.name, lineno)))
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(self.call_method("_cache_support", args), [], [], body).set_lineno(lineno)
+
+    def _source_fingerprint(self, name: str | None, lineno: int) -> str:
+        source = ""
+        loader = self.environment.loader
+        if name and loader is not None:
+            try:
+                source = loader.get_source(self.environment, name)[0]
+            except Exception:
+                source = ""
+        digest = hashlib.sha1(source.encode("utf-8")).hexdigest()[:12]
+        return f"{name or '?'}:{digest}:{lineno}"
+
+    def _cache_support(self, key: Any, ttl: Any, fingerprint: str, caller) -> Markup:
+        cache: TtlCache | None = self.environment.fragment_cache
+        if cache is None:
+            return Markup(caller())
+        version_fn = self.environment.fragment_cache_version
+        version = version_fn() if callable(version_fn) else ""
+        full_key = f"{version}:{fingerprint}:{_key_part(key)}"
+        hit = cache.get(full_key)
+        if hit is not None:
+            return Markup(hit)
+        rendered = str(caller())
+        try:
+            cache.set(full_key, rendered, ttl=float(ttl) if ttl else None)
+        except Exception:
+            logger.exception("fragment cache set failed key=%s", full_key)
+        return Markup(rendered)
@@ -0,0 +1,57 @@
+"""Expiry pruning for short-lived tables, run from its own cron (command / endpoint).
+
+Modules that own such a table register a prune with ``register_prune(name, build)``:
+``build(now)`` returns one indexed DELETE, ``now`` being UTC. PRUNE_MODULES lists the
+owners, imported on the first run so their registrations are in place. Nothing here
+touches bookings, so the booking sweeper stays about booking status only.
+"""
+from __future__ import annotations
+
+import importlib
+import logging
+from datetime import datetime
+from typing import Any, Callable
+
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+PruneBuilder = Callable[[datetime], Any]
+
+# Owners of prunable tables; each calls register_prune() at import.
+PRUNE_MODULES: tuple[str, ...] = (
+    "app.services.booking_locks",
+    "app.services.idempotency",
+    "app.auth.session_store",
+)
+
+_PRUNES: dict[str, PruneBuilder] = {}
+
+
+def register_prune(name: str, build: PruneBuilder) -> None:
+    _PRUNES[name] = build
+
+
+def _prune_statements(now: datetime | None) -> dict[str, Any]:
+    for module in PRUNE_MODULES:
+        importlib.import_module(module)
+    now = now or datetime.utcnow()
+    return {name: build(now) for name, build in sorted(_PRUNES.items())}
+
+
+def prune_expired(db: Session, *, now: datetime | None = None) -> dict[str, int]:
+    """Run every registered prune and commit; returns deleted rows per prune."""
+    report = {name: int(db.execute(stmt).rowcount or 0) for name, stmt in _prune_statements(now).items()}
+    db.commit()
+    logger.info("housekeeping: pruned %s", report)
+    return report
+
+
+async def prune_expired_async(db, *, now: datetime | None = None) -> dict[str, int]:
+    report = {}
+    for name, stmt in _prune_statements(now).items():
+        report[name] = int((await db.execute(stmt)).rowcount or 0)
+    await db.commit()
+    logger.info("housekeeping: pruned %s", report)
+    return report
+
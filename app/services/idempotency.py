@@ -0,0 +1,186 @@
+"""Idempotency-Key support for booking write endpoints.
+
+The client sends an ``Idempotency-Key`` header (or an ``idempotency_key`` form
+field from the public booking form). The key is hashed together with the
+endpoint scope and the acting user, and claimed with one INSERT that ignores
+duplicates (MySQL INSERT IGNORE, SQLite ON CONFLICT DO NOTHING), committed
+before the booking transaction starts.
+
+- The first request runs the booking and stores its successful response for
+  IDEMPOTENCY_TTL_SEC. A repeat of the key replays that response and does not
+  touch the booking tables.
+- A concurrent duplicate waits for the first one to finish, up to WAIT_SEC.
+- Failed attempts release the key, so a corrected retry runs normally. That
+  includes attempts that raise: run the booking inside ``claim.releasing(db)``.
+- A claim left pending by a crashed worker can be taken over after LEASE_SEC.
+  Expired rows are dropped by the "idempotency_keys" housekeeping prune.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import re
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, delete, insert, or_, select, update
+from starlette.responses import Response
+
+from app.config import get_settings
+from app.models import IdempotencyKey
+from app.services.housekeeping import register_prune
+
+HEADER = "Idempotency-Key"
+FORM_FIELD = "idempotency_key"
+WAIT_SEC = 10.0
+POLL_SEC = 0.2
+LEASE_SEC = 60
+BUSY_MESSAGE = "Запрос уже обрабатывается. Подождите несколько секунд и обновите страницу."
+
+_KEY_RE = re.compile(r"^[A-Za-z0-9_.:-]{8,128}$")
+_KEYS = IdempotencyKey.__table__
+
+
+def request_idempotency_key(request, form=None) -> str | None:
+    raw = (request.headers.get(HEADER) or "").strip()
+    if not raw and form is not None:
+        raw = str(form.get(FORM_FIELD) or "").strip()
+    return raw if _KEY_RE.match(raw) else None
+
+
+def _digest(scope: str, actor: str, key: str) -> str:
+    return hashlib.sha256(f"{scope}|{actor}|{key}".encode()).hexdigest()
+
+
+def _claim_stmt(dialect: str, row: dict):
+    if dialect == "mysql":
+        return insert(_KEYS).prefix_with("IGNORE").values(**row)
+    from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+    return sqlite_insert(_KEYS).values(**row).on_conflict_do_nothing(index_elements=[_KEYS.c.key])
+
+
+@dataclass
+class StoredResponse:
+    status_code: int
+    media_type: str
+    body: str
+
+    def to_response(self) -> Response:
+        return Response(
+            content=self.body,
+            status_code=self.status_code,
+            media_type=self.media_type,
+            headers={"Idempotent-Replayed": "true"},
+        )
+
+
+@dataclass
+class IdempotencyClaim:
+    """Outcome of begin(): `claimed` (run the request), `replay`, `busy`, or `off` (no key sent)."""
+
+    state: str
+    digest: str | None = None
+    stored: StoredResponse | None = None
+
+    async def store(self, db, response: Response) -> None:
+        if self.state != "claimed":
+            return
+        await db.execute(
+            update(_KEYS)
+            .where(_KEYS.c.key == self.digest)
+            .values(
+                status="done",
+                response_status=response.status_code,
+                response_media_type=(response.media_type or "application/json")[:64],
+                response_body=bytes(response.body).decode("utf-8"),
+            )
+        )
+        await db.commit()
+
+    async def release(self, db) -> None:
+        if self.state != "claimed":
+            return
+        await db.execute(delete(_KEYS).where(_KEYS.c.key == self.digest))
+        await db.commit()
+
+    @asynccontextmanager
+    async def releasing(self, db):
+        """Release the key if the body raises. The failed transaction is rolled back
+        first, so release() commits nothing of it (e.g. a day-lock bump)."""
+        try:
+            yield
+        except BaseException:
+            await db.rollback()
+            await self.release(db)
+            raise
+
+
+async def _read(db, digest: str):
+    row = (
+        await db.execute(
+            select(
+                _KEYS.c.status,
+                _KEYS.c.response_status,
+                _KEYS.c.response_media_type,
+                _KEYS.c.response_body,
+                _KEYS.c.expires_at,
+            ).where(_KEYS.c.key == digest)
+        )
+    ).one_or_none()
+    await db.commit()  # end the read transaction so the next poll sees fresh rows
+    return row
+
+
+async def begin(db, scope: str, actor: str, key: str | None) -> IdempotencyClaim:
+    """Claim `key` for this scope/actor. Commits the request session's (read-only) transaction."""
+    if not key:
+        return IdempotencyClaim("off")
+    digest = _digest(scope, actor, key)
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=max(60, get_settings().idempotency_ttl_sec))
+    row = {"key": digest, "scope": scope[:64], "status": "pending", "created_at": now, "expires_at": expires_at}
+    claimed = (await db.execute(_claim_stmt(db.bind.dialect.name, row))).rowcount
+    if not claimed:
+        # Take over an expired response or a pending claim abandoned by a crashed worker.
+        claimed = (
+            await db.execute(
+                update(_KEYS)
+                .where(
+                    _KEYS.c.key == digest,
+                    or_(
+                        _KEYS.c.expires_at < now,
+                        and_(_KEYS.c.status == "pending", _KEYS.c.created_at < now - timedelta(seconds=LEASE_SEC)),
+                    ),
+                )
+                .values(status="pending", created_at=now, expires_at=expires_at, response_status=None,
+                        response_media_type=None, response_body=None)
+            )
+        ).rowcount
+    await db.commit()
+    if claimed:
+        return IdempotencyClaim("claimed", digest)
+
+    deadline = asyncio.get_running_loop().time() + WAIT_SEC
+    while True:
+        found = await _read(db, digest)
+        if found is None:
+            # The first attempt failed and released the key: run this one.
+            return await begin(db, scope, actor, key)
+        if found.status == "done":
+            stored = StoredResponse(
+                found.response_status or 200, found.response_media_type or "application/json", found.response_body or ""
+            )
+            return IdempotencyClaim("replay", digest, stored)
+        if asyncio.get_running_loop().time() >= deadline:
+            return IdempotencyClaim("busy", digest)
+        await asyncio.sleep(POLL_SEC)
+
+
+def prune_idempotency_keys(now: datetime | None = None):
+    """Statement dropping stored responses past their TTL."""
+    return delete(IdempotencyKey).where(IdempotencyKey.expires_at < (now or datetime.utcnow()))
+
+
+register_prune("idempotency_keys", prune_idempotency_keys)
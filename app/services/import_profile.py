@@ -0,0 +1,135 @@
+"""Cold-import profiler for worker start-up (python -X importtime in a subprocess).
+
+Heavy optional integrations (aiogram, Google API client, Pillow, cryptography) must be
+imported inside the functions that use them, so a fresh Passenger/gunicorn worker only
+pays for FastAPI + SQLAlchemy + our own modules.
+"""
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from typing import Any
+
+from app.config import get_settings
+
+# Top-level packages that must NOT be loaded by `import app.main`.
+HEAVY_OPTIONAL_MODULES: tuple[str, ...] = (
+    "aiogram",
+    "googleapiclient",
+    "google_auth_oauthlib",
+    "PIL",
+    "cryptography",
+)
+
+_PROBE = (
+    "import {target}\n"
+    "import json, sys\n"
+    "print(json.dumps(sorted(m for m in {heavy!r} if m in sys.modules)))"
+)
+
+
+def parse_importtime(stderr: str) -> list[dict[str, Any]]:
+    """Parse `-X importtime` lines into [{module, self_us, cumulative_us, depth}]."""
+    rows: list[dict[str, Any]] = []
+    for line in (stderr or "").splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3:
+            continue
+        self_raw, cum_raw, name_raw = parts
+        try:
+            self_us = int(self_raw.strip())
+            cum_us = int(cum_raw.strip())
+        except ValueError:
+            # header row: "self [us] | cumulative | imported package"
+            continue
+        stripped = name_raw.lstrip(" ")
+        depth = (len(name_raw) - len(stripped) - 1) // 2
+        rows.append(
+            {
+                "module": stripped.strip(),
+                "self_us": self_us,
+                "cumulative_us": cum_us,
+                "depth": max(0, depth),
+            }
+        )
+    return rows
+
+
+def run_import_profile(
+    target: str = "app.main",
+    *,
+    top_n: int = 20,
+    budget_ms: float | None = None,
+    python: str | None = None,
+) -> dict[str, Any]:
+    """Import `target` in a fresh interpreter and report timings vs the budget."""
+    if not all(part.isidentifier() for part in target.split(".")):
+        raise ValueError(f"not a module path: {target!r}")
+    settings = get_settings()
+    budget = float(settings.import_budget_ms if budget_ms is None else budget_ms)
+    code = _PROBE.format(target=target, heavy=HEAVY_OPTIONAL_MODULES)
+    proc = subprocess.run(
+        [python or sys.executable, "-X", "importtime", "-c", code],
+        cwd=str(settings.base_dir),
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    rows = parse_importtime(proc.stderr)
+    root = next((r for r in reversed(rows) if r["module"] == target), None)
+    total_ms = round((root["cumulative_us"] if root else 0) / 1000.0, 1)
+    heavy_loaded: list[str] = []
+    if proc.returncode == 0:
+        try:
+            heavy_loaded = json.loads((proc.stdout or "").strip().splitlines()[-1])
+        except (ValueError, IndexError):
+            heavy_loaded = []
+    by_self = sorted(rows, key=lambda r: r["self_us"], reverse=True)[:top_n]
+    top_level = sorted(
+        (r for r in rows if r["depth"] == 1),
+        key=lambda r: r["cumulative_us"],
+        reverse=True,
+    )[:top_n]
+    error = None
+    if proc.returncode != 0:
+        error = (proc.stderr or "").strip().splitlines()[-1:] or ["import failed"]
+        error = error[0][:300]
+    return {
+        "target": target,
+        "ok": proc.returncode == 0 and total_ms <= budget and not heavy_loaded,
+        "error": error,
+        "total_ms": total_ms,
+        "budget_ms": budget,
+        "modules_imported": len(rows),
+        "heavy_loaded": heavy_loaded,
+        "top_self": [
+            {"module": r["module"], "self_ms": round(r["self_us"] / 1000.0, 1)} for r in by_self
+        ],
+        "top_direct": [
+            {"module": r["module"], "cumulative_ms": round(r["cumulative_us"] / 1000.0, 1)}
+            for r in top_level
+        ],
+    }
+
+
+def format_import_report(data: dict[str, Any]) -> str:
+    status = "OK" if data.get("ok") else "OVER BUDGET"
+    lines = [
+        f"=== Import profile: {data['target']} ({status}) ===",
+        f"Total: {data['total_ms']} ms (budget {data['budget_ms']:.0f} ms), modules: {data['modules_imported']}",
+    ]
+    if data.get("error"):
+        lines.append(f"Import error: {data['error']}")
+    if data.get("heavy_loaded"):
+        lines.append(f"Heavy optional modules loaded eagerly: {', '.join(data['heavy_loaded'])}")
+    lines.append("Direct imports by cumulative time:")
+    for row in data.get("top_direct") or []:
+        lines.append(f"  {row['cumulative_ms']:>9.1f} ms  {row['module']}")
+    lines.append("Slowest modules (self time):")
+    for row in data.get("top_self") or []:
+        lines.append(f"  {row['self_ms']:>9.1f} ms  {row['module']}")
+    lines.append("=== end ===")
+    return "\n".join(lines)
@@ -1,7 +1,31 @@
-from sqlalchemy import func
+"""Landing page counters (bookings / specialists / calendars).
+
+Totals live in ``app_counters`` rows. An ORM after_flush hook (see app.models.core)
+collects +1 / -1 per created / deleted row in ``session.info``; after commit they go to
+the write buffer, which upserts them in the background, so the business transaction
+never updates the hot counter row (a rollback discards them). reconcile_landing_counters()
+recounts from the source tables on deploy. Reads go through a short-TTL cache, so the
+landing never runs COUNT(*) on bookings.
+
+Reconcile overwrites the rows with absolute counts, and it can only flush its own
+process's buffer. Deltas another web worker still holds are for rows that are already
+committed, so the recount includes them, and they would be added a second time when
+that worker flushes. Run it only while the web workers are stopped or restarting, which
+is what the deploy does. It is not a cron job. The lazy first-read seed has the same
+caveat, limited to the first seconds after a fresh deploy.
+"""
+from __future__ import annotations
+
+import logging
+
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
-from app.models import Booking, Calendar, Consultant
+from app.models import AppCounter, Booking, Calendar, Consultant
+from app.services.app_counters import set_counter
+from app.services.ttl_cache import TtlCache
+
+logger = logging.getLogger(__name__)
 
 # Shown when DB is empty so the landing never looks abandoned.
 MIN_DISPLAY = {
@@ -10,16 +34,111 @@ MIN_DISPLAY = {
     "calendars": 35,
 }
 
+# stats key -> (app_counters key, counted model)
+COUNTERS = {
+    "bookings": ("landing_bookings_total", Booking),
+    "specialists": ("landing_specialists_total", Consultant),
+    "calendars": ("landing_calendars_total", Calendar),
+}
+_KEY_BY_MODEL = {model: key for key, model in COUNTERS.values()}
+
+STATS_TTL_SEC = 60.0
+STATS_CACHE = TtlCache(default_ttl=STATS_TTL_SEC, max_entries=4, redis_prefix="ayc:landing:")
+_CACHE_KEY = "stats"
+_PENDING_KEY = "landing_counter_deltas"
+
+
+def _build(totals: dict[str, int]) -> dict[str, int]:
+    out: dict[str, int] = {}
+    for name in COUNTERS:
+        out[name] = max(totals.get(name, 0), MIN_DISPLAY[name])
+    for name in COUNTERS:
+        out[f"{name}_real"] = totals.get(name, 0)
+    return out
+
+
+def _counters_stmt():
+    return select(AppCounter.key, AppCounter.value).where(AppCounter.key.in_([k for k, _ in COUNTERS.values()]))
+
+
+def _totals(rows) -> tuple[dict[str, int], list[str]]:
+    by_key = {key: int(value or 0) for key, value in rows}
+    totals = {name: by_key[key] for name, (key, _) in COUNTERS.items() if key in by_key}
+    return totals, [name for name in COUNTERS if name not in totals]
+
+
+def reconcile_landing_counters(db: Session, *, names: list[str] | None = None) -> dict[str, int]:
+    """Recount from the source tables and overwrite the counter rows (fixes drift from bulk writes).
+
+    Only safe with the web workers stopped (see the module docstring).
+    """
+    from app.services.write_buffer import flush_pending_writes
+
+    flush_pending_writes()  # deltas buffered before the recount must not land on top of it
+    totals: dict[str, int] = {}
+    for name in names or list(COUNTERS):
+        key, model = COUNTERS[name]
+        totals[name] = int(db.execute(select(func.count(model.id))).scalar() or 0)
+        set_counter(db, key, totals[name])
+    db.commit()
+    STATS_CACHE.delete(_CACHE_KEY)
+    return totals
+
+
+def _load(db: Session) -> dict[str, int]:
+    totals, missing = _totals(db.execute(_counters_stmt()).all())
+    if missing:
+        # First read after deploy: seed the rows once instead of showing MIN_DISPLAY until the
+        # cron, in a session of its own so the request's session is never committed here.
+        with Session(bind=db.get_bind()) as seed:
+            totals.update(reconcile_landing_counters(seed, names=missing))
+    return _build(totals)
+
 
 def landing_stats(db: Session) -> dict[str, int]:
-    bookings = db.query(func.count(Booking.id)).scalar() or 0
-    specialists = db.query(func.count(Consultant.id)).scalar() or 0
-    calendars = db.query(func.count(Calendar.id)).scalar() or 0
-    return {
-        "bookings": max(bookings, MIN_DISPLAY["bookings"]),
-        "specialists": max(specialists, MIN_DISPLAY["specialists"]),
-        "calendars": max(calendars, MIN_DISPLAY["calendars"]),
-        "bookings_real": bookings,
-        "specialists_real": specialists,
-        "calendars_real": calendars,
-    }
+    return STATS_CACHE.get_or_set(_CACHE_KEY, lambda: _load(db))
+
+
+async def landing_stats_async(db) -> dict[str, int]:
+    hit = STATS_CACHE.get(_CACHE_KEY)
+    if hit is not None:
+        return hit
+    totals, missing = _totals((await db.execute(_counters_stmt())).all())
+    if missing:
+        from sqlalchemy.ext.asyncio import AsyncSession
+
+        async with AsyncSession(db.bind) as seed:
+            totals.update(await seed.run_sync(lambda session: reconcile_landing_counters(session, names=missing)))
+    stats = _build(totals)
+    STATS_CACHE.set(_CACHE_KEY, stats)
+    return stats
+
+
+def note_counter_deltas(session: Session) -> None:
+    """after_flush hook: sum +1 / -1 per inserted / deleted counted row until commit."""
+    pending: dict[str, int] = session.info.get(_PENDING_KEY) or {}
+    for objs, sign in ((session.new, 1), (session.deleted, -1)):
+        for obj in objs:
+            key = _KEY_BY_MODEL.get(type(obj))
+            if key:
+                pending[key] = pending.get(key, 0) + sign
+    if pending:
+        session.info[_PENDING_KEY] = pending
+
+
+def buffer_committed_deltas(session: Session) -> None:
+    """after_commit hook: hand the transaction's deltas to the write buffer."""
+    from app.services.write_buffer import buffer_counter
+
+    for key, n in (session.info.pop(_PENDING_KEY, None) or {}).items():
+        if not n:
+            continue
+        try:
+            buffer_counter(session, key, by=n)
+        except Exception:
+            logger.exception("landing counter delta dropped for %s", key)
+
+
+def discard_deltas(session: Session) -> None:
+    """Outermost transaction ended without commit (rollback / close): those rows never happened."""
+    session.info.pop(_PENDING_KEY, None)
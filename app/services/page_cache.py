@@ -0,0 +1,124 @@
+"""Anonymous full-page cache with strong ETags / 304 for public pages.
+
+Stores rendered bodies per (path, variant) in a TtlCache (Redis when configured).
+Requests carrying a session user always bypass the cache and keep `no-store`.
+Specialist pages are keyed by consultant id so profile/services edits can drop them
+via app.services.response_cache.invalidate_*.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+from typing import Awaitable, Callable
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.auth.session import get_session_user_id
+from app.services.ttl_cache import TtlCache
+
+logger = logging.getLogger(__name__)
+
+PAGE_TTL_SEC = 300.0
+# Marketing pages: shared caches may keep them briefly; Vary: Cookie keeps logged-in shells apart.
+PUBLIC_CACHE_CONTROL = "public, max-age=60, stale-while-revalidate=300"
+# Pages that embed the visitor's own contact data: browser-only, always revalidate.
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+PAGE_CACHE = TtlCache(default_ttl=PAGE_TTL_SEC, max_entries=256, redis_prefix="ayc:page:")
+
+
+def page_key(path: str, variant: str = "") -> str:
+    return f"page:{path}:{variant}"
+
+
+def specialist_page_key(consultant_id: int, variant: str = "") -> str:
+    return f"spec:{int(consultant_id)}:{variant}"
+
+
+def invalidate_specialist_pages(consultant_id: int) -> None:
+    PAGE_CACHE.delete_prefix(f"spec:{int(consultant_id)}:")
+
+
+def variant_hash(*parts) -> str:
+    raw = "\0".join(str(p or "") for p in parts)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match uses weak comparison (RFC 9110 13.1.2)."""
+    header = (request.headers.get("if-none-match") or "").strip()
+    if not header or not etag:
+        return False
+    if header == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        c = candidate.strip()
+        if c.startswith("W/"):
+            c = c[2:]
+        if c == bare:
+            return True
+    return False
+
+
+def _cache_headers(etag: str, cache_control: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": cache_control, "Vary": "Cookie"}
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers=_cache_headers(etag, cache_control))
+
+
+def is_anonymous(request: Request) -> bool:
+    return not get_session_user_id(request)
+
+
+async def serve_cached_page(
+    request: Request,
+    key: str,
+    render: Callable[[], Awaitable[Response]],
+    *,
+    ttl: float | None = None,
+    cache_control: str = PUBLIC_CACHE_CONTROL,
+) -> Response:
+    """Return cached body (or 304) for guests; render + store on miss."""
+    if request.method != "GET" or not is_anonymous(request):
+        return await render()
+
+    hit = PAGE_CACHE.get(key)
+    if hit:
+        etag = hit["etag"]
+        if etag_matches(request, etag):
+            return not_modified(etag, cache_control)
+        headers = _cache_headers(etag, cache_control)
+        headers["X-Page-Cache"] = "hit"
+        return Response(content=hit["body"], media_type=hit["media_type"], headers=headers)
+
+    response = await render()
+    if response.status_code != 200 or not getattr(response, "body", None):
+        return response
+    body = bytes(response.body)
+    etag = make_etag(body)
+    try:
+        PAGE_CACHE.set(
+            key,
+            {
+                "body": body.decode(response.charset or "utf-8"),
+                "media_type": response.media_type or response.headers.get("content-type") or "text/html",
+                "etag": etag,
+            },
+            ttl=ttl,
+        )
+    except Exception:
+        logger.exception("page cache store failed key=%s", key)
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control)
+    for name, value in _cache_headers(etag, cache_control).items():
+        response.headers[name] = value
+    response.headers["X-Page-Cache"] = "miss"
+    return response
@@ -1,205 +1,138 @@
-"""Platform analytics: DAU/WAU and signup trends (Admin A4)."""
+"""Platform analytics: DAU/WAU and signup trends (Admin A4).
+
+Reads precomputed per-day rows from platform_daily_rollups (one range query);
+today's row is re-rolled on read when older than analytics_rollup.TODAY_TTL.
+"""
 from __future__ import annotations
 
-from datetime import date, datetime, timedelta
+from datetime import date, timedelta
 
-from sqlalchemy import func
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from app.models import Booking, PlatformUserActivity, User
+from app.models import Consultant, PlatformDailyRollup, PlatformSpecialistDaily
+from app.services.analytics_rollup import STATUS_COLUMNS, rollup_days, rollup_is_stale
 
+RANGE_CHOICES = (7, 30, 90, 365)
+TOP_SPECIALISTS = 10
 
-def analytics_snapshot(db: Session) -> dict:
-    today = date.today()
-    week_start = today - timedelta(days=6)
-    month_start = today - timedelta(days=29)
-
-    dau = (
-        db.query(func.count(func.distinct(PlatformUserActivity.user_id)))
-        .filter(PlatformUserActivity.activity_date == today)
-        .scalar()
-        or 0
-    )
-    wau = (
-        db.query(func.count(func.distinct(PlatformUserActivity.user_id)))
-        .filter(PlatformUserActivity.activity_date >= week_start)
-        .scalar()
-        or 0
-    )
-    mau = (
-        db.query(func.count(func.distinct(PlatformUserActivity.user_id)))
-        .filter(PlatformUserActivity.activity_date >= month_start)
-        .scalar()
-        or 0
-    )
 
-    signups_today = (
-        db.query(func.count(User.id))
-        .filter(User.date_joined >= datetime.combine(today, datetime.min.time()))
-        .scalar()
-        or 0
-    )
-    signups_week = (
-        db.query(func.count(User.id))
-        .filter(User.date_joined >= datetime.combine(week_start, datetime.min.time()))
-        .scalar()
-        or 0
-    )
+def analytics_range(raw: str | int | None) -> int:
+    try:
+        days = int(raw or 7)
+    except (TypeError, ValueError):
+        return 7
+    return days if days in RANGE_CHOICES else 7
 
-    bookings_week = (
-        db.query(func.count(Booking.id)).filter(Booking.booking_date >= week_start).scalar() or 0
-    )
 
-    daily_active = _daily_counts(
-        db,
-        PlatformUserActivity.activity_date,
-        PlatformUserActivity.user_id,
-        week_start,
-        today,
-        distinct_users=True,
-    )
-    daily_signups = _daily_counts(
-        db,
-        func.date(User.date_joined),
-        User.id,
-        week_start,
-        today,
-        distinct_users=False,
-    )
-    daily_bookings = _daily_counts(
-        db,
-        Booking.booking_date,
-        Booking.id,
-        week_start,
-        today,
-        distinct_users=False,
+def _window_stmt(start: date, end: date):
+    # Plain column rows: nothing for a commit (today's re-roll) to expire.
+    return (
+        select(*PlatformDailyRollup.__table__.c)
+        .where(PlatformDailyRollup.day >= start, PlatformDailyRollup.day <= end)
+        .order_by(PlatformDailyRollup.day.asc())
     )
 
-    return {
-        "dau": int(dau),
-        "wau": int(wau),
-        "mau": int(mau),
-        "signups_today": int(signups_today),
-        "signups_week": int(signups_week),
-        "bookings_week": int(bookings_week),
-        "daily_active": daily_active,
-        "daily_signups": daily_signups,
-        "daily_bookings": daily_bookings,
-    }
+
+def _window_start(today: date, days: int) -> date:
+    return today - timedelta(days=max(days, 7) - 1)
 
 
-def _daily_counts(
-    db: Session,
-    date_col,
-    count_col,
-    start: date,
-    end: date,
-    *,
-    distinct_users: bool,
-) -> list[dict]:
-    if distinct_users:
-        agg = func.count(func.distinct(count_col))
-    else:
-        agg = func.count(count_col)
-    rows = (
-        db.query(date_col, agg)
-        .filter(date_col >= start, date_col <= end)
-        .group_by(date_col)
-        .order_by(date_col.asc())
-        .all()
+def _top_specialists_stmt(today: date, days: int):
+    total = func.sum(PlatformSpecialistDaily.bookings)
+    return (
+        select(
+            PlatformSpecialistDaily.consultant_id,
+            Consultant.first_name,
+            Consultant.last_name,
+            total,
+            func.sum(PlatformSpecialistDaily.completed),
+            func.sum(PlatformSpecialistDaily.cancelled),
+        )
+        .join(Consultant, Consultant.id == PlatformSpecialistDaily.consultant_id)
+        .where(PlatformSpecialistDaily.day >= today - timedelta(days=days - 1), PlatformSpecialistDaily.day <= today)
+        .group_by(PlatformSpecialistDaily.consultant_id, Consultant.first_name, Consultant.last_name)
+        .order_by(total.desc(), PlatformSpecialistDaily.consultant_id.asc())
+        .limit(TOP_SPECIALISTS)
     )
-    by_date = {str(r[0]): int(r[1] or 0) for r in rows}
+
+
+def _series(by_day: dict, start: date, end: date, attr: str) -> list[dict]:
     out = []
     d = start
     while d <= end:
-        key = str(d)
-        out.append({"date": key, "value": by_date.get(key, 0)})
+        row = by_day.get(d)
+        out.append({"date": str(d), "value": int(getattr(row, attr) or 0) if row else 0})
         d += timedelta(days=1)
     return out
 
 
-async def analytics_snapshot_async(db) -> dict:
-    from sqlalchemy import func, select
-
-    today = date.today()
-    week_start = today - timedelta(days=6)
-    month_start = today - timedelta(days=29)
-
-    dau = (
-        await db.execute(
-            select(func.count(func.distinct(PlatformUserActivity.user_id))).where(
-                PlatformUserActivity.activity_date == today
-            )
-        )
-    ).scalar() or 0
-    wau = (
-        await db.execute(
-            select(func.count(func.distinct(PlatformUserActivity.user_id))).where(
-                PlatformUserActivity.activity_date >= week_start
-            )
-        )
-    ).scalar() or 0
-    mau = (
-        await db.execute(
-            select(func.count(func.distinct(PlatformUserActivity.user_id))).where(
-                PlatformUserActivity.activity_date >= month_start
-            )
-        )
-    ).scalar() or 0
-    signups_today = (
-        await db.execute(
-            select(func.count(User.id)).where(User.date_joined >= datetime.combine(today, datetime.min.time()))
-        )
-    ).scalar() or 0
-    signups_week = (
-        await db.execute(
-            select(func.count(User.id)).where(
-                User.date_joined >= datetime.combine(week_start, datetime.min.time())
-            )
-        )
-    ).scalar() or 0
-    bookings_week = (
-        await db.execute(select(func.count(Booking.id)).where(Booking.booking_date >= week_start))
-    ).scalar() or 0
-
-    daily_active = await _daily_counts_async(
-        db, PlatformUserActivity.activity_date, PlatformUserActivity.user_id, week_start, today, distinct_users=True
-    )
-    daily_signups = await _daily_counts_async(
-        db, func.date(User.date_joined), User.id, week_start, today, distinct_users=False
-    )
-    daily_bookings = await _daily_counts_async(
-        db, Booking.booking_date, Booking.id, week_start, today, distinct_users=False
-    )
-
+def _build_snapshot(rows: list, specialists: list, today: date, days: int) -> dict:
+    by_day = {r.day: r for r in rows}
+    today_row = by_day.get(today)
+    week = [by_day[d] for d in (today - timedelta(days=i) for i in range(7)) if d in by_day]
+    start = today - timedelta(days=days - 1)
+    in_range = [r for r in rows if r.day >= start]
+    series = {
+        "daily_active": _series(by_day, start, today, "active_users"),
+        "daily_signups": _series(by_day, start, today, "signups"),
+        "daily_bookings": _series(by_day, start, today, "bookings_scheduled"),
+        "daily_bookings_created": _series(by_day, start, today, "bookings_created"),
+    }
     return {
-        "dau": int(dau),
-        "wau": int(wau),
-        "mau": int(mau),
-        "signups_today": int(signups_today),
-        "signups_week": int(signups_week),
-        "bookings_week": int(bookings_week),
-        "daily_active": daily_active,
-        "daily_signups": daily_signups,
-        "daily_bookings": daily_bookings,
+        "days": days,
+        "range_choices": RANGE_CHOICES,
+        "dau": int(today_row.active_users) if today_row else 0,
+        "wau": int(today_row.wau) if today_row else 0,
+        "mau": int(today_row.mau) if today_row else 0,
+        "signups_today": int(today_row.signups) if today_row else 0,
+        "signups_week": sum(int(r.signups or 0) for r in week),
+        "bookings_week": sum(int(r.bookings_created or 0) for r in week),
+        "signups_total": sum(int(r.signups or 0) for r in in_range),
+        "bookings_total": sum(int(r.bookings_scheduled or 0) for r in in_range),
+        "status_totals": {
+            status: sum(int(getattr(r, column) or 0) for r in in_range) for status, column in STATUS_COLUMNS.items()
+        },
+        "series_max": {name: max([p["value"] for p in points] or [0]) or 1 for name, points in series.items()},
+        "top_specialists": [
+            {
+                "consultant_id": int(cid),
+                "name": f"{first or ''} {last or ''}".strip() or f"#{cid}",
+                "bookings": int(total or 0),
+                "completed": int(completed or 0),
+                "cancelled": int(cancelled or 0),
+            }
+            for cid, first, last, total, completed, cancelled in specialists
+        ],
+        **series,
     }
 
 
-async def _daily_counts_async(db, date_col, count_col, start: date, end: date, *, distinct_users: bool):
-    from sqlalchemy import func, select
-
-    if distinct_users:
-        agg = func.count(func.distinct(count_col))
-    else:
-        agg = func.count(count_col)
-    rows = await db.execute(
-        select(date_col, agg).where(date_col >= start, date_col <= end).group_by(date_col).order_by(date_col.asc())
-    )
-    by_date = {str(r[0]): int(r[1] or 0) for r in rows.all()}
-    out = []
-    d = start
-    while d <= end:
-        key = str(d)
-        out.append({"date": key, "value": by_date.get(key, 0)})
-        d += timedelta(days=1)
-    return out
+def analytics_snapshot(db: Session, *, days: int = 7) -> dict:
+    today = date.today()
+    rows = list(db.execute(_window_stmt(_window_start(today, days), today)).all())
+    if rollup_is_stale(rows[-1] if rows and rows[-1].day == today else None):
+        try:
+            rollup_days(db, today, today)
+        except IntegrityError:
+            db.rollback()  # a concurrent request re-rolled today first
+        rows = [r for r in rows if r.day != today] + list(db.execute(_window_stmt(today, today)).all())
+    specialists = db.execute(_top_specialists_stmt(today, days)).all()
+    return _build_snapshot(rows, specialists, today, days)
+
+
+async def analytics_snapshot_async(db, *, days: int = 7, write_db=None) -> dict:
+    """`db` may be a read replica: a stale "today" rollup is rebuilt and re-read through `write_db`."""
+    today = date.today()
+    wdb = write_db if write_db is not None else db
+    rows = list((await db.execute(_window_stmt(_window_start(today, days), today))).all())
+    if rollup_is_stale(rows[-1] if rows and rows[-1].day == today else None):
+        try:
+            await wdb.run_sync(lambda session: rollup_days(session, today, today, commit=False))
+            await wdb.commit()
+        except IntegrityError:
+            await wdb.rollback()  # a concurrent request re-rolled today first
+        rows = [r for r in rows if r.day != today] + list((await wdb.execute(_window_stmt(today, today))).all())
+    specialists = (await db.execute(_top_specialists_stmt(today, days))).all()
+    return _build_snapshot(rows, specialists, today, days)
@@ -106,118 +106,159 @@ def specialist_admin_card(db: Session, consultant_id: int) -> dict[str, Any] | N
     return {"consultant": consultant, "stats": stats, "public_slug": slug}
 
 
-def search_platform_clients(db: Session, q: str, *, limit: int = 50) -> list[dict[str, Any]]:
-    """Aggregate platform clients by client_user_id; orphan cards listed separately."""
-    q = (q or "").strip()
-    rows: list[dict[str, Any]] = []
-    seen_user_ids: set[int] = set()
+def _client_search_filters(q: str) -> tuple[list, list]:
+    like = _like(q)
+    user_filters = [
+        User.email.ilike(like),
+        User.username.ilike(like),
+        User.first_name.ilike(like),
+        User.last_name.ilike(like),
+    ]
+    card_filters = [
+        ClientCard.name.ilike(like),
+        ClientCard.email.ilike(like),
+        ClientCard.phone.ilike(like),
+        ClientCard.telegram.ilike(like),
+    ]
+    if q.isdigit():
+        user_filters.append(User.id == int(q))
+        card_filters.append(ClientCard.id == int(q))
+    return user_filters, card_filters
 
-    user_query = (
-        db.query(User)
-        .join(Booking, Booking.client_user_id == User.id)
-        .options(joinedload(User.social_accounts))
-        .distinct()
-    )
-    if q:
-        like = _like(q)
-        filters = [
-            User.email.ilike(like),
-            User.username.ilike(like),
-            User.first_name.ilike(like),
-            User.last_name.ilike(like),
-        ]
-        if q.isdigit():
-            filters.append(User.id == int(q))
-        user_query = user_query.filter(or_(*filters))
-    for user in user_query.order_by(User.id.desc()).limit(limit).all():
-        seen_user_ids.add(user.id)
-        cards_count = (
-            db.query(func.count(ClientCard.id))
-            .filter(ClientCard.client_user_id == user.id)
-            .scalar()
-            or 0
-        )
-        bookings_count = (
-            db.query(func.count(Booking.id)).filter(Booking.client_user_id == user.id).scalar() or 0
-        )
-        rows.append(
-            {
-                "key": f"user-{user.id}",
-                "client_user_id": user.id,
-                "name": f"{user.first_name} {user.last_name}".strip() or user.email or user.username,
-                "email": user.email,
-                "phone": None,
-                "cards_count": int(cards_count),
-                "bookings_count": int(bookings_count),
-                "user": user,
-            }
-        )
 
-    card_query = db.query(ClientCard).options(joinedload(ClientCard.consultant))
-    if q:
-        like = _like(q)
-        filters = [
-            ClientCard.name.ilike(like),
-            ClientCard.email.ilike(like),
-            ClientCard.phone.ilike(like),
-            ClientCard.telegram.ilike(like),
-        ]
-        if q.isdigit():
-            filters.append(ClientCard.id == int(q))
-        card_query = card_query.filter(or_(*filters))
-    for card in card_query.order_by(ClientCard.id.desc()).limit(limit * 2).all():
-        if card.client_user_id and card.client_user_id in seen_user_ids:
-            continue
+def _pick_client_rows(users: list, cards: list, limit: int) -> list[tuple[str, Any]]:
+    """Users first, then cards not covered by a listed user (one row per client_user_id)."""
+    picked: list[tuple[str, Any]] = [("user", u) for u in users]
+    seen_user_ids = {u.id for u in users}
+    for card in cards:
+        if len(picked) >= limit:
+            break
         if card.client_user_id:
-            user = db.get(User, card.client_user_id)
-            bookings_count = (
-                db.query(func.count(Booking.id))
-                .filter(Booking.client_user_id == card.client_user_id)
-                .scalar()
-                or 0
+            if card.client_user_id in seen_user_ids:
+                continue
+            seen_user_ids.add(card.client_user_id)
+            picked.append(("user_card", card))
+        else:
+            picked.append(("card", card))
+    return picked[:limit]
+
+
+def _picked_ids(picked: list[tuple[str, Any]]) -> tuple[list[int], list[int], list[int]]:
+    """(client user ids, user ids still to load, orphan card ids) for the grouped queries."""
+    user_ids = [obj.id if kind == "user" else obj.client_user_id for kind, obj in picked if kind != "card"]
+    missing = [obj.client_user_id for kind, obj in picked if kind == "user_card"]
+    orphan_card_ids = [obj.id for kind, obj in picked if kind == "card"]
+    return user_ids, missing, orphan_card_ids
+
+
+def _build_client_rows(
+    picked: list[tuple[str, Any]],
+    users_by_id: dict[int, User],
+    cards_by_user: dict[int, int],
+    bookings_by_user: dict[int, int],
+    bookings_by_card: dict[int, int],
+) -> list[dict[str, Any]]:
+    rows: list[dict[str, Any]] = []
+    for kind, obj in picked:
+        if kind == "user":
+            rows.append(
+                {
+                    "key": f"user-{obj.id}",
+                    "client_user_id": obj.id,
+                    "name": f"{obj.first_name} {obj.last_name}".strip() or obj.email or obj.username,
+                    "email": obj.email,
+                    "phone": None,
+                    "cards_count": cards_by_user.get(obj.id, 0),
+                    "bookings_count": bookings_by_user.get(obj.id, 0),
+                    "user": obj,
+                }
             )
+        elif kind == "user_card":
+            uid = obj.client_user_id
+            user = users_by_id.get(uid)
             rows.append(
                 {
-                    "key": f"user-{card.client_user_id}",
-                    "client_user_id": card.client_user_id,
-                    "name": card.name or (user and (user.email or user.username)) or "-",
-                    "email": card.email or (user.email if user else None),
-                    "phone": card.phone,
-                    "cards_count": (
-                        db.query(func.count(ClientCard.id))
-                        .filter(ClientCard.client_user_id == card.client_user_id)
-                        .scalar()
-                        or 1
-                    ),
-                    "bookings_count": int(bookings_count),
+                    "key": f"user-{uid}",
+                    "client_user_id": uid,
+                    "name": obj.name or (user and (user.email or user.username)) or "-",
+                    "email": obj.email or (user.email if user else None),
+                    "phone": obj.phone,
+                    "cards_count": cards_by_user.get(uid) or 1,
+                    "bookings_count": bookings_by_user.get(uid, 0),
                     "user": user,
                 }
             )
-            seen_user_ids.add(card.client_user_id)
         else:
-            bookings_count = (
-                db.query(func.count(Booking.id))
-                .filter(Booking.client_card_id == card.id)
-                .scalar()
-                or 0
-            )
             rows.append(
                 {
-                    "key": f"card-{card.id}",
+                    "key": f"card-{obj.id}",
                     "client_user_id": None,
-                    "client_card_id": card.id,
-                    "name": card.name or card.phone or card.email or f"Карточка #{card.id}",
-                    "email": card.email,
-                    "phone": card.phone,
+                    "client_card_id": obj.id,
+                    "name": obj.name or obj.phone or obj.email or f"Карточка #{obj.id}",
+                    "email": obj.email,
+                    "phone": obj.phone,
                     "cards_count": 1,
-                    "bookings_count": int(bookings_count),
+                    "bookings_count": bookings_by_card.get(obj.id, 0),
                     "user": None,
-                    "consultant": card.consultant,
+                    "consultant": obj.consultant,
                 }
             )
-        if len(rows) >= limit:
-            break
-    return rows[:limit]
+    return rows
+
+
+def search_platform_clients(db: Session, q: str, *, limit: int = 50) -> list[dict[str, Any]]:
+    """Aggregate platform clients by client_user_id; orphan cards listed separately.
+
+    Counts and card owners come from grouped queries over the picked id set, so the
+    number of round-trips does not grow with ``limit``.
+    """
+    q = (q or "").strip()
+    user_query = (
+        db.query(User)
+        .join(Booking, Booking.client_user_id == User.id)
+        .options(joinedload(User.social_accounts))
+        .distinct()
+    )
+    card_query = db.query(ClientCard).options(joinedload(ClientCard.consultant))
+    if q:
+        user_filters, card_filters = _client_search_filters(q)
+        user_query = user_query.filter(or_(*user_filters))
+        card_query = card_query.filter(or_(*card_filters))
+    users = user_query.order_by(User.id.desc()).limit(limit).all()
+    cards = card_query.order_by(ClientCard.id.desc()).limit(limit * 2).all() if len(users) < limit else []
+    picked = _pick_client_rows(users, cards, limit)
+    user_ids, missing, orphan_card_ids = _picked_ids(picked)
+
+    users_by_id = {u.id: u for u in users}
+    cards_by_user: dict[int, int] = {}
+    bookings_by_user: dict[int, int] = {}
+    bookings_by_card: dict[int, int] = {}
+    if missing:
+        users_by_id.update({u.id: u for u in db.query(User).filter(User.id.in_(missing)).all()})
+    if user_ids:
+        cards_by_user = {
+            int(uid): int(n)
+            for uid, n in db.query(ClientCard.client_user_id, func.count(ClientCard.id))
+            .filter(ClientCard.client_user_id.in_(user_ids))
+            .group_by(ClientCard.client_user_id)
+            .all()
+        }
+        bookings_by_user = {
+            int(uid): int(n)
+            for uid, n in db.query(Booking.client_user_id, func.count(Booking.id))
+            .filter(Booking.client_user_id.in_(user_ids))
+            .group_by(Booking.client_user_id)
+            .all()
+        }
+    if orphan_card_ids:
+        bookings_by_card = {
+            int(cid): int(n)
+            for cid, n in db.query(Booking.client_card_id, func.count(Booking.id))
+            .filter(Booking.client_card_id.in_(orphan_card_ids))
+            .group_by(Booking.client_card_id)
+            .all()
+        }
+    return _build_client_rows(picked, users_by_id, cards_by_user, bookings_by_user, bookings_by_card)
 
 
 def platform_client_detail(db: Session, *, user_id: int | None = None, card_id: int | None = None) -> dict[str, Any] | None:
@@ -311,6 +352,9 @@ def admin_set_booking_status(
     if old_status == new_status:
         return booking, None
     booking.status = new_status
+    from app.services.crm_aggregates import refresh_card_aggregates
+
+    refresh_card_aggregates(db, [booking.client_card_id])
     db.commit()
     if notify:
         from app.services.telegram import notify_booking_status_changed
@@ -537,106 +581,54 @@ async def search_platform_clients_async(db, q: str, *, limit: int = 50) -> list[
     from sqlalchemy.orm import selectinload
 
     q = (q or "").strip()
-    rows: list[dict[str, Any]] = []
-    seen_user_ids: set[int] = set()
     user_stmt = (
         select(User)
         .join(Booking, Booking.client_user_id == User.id)
         .options(selectinload(User.social_accounts))
         .distinct()
     )
+    card_stmt = select(ClientCard).options(selectinload(ClientCard.consultant))
     if q:
-        like = _like(q)
-        filters = [
-            User.email.ilike(like),
-            User.username.ilike(like),
-            User.first_name.ilike(like),
-            User.last_name.ilike(like),
-        ]
-        if q.isdigit():
-            filters.append(User.id == int(q))
-        user_stmt = user_stmt.where(or_(*filters))
+        user_filters, card_filters = _client_search_filters(q)
+        user_stmt = user_stmt.where(or_(*user_filters))
+        card_stmt = card_stmt.where(or_(*card_filters))
     users = list((await db.execute(user_stmt.order_by(User.id.desc()).limit(limit))).scalars().unique().all())
-    for user in users:
-        seen_user_ids.add(user.id)
-        cards_count = (
-            await db.execute(select(func.count(ClientCard.id)).where(ClientCard.client_user_id == user.id))
-        ).scalar() or 0
-        bookings_count = (
-            await db.execute(select(func.count(Booking.id)).where(Booking.client_user_id == user.id))
-        ).scalar() or 0
-        rows.append(
-            {
-                "key": f"user-{user.id}",
-                "client_user_id": user.id,
-                "name": f"{user.first_name} {user.last_name}".strip() or user.email or user.username,
-                "email": user.email,
-                "phone": None,
-                "cards_count": int(cards_count),
-                "bookings_count": int(bookings_count),
-                "user": user,
-            }
+    cards: list = []
+    if len(users) < limit:
+        cards = list(
+            (await db.execute(card_stmt.order_by(ClientCard.id.desc()).limit(limit * 2))).scalars().unique().all()
         )
-    card_stmt = select(ClientCard).options(selectinload(ClientCard.consultant))
-    if q:
-        like = _like(q)
-        filters = [
-            ClientCard.name.ilike(like),
-            ClientCard.email.ilike(like),
-            ClientCard.phone.ilike(like),
-            ClientCard.telegram.ilike(like),
-        ]
-        if q.isdigit():
-            filters.append(ClientCard.id == int(q))
-        card_stmt = card_stmt.where(or_(*filters))
-    cards = list((await db.execute(card_stmt.order_by(ClientCard.id.desc()).limit(limit * 2))).scalars().unique().all())
-    for card in cards:
-        if card.client_user_id and card.client_user_id in seen_user_ids:
-            continue
-        if card.client_user_id:
-            user = await db.get(User, card.client_user_id)
-            bookings_count = (
-                await db.execute(select(func.count(Booking.id)).where(Booking.client_user_id == card.client_user_id))
-            ).scalar() or 0
-            cards_n = (
-                await db.execute(
-                    select(func.count(ClientCard.id)).where(ClientCard.client_user_id == card.client_user_id)
-                )
-            ).scalar() or 1
-            rows.append(
-                {
-                    "key": f"user-{card.client_user_id}",
-                    "client_user_id": card.client_user_id,
-                    "name": card.name or (user and (user.email or user.username)) or "-",
-                    "email": card.email or (user.email if user else None),
-                    "phone": card.phone,
-                    "cards_count": int(cards_n),
-                    "bookings_count": int(bookings_count),
-                    "user": user,
-                }
-            )
-            seen_user_ids.add(card.client_user_id)
-        else:
-            bookings_count = (
-                await db.execute(select(func.count(Booking.id)).where(Booking.client_card_id == card.id))
-            ).scalar() or 0
-            rows.append(
-                {
-                    "key": f"card-{card.id}",
-                    "client_user_id": None,
-                    "client_card_id": card.id,
-                    "name": card.name or card.phone or card.email or f"Карточка #{card.id}",
-                    "email": card.email,
-                    "phone": card.phone,
-                    "cards_count": 1,
-                    "bookings_count": int(bookings_count),
-                    "user": None,
-                    "consultant": card.consultant,
-                }
-            )
-        if len(rows) >= limit:
-            break
-    return rows[:limit]
+    picked = _pick_client_rows(users, cards, limit)
+    user_ids, missing, orphan_card_ids = _picked_ids(picked)
+
+    users_by_id = {u.id: u for u in users}
+    cards_by_user: dict[int, int] = {}
+    bookings_by_user: dict[int, int] = {}
+    bookings_by_card: dict[int, int] = {}
+    if missing:
+        loaded = (await db.execute(select(User).where(User.id.in_(missing)))).scalars().all()
+        users_by_id.update({u.id: u for u in loaded})
+    if user_ids:
+        res = await db.execute(
+            select(ClientCard.client_user_id, func.count(ClientCard.id))
+            .where(ClientCard.client_user_id.in_(user_ids))
+            .group_by(ClientCard.client_user_id)
+        )
+        cards_by_user = {int(uid): int(n) for uid, n in res.all()}
+        res = await db.execute(
+            select(Booking.client_user_id, func.count(Booking.id))
+            .where(Booking.client_user_id.in_(user_ids))
+            .group_by(Booking.client_user_id)
+        )
+        bookings_by_user = {int(uid): int(n) for uid, n in res.all()}
+    if orphan_card_ids:
+        res = await db.execute(
+            select(Booking.client_card_id, func.count(Booking.id))
+            .where(Booking.client_card_id.in_(orphan_card_ids))
+            .group_by(Booking.client_card_id)
+        )
+        bookings_by_card = {int(cid): int(n) for cid, n in res.all()}
+    return _build_client_rows(picked, users_by_id, cards_by_user, bookings_by_user, bookings_by_card)
 
 
 async def platform_client_detail_async(
@@ -753,6 +745,9 @@ async def admin_set_booking_status_async(
     if old_status == new_status:
         return booking, None
     booking.status = new_status
+    from app.services.crm_aggregates import refresh_card_aggregates_async
+
+    await refresh_card_aggregates_async(db, [booking.client_card_id])
     await db.commit()
     if notify:
         from app.services.notify_bridge import schedule_status_changed
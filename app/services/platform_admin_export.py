@@ -1,153 +1,188 @@
-"""CSV export for admin (Admin A5)."""
+"""Streaming CSV / NDJSON export for admin (Admin A5).
+
+Column-only selects read through server-side cursors (``yield_per``) and are encoded
+one partition at a time, so memory stays flat no matter how many rows are exported.
+"""
 from __future__ import annotations
 
 import csv
 import io
+import json
+import zlib
+from collections.abc import AsyncIterator, Iterable, Iterator, Mapping
 from datetime import date
+from typing import Any
 
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select
+from sqlalchemy.orm import Session
 
-from app.models import Booking, Calendar, User
+from app.models import Booking, Calendar, Service, User
+from app.services.bookings_hub import STATUS_LABELS
 
+EXPORT_BATCH = 1000
+FORMATS = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson; charset=utf-8"}
+USER_STATUSES = ("active", "inactive", "staff")
 
-def export_users_csv(db: Session, *, limit: int = 5000) -> str:
-    buf = io.StringIO()
-    writer = csv.writer(buf)
-    writer.writerow(
-        ["id", "email", "username", "first_name", "last_name", "is_active", "is_staff", "date_joined"]
-    )
-    for u in db.query(User).order_by(User.id.asc()).limit(limit).all():
-        writer.writerow(
-            [
-                u.id,
-                u.email,
-                u.username,
-                u.first_name,
-                u.last_name,
-                int(u.is_active),
-                int(u.is_staff),
-                u.date_joined,
-            ]
-        )
-    return buf.getvalue()
+USER_COLUMNS = ["id", "email", "username", "first_name", "last_name", "is_active", "is_staff", "date_joined"]
+BOOKING_COLUMNS = [
+    "id",
+    "booking_date",
+    "booking_time",
+    "status",
+    "client_name",
+    "client_phone",
+    "client_user_id",
+    "consultant_id",
+    "calendar_id",
+    "service_name",
+]
 
 
-def export_bookings_csv(db: Session, *, limit: int = 5000) -> str:
-    buf = io.StringIO()
-    writer = csv.writer(buf)
-    writer.writerow(
-        [
-            "id",
-            "booking_date",
-            "booking_time",
-            "status",
-            "client_name",
-            "client_phone",
-            "client_user_id",
-            "consultant_id",
-            "calendar_id",
-            "service_name",
-        ]
-    )
-    rows = (
-        db.query(Booking)
-        .options(joinedload(Booking.service), joinedload(Booking.calendar))
+def users_export_stmt(*, date_from: date | None = None, date_to: date | None = None, statuses: tuple = ()):
+    stmt = select(
+        User.id, User.email, User.username, User.first_name, User.last_name,
+        User.is_active, User.is_staff, User.date_joined,
+    ).order_by(User.id.asc())
+    if date_from:
+        stmt = stmt.where(User.date_joined >= date_from)
+    if date_to:
+        stmt = stmt.where(User.date_joined < date.fromordinal(date_to.toordinal() + 1))
+    if "staff" in statuses:
+        stmt = stmt.where(User.is_staff.is_(True))
+    if "active" in statuses and "inactive" not in statuses:
+        stmt = stmt.where(User.is_active.is_(True))
+    elif "inactive" in statuses and "active" not in statuses:
+        stmt = stmt.where(User.is_active.is_(False))
+    return stmt
+
+
+def bookings_export_stmt(*, date_from: date | None = None, date_to: date | None = None, statuses: tuple = ()):
+    stmt = (
+        select(
+            Booking.id, Booking.booking_date, Booking.booking_time, Booking.status,
+            Booking.client_name, Booking.client_phone, Booking.client_user_id,
+            Calendar.consultant_id, Booking.calendar_id, Service.name,
+        )
+        .outerjoin(Calendar, Calendar.id == Booking.calendar_id)
+        .outerjoin(Service, Service.id == Booking.service_id)
         .order_by(Booking.id.desc())
-        .limit(limit)
-        .all()
     )
-    for b in rows:
-        consultant_id = ""
-        if b.calendar and isinstance(b.calendar, Calendar):
-            consultant_id = b.calendar.consultant_id
-        writer.writerow(
-            [
-                b.id,
-                b.booking_date,
-                b.booking_time,
-                b.status,
-                b.client_name,
-                b.client_phone,
-                b.client_user_id or "",
-                consultant_id,
-                b.calendar_id,
-                b.service.name if b.service else "",
-            ]
-        )
-    return buf.getvalue()
+    if date_from:
+        stmt = stmt.where(Booking.booking_date >= date_from)
+    if date_to:
+        stmt = stmt.where(Booking.booking_date <= date_to)
+    if statuses:
+        stmt = stmt.where(Booking.status.in_(statuses))
+    return stmt
+
+
+def _user_csv(row) -> list:
+    return [*row[:5], int(bool(row.is_active)), int(bool(row.is_staff)), row.date_joined]
+
+
+def _booking_csv(row) -> list:
+    return [*row[:6], row.client_user_id or "", row.consultant_id or "", row.calendar_id, row.name or ""]
+
+
+# kind -> (header, statement builder, CSV row encoder, allowed status filter values)
+EXPORTS: dict[str, tuple[list[str], Any, Any, tuple[str, ...]]] = {
+    "users": (USER_COLUMNS, users_export_stmt, _user_csv, USER_STATUSES),
+    "bookings": (BOOKING_COLUMNS, bookings_export_stmt, _booking_csv, tuple(STATUS_LABELS)),
+}
+
 
+def export_options(kind: str, params: Mapping[str, str]) -> tuple[dict[str, Any] | None, str | None]:
+    """Validate ?format=&gzip=&date_from=&date_to=&status=a,b for an export; (options, error)."""
+    if kind not in EXPORTS:
+        return None, f"unknown export: {kind}"
+    fmt = (params.get("format") or "csv").strip().lower()
+    if fmt not in FORMATS:
+        return None, f"format must be one of: {', '.join(FORMATS)}"
+    filters: dict[str, Any] = {}
+    for name in ("date_from", "date_to"):
+        raw = (params.get(name) or "").strip()
+        if raw:
+            try:
+                filters[name] = date.fromisoformat(raw)
+            except ValueError:
+                return None, f"{name} must be YYYY-MM-DD"
+    statuses = tuple(s for s in (p.strip() for p in (params.get("status") or "").split(",")) if s)
+    bad = [s for s in statuses if s not in EXPORTS[kind][3]]
+    if bad:
+        return None, f"unknown status: {', '.join(bad)}"
+    filters["statuses"] = statuses
+    gz = (params.get("gzip") or "").strip().lower() in ("1", "true", "yes", "on")
+    return {"kind": kind, "fmt": fmt, "gzip": gz, "filters": filters}, None
 
-def export_filename(prefix: str) -> str:
-    return f"{prefix}_{date.today().isoformat()}.csv"
 
+def _json_value(value: Any) -> Any:
+    return value.isoformat() if hasattr(value, "isoformat") else value
 
-async def export_users_csv_async(db, *, limit: int = 5000) -> str:
-    from sqlalchemy import select
 
+def _encode_rows(kind: str, fmt: str, rows: Iterable) -> str:
+    columns, _, csv_row, _ = EXPORTS[kind]
+    if fmt == "ndjson":
+        return "".join(
+            json.dumps({c: _json_value(v) for c, v in zip(columns, row)}, ensure_ascii=False) + "\n"
+            for row in rows
+        )
     buf = io.StringIO()
     writer = csv.writer(buf)
-    writer.writerow(
-        ["id", "email", "username", "first_name", "last_name", "is_active", "is_staff", "date_joined"]
-    )
-    result = await db.execute(select(User).order_by(User.id.asc()).limit(limit))
-    for u in result.scalars().all():
-        writer.writerow(
-            [
-                u.id,
-                u.email,
-                u.username,
-                u.first_name,
-                u.last_name,
-                int(u.is_active),
-                int(u.is_staff),
-                u.date_joined,
-            ]
-        )
+    writer.writerows(csv_row(row) for row in rows)
     return buf.getvalue()
 
 
-async def export_bookings_csv_async(db, *, limit: int = 5000) -> str:
-    from sqlalchemy import select
-    from sqlalchemy.orm import selectinload
-
+def _header(kind: str, fmt: str) -> str:
+    if fmt != "csv":
+        return ""
     buf = io.StringIO()
-    writer = csv.writer(buf)
-    writer.writerow(
-        [
-            "id",
-            "booking_date",
-            "booking_time",
-            "status",
-            "client_name",
-            "client_phone",
-            "client_user_id",
-            "consultant_id",
-            "calendar_id",
-            "service_name",
-        ]
-    )
-    result = await db.execute(
-        select(Booking)
-        .options(selectinload(Booking.service), selectinload(Booking.calendar))
-        .order_by(Booking.id.desc())
-        .limit(limit)
-    )
-    for b in result.scalars().unique().all():
-        consultant_id = ""
-        if b.calendar and isinstance(b.calendar, Calendar):
-            consultant_id = b.calendar.consultant_id
-        writer.writerow(
-            [
-                b.id,
-                b.booking_date,
-                b.booking_time,
-                b.status,
-                b.client_name,
-                b.client_phone,
-                b.client_user_id or "",
-                consultant_id,
-                b.calendar_id,
-                b.service.name if b.service else "",
-            ]
-        )
+    csv.writer(buf).writerow(EXPORTS[kind][0])
     return buf.getvalue()
+
+
+def iter_export(db: Session, kind: str, *, fmt: str = "csv", batch: int = EXPORT_BATCH, **filters) -> Iterator[str]:
+    """Yield the export text one ``batch``-sized partition at a time."""
+    header = _header(kind, fmt)
+    if header:
+        yield header
+    stmt = EXPORTS[kind][1](**filters).execution_options(yield_per=batch)
+    for rows in db.execute(stmt).partitions():
+        yield _encode_rows(kind, fmt, rows)
+
+
+async def iter_export_async(
+    db, kind: str, *, fmt: str = "csv", batch: int = EXPORT_BATCH, **filters
+) -> AsyncIterator[str]:
+    header = _header(kind, fmt)
+    if header:
+        yield header
+    stmt = EXPORTS[kind][1](**filters).execution_options(yield_per=batch)
+    result = await db.stream(stmt)
+    async for rows in result.partitions():
+        yield _encode_rows(kind, fmt, rows)
+
+
+async def encode_stream_async(chunks: AsyncIterator[str], *, gzip: bool = False) -> AsyncIterator[bytes]:
+    """UTF-8 encode (and optionally gzip) a text chunk stream for StreamingResponse."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
+    async for chunk in chunks:
+        data = chunk.encode("utf-8")
+        if compressor:
+            # Sync-flush per partition so the client receives bytes as each batch is read.
+            data = compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    if compressor:
+        yield compressor.flush()
+
+
+def export_users_csv(db: Session, **filters) -> str:
+    return "".join(iter_export(db, "users", **filters))
+
+
+def export_bookings_csv(db: Session, **filters) -> str:
+    return "".join(iter_export(db, "bookings", **filters))
+
+
+def export_filename(prefix: str, fmt: str = "csv", *, gzip: bool = False) -> str:
+    return f"{prefix}_{date.today().isoformat()}.{fmt}" + (".gz" if gzip else "")
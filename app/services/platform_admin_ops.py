@@ -2,8 +2,6 @@
 from __future__ import annotations
 
 import logging
-import shutil
-import subprocess
 from datetime import datetime
 from pathlib import Path
 from typing import Any
@@ -13,6 +11,7 @@ from sqlalchemy.orm import Session
 from app.config import Settings, get_settings
 from app.db_schema import get_schema_health
 from app.services.dual_role_inventory import collect_dual_role_inventory, format_inventory_report
+from app.services.platform_backup import BackupError, backups_dir, is_backup_file, read_backup_job, run_backup
 from app.services.prod_readiness import run_prod_readiness
 from app.services.deploy_checklist import deploy_checklist
 
@@ -24,8 +23,9 @@ def system_snapshot(db: Session, settings: Settings | None = None) -> dict[str,
     schema = get_schema_health()
     inventory = collect_dual_role_inventory(db)
     db_kind = "sqlite" if s.database_url.startswith("sqlite") else "mysql"
-    backups_dir = s.base_dir / "media" / "backups"
-    backups = list_recent_backups(backups_dir, limit=10)
+    directory = backups_dir(s)
+    backups = list_recent_backups(directory, limit=10)
+    backup_job = read_backup_job(s)
     readiness = run_prod_readiness(db, s)
     return {
         "schema": schema,
@@ -37,8 +37,10 @@ def system_snapshot(db: Session, settings: Settings | None = None) -> dict[str,
         "inventory_report": format_inventory_report(inventory),
         "readiness": readiness,
         "deploy_checklist": deploy_checklist(db, s),
-        "backups_dir": str(backups_dir.relative_to(s.base_dir)),
+        "backups_dir": str(directory.relative_to(s.base_dir)),
         "recent_backups": backups,
+        "backup_job": backup_job,
+        "backup_keep": s.backup_keep,
         "support_email": s.support_email,
     }
 
@@ -46,80 +48,42 @@ def system_snapshot(db: Session, settings: Settings | None = None) -> dict[str,
 def list_recent_backups(backups_dir: Path, *, limit: int = 10) -> list[dict[str, Any]]:
     if not backups_dir.is_dir():
         return []
-    files = sorted(backups_dir.glob("*"), key=lambda p: p.stat().st_mtime, reverse=True)
+    files = sorted(
+        (p for p in backups_dir.iterdir() if is_backup_file(p)),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )
     out = []
     for path in files[:limit]:
-        if not path.is_file():
-            continue
         stat = path.stat()
         out.append(
             {
                 "name": path.name,
                 "size_kb": round(stat.st_size / 1024, 1),
                 "mtime": datetime.fromtimestamp(stat.st_mtime).isoformat(sep=" ", timespec="seconds"),
+                "has_checksum": path.with_name(path.name + ".sha256").is_file(),
             }
         )
     return out
 
 
 def create_platform_backup(settings: Settings | None = None) -> tuple[str | None, str | None]:
-    """Create DB backup. Returns (relative_path, error)."""
-    s = settings or get_settings()
-    backups_dir = s.base_dir / "media" / "backups"
-    backups_dir.mkdir(parents=True, exist_ok=True)
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-
-    if s.database_url.startswith("sqlite"):
-        src = s.base_dir / "data.db"
-        if not src.is_file():
-            return None, "Файл data.db не найден"
-        dst = backups_dir / f"data_{ts}.db"
-        shutil.copy2(src, dst)
-        return str(dst.relative_to(s.base_dir)).replace("\\", "/"), None
-
-    if not s.db_name:
-        return None, "MySQL: DB_NAME не задан"
-    dst = backups_dir / f"mysql_{s.db_name}_{ts}.sql"
-    cmd = [
-        "mysqldump",
-        f"-h{s.db_host}",
-        f"-P{s.db_port}",
-        f"-u{s.db_user}",
-        s.db_name,
-    ]
-    env = None
-    if s.db_password:
-        env = {"MYSQL_PWD": s.db_password}
+    """Create DB backup in the calling thread (CLI). Returns (relative_path, error)."""
     try:
-        with dst.open("w", encoding="utf-8") as fh:
-            proc = subprocess.run(
-                cmd,
-                stdout=fh,
-                stderr=subprocess.PIPE,
-                text=True,
-                env=env,
-                timeout=120,
-                check=False,
-            )
-        if proc.returncode != 0:
-            dst.unlink(missing_ok=True)
-            err = (proc.stderr or "mysqldump failed")[:500]
-            return None, f"MySQL backup failed: {err}"
-        return str(dst.relative_to(s.base_dir)).replace("\\", "/"), None
-    except FileNotFoundError:
-        return None, "mysqldump не найден на сервере. Сделайте дамп вручную через панель хостинга."
+        return run_backup(settings)["path"], None
+    except BackupError as e:
+        return None, str(e)
     except Exception as e:
         logger.exception("backup failed")
-        dst.unlink(missing_ok=True)
         return None, str(e)[:500]
 
 
 async def system_snapshot_async(db, settings: Settings | None = None) -> dict[str, Any]:
-    """Async wrapper: inventory/readiness helpers still use sync Session via bridge."""
-    from app.database import SessionLocal
+    """Async wrapper: inventory/readiness helpers still use sync Session via bridge (replica when set)."""
+    from app.database import ReadSessionLocal
 
     s = settings or get_settings()
-    sdb = SessionLocal()
+    sdb = ReadSessionLocal()
     try:
         return system_snapshot(sdb, s)
     finally:
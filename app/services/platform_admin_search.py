@@ -1,6 +1,7 @@
-"""Admin Ctrl+K global search."""
+"""Admin Ctrl+K global search: one ranked query over the admin search index."""
 from __future__ import annotations
 
+import logging
 from typing import Any
 
 from sqlalchemy.orm import Session
@@ -12,20 +13,61 @@ from app.services.admin_rbac import (
     PERM_USERS_READ,
     has_permission,
 )
+from app.services.admin_search_index import search_index
 from app.services.platform_admin_domain import list_bookings, search_platform_clients, search_specialists
 from app.services.platform_admin_users import search_users
 from app.services.platform_admin_access import admin_permissions
 from app.services.platform_support import list_support_tickets
 
+logger = logging.getLogger(__name__)
+
+USER_INDEX_TYPES = ("user", "specialist", "client", "booking")
+
+
+def index_types(can_users: bool, can_support: bool) -> list[str]:
+    """Search index entity types visible for the admin's permissions."""
+    return [*(USER_INDEX_TYPES if can_users else ()), *(("support",) if can_support else ())]
+
 
 def admin_global_search(db: Session, user: AuthUser, q: str, *, limit_per_type: int = 5) -> list[dict[str, Any]]:
     q = (q or "").strip()
     if len(q) < 2:
         return _nav_shortcuts(db, user, q)
 
-    results: list[dict[str, Any]] = []
+    can_users = has_permission(db, user, PERM_USERS_READ)
+    can_support = has_permission(db, user, PERM_SUPPORT)
+    try:
+        results = search_index(db, q, index_types(can_users, can_support), limit_per_type=limit_per_type)
+    except Exception:
+        logger.exception("admin search index query failed; falling back to per-table search")
+        results = _fanout_search(
+            db, q, can_users=can_users, can_support=can_support, limit_per_type=limit_per_type
+        )
+
+    if has_permission(db, user, PERM_ERRORS) and q.isdigit():
+        from app.models import PlatformErrorLog
+
+        err = db.get(PlatformErrorLog, int(q))
+        if err:
+            results.append(
+                {
+                    "type": "error",
+                    "id": err.id,
+                    "title": err.message or f"Error #{err.id}",
+                    "subtitle": f"{err.method} {err.path or ''} · {err.status}",
+                    "url": f"/platform-admin/errors/?status={err.status}",
+                }
+            )
+
+    return results[:25]
 
-    if has_permission(db, user, PERM_USERS_READ):
+
+def _fanout_search(
+    db: Session, q: str, *, can_users: bool, can_support: bool, limit_per_type: int
+) -> list[dict[str, Any]]:
+    """Per-table ILIKE search; fallback when the search index is unavailable."""
+    results: list[dict[str, Any]] = []
+    if can_users:
         for u in search_users(db, q, limit=limit_per_type):
             label = u.email or u.username
             name = f"{u.first_name} {u.last_name}".strip()
@@ -83,7 +125,7 @@ def admin_global_search(db: Session, user: AuthUser, q: str, *, limit_per_type:
                 }
             )
 
-    if has_permission(db, user, PERM_SUPPORT):
+    if can_support:
         for t in list_support_tickets(db, q=q, limit=limit_per_type):
             results.append(
                 {
@@ -94,23 +136,7 @@ def admin_global_search(db: Session, user: AuthUser, q: str, *, limit_per_type:
                     "url": f"/platform-admin/support/{t.id}/",
                 }
             )
-
-    if has_permission(db, user, PERM_ERRORS) and q.isdigit():
-        from app.models import PlatformErrorLog
-
-        err = db.get(PlatformErrorLog, int(q))
-        if err:
-            results.append(
-                {
-                    "type": "error",
-                    "id": err.id,
-                    "title": err.message or f"Error #{err.id}",
-                    "subtitle": f"{err.method} {err.path or ''} · {err.status}",
-                    "url": f"/platform-admin/errors/?status={err.status}",
-                }
-            )
-
-    return results[:25]
+    return results
 
 
 def _nav_shortcuts(db: Session, user: AuthUser, q: str) -> list[dict[str, Any]]:
@@ -144,22 +170,53 @@ async def admin_global_search_async(
 ) -> list[dict[str, Any]]:
     from app.models import PlatformErrorLog
     from app.services.admin_rbac import PERM_ERRORS, PERM_SUPPORT, PERM_USERS_READ, has_permission_async
+    from app.services.admin_search_index import search_index_async
+
+    q = (q or "").strip()
+    if len(q) < 2:
+        return await _nav_shortcuts_async(db, user, q)
+
+    can_users = await has_permission_async(db, user, PERM_USERS_READ)
+    can_support = await has_permission_async(db, user, PERM_SUPPORT)
+    try:
+        results = await search_index_async(
+            db, q, index_types(can_users, can_support), limit_per_type=limit_per_type
+        )
+    except Exception:
+        logger.exception("admin search index query failed; falling back to per-table search")
+        results = await _fanout_search_async(
+            db, q, can_users=can_users, can_support=can_support, limit_per_type=limit_per_type
+        )
+
+    if await has_permission_async(db, user, PERM_ERRORS) and q.isdigit():
+        err = await db.get(PlatformErrorLog, int(q))
+        if err:
+            results.append(
+                {
+                    "type": "error",
+                    "id": err.id,
+                    "title": err.message or f"Error #{err.id}",
+                    "subtitle": f"{err.method} {err.path or ''} · {err.status}",
+                    "url": f"/platform-admin/errors/?status={err.status}",
+                }
+            )
+
+    return results[:25]
+
+
+async def _fanout_search_async(
+    db, q: str, *, can_users: bool, can_support: bool, limit_per_type: int
+) -> list[dict[str, Any]]:
     from app.services.platform_admin_domain import (
         list_bookings_async,
         search_platform_clients_async,
         search_specialists_async,
     )
     from app.services.platform_admin_users import search_users_async
-    from app.services.platform_admin_access import admin_permissions_async
     from app.services.platform_support import list_support_tickets_async
 
-    q = (q or "").strip()
-    if len(q) < 2:
-        return await _nav_shortcuts_async(db, user, q)
-
     results: list[dict[str, Any]] = []
-
-    if await has_permission_async(db, user, PERM_USERS_READ):
+    if can_users:
         for u in await search_users_async(db, q, limit=limit_per_type):
             label = u.email or u.username
             name = f"{u.first_name} {u.last_name}".strip()
@@ -217,7 +274,7 @@ async def admin_global_search_async(
                 }
             )
 
-    if await has_permission_async(db, user, PERM_SUPPORT):
+    if can_support:
         for t in await list_support_tickets_async(db, q=q, limit=limit_per_type):
             results.append(
                 {
@@ -228,26 +285,14 @@ async def admin_global_search_async(
                     "url": f"/platform-admin/support/{t.id}/",
                 }
             )
-
-    if await has_permission_async(db, user, PERM_ERRORS) and q.isdigit():
-        err = await db.get(PlatformErrorLog, int(q))
-        if err:
-            results.append(
-                {
-                    "type": "error",
-                    "id": err.id,
-                    "title": err.message or f"Error #{err.id}",
-                    "subtitle": f"{err.method} {err.path or ''} · {err.status}",
-                    "url": f"/platform-admin/errors/?status={err.status}",
-                }
-            )
-
-    return results[:25]
+    return results
 
 
 async def _nav_shortcuts_async(db, user: AuthUser, q: str) -> list[dict[str, Any]]:
     if q:
         return []
+    from app.services.platform_admin_access import admin_permissions_async
+
     perms = await admin_permissions_async(db, user)
     shortcuts: tuple[tuple[str, str, str], ...] = (
         ("users", "Пользователи", "/platform-admin/users/"),
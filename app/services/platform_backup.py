@@ -0,0 +1,388 @@
+"""DB backups for platform ops and cron (Admin A5).
+
+- SQLite: the online backup API (sqlite3 Connection.backup) copies the live
+  database a batch of pages at a time. Writers can keep going while it runs and
+  the copy is still consistent. The copy must pass PRAGMA quick_check before it
+  is renamed into place.
+- MySQL: ``mysqldump --single-transaction --quick`` is streamed through gzip,
+  or zstd when the optional ``zstandard`` package is installed
+  (BACKUP_COMPRESSION). The dump is never held in memory and has no wall-clock
+  limit.
+- Every backup gets a ``<name>.sha256`` sidecar in sha256sum format, and
+  verify_backup() re-hashes the file. Only the newest BACKUP_KEEP backups are
+  kept.
+- start_backup_job() runs a backup on a background thread. The job state is kept
+  in ``.job.json`` in the backups dir, so any worker can answer status polls.
+- Backups live in ``var/backups``, outside MEDIA_ROOT (served publicly as /media);
+  admins download them through /platform-admin/ops/backups/<name>.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+from sqlalchemy.engine import make_url
+
+from app.config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+SQLITE_PAGES = 1024  # pages per backup step; the source is unlocked between steps
+STREAM_CHUNK = 1 << 20
+JOB_FILE = ".job.json"
+JOB_LOCK = ".job.lock"
+JOB_STALE_SEC = 300  # a running job without a heartbeat this long is treated as dead
+HEARTBEAT_SEC = 1.0
+
+BACKUP_RE = re.compile(r"^(data_\d{8}_\d{6}\.db|mysql_.+_\d{8}_\d{6}\.sql(\.gz|\.zst)?)$")
+
+Progress = Callable[[int, int | None, str], None]
+
+
+class BackupError(Exception):
+    """Backup failed with a message fit for the admin UI."""
+
+
+def backups_dir(settings: Settings | None = None) -> Path:
+    s = settings or get_settings()
+    return s.base_dir / "var" / "backups"
+
+
+def move_legacy_backups(settings: Settings | None = None) -> list[str]:
+    """Move backups left in the old public media/backups dir into backups_dir(); drop stale job files."""
+    s = settings or get_settings()
+    legacy = s.base_dir / "media" / "backups"
+    if not legacy.is_dir():
+        return []
+    directory = backups_dir(s)
+    moved = []
+    for path in legacy.iterdir():
+        if is_backup_file(path):
+            directory.mkdir(parents=True, exist_ok=True)
+            for src in (path, _sidecar(path)):
+                if src.is_file():
+                    os.replace(src, directory / src.name)
+            moved.append(path.name)
+    for name in (JOB_FILE, JOB_LOCK):
+        (legacy / name).unlink(missing_ok=True)
+    return moved
+
+
+def is_backup_file(path: Path) -> bool:
+    return path.is_file() and bool(BACKUP_RE.match(path.name))
+
+
+def _rel(path: Path, s) -> str:
+    return str(path.relative_to(s.base_dir)).replace("\\", "/")
+
+
+def _sqlite_path(s) -> Path:
+    raw = make_url(s.database_url).database or "data.db"
+    path = Path(raw)
+    return path if path.is_absolute() else s.base_dir / path
+
+
+# --- checksums -------------------------------------------------------------
+
+
+def _sidecar(path: Path) -> Path:
+    return path.with_name(path.name + ".sha256")
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(STREAM_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_sidecar(path: Path, sha256: str) -> None:
+    _sidecar(path).write_text(f"{sha256}  {path.name}\n", encoding="utf-8")
+
+
+def verify_backup(path: Path) -> tuple[bool, str]:
+    """Re-hash `path` against its .sha256 sidecar. Returns (ok, message)."""
+    sidecar = _sidecar(path)
+    if not path.is_file():
+        return False, f"{path.name}: файл не найден"
+    if not sidecar.is_file():
+        return False, f"{path.name}: нет {sidecar.name}"
+    expected = sidecar.read_text(encoding="utf-8").split(maxsplit=1)[0].strip().lower()
+    actual = file_sha256(path)
+    if actual != expected:
+        return False, f"{path.name}: sha256 не совпадает ({actual[:12]}… ≠ {expected[:12]}…)"
+    return True, f"{path.name}: sha256 OK"
+
+
+class _HashingFile:
+    """Write-through file wrapper hashing and counting the bytes that reach disk."""
+
+    def __init__(self, fh):
+        self._fh = fh
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data) -> int:
+        self.sha256.update(data)
+        self.size += len(data)
+        return self._fh.write(data)
+
+    def flush(self) -> None:
+        self._fh.flush()
+
+    def close(self) -> None:
+        if not self._fh.closed:
+            self._fh.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._fh.closed
+
+
+def _compressor(codec: str, raw: _HashingFile):
+    """(writer, suffix) for `codec`; zstd falls back to gzip when zstandard is not installed."""
+    if codec == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            logger.warning("BACKUP_COMPRESSION=zstd but zstandard is not installed; using gzip")
+        else:
+            return zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=False), ".zst"
+    if codec == "none":
+        return raw, ""
+    return gzip.GzipFile(filename="", mode="wb", fileobj=raw, compresslevel=6, mtime=0), ".gz"
+
+
+# --- engines ---------------------------------------------------------------
+
+
+def sqlite_backup(src: Path, dst: Path, *, pages: int = SQLITE_PAGES, progress: Progress | None = None) -> None:
+    """Consistent copy of a live SQLite file into `dst` via the online backup API."""
+    part = dst.with_name(dst.name + ".part")
+    part.unlink(missing_ok=True)
+
+    def _step(status, remaining, total):
+        if progress is not None:
+            progress(total - remaining, total, "pages")
+
+    try:
+        source = sqlite3.connect(str(src), timeout=30)
+        try:
+            target = sqlite3.connect(str(part))
+            try:
+                source.backup(target, pages=max(1, int(pages)), progress=_step)
+                check = target.execute("PRAGMA quick_check").fetchone()[0]
+            finally:
+                target.close()
+        finally:
+            source.close()
+    except sqlite3.DatabaseError as e:
+        part.unlink(missing_ok=True)
+        raise BackupError(f"SQLite backup failed: {e}") from e
+    if check != "ok":
+        part.unlink(missing_ok=True)
+        raise BackupError(f"SQLite backup failed quick_check: {check}")
+    os.replace(part, dst)
+
+
+def _mysqldump_cmd(s) -> list[str]:
+    return [
+        "mysqldump",
+        f"-h{s.db_host}",
+        f"-P{s.db_port}",
+        f"-u{s.db_user}",
+        "--single-transaction",
+        "--quick",
+        s.db_name,
+    ]
+
+
+def mysql_backup(s, dst_stem: Path, *, codec: str = "gzip", progress: Progress | None = None) -> tuple[Path, str]:
+    """Stream mysqldump into `dst_stem` + compression suffix. Returns (path, sha256)."""
+    env = dict(os.environ)
+    if s.db_password:
+        env["MYSQL_PWD"] = s.db_password
+    part = dst_stem.with_name(dst_stem.name + ".part")
+    try:
+        with tempfile.TemporaryFile() as stderr, part.open("wb") as fh:
+            raw = _HashingFile(fh)
+            writer, suffix = _compressor(codec, raw)
+            proc = subprocess.Popen(_mysqldump_cmd(s), stdout=subprocess.PIPE, stderr=stderr, env=env)
+            done = 0
+            try:
+                for chunk in iter(lambda: proc.stdout.read(STREAM_CHUNK), b""):
+                    writer.write(chunk)
+                    done += len(chunk)
+                    if progress is not None:
+                        progress(done, None, "bytes")
+            finally:
+                proc.stdout.close()
+                code = proc.wait()
+            if writer is not raw:
+                writer.close()
+            raw.flush()
+            if code != 0:
+                stderr.seek(0)
+                err = stderr.read().decode("utf-8", "replace").strip() or "mysqldump failed"
+                raise BackupError(f"MySQL backup failed: {err[-500:]}")
+    except FileNotFoundError as e:
+        part.unlink(missing_ok=True)
+        raise BackupError("mysqldump не найден на сервере. Сделайте дамп вручную через панель хостинга.") from e
+    except BaseException:
+        part.unlink(missing_ok=True)
+        raise
+    dst = dst_stem.with_name(dst_stem.name + suffix)
+    os.replace(part, dst)
+    return dst, raw.sha256.hexdigest()
+
+
+# --- retention -------------------------------------------------------------
+
+
+def rotate_backups(directory: Path, keep: int) -> list[str]:
+    """Delete all but the newest `keep` backups (and their sidecars). Returns removed names."""
+    if keep <= 0 or not directory.is_dir():
+        return []
+    files = sorted(
+        (p for p in directory.iterdir() if is_backup_file(p)),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )
+    removed = []
+    for path in files[keep:]:
+        path.unlink(missing_ok=True)
+        _sidecar(path).unlink(missing_ok=True)
+        removed.append(path.name)
+    return removed
+
+
+def run_backup(settings: Settings | None = None, *, progress: Progress | None = None) -> dict[str, Any]:
+    """Create, checksum and rotate one backup. Raises BackupError."""
+    s = settings or get_settings()
+    directory = backups_dir(s)
+    directory.mkdir(parents=True, exist_ok=True)
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    if s.database_url.startswith("sqlite"):
+        src = _sqlite_path(s)
+        if not src.is_file():
+            raise BackupError(f"Файл {src.name} не найден")
+        dst = directory / f"data_{ts}.db"
+        sqlite_backup(src, dst, progress=progress)
+        sha256 = file_sha256(dst)
+    else:
+        if not s.db_name:
+            raise BackupError("MySQL: DB_NAME не задан")
+        dst, sha256 = mysql_backup(s, directory / f"mysql_{s.db_name}_{ts}.sql",
+                                   codec=s.backup_compression, progress=progress)
+    _write_sidecar(dst, sha256)
+    return {
+        "path": _rel(dst, s),
+        "name": dst.name,
+        "size": dst.stat().st_size,
+        "sha256": sha256,
+        "removed": rotate_backups(directory, s.backup_keep),
+    }
+
+
+# --- background job --------------------------------------------------------
+
+
+def _write_job(directory: Path, job: dict[str, Any]) -> None:
+    part = directory / (JOB_FILE + ".part")
+    part.write_text(json.dumps(job, ensure_ascii=False), encoding="utf-8")
+    os.replace(part, directory / JOB_FILE)
+
+
+def _read_job(directory: Path) -> dict[str, Any] | None:
+    path = directory / JOB_FILE
+    try:
+        job = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if job.get("status") == "running" and time.time() - float(job.get("heartbeat") or 0) > JOB_STALE_SEC:
+        job["status"] = "failed"
+        job["error"] = "Процесс backup остановился (нет heartbeat)."
+    return job
+
+
+def read_backup_job(settings: Settings | None = None) -> dict[str, Any] | None:
+    """Last/current job state for status polling; a running job without heartbeat reads as failed."""
+    return _read_job(backups_dir(settings))
+
+
+def _acquire_lock(directory: Path) -> bool:
+    lock = directory / JOB_LOCK
+    for _ in range(2):
+        try:
+            os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            job = _read_job(directory)
+            if job is not None and job.get("status") == "running":
+                return False
+            lock.unlink(missing_ok=True)  # the owner died: take over
+    return False
+
+
+def _run_job(s, job: dict[str, Any]) -> None:
+    directory = backups_dir(s)
+    last = 0.0
+
+    def _progress(done: int, total: int | None, unit: str) -> None:
+        nonlocal last
+        now = time.time()
+        if now - last < HEARTBEAT_SEC:
+            return
+        last = now
+        job.update(done=done, total=total, unit=unit, heartbeat=now)
+        _write_job(directory, job)
+
+    try:
+        result = run_backup(s, progress=_progress)
+        job.update(status="done", **result)
+    except BackupError as e:
+        job.update(status="failed", error=str(e))
+    except Exception as e:
+        logger.exception("backup job failed")
+        job.update(status="failed", error=str(e)[:500])
+    finally:
+        job.update(finished_at=datetime.now().isoformat(timespec="seconds"), heartbeat=time.time())
+        _write_job(directory, job)
+        (directory / JOB_LOCK).unlink(missing_ok=True)
+
+
+def start_backup_job(settings: Settings | None = None) -> tuple[dict[str, Any] | None, str | None]:
+    """Start a backup on a background thread. Returns (job, error); one job at a time per host."""
+    s = settings or get_settings()
+    directory = backups_dir(s)
+    directory.mkdir(parents=True, exist_ok=True)
+    if not _acquire_lock(directory):
+        return read_backup_job(s), "Backup уже выполняется."
+    job = {
+        "id": uuid.uuid4().hex[:12],
+        "status": "running",
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "heartbeat": time.time(),
+        "done": 0,
+        "total": None,
+        "unit": None,
+        "error": None,
+    }
+    _write_job(directory, job)
+    threading.Thread(target=_run_job, args=(s, dict(job)), name="platform-backup", daemon=True).start()
+    return job, None
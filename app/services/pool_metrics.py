@@ -0,0 +1,219 @@
+"""DB connection pool metrics and per-worker pool sizing.
+
+- instrument_engine() attaches pool event listeners to an engine. They count
+  checkouts, connections currently checked out (and the peak), new
+  connections, invalidations, and checkouts that found the pool at its
+  size + overflow limit.
+- Engines built with timed_pool_class() also measure checkout time, meaning
+  the wait for a free slot or a new connection, and pool timeouts.
+- plan_pool_size() sizes each worker's pools. app.database passes the number of
+  pooled engines a worker opens: the primary sync + async pair, the replica pair
+  when DB_READ_URL is set, and the write buffer's sync twin when its URL differs
+  from the primary. With DB_CONNECTION_BUDGET set, each engine gets
+  budget // (WEB_CONCURRENCY × engines) connections.
+- pool_snapshot() feeds /internal/metrics/. Counters are per process.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import event, exc
+
+logger = logging.getLogger(__name__)
+
+SLOW_CHECKOUT_MS = 100.0
+SATURATION_LOG_EVERY_SEC = 60.0
+
+_LOCK = threading.Lock()
+
+
+@dataclass
+class PoolStats:
+    label: str
+    pool: Any = field(default=None, repr=False)
+    checkouts: int = 0
+    checked_out: int = 0
+    peak_checked_out: int = 0
+    connects: int = 0
+    invalidations: int = 0
+    soft_invalidations: int = 0
+    saturated_checkouts: int = 0
+    timeouts: int = 0
+    slow_checkouts: int = 0
+    checkout_ms_total: float = 0.0
+    checkout_ms_max: float = 0.0
+    timed: int = 0
+    _last_saturation_log: float = field(default=0.0, repr=False)
+
+    def limit(self) -> int | None:
+        size = getattr(self.pool, "size", None)
+        if not callable(size):
+            return None
+        overflow = max(0, int(getattr(self.pool, "_max_overflow", 0) or 0))
+        return int(size()) + overflow
+
+    def record_checkout_time(self, ms: float) -> None:
+        with _LOCK:
+            self.timed += 1
+            self.checkout_ms_total += ms
+            self.checkout_ms_max = max(self.checkout_ms_max, ms)
+            if ms >= SLOW_CHECKOUT_MS:
+                self.slow_checkouts += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        pool = self.pool
+        live: dict[str, Any] = {}
+        for name in ("size", "overflow", "checkedin"):
+            fn = getattr(pool, name, None)
+            if callable(fn):
+                live[name] = fn()
+        with _LOCK:
+            return {
+                "pool": type(pool).__name__ if pool is not None else None,
+                **live,
+                "limit": self.limit(),
+                "checked_out": self.checked_out,
+                "peak_checked_out": self.peak_checked_out,
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "soft_invalidations": self.soft_invalidations,
+                "saturated_checkouts": self.saturated_checkouts,
+                "timeouts": self.timeouts,
+                "slow_checkouts": self.slow_checkouts,
+                "checkout_ms_avg": round(self.checkout_ms_total / self.timed, 2) if self.timed else None,
+                "checkout_ms_max": round(self.checkout_ms_max, 2),
+            }
+
+
+_STATS: dict[str, PoolStats] = {}
+_PLAN: dict[str, Any] = {}
+
+
+class _TimedPoolMixin:
+    """Times _do_get (waiting for a free slot or opening a connection) into the engine's PoolStats."""
+
+    _metrics: PoolStats | None = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            if self._metrics is not None:
+                with _LOCK:
+                    self._metrics.timeouts += 1
+            raise
+        finally:
+            if self._metrics is not None:
+                self._metrics.record_checkout_time((time.perf_counter() - started) * 1000.0)
+
+    def recreate(self):
+        new = super().recreate()  # engine.dispose(): keep reporting into the same stats
+        new._metrics = self._metrics
+        if self._metrics is not None:
+            self._metrics.pool = new
+        return new
+
+
+_TIMED_CLASSES: dict[type, type] = {}
+
+
+def timed_pool_class(base: type) -> type:
+    """QueuePool / AsyncAdaptedQueuePool subclass that measures checkout time."""
+    cls = _TIMED_CLASSES.get(base)
+    if cls is None:
+        cls = type(f"Timed{base.__name__}", (_TimedPoolMixin, base), {})
+        _TIMED_CLASSES[base] = cls
+    return cls
+
+
+def instrument_engine(engine, label: str) -> PoolStats:
+    """Attach pool listeners to a sync Engine (pass AsyncEngine.sync_engine for async)."""
+    stats = PoolStats(label=label, pool=engine.pool)
+    if isinstance(engine.pool, _TimedPoolMixin):
+        engine.pool._metrics = stats
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, record):
+        with _LOCK:
+            stats.connects += 1
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, record, proxy):
+        with _LOCK:
+            stats.checkouts += 1
+            stats.checked_out += 1
+            stats.peak_checked_out = max(stats.peak_checked_out, stats.checked_out)
+            limit = stats.limit()
+            saturated = limit is not None and stats.checked_out >= limit
+            if saturated:
+                stats.saturated_checkouts += 1
+                now = time.monotonic()
+                log = now - stats._last_saturation_log >= SATURATION_LOG_EVERY_SEC
+                if log:
+                    stats._last_saturation_log = now
+        if saturated and log:
+            logger.warning(
+                "db pool %s saturated: %s/%s connections checked out", label, stats.checked_out, limit
+            )
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, record):
+        with _LOCK:
+            stats.checked_out = max(0, stats.checked_out - 1)
+
+    @event.listens_for(engine, "invalidate")
+    def _invalidate(dbapi_connection, record, exception):
+        with _LOCK:
+            stats.invalidations += 1
+
+    @event.listens_for(engine, "soft_invalidate")
+    def _soft_invalidate(dbapi_connection, record, exception):
+        with _LOCK:
+            stats.soft_invalidations += 1
+
+    _STATS[label] = stats
+    return stats
+
+
+def plan_pool_size(settings, *, engines: int) -> dict[str, Any]:
+    """Per-engine pool_size / max_overflow for this worker's ``engines`` pooled engines;
+    records the plan for pool_snapshot()."""
+    workers = max(1, int(settings.web_workers or 1))
+    engines = max(1, int(engines))
+    budget = int(settings.db_connection_budget or 0)
+    if budget > 0:
+        per_engine = budget // (workers * engines)
+        if per_engine < 1:
+            logger.warning(
+                "DB_CONNECTION_BUDGET=%s is below %s workers x %s engines; using 1 connection per engine",
+                budget, workers, engines,
+            )
+            per_engine = 1
+        pool_size = max(1, per_engine * 2 // 3)
+        max_overflow = per_engine - pool_size
+        source = "budget"
+    else:
+        pool_size, max_overflow = settings.db_pool_size, settings.db_max_overflow
+        source = "static"
+    plan = {
+        "source": source,
+        "budget": budget or None,
+        "workers": workers,
+        "engines_per_worker": engines,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "max_connections": workers * engines * (pool_size + max_overflow),
+    }
+    _PLAN.clear()
+    _PLAN.update(plan)
+    return plan
+
+
+def pool_snapshot() -> dict[str, Any]:
+    return {"plan": dict(_PLAN), "engines": {label: s.as_dict() for label, s in _STATS.items()}}
@@ -1,7 +1,13 @@
-"""Profile hub: serialization, completeness, dashboard stats."""
+"""Profile hub: serialization, completeness, dashboard stats.
+
+Service / calendar / client counts come from load_profile_counts(_async) — one grouped
+query per payload, shared by completeness, dashboard and completion_meta.
+"""
 from __future__ import annotations
 
-from sqlalchemy import func
+from dataclasses import dataclass
+
+from sqlalchemy import case, func, select, true
 from sqlalchemy.orm import Session
 
 from app.config import get_settings
@@ -87,58 +93,53 @@ def _completion_message(percent: int) -> str:
     return "Заполните профиль, чтобы клиентам было проще записаться"
 
 
-def _service_counts(db: Session, consultant_id: int) -> tuple[int, int]:
-    svc_total = db.query(func.count(Service.id)).filter(Service.consultant_id == consultant_id).scalar() or 0
-    svc_active = (
-        db.query(func.count(Service.id))
-        .filter(Service.consultant_id == consultant_id, Service.is_active.is_(True))
-        .scalar()
-    ) or 0
-    return svc_total, svc_active
+@dataclass(frozen=True)
+class ProfileCounts:
+    """Everything the profile sub-builders count, loaded once per payload."""
 
+    services_total: int = 0
+    services_active: int = 0
+    calendars_total: int = 0
+    calendars_active: int = 0
+    clients_total: int = 0
 
-async def _service_counts_async(db, consultant_id: int) -> tuple[int, int]:
-    from sqlalchemy import select
 
-    svc_total = (
-        await db.execute(select(func.count(Service.id)).where(Service.consultant_id == consultant_id))
-    ).scalar_one() or 0
-    svc_active = (
-        await db.execute(
-            select(func.count(Service.id)).where(
-                Service.consultant_id == consultant_id,
-                Service.is_active.is_(True),
-            )
-        )
-    ).scalar_one() or 0
-    return svc_total, svc_active
+def _active_count(flag):
+    return func.coalesce(func.sum(case((flag.is_(True), 1), else_=0)), 0)
 
 
-def _calendar_counts(db: Session, consultant_id: int) -> tuple[int, int]:
-    cal_total = db.query(func.count(Calendar.id)).filter(Calendar.consultant_id == consultant_id).scalar() or 0
-    cal_active = (
-        db.query(func.count(Calendar.id))
-        .filter(Calendar.consultant_id == consultant_id, Calendar.is_active.is_(True))
-        .scalar()
-    ) or 0
-    return cal_total, cal_active
+def _profile_counts_stmt(consultant_id: int):
+    """One round trip: single-row aggregates per table, joined on TRUE."""
+    svc = (
+        select(func.count(Service.id).label("total"), _active_count(Service.is_active).label("active"))
+        .where(Service.consultant_id == consultant_id)
+        .subquery()
+    )
+    cal = (
+        select(func.count(Calendar.id).label("total"), _active_count(Calendar.is_active).label("active"))
+        .where(Calendar.consultant_id == consultant_id)
+        .subquery()
+    )
+    clients = (
+        select(func.count(ClientCard.id).label("total"))
+        .where(ClientCard.consultant_id == consultant_id)
+        .subquery()
+    )
+    return select(svc.c.total, svc.c.active, cal.c.total, cal.c.active, clients.c.total).select_from(
+        svc.join(cal, true()).join(clients, true())
+    )
 
 
-async def _calendar_counts_async(db, consultant_id: int) -> tuple[int, int]:
-    from sqlalchemy import select
+def _counts_from_row(row) -> ProfileCounts:
+    return ProfileCounts(*(int(v or 0) for v in row)) if row is not None else ProfileCounts()
 
-    cal_total = (
-        await db.execute(select(func.count(Calendar.id)).where(Calendar.consultant_id == consultant_id))
-    ).scalar_one() or 0
-    cal_active = (
-        await db.execute(
-            select(func.count(Calendar.id)).where(
-                Calendar.consultant_id == consultant_id,
-                Calendar.is_active.is_(True),
-            )
-        )
-    ).scalar_one() or 0
-    return cal_total, cal_active
+
+def load_profile_counts(db: Session, consultant_id: int) -> ProfileCounts:
+    return _counts_from_row(db.execute(_profile_counts_stmt(consultant_id)).first())
+
+
+async def load_profile_counts_async(db, consultant_id: int) -> ProfileCounts:
+    return _counts_from_row((await db.execute(_profile_counts_stmt(consultant_id))).first())
 
 
 def compute_completeness(
@@ -265,28 +266,32 @@ def compute_completeness(
     }
 
 
-def completeness(consultant: Consultant, db: Session, consultant_id: int) -> dict:
-    svc_total, svc_active = _service_counts(db, consultant_id)
-    cal_total, cal_active = _calendar_counts(db, consultant_id)
-    return compute_completeness(
-        first_name=consultant.first_name,
-        last_name=consultant.last_name,
-        email=consultant.email,
-        phone=consultant.phone,
-        profile_description=consultant.profile_description,
-        video_link=consultant.video_link,
-        has_photo=bool(consultant.profile_photo),
-        social_count=connected_social_count(consultant),
-        services_active=svc_active,
-        services_total=svc_total,
-        calendars_active=cal_active,
-        calendars_total=cal_total,
+def profile_version_stmt(consultant_id: int, user_id: int):
+    """Source rows of the profile payload in one row: max(updated_at) per table, plus row
+    counts so a delete (which leaves no timestamp behind) also changes the version."""
+    from app.models import Category, EmailAddress, SocialAccount, User
+
+    def scalar(expr, *where):
+        return select(expr).where(*where).scalar_subquery()
+
+    category_id = scalar(Consultant.category_of_specialist_id, Consultant.id == consultant_id)
+    return select(
+        scalar(Consultant.updated_at, Consultant.id == consultant_id),
+        scalar(Category.updated_at, Category.id == category_id),
+        scalar(User.updated_at, User.id == user_id),
+        scalar(func.count(Service.id), Service.consultant_id == consultant_id),
+        scalar(func.max(Service.updated_at), Service.consultant_id == consultant_id),
+        scalar(func.count(Calendar.id), Calendar.consultant_id == consultant_id),
+        scalar(func.max(Calendar.updated_at), Calendar.consultant_id == consultant_id),
+        scalar(func.count(ClientCard.id), ClientCard.consultant_id == consultant_id),
+        scalar(func.count(SocialAccount.id), SocialAccount.user_id == user_id),
+        scalar(func.max(SocialAccount.updated_at), SocialAccount.user_id == user_id),
+        scalar(func.count(EmailAddress.id), EmailAddress.user_id == user_id),
+        scalar(func.max(EmailAddress.updated_at), EmailAddress.user_id == user_id),
     )
 
 
-async def completeness_async(consultant: Consultant, db, consultant_id: int) -> dict:
-    svc_total, svc_active = await _service_counts_async(db, consultant_id)
-    cal_total, cal_active = await _calendar_counts_async(db, consultant_id)
+def _completeness_from(consultant: Consultant, counts: ProfileCounts) -> dict:
     return compute_completeness(
         first_name=consultant.first_name,
         last_name=consultant.last_name,
@@ -296,22 +301,20 @@ async def completeness_async(consultant: Consultant, db, consultant_id: int) ->
         video_link=consultant.video_link,
         has_photo=bool(consultant.profile_photo),
         social_count=connected_social_count(consultant),
-        services_active=svc_active,
-        services_total=svc_total,
-        calendars_active=cal_active,
-        calendars_total=cal_total,
+        services_active=counts.services_active,
+        services_total=counts.services_total,
+        calendars_active=counts.calendars_active,
+        calendars_total=counts.calendars_total,
     )
 
 
-def completion_meta(consultant: Consultant, db: Session, consultant_id: int) -> dict:
-    svc_total, svc_active = _service_counts(db, consultant_id)
-    cal_total, cal_active = _calendar_counts(db, consultant_id)
+def _completion_meta_from(consultant: Consultant, counts: ProfileCounts) -> dict:
     return {
         "has_photo": bool(consultant.profile_photo),
-        "services_active": svc_active,
-        "services_total": svc_total,
-        "calendars_active": cal_active,
-        "calendars_total": cal_total,
+        "services_active": counts.services_active,
+        "services_total": counts.services_total,
+        "calendars_active": counts.calendars_active,
+        "calendars_total": counts.calendars_total,
         "about_min_chars": ABOUT_MIN_CHARS,
         "about_full_chars": ABOUT_FULL_CHARS,
         "social_links_for_full": SOCIAL_LINKS_FOR_FULL,
@@ -319,62 +322,58 @@ def completion_meta(consultant: Consultant, db: Session, consultant_id: int) ->
     }
 
 
-async def completion_meta_async(consultant: Consultant, db, consultant_id: int) -> dict:
-    svc_total, svc_active = await _service_counts_async(db, consultant_id)
-    cal_total, cal_active = await _calendar_counts_async(db, consultant_id)
+def _dashboard_from(counts: ProfileCounts) -> dict:
     return {
-        "has_photo": bool(consultant.profile_photo),
-        "services_active": svc_active,
-        "services_total": svc_total,
-        "calendars_active": cal_active,
-        "calendars_total": cal_total,
-        "about_min_chars": ABOUT_MIN_CHARS,
-        "about_full_chars": ABOUT_FULL_CHARS,
-        "social_links_for_full": SOCIAL_LINKS_FOR_FULL,
-        "social_fields": list(SOCIAL_FIELDS),
+        "services_total": counts.services_total,
+        "services_active": counts.services_active,
+        "calendars_total": counts.calendars_total,
+        "calendars_active": counts.calendars_active,
+        "clients_total": counts.clients_total,
     }
 
 
-def dashboard_stats(db: Session, consultant_id: int) -> dict:
-    svc_total, svc_active = _service_counts(db, consultant_id)
-    cal_total, cal_active = _calendar_counts(db, consultant_id)
-    clients = db.query(func.count(ClientCard.id)).filter(ClientCard.consultant_id == consultant_id).scalar() or 0
-    return {
-        "services_total": svc_total,
-        "services_active": svc_active,
-        "calendars_total": cal_total,
-        "calendars_active": cal_active,
-        "clients_total": clients,
-    }
+def completeness(
+    consultant: Consultant, db: Session, consultant_id: int, counts: ProfileCounts | None = None
+) -> dict:
+    return _completeness_from(consultant, counts or load_profile_counts(db, consultant_id))
 
 
-async def dashboard_stats_async(db, consultant_id: int) -> dict:
-    from sqlalchemy import select
+async def completeness_async(
+    consultant: Consultant, db, consultant_id: int, counts: ProfileCounts | None = None
+) -> dict:
+    return _completeness_from(consultant, counts or await load_profile_counts_async(db, consultant_id))
 
-    svc_total, svc_active = await _service_counts_async(db, consultant_id)
-    cal_total, cal_active = await _calendar_counts_async(db, consultant_id)
-    clients = (
-        await db.execute(
-            select(func.count(ClientCard.id)).where(ClientCard.consultant_id == consultant_id)
-        )
-    ).scalar_one() or 0
-    return {
-        "services_total": svc_total,
-        "services_active": svc_active,
-        "calendars_total": cal_total,
-        "calendars_active": cal_active,
-        "clients_total": clients,
-    }
+
+def completion_meta(
+    consultant: Consultant, db: Session, consultant_id: int, counts: ProfileCounts | None = None
+) -> dict:
+    return _completion_meta_from(consultant, counts or load_profile_counts(db, consultant_id))
 
 
-def serialize_preview(consultant: Consultant, slug: str, db: Session, consultant_id: int) -> dict:
-    services = (
-        db.query(Service)
-        .filter(Service.consultant_id == consultant_id, Service.is_active.is_(True))
+async def completion_meta_async(
+    consultant: Consultant, db, consultant_id: int, counts: ProfileCounts | None = None
+) -> dict:
+    return _completion_meta_from(consultant, counts or await load_profile_counts_async(db, consultant_id))
+
+
+def dashboard_stats(db: Session, consultant_id: int, counts: ProfileCounts | None = None) -> dict:
+    return _dashboard_from(counts or load_profile_counts(db, consultant_id))
+
+
+async def dashboard_stats_async(db, consultant_id: int, counts: ProfileCounts | None = None) -> dict:
+    return _dashboard_from(counts or await load_profile_counts_async(db, consultant_id))
+
+
+def _preview_services_stmt(consultant_id: int):
+    return (
+        select(Service.name, Service.color)
+        .where(Service.consultant_id == consultant_id, Service.is_active.is_(True))
         .order_by(Service.sort_order, Service.name)
         .limit(5)
-        .all()
     )
+
+
+def _preview_from(consultant: Consultant, slug: str, services) -> dict:
     return {
         "full_name": full_name(consultant),
         "specialization": specialization(consultant),
@@ -383,35 +382,42 @@ def serialize_preview(consultant: Consultant, slug: str, db: Session, consultant
         "video_link": consultant.video_link or "",
         "social": social_links(consultant),
         "public_url": specialist_public_url(settings.site_url, slug),
-        "services": [{"name": s.name, "color": s.color or "#7d5cff"} for s in services],
+        "services": [{"name": name, "color": color or "#7d5cff"} for name, color in services],
     }
 
 
+def serialize_preview(consultant: Consultant, slug: str, db: Session, consultant_id: int) -> dict:
+    return _preview_from(consultant, slug, db.execute(_preview_services_stmt(consultant_id)).all())
+
+
 async def serialize_preview_async(consultant: Consultant, slug: str, db, consultant_id: int) -> dict:
-    from sqlalchemy import select
-
-    services = list(
-        (
-            await db.execute(
-                select(Service)
-                .where(Service.consultant_id == consultant_id, Service.is_active.is_(True))
-                .order_by(Service.sort_order, Service.name)
-                .limit(5)
-            )
+    return _preview_from(consultant, slug, (await db.execute(_preview_services_stmt(consultant_id))).all())
+
+
+async def _with_category_async(db, consultant: Consultant, consultant_id: int) -> Consultant:
+    """AsyncSession cannot lazy-load; reload with the category unless it is loaded and fresh
+    (ensure_public_slug_async may have rolled back, which expires the instance)."""
+    if "category" in consultant.__dict__ and "first_name" in consultant.__dict__:
+        return consultant
+    from sqlalchemy.orm import selectinload
+
+    return (
+        await db.execute(
+            select(Consultant)
+            .options(selectinload(Consultant.category))
+            .where(Consultant.id == consultant_id)
         )
-        .scalars()
-        .all()
-    )
-    return {
-        "full_name": full_name(consultant),
-        "specialization": specialization(consultant),
-        "photo_url": profile_photo_src(consultant.profile_photo) if consultant.profile_photo else None,
-        "description": consultant.profile_description or "",
-        "video_link": consultant.video_link or "",
-        "social": social_links(consultant),
-        "public_url": specialist_public_url(settings.site_url, slug),
-        "services": [{"name": s.name, "color": s.color or "#7d5cff"} for s in services],
-    }
+    ).scalar_one()
+
+
+async def build_profile_preview_async(db, consultant: Consultant) -> dict:
+    """Public preview only: slug + top services, no counts, socials or auth lookups."""
+    from app.services.public_client import ensure_public_slug_async
+
+    consultant_id = int(consultant.id)
+    slug = await ensure_public_slug_async(db, consultant)
+    consultant = await _with_category_async(db, consultant, consultant_id)
+    return await serialize_preview_async(consultant, slug, db, consultant_id)
 
 
 def build_profile_payload(
@@ -434,8 +440,9 @@ def build_profile_payload(
 
     def _build() -> dict:
         slug = ensure_public_slug(db, consultant)
-        comp = completeness(consultant, db, consultant.id)
-        dash = dashboard_stats(db, consultant.id)
+        counts = load_profile_counts(db, consultant.id)
+        comp = _completeness_from(consultant, counts)
+        dash = _dashboard_from(counts)
         dash["completeness"] = comp["percent"]
         return {
             "profile": {
@@ -459,7 +466,7 @@ def build_profile_payload(
             },
             "dashboard": dash,
             "completeness": comp,
-            "completion_meta": completion_meta(consultant, db, consultant.id),
+            "completion_meta": _completion_meta_from(consultant, counts),
             "preview": serialize_preview(consultant, slug, db, consultant.id),
             "auth": {
                 "connected_providers": sorted(providers),
@@ -508,18 +515,10 @@ async def build_profile_payload_async(
 
     consultant_id = int(consultant.id)
     slug = await ensure_public_slug_async(db, consultant)
-    from sqlalchemy import select
-    from sqlalchemy.orm import selectinload
-
-    consultant = (
-        await db.execute(
-            select(Consultant)
-            .options(selectinload(Consultant.category))
-            .where(Consultant.id == consultant_id)
-        )
-    ).scalar_one()
-    comp = await completeness_async(consultant, db, consultant_id)
-    dash = await dashboard_stats_async(db, consultant_id)
+    consultant = await _with_category_async(db, consultant, consultant_id)
+    counts = await load_profile_counts_async(db, consultant_id)
+    comp = _completeness_from(consultant, counts)
+    dash = _dashboard_from(counts)
     dash["completeness"] = comp["percent"]
     payload = {
         "profile": {
@@ -543,7 +542,7 @@ async def build_profile_payload_async(
         },
         "dashboard": dash,
         "completeness": comp,
-        "completion_meta": await completion_meta_async(consultant, db, consultant_id),
+        "completion_meta": _completion_meta_from(consultant, counts),
         "preview": await serialize_preview_async(consultant, slug, db, consultant_id),
         "auth": {
             "connected_providers": sorted(providers),
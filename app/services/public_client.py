@@ -6,11 +6,12 @@ import re
 import secrets
 import unicodedata
 
-from sqlalchemy import text
+from sqlalchemy import literal_column, or_, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.models import Consultant
+from app.services.ttl_cache import TtlCache
 
 logger = logging.getLogger(__name__)
 
@@ -27,47 +28,88 @@ def specialist_slug_for(consultant: Consultant) -> str:
     return f"id-{consultant.id}"
 
 
+# Slug registry: "s:<slug>" -> consultant id and "i:<id>" -> slug. Slugs are assigned once,
+# so entries only go stale on delete (resolution re-checks) or invalidate_public_slug().
+SLUG_TTL_SEC = 3600.0
+SLUG_CACHE = TtlCache(default_ttl=SLUG_TTL_SEC, max_entries=4096, redis_prefix="ayc:slug:")
+
+_SLUG_COLUMN = literal_column("consultants.public_slug")
+
+
+def _remember_slug(consultant_id: int, slug: str) -> None:
+    SLUG_CACHE.set(f"s:{slug}", int(consultant_id))
+    SLUG_CACHE.set(f"i:{int(consultant_id)}", slug)
+
+
+def invalidate_public_slug(consultant_id: int) -> None:
+    slug = SLUG_CACHE.get(f"i:{int(consultant_id)}")
+    SLUG_CACHE.delete(f"i:{int(consultant_id)}")
+    if slug:
+        SLUG_CACHE.delete(f"s:{slug}")
+
+
+def _slug_base(consultant: Consultant) -> str:
+    return _slugify(f"{consultant.first_name}-{consultant.last_name}") or f"spec-{consultant.id}"
+
+
+def _taken_slugs_stmt(base: str):
+    # One prefix scan over the unique index instead of probing base-1, base-2, ...
+    return (
+        select(_SLUG_COLUMN)
+        .select_from(Consultant.__table__)
+        .where(or_(_SLUG_COLUMN == base, _SLUG_COLUMN.like(f"{base}-%")))
+    )
+
+
+def _free_slug(base: str, taken) -> str:
+    taken = set(taken)
+    if base not in taken:
+        return base
+    suffix = re.compile(rf"^{re.escape(base)}-(\d+)$")
+    used = [int(m.group(1)) for m in (suffix.match(t or "") for t in taken) if m]
+    return f"{base}-{max(used, default=0) + 1}"
+
+
+def _slug_id(slug: str) -> int | None:
+    if not slug.startswith("id-"):
+        return None
+    try:
+        return int(slug.replace("id-", "", 1)) or None
+    except ValueError:
+        return None
+
+
 def ensure_public_slug(db: Session, consultant: Consultant) -> str:
     """
     Return a public URL slug without requiring a mapped ORM column.
     Tries optional consultants.public_slug if the column exists; otherwise id-{id}.
     """
     stable = specialist_slug_for(consultant)
+    cid = consultant.id  # read before commit() expires the instance
+    cached = SLUG_CACHE.get(f"i:{cid}")
+    if cached:
+        return cached
     try:
         row = db.execute(
             text("SELECT public_slug FROM consultants WHERE id = :id"),
-            {"id": consultant.id},
+            {"id": cid},
         ).first()
+        if row and row[0]:
+            _remember_slug(cid, str(row[0]))
+            return str(row[0])
+        base = _slug_base(consultant)
+        candidate = _free_slug(base, db.execute(_taken_slugs_stmt(base)).scalars())
     except Exception:
         db.rollback()
         return stable
 
-    if row and row[0]:
-        return str(row[0])
-
-    base = _slugify(f"{consultant.first_name}-{consultant.last_name}") or f"spec-{consultant.id}"
-    candidate = base
-    n = 0
-    while True:
-        try:
-            exists = db.execute(
-                text("SELECT id FROM consultants WHERE public_slug = :slug LIMIT 1"),
-                {"slug": candidate},
-            ).first()
-        except Exception:
-            db.rollback()
-            return stable
-        if not exists:
-            break
-        n += 1
-        candidate = f"{base}-{n}"
-
     try:
         db.execute(
             text("UPDATE consultants SET public_slug = :slug WHERE id = :id"),
-            {"slug": candidate, "id": consultant.id},
+            {"slug": candidate, "id": cid},
         )
         db.commit()
+        _remember_slug(cid, candidate)
         return candidate
     except Exception:
         db.rollback()
@@ -77,45 +119,33 @@ def ensure_public_slug(db: Session, consultant: Consultant) -> str:
 
 async def ensure_public_slug_async(db: AsyncSession, consultant: Consultant) -> str:
     stable = specialist_slug_for(consultant)
+    cid = consultant.id  # read before commit() expires the instance
+    cached = SLUG_CACHE.get(f"i:{cid}")
+    if cached:
+        return cached
     try:
         row = (
             await db.execute(
                 text("SELECT public_slug FROM consultants WHERE id = :id"),
-                {"id": consultant.id},
+                {"id": cid},
             )
         ).first()
+        if row and row[0]:
+            _remember_slug(cid, str(row[0]))
+            return str(row[0])
+        base = _slug_base(consultant)
+        candidate = _free_slug(base, (await db.execute(_taken_slugs_stmt(base))).scalars())
     except Exception:
         await db.rollback()
         return stable
 
-    if row and row[0]:
-        return str(row[0])
-
-    base = _slugify(f"{consultant.first_name}-{consultant.last_name}") or f"spec-{consultant.id}"
-    candidate = base
-    n = 0
-    while True:
-        try:
-            exists = (
-                await db.execute(
-                    text("SELECT id FROM consultants WHERE public_slug = :slug LIMIT 1"),
-                    {"slug": candidate},
-                )
-            ).first()
-        except Exception:
-            await db.rollback()
-            return stable
-        if not exists:
-            break
-        n += 1
-        candidate = f"{base}-{n}"
-
     try:
         await db.execute(
             text("UPDATE consultants SET public_slug = :slug WHERE id = :id"),
-            {"slug": candidate, "id": consultant.id},
+            {"slug": candidate, "id": cid},
         )
         await db.commit()
+        _remember_slug(cid, candidate)
         return candidate
     except Exception:
         await db.rollback()
@@ -127,56 +157,51 @@ def specialist_public_url(site_url: str, slug: str) -> str:
     return f"{site_url.rstrip('/')}/s/{slug}/"
 
 
+def _resolve_stmt(slug: str):
+    """One SELECT of the Consultant row: by id (id-N or registry hit) or by public_slug."""
+    cid = _slug_id(slug) or SLUG_CACHE.get(f"s:{slug}")
+    if cid:
+        return int(cid), select(Consultant).where(Consultant.id == int(cid))
+    return None, select(Consultant).where(_SLUG_COLUMN == slug).limit(1)
+
+
+def _resolved(slug: str, cid: int | None, consultant: Consultant | None) -> Consultant | None:
+    if consultant is None:
+        if cid and not slug.startswith("id-"):
+            SLUG_CACHE.delete(f"s:{slug}")  # deleted specialist: drop the stale mapping
+        return None
+    if not slug.startswith("id-"):
+        _remember_slug(consultant.id, slug)
+    return consultant
+
+
 def resolve_consultant_by_slug(db: Session, slug: str) -> Consultant | None:
     slug = (slug or "").strip()
     if not slug:
         return None
-    if slug.startswith("id-"):
-        try:
-            cid = int(slug.replace("id-", "", 1))
-        except ValueError:
-            cid = None
-        if cid:
-            found = db.query(Consultant).filter(Consultant.id == cid).first()
-            if found:
-                return found
+    cid, stmt = _resolve_stmt(slug)
     try:
-        row = db.execute(
-            text("SELECT id FROM consultants WHERE public_slug = :slug LIMIT 1"),
-            {"slug": slug},
-        ).first()
-        if row:
-            return db.query(Consultant).filter(Consultant.id == row[0]).first()
+        if cid:
+            consultant = db.query(Consultant).filter(Consultant.id == cid).first()
+        else:
+            consultant = db.execute(stmt).scalar_one_or_none()
     except Exception:
         db.rollback()
-    return None
+        return None
+    return _resolved(slug, cid, consultant)
 
 
 async def resolve_consultant_by_slug_async(db: AsyncSession, slug: str) -> Consultant | None:
-    from sqlalchemy import select, text as sql_text
-
     slug = (slug or "").strip()
     if not slug:
         return None
-    if slug.startswith("id-"):
-        try:
-            cid = int(slug.replace("id-", "", 1))
-        except ValueError:
-            cid = None
-        if cid:
-            return (await db.execute(select(Consultant).where(Consultant.id == cid))).scalar_one_or_none()
+    cid, stmt = _resolve_stmt(slug)
     try:
-        row = (
-            await db.execute(
-                sql_text("SELECT id FROM consultants WHERE public_slug = :slug LIMIT 1"),
-                {"slug": slug},
-            )
-        ).first()
-        if row:
-            return (await db.execute(select(Consultant).where(Consultant.id == row[0]))).scalar_one_or_none()
+        consultant = (await db.execute(stmt)).scalar_one_or_none()
     except Exception:
         await db.rollback()
-    return None
+        return None
+    return _resolved(slug, cid, consultant)
 
 
 def client_gate_ok(session: dict, consultant_id: int) -> bool:
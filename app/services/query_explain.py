@@ -11,6 +11,47 @@ HOT_QUERIES: dict[str, str] = {
         "WHERE calendar_id = 1 AND booking_date = CURRENT_DATE AND status IN ('pending','confirmed') "
         "LIMIT 50"
     ),
+    # Booking writers: day lock row (primary key) then the day's active bookings.
+    "booking_day_lock": (
+        "SELECT version FROM booking_day_locks WHERE calendar_id = 1 AND booking_date = CURRENT_DATE"
+    ),
+    "bookings_hub_keyset_page": (
+        "SELECT id FROM bookings "
+        "WHERE calendar_id IN (1, 2) AND status IN ('pending','confirmed') "
+        "AND (booking_date > CURRENT_DATE OR (booking_date = CURRENT_DATE AND booking_time > '12:00:00')) "
+        "ORDER BY booking_date, booking_time, id LIMIT 31"
+    ),
+    "bookings_sweeper_candidates": (
+        "SELECT id FROM bookings "
+        "WHERE status = 'confirmed' AND (booking_date < CURRENT_DATE "
+        "OR (booking_date = CURRENT_DATE AND booking_end_time <= '12:00:00'))"
+    ),
+    "crm_clients_page": (
+        "SELECT id FROM consultant_client_cards WHERE consultant_id = 1 "
+        "ORDER BY updated_at DESC, id DESC LIMIT 25"
+    ),
+    "crm_card_aggregates": (
+        "SELECT COUNT(id), MAX(booking_date) FROM bookings WHERE client_card_id = 1"
+    ),
+    "client_card_contact_match": (
+        "SELECT id FROM consultant_client_cards WHERE consultant_id = 1 "
+        "AND (phone_key = '79000000000' OR email_key = 'a@b.co' OR telegram_key = 'user') "
+        "ORDER BY id"
+    ),
+    # MySQL FULLTEXT (ngram); on SQLite the index lives in the admin_search_fts FTS5 table.
+    "admin_search_fulltext": (
+        "SELECT entity_type, entity_id FROM admin_search_documents "
+        "WHERE MATCH(body) AGAINST('+iv*' IN BOOLEAN MODE) AND entity_type IN ('user','client') "
+        "ORDER BY MATCH(body) AGAINST('+iv*' IN BOOLEAN MODE) DESC LIMIT 40"
+    ),
+    "analytics_rollup_window": (
+        "SELECT * FROM platform_daily_rollups "
+        "WHERE day >= '2026-01-01' AND day <= '2026-03-31' ORDER BY day"
+    ),
+    "analytics_rollup_distinct_users": (
+        "SELECT COUNT(DISTINCT user_id) FROM platform_user_activity "
+        "WHERE activity_date >= '2026-03-01' AND activity_date <= '2026-03-30'"
+    ),
     "time_slots_by_calendar_dow": (
         "SELECT id FROM time_slots "
         "WHERE calendar_id = 1 AND day_of_week = 1 AND is_available = 1 "
@@ -55,6 +96,9 @@ def list_expected_indexes() -> list[dict[str, str]]:
         {"table": "bookings", "name": "ix_bookings_calendar_date_status"},
         {"table": "bookings", "name": "ix_bookings_telegram_id"},
         {"table": "bookings", "name": "ix_bookings_status_date"},
+        {"table": "bookings", "name": "ix_bookings_calendar_date_time"},
+        {"table": "bookings", "name": "ix_bookings_status_date_end"},
+        {"table": "bookings", "name": "ix_bookings_client_card_id"},
         {"table": "time_slots", "name": "ix_time_slots_calendar_dow"},
         {"table": "calendars", "name": "ix_calendars_consultant_active"},
         {"table": "services", "name": "ix_services_consultant_active"},
@@ -65,4 +109,18 @@ def list_expected_indexes() -> list[dict[str, str]]:
         {"table": "socialaccount_socialaccount", "name": "ix_socialaccount_user_id"},
         {"table": "integrations", "name": "ix_integrations_telegram_chat_id"},
         {"table": "consultant_client_cards", "name": "ix_client_cards_consultant_id"},
+        {"table": "consultant_client_cards", "name": "ix_client_cards_consultant_updated"},
+        {"table": "consultant_client_cards", "name": "ix_client_cards_consultant_created"},
+        {"table": "consultant_client_cards", "name": "ix_client_cards_consultant_last_booking"},
+        {"table": "consultant_client_cards", "name": "ix_client_cards_consultant_phone_key"},
+        {"table": "consultant_client_cards", "name": "ix_client_cards_consultant_email_key"},
+        {"table": "consultant_client_cards", "name": "ix_client_cards_consultant_telegram_key"},
+        {"table": "admin_search_documents", "name": "uq_admin_search_entity"},
+        {"table": "admin_search_documents", "name": "ft_admin_search_body"},
+        {"table": "platform_user_activity", "name": "ix_platform_user_activity_date_user"},
+        {"table": "platform_user_activity", "name": "uq_platform_user_activity_user_day"},
+        {"table": "bookings", "name": "ix_bookings_created_at"},
+        {"table": "platform_specialist_daily", "name": "ix_platform_specialist_daily_consultant_id"},
+        {"table": "idempotency_keys", "name": "ix_idempotency_keys_expires_at"},
+        {"table": "web_sessions", "name": "ix_web_sessions_expires_at"},
     ]
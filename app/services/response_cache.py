@@ -1,6 +1,26 @@
-"""Domain keys for specialist payload caches + invalidation helpers."""
+"""Domain keys for specialist payload caches + invalidation helpers.
+
+Cabinet JSON ETags are derived from the data: each payload family has a version
+statement (counts / max(updated_at) / the few source rows) whose digest is the same in
+every worker and only changes when those rows do. versioned_json() answers
+If-None-Match with 304 after that one query, before building anything, and drops a
+cached payload that was built from other rows (e.g. a write handled by another worker).
+"""
 from __future__ import annotations
 
+import hashlib
+from typing import Any, Awaitable, Callable
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+from app.services.page_cache import (
+    PRIVATE_CACHE_CONTROL,
+    etag_matches,
+    invalidate_specialist_pages,
+    make_etag,
+    not_modified,
+)
 from app.services.ttl_cache import CACHE
 
 TTL_SEC = 45.0
@@ -18,20 +38,85 @@ def profile_key(consultant_id: int, user_id: int) -> str:
     return f"profile:{int(consultant_id)}:{int(user_id)}"
 
 
+def version_key(key: str) -> str:
+    return f"ver:{key}"
+
+
+async def data_version_async(db, stmt: Any) -> str:
+    """Digest of what ``stmt`` returns: one aggregate row, or the few rows a payload is built from."""
+    rows = [tuple(row) for row in (await db.execute(stmt)).all()]
+    return hashlib.sha1(repr(rows).encode("utf-8")).hexdigest()[:16]
+
+
+def versioned_etag(key: str, version: str, variant: str = "") -> str:
+    return make_etag(f"{key}:{version}:{variant}".encode("utf-8"))
+
+
+async def conditional_json(
+    request: Request,
+    etag: str,
+    build: Callable[[], Awaitable[dict | list]],
+) -> Response:
+    """304 when If-None-Match is current; otherwise build the payload and tag it.
+
+    Compute the ETag before building: a write committed in between changes the version,
+    so the next request sees a new ETag even if this payload already reflects the write.
+    """
+    if etag_matches(request, etag):
+        return not_modified(etag, PRIVATE_CACHE_CONTROL)
+    data = await build()
+    return JSONResponse(
+        data,
+        headers={"ETag": etag, "Cache-Control": PRIVATE_CACHE_CONTROL, "Vary": "Cookie"},
+    )
+
+
+async def versioned_json(
+    request: Request,
+    db,
+    key: str,
+    version_stmt: Any,
+    build: Callable[[], Awaitable[dict | list]],
+    variant: str = "",
+) -> Response:
+    """conditional_json with a data-derived ETag for the payload cached under ``key``."""
+    version = await data_version_async(db, version_stmt)
+    etag = versioned_etag(key, version, variant)
+    if not etag_matches(request, etag) and CACHE.get(version_key(key)) != version:
+        CACHE.delete(key)  # cached copy (if any) was built from older rows
+        CACHE.set(version_key(key), version, ttl=TTL_SEC)
+    return await conditional_json(request, etag, build)
+
+
+def _drop(key: str) -> None:
+    CACHE.delete(key)
+    CACHE.delete(version_key(key))
+
+
+def _drop_prefix(prefix: str) -> None:
+    CACHE.delete_prefix(prefix)
+    CACHE.delete_prefix(version_key(prefix))
+
+
 def invalidate_consultant(consultant_id: int) -> None:
-    """Drop catalog + all profile payloads for this specialist."""
-    CACHE.delete(catalog_key(consultant_id))
-    CACHE.delete_prefix(f"profile:{int(consultant_id)}:")
+    """Drop catalog + all profile payloads + cached public pages for this specialist."""
+    _drop(catalog_key(consultant_id))
+    _drop_prefix(f"profile:{int(consultant_id)}:")
+    invalidate_specialist_pages(consultant_id)
 
 
 def invalidate_calendar(calendar_id: int, *, consultant_id: int | None = None) -> None:
-    CACHE.delete(schedule_key(calendar_id))
+    _drop(schedule_key(calendar_id))
     if consultant_id is not None:
         invalidate_consultant(consultant_id)
 
 
 def invalidate_profile(consultant_id: int, user_id: int | None = None) -> None:
+    from app.services.public_client import invalidate_public_slug
+
+    invalidate_specialist_pages(consultant_id)
+    invalidate_public_slug(consultant_id)
     if user_id is not None:
-        CACHE.delete(profile_key(consultant_id, user_id))
+        _drop(profile_key(consultant_id, user_id))
     else:
-        CACHE.delete_prefix(f"profile:{int(consultant_id)}:")
+        _drop_prefix(f"profile:{int(consultant_id)}:")
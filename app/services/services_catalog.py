@@ -358,6 +358,22 @@ def build_catalog_payload(db: Session, consultant_id: int, *, use_cache: bool =
     return CACHE.get_or_set(catalog_key(consultant_id), _build, ttl=TTL_SEC)
 
 
+def catalog_version_stmt(consultant_id: int):
+    """Source rows of the catalog payload in one row: services, calendars and their bookings."""
+    from sqlalchemy import select
+
+    service_ids = select(Service.id).where(Service.consultant_id == consultant_id)
+    by_consultant = Service.consultant_id == consultant_id
+    return select(
+        select(func.count(Service.id)).where(by_consultant).scalar_subquery(),
+        select(func.max(Service.updated_at)).where(by_consultant).scalar_subquery(),
+        select(func.count(Calendar.id)).where(Calendar.consultant_id == consultant_id).scalar_subquery(),
+        select(func.max(Calendar.updated_at)).where(Calendar.consultant_id == consultant_id).scalar_subquery(),
+        select(func.count(Booking.id)).where(Booking.service_id.in_(service_ids)).scalar_subquery(),
+        select(func.max(Booking.updated_at)).where(Booking.service_id.in_(service_ids)).scalar_subquery(),
+    )
+
+
 async def build_catalog_payload_async(db, consultant_id: int, *, use_cache: bool = True) -> dict:
     from sqlalchemy import select
 
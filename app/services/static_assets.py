@@ -0,0 +1,399 @@
+"""Fingerprinted + precompressed static assets.
+
+`build_static_assets()` copies app/static into STATIC_BUILD_DIR with content-hashed
+names (css/app.3f2a9c01b2.css), `.gz`/`.br` siblings for text assets, `.webp`/`.avif`
+siblings for large PNGs and `asset-manifest.json`. Templates call `static_url(...)`;
+without a build (local dev) it falls back to `/static/<path>?v=<content hash>`.
+`PrecompressedStaticFiles` serves the best sibling by Accept-Encoding / Accept.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+import shutil
+import stat
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "asset-manifest.json"
+HASH_LEN = 10
+COMPRESSIBLE_SUFFIXES = frozenset({".css", ".js", ".svg", ".webmanifest", ".json", ".txt", ".xml"})
+MIN_COMPRESS_BYTES = 512
+# PNGs below this are icons where WebP/AVIF headers eat the win.
+IMAGE_MIN_BYTES = 16 * 1024
+IMAGE_DIR = "img"
+
+# Served sibling -> Content-Encoding, in server preference order.
+_ENCODINGS = ((".br", "br"), (".gz", "gzip"))
+# Served sibling -> Accept media type, in server preference order.
+_IMAGE_VARIANTS = ((".avif", "image/avif"), (".webp", "image/webp"))
+_FINGERPRINT_RE = re.compile(r"\.[0-9a-f]{%d}\.[A-Za-z0-9]+$" % HASH_LEN)
+_CSS_URL_RE = re.compile(r"""url\((["']?)/static/([^"')?#]+)(?:\?[^"')#]*)?\1\)""")
+
+
+def is_fingerprinted(path: str) -> bool:
+    return bool(_FINGERPRINT_RE.search(path))
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:HASH_LEN]
+
+
+def fingerprinted_name(rel: str, data: bytes) -> str:
+    p = Path(rel)
+    return str(p.with_name(f"{p.stem}.{_digest(data)}{p.suffix}").as_posix())
+
+
+# --- manifest lookup / template helper -------------------------------------------------
+
+
+def build_dir() -> Path | None:
+    raw = (get_settings().static_build_dir or "").strip()
+    return Path(raw) if raw else None
+
+
+@lru_cache(maxsize=1)
+def load_manifest() -> dict[str, dict[str, Any]]:
+    root = build_dir()
+    if root is None:
+        return {}
+    try:
+        data = json.loads((root / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError):
+        logger.warning("static manifest %s unreadable; serving unhashed assets", root)
+        return {}
+    return data.get("assets") or {}
+
+
+def reload_manifest() -> None:
+    load_manifest.cache_clear()
+
+
+def build_active() -> bool:
+    return bool(load_manifest())
+
+
+@lru_cache(maxsize=2048)
+def _source_hash(rel: str, mtime_ns: int, size: int) -> str:
+    path = get_settings().static_dir / rel
+    try:
+        return _digest(path.read_bytes())
+    except OSError:
+        return ""
+
+
+def static_url(path: str) -> str:
+    """`/static/...` URL for a source-relative path: fingerprinted name or `?v=<hash>`."""
+    rel = path.lstrip("/")
+    if rel.startswith("static/"):
+        rel = rel[len("static/") :]
+    entry = load_manifest().get(rel)
+    if entry:
+        return f"/static/{entry['file']}"
+    try:
+        st = (get_settings().static_dir / rel).stat()
+    except OSError:
+        return f"/static/{rel}"
+    version = _source_hash(rel, st.st_mtime_ns, st.st_size)
+    return f"/static/{rel}?v={version}" if version else f"/static/{rel}"
+
+
+# --- serving ----------------------------------------------------------------------------
+
+
+def _accepted_tokens(header: str | None) -> set[str]:
+    """Tokens from Accept / Accept-Encoding, minus the ones refused with q=0."""
+    tokens: set[str] = set()
+    for item in (header or "").split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = params.replace(" ", "").lower()
+        if q in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        tokens.add(name)
+    return tokens
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that prefers `<file>.br`/`.gz` (and `.avif`/`.webp` for PNG) siblings.
+
+    `fallback_directory` is searched after `directory`, so a build dir can shadow the
+    source tree while files added after the last build keep working.
+    """
+
+    def __init__(self, *, fallback_directory: str | os.PathLike | None = None, **kwargs):
+        super().__init__(**kwargs)
+        if fallback_directory is not None:
+            self.all_directories.append(fallback_directory)
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope["method"] in ("GET", "HEAD"):
+            picked = await anyio.to_thread.run_sync(self._pick_variant, path, Headers(scope=scope))
+            if picked is not None:
+                return self._variant_response(scope, *picked)
+        return await super().get_response(path, scope)
+
+    def _pick_variant(self, path: str, headers: Headers):
+        full_path, st = self.lookup_path(path)
+        if not st or not stat.S_ISREG(st.st_mode):
+            return None
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        extra: dict[str, str] = {}
+        if media_type == "image/png":
+            accepted = _accepted_tokens(headers.get("accept"))
+            options = [(suffix, None, mime) for suffix, mime in _IMAGE_VARIANTS if mime in accepted]
+            vary = "Accept"
+            candidates = _IMAGE_VARIANTS
+        else:
+            accepted = _accepted_tokens(headers.get("accept-encoding"))
+            options = [(suffix, enc, media_type) for suffix, enc in _ENCODINGS if enc in accepted]
+            vary = "Accept-Encoding"
+            candidates = _ENCODINGS
+        if not any(os.path.exists(full_path + suffix) for suffix, _ in candidates):
+            return None
+        extra["Vary"] = vary
+        for suffix, encoding, served_type in options:
+            try:
+                variant_st = os.stat(full_path + suffix)
+            except OSError:
+                continue
+            if encoding:
+                extra["Content-Encoding"] = encoding
+            return full_path + suffix, variant_st, served_type, extra
+        return full_path, st, media_type, extra
+
+    def _variant_response(
+        self, scope: Scope, full_path: str, st: os.stat_result, media_type: str, headers: dict
+    ) -> Response:
+        # ETag comes from the served file's size/mtime, so every encoding gets its own tag.
+        response = FileResponse(full_path, stat_result=st, media_type=media_type, headers=headers)
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def make_static_app() -> PrecompressedStaticFiles:
+    settings = get_settings()
+    root = build_dir()
+    if root is not None and (root / MANIFEST_NAME).is_file():
+        return PrecompressedStaticFiles(directory=str(root), fallback_directory=str(settings.static_dir))
+    return PrecompressedStaticFiles(directory=str(settings.static_dir))
+
+
+# --- build ------------------------------------------------------------------------------
+
+
+def _compress_variants(data: bytes, suffix: str) -> dict[str, bytes]:
+    if suffix not in COMPRESSIBLE_SUFFIXES or len(data) < MIN_COMPRESS_BYTES:
+        return {}
+    out = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+    if brotli is not None:
+        out[".br"] = brotli.compress(data, quality=11)
+    return {k: v for k, v in out.items() if len(v) < len(data)}
+
+
+def _image_variants(src: Path) -> dict[str, bytes]:
+    import io
+
+    from PIL import Image, features
+
+    out: dict[str, bytes] = {}
+    with Image.open(src) as img:
+        img.load()
+        frame = img if img.mode in ("RGB", "RGBA") else img.convert("RGBA")
+        buf = io.BytesIO()
+        frame.save(buf, format="WEBP", quality=82, method=6)
+        out[".webp"] = buf.getvalue()
+        if features.check("avif"):
+            buf = io.BytesIO()
+            frame.save(buf, format="AVIF", quality=60)
+            out[".avif"] = buf.getvalue()
+    size = src.stat().st_size
+    return {k: v for k, v in out.items() if len(v) < size}
+
+
+def _rewrite_css(data: bytes, assets: dict[str, dict[str, Any]]) -> bytes:
+    def repl(m: re.Match) -> str:
+        quote, rel = m.group(1), m.group(2)
+        entry = assets.get(rel)
+        if not entry:
+            return m.group(0)
+        return f"url({quote}/static/{entry['file']}{quote})"
+
+    return _CSS_URL_RE.sub(repl, data.decode("utf-8")).encode("utf-8")
+
+
+def _write(root: Path, rel: str, data: bytes) -> None:
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+
+
+def build_static_assets(src: Path | None = None, out: Path | None = None) -> dict[str, Any]:
+    """Write a fingerprinted, precompressed copy of `src` into `out` (swapped atomically).
+
+    Fingerprinted files of the previous build are carried over for one generation so
+    HTML rendered before the deploy (page/fragment caches, open tabs) keeps resolving.
+    """
+    settings = get_settings()
+    src = Path(src or settings.static_dir)
+    out = Path(out or build_dir() or settings.static_dir.parent / "static_build")
+    tmp = out.with_name(out.name + ".tmp")
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    tmp.mkdir(parents=True)
+
+    files = sorted(p for p in src.rglob("*") if p.is_file())
+    # CSS last: its url(/static/...) references are rewritten to fingerprinted names.
+    files.sort(key=lambda p: p.suffix == ".css")
+    assets: dict[str, dict[str, Any]] = {}
+    for path in files:
+        rel = path.relative_to(src).as_posix()
+        data = path.read_bytes()
+        if path.suffix == ".css":
+            data = _rewrite_css(data, assets)
+        hashed = fingerprinted_name(rel, data)
+        entry: dict[str, Any] = {"file": hashed, "size": path.stat().st_size}
+        variants = _compress_variants(data, path.suffix)
+        if path.suffix == ".png" and rel.startswith(f"{IMAGE_DIR}/") and len(data) >= IMAGE_MIN_BYTES:
+            try:
+                variants.update(_image_variants(path))
+            except Exception:
+                logger.exception("image variants failed for %s", rel)
+        for name in (rel, hashed):
+            _write(tmp, name, data)
+            for suffix, blob in variants.items():
+                _write(tmp, name + suffix, blob)
+        for suffix, blob in variants.items():
+            entry[suffix.lstrip(".")] = len(blob)
+        assets[rel] = entry
+
+    previous = _read_manifest(out)
+    kept = 0
+    for rel, entry in previous.items():
+        old = entry.get("file")
+        if not old or (tmp / old).exists() or not (out / old).exists():
+            continue
+        for sibling in (out / old).parent.glob(Path(old).name + "*"):
+            target = tmp / Path(old).parent / sibling.name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(sibling, target)
+        kept += 1
+
+    (tmp / MANIFEST_NAME).write_text(
+        json.dumps({"version": 1, "assets": assets}, ensure_ascii=False, indent=1),
+        encoding="utf-8",
+    )
+    old_dir = out.with_name(out.name + ".old")
+    if old_dir.exists():
+        shutil.rmtree(old_dir)
+    if out.exists():
+        out.rename(old_dir)
+    tmp.rename(out)
+    if old_dir.exists():
+        shutil.rmtree(old_dir)
+    reload_manifest()
+    return {"ok": True, "out": str(out), "assets": assets, "kept_previous": kept}
+
+
+def _read_manifest(root: Path) -> dict[str, dict[str, Any]]:
+    try:
+        return json.loads((root / MANIFEST_NAME).read_text(encoding="utf-8")).get("assets") or {}
+    except (OSError, ValueError):
+        return {}
+
+
+# --- report -----------------------------------------------------------------------------
+
+_STATIC_REF_RE = re.compile(r"""static_url\(\s*["']([^"']+)["']\s*\)""")
+_TEMPLATE_REF_RE = re.compile(r"""{%-?\s*(?:extends|include|import|from)\s+["']([^"']+)["']""")
+
+
+def _best_size(entry: dict[str, Any]) -> int:
+    sizes = [entry["size"]] + [entry[k] for k in ("br", "gz", "avif", "webp") if entry.get(k)]
+    return min(sizes)
+
+
+def _template_assets(templates_dir: Path, name: str, seen: set[str]) -> set[str]:
+    if name in seen:
+        return set()
+    seen.add(name)
+    try:
+        source = (templates_dir / name).read_text(encoding="utf-8")
+    except OSError:
+        return set()
+    refs = {r.lstrip("/").removeprefix("static/") for r in _STATIC_REF_RE.findall(source)}
+    for child in _TEMPLATE_REF_RE.findall(source):
+        refs |= _template_assets(templates_dir, child, seen)
+    return refs
+
+
+def page_savings(assets: dict[str, dict[str, Any]], templates_dir: Path | None = None) -> list[dict[str, Any]]:
+    """Per page template: raw bytes of referenced assets vs best precompressed variant."""
+    templates_dir = Path(templates_dir or get_settings().templates_dir)
+    rows = []
+    for path in sorted(templates_dir.rglob("*.html")):
+        name = path.relative_to(templates_dir).as_posix()
+        if name.startswith(("components/", "partials/", "layouts/")) or Path(name).name.startswith("_"):
+            continue
+        refs = sorted(r for r in _template_assets(templates_dir, name, set()) if r in assets)
+        if not refs:
+            continue
+        raw = sum(assets[r]["size"] for r in refs)
+        best = sum(_best_size(assets[r]) for r in refs)
+        rows.append(
+            {
+                "page": name,
+                "assets": len(refs),
+                "raw_bytes": raw,
+                "served_bytes": best,
+                "saved_bytes": raw - best,
+                "saved_pct": round(100.0 * (raw - best) / raw, 1) if raw else 0.0,
+            }
+        )
+    rows.sort(key=lambda r: r["saved_bytes"], reverse=True)
+    return rows
+
+
+def format_static_report(data: dict[str, Any], *, top_n: int = 30) -> str:
+    assets = data["assets"]
+    raw = sum(e["size"] for e in assets.values())
+    best = sum(_best_size(e) for e in assets.values())
+    lines = [
+        f"static build: {len(assets)} assets -> {data['out']}",
+        f"total {raw / 1024:.0f} KB raw, {best / 1024:.0f} KB best variant, "
+        f"saved {(raw - best) / 1024:.0f} KB",
+        f"kept {data.get('kept_previous', 0)} fingerprinted files from previous build",
+        "",
+        f"{'page':<45} {'assets':>6} {'raw KB':>8} {'sent KB':>8} {'saved':>7}",
+    ]
+    for row in data.get("pages", [])[:top_n]:
+        lines.append(
+            f"{row['page']:<45} {row['assets']:>6} {row['raw_bytes'] / 1024:>8.1f} "
+            f"{row['served_bytes'] / 1024:>8.1f} {row['saved_pct']:>6.1f}%"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,238 @@
+"""Buffered, coalesced writes for app_counters and platform_user_activity.
+
+Request paths only touch an in-process dict: counter increments are summed per
+key and (user, day) activity marks are de-duplicated. A daemon thread flushes
+them every WRITE_BUFFER_FLUSH_SEC with atomic upserts (MySQL ON DUPLICATE KEY
+UPDATE, SQLite ON CONFLICT); the buffer is flushed again on app shutdown and at
+interpreter exit. Pending writes are grouped by sync Engine so they land in the
+database the caller's session used (an AsyncSession maps to a sync engine on the same
+URL: the app engine for the app's own async engine).
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+from datetime import date, datetime
+from typing import Any
+
+from sqlalchemy import insert, select, tuple_, update
+from sqlalchemy.engine import Connection, Engine
+
+from app.config import get_settings
+from app.models import AppCounter, PlatformUserActivity
+
+logger = logging.getLogger(__name__)
+
+MAX_FLUSH_ATTEMPTS = 3
+
+_COUNTERS = AppCounter.__table__
+_ACTIVITY = PlatformUserActivity.__table__
+
+
+def upsert_counters(conn: Connection, counters: dict[str, int]) -> None:
+    now = datetime.utcnow()
+    rows = [{"key": k, "value": n, "updated_at": now} for k, n in sorted(counters.items()) if n]
+    if not rows:
+        return
+    dialect = conn.dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        stmt = mysql_insert(_COUNTERS)
+        stmt = stmt.on_duplicate_key_update(value=_COUNTERS.c.value + stmt.inserted.value, updated_at=now)
+        conn.execute(stmt, rows)
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        stmt = sqlite_insert(_COUNTERS)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[_COUNTERS.c.key],
+            set_={"value": _COUNTERS.c.value + stmt.excluded.value, "updated_at": now},
+        )
+        conn.execute(stmt, rows)
+    else:
+        for row in rows:
+            done = conn.execute(
+                update(_COUNTERS)
+                .where(_COUNTERS.c.key == row["key"])
+                .values(value=_COUNTERS.c.value + row["value"], updated_at=now)
+            ).rowcount
+            if not done:
+                conn.execute(insert(_COUNTERS), row)
+
+
+def upsert_activity(conn: Connection, marks: dict[tuple[int, date], str]) -> None:
+    now = datetime.utcnow()
+    rows = [
+        {"user_id": user_id, "activity_date": day, "source": source[:32], "created_at": now}
+        for (user_id, day), source in sorted(marks.items())
+    ]
+    if not rows:
+        return
+    dialect = conn.dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        stmt = mysql_insert(_ACTIVITY)
+        # No-op update: the first mark of the day wins (uq_platform_user_activity_user_day).
+        conn.execute(stmt.on_duplicate_key_update(user_id=stmt.inserted.user_id), rows)
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        stmt = sqlite_insert(_ACTIVITY).on_conflict_do_nothing(
+            index_elements=[_ACTIVITY.c.user_id, _ACTIVITY.c.activity_date]
+        )
+        conn.execute(stmt, rows)
+    else:
+        existing = set(
+            conn.execute(
+                select(_ACTIVITY.c.user_id, _ACTIVITY.c.activity_date).where(
+                    tuple_(_ACTIVITY.c.user_id, _ACTIVITY.c.activity_date).in_(list(marks))
+                )
+            ).all()
+        )
+        fresh = [r for r in rows if (r["user_id"], r["activity_date"]) not in existing]
+        if fresh:
+            conn.execute(insert(_ACTIVITY), fresh)
+
+
+class WriteBuffer:
+    def __init__(self, *, interval: float):
+        self.interval = float(interval)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._counters: dict[Engine, dict[str, int]] = {}
+        self._activity: dict[Engine, dict[tuple[int, date], str]] = {}
+        self._failures: dict[Engine, int] = {}
+        self._thread: threading.Thread | None = None
+
+    def add_counter(self, bind: Engine, key: str, by: int = 1) -> None:
+        with self._lock:
+            bucket = self._counters.setdefault(bind, {})
+            bucket[key] = bucket.get(key, 0) + int(by)
+        self._after_enqueue()
+
+    def mark_activity(self, bind: Engine, user_id: int, day: date, source: str) -> None:
+        with self._lock:
+            self._activity.setdefault(bind, {}).setdefault((int(user_id), day), source or "login")
+        self._after_enqueue()
+
+    def pending(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "counters": sum(len(b) for b in self._counters.values()),
+                "activity": sum(len(b) for b in self._activity.values()),
+            }
+
+    def _after_enqueue(self) -> None:
+        if self.interval <= 0:
+            self.flush()
+            return
+        if self._thread is None or not self._thread.is_alive():
+            # Re-checked under the lock; is_alive() is False in a forked Passenger worker.
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="write-buffer", daemon=True)
+                    self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    def _requeue(self, bind: Engine, counters: dict[str, int], marks: dict[tuple[int, date], str]) -> None:
+        with self._lock:
+            bucket = self._counters.setdefault(bind, {})
+            for key, n in counters.items():
+                bucket[key] = bucket.get(key, 0) + n
+            activity = self._activity.setdefault(bind, {})
+            for mark, source in marks.items():
+                activity.setdefault(mark, source)
+
+    def flush(self) -> dict[str, int]:
+        """Write everything pending; returns how many counter keys / activity marks were written."""
+        written = {"counters": 0, "activity": 0}
+        with self._flush_lock:
+            with self._lock:
+                counters, self._counters = self._counters, {}
+                activity, self._activity = self._activity, {}
+            for bind in set(counters) | set(activity):
+                batch_counters = counters.get(bind, {})
+                batch_marks = activity.get(bind, {})
+                try:
+                    with bind.begin() as conn:
+                        upsert_counters(conn, batch_counters)
+                        upsert_activity(conn, batch_marks)
+                except Exception:
+                    attempts = self._failures.get(bind, 0) + 1
+                    if attempts < MAX_FLUSH_ATTEMPTS:
+                        self._failures[bind] = attempts
+                        self._requeue(bind, batch_counters, batch_marks)
+                        logger.warning("write buffer flush failed (attempt %s), will retry", attempts, exc_info=True)
+                    else:
+                        self._failures.pop(bind, None)
+                        logger.exception(
+                            "write buffer flush failed; dropped %s counters, %s activity marks",
+                            len(batch_counters),
+                            len(batch_marks),
+                        )
+                    continue
+                self._failures.pop(bind, None)
+                written["counters"] += len(batch_counters)
+                written["activity"] += len(batch_marks)
+        return written
+
+
+WRITE_BUFFER = WriteBuffer(interval=get_settings().write_buffer_flush_sec)
+atexit.register(WRITE_BUFFER.flush)
+
+
+_SYNC_TWINS: dict[str, Engine] = {}
+_TWINS_LOCK = threading.Lock()
+
+
+def _sync_twin(async_bind: Engine) -> Engine:
+    """Sync engine on the database of an AsyncEngine's sync_engine (no event loop needed)."""
+    from sqlalchemy import create_engine
+
+    from app.database import _sync_engine_kwargs, engine, sync_url
+    from app.services.pool_metrics import instrument_engine
+
+    key = sync_url(async_bind.url)
+    if key == engine.url.render_as_string(hide_password=False):
+        return engine
+    with _TWINS_LOCK:
+        twin = _SYNC_TWINS.get(key)
+        if twin is None:
+            twin = _SYNC_TWINS[key] = create_engine(key, **_sync_engine_kwargs(key))
+            instrument_engine(twin, "sync_twin")
+        return twin
+
+
+def _sync_bind(db: Any) -> Engine | None:
+    bind = db.get_bind() if db is not None else None
+    if isinstance(bind, Connection):
+        bind = bind.engine
+    if not isinstance(bind, Engine):
+        return None
+    if bind.dialect.is_async:
+        return _sync_twin(bind)
+    return bind
+
+
+def buffer_counter(db: Any, key: str, *, by: int = 1) -> None:
+    bind = _sync_bind(db)
+    if bind is not None:
+        WRITE_BUFFER.add_counter(bind, key, by)
+
+
+def buffer_user_activity(db: Any, user_id: int, *, day: date | None = None, source: str = "login") -> None:
+    bind = _sync_bind(db)
+    if bind is not None:
+        WRITE_BUFFER.mark_activity(bind, user_id, day or date.today(), source)
+
+
+def flush_pending_writes() -> dict[str, int]:
+    return WRITE_BUFFER.flush()
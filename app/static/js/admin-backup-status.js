@@ -0,0 +1,28 @@
+(function () {
+    var box = document.getElementById("paBackupJob");
+    if (!box || box.getAttribute("data-running") !== "1") return;
+
+    function render(job) {
+        var text = "Последний запуск " + job.started_at + ": " + job.status;
+        if (job.status === "running") {
+            text += " (" + (job.done || 0) + (job.total ? "/" + job.total : "") + " " + (job.unit || "") + ")";
+        }
+        if (job.path) text += " — " + job.path;
+        if (job.error) text += " — " + job.error;
+        box.textContent = text;
+    }
+
+    var timer = setInterval(function () {
+        fetch(box.getAttribute("data-status-url"), { credentials: "same-origin", headers: { Accept: "application/json" } })
+            .then(function (r) { return r.json(); })
+            .then(function (data) {
+                if (!data.job) return;
+                render(data.job);
+                if (data.job.status !== "running") {
+                    clearInterval(timer);
+                    if (data.job.status === "done") window.location.reload();
+                }
+            })
+            .catch(function () {});
+    }, 2000);
+})();
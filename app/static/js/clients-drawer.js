@@ -40,6 +40,7 @@
             '</section>' +
             '<section class="drawer-section"><h4 class="drawer-section__title">Статистика</h4>' +
             '<p class="text-body-sm">Записей: <strong>' + (client.booking_count || 0) + '</strong></p>' +
+            (client.next_booking ? '<p class="text-body-sm">Следующая запись: <strong>' + new Date(client.next_booking + 'T12:00:00').toLocaleDateString('ru-RU') + '</strong></p>' : '') +
             '</section>' +
             '<p class="text-body-sm text-muted">Здесь в будущих версиях появятся история посещений, заметки, документы и задачи.</p>';
     }
@@ -70,16 +71,21 @@
         }, 220);
     }
 
-    function init(clients) {
-        clientsIndex = {};
+    function add(clients) {
         (clients || []).forEach(function (c) {
             clientsIndex[c.id] = c;
         });
+    }
+
+    function init(clients) {
+        clientsIndex = {};
+        add(clients);
 
-        document.querySelectorAll('[data-open-drawer]').forEach(function (btn) {
-            btn.addEventListener('click', function () {
-                open(parseInt(btn.getAttribute('data-open-drawer'), 10));
-            });
+        // Delegated: cards are re-rendered by filters and "Показать ещё".
+        document.addEventListener('click', function (e) {
+            var btn = e.target.closest('[data-open-drawer]');
+            if (!btn) return;
+            open(parseInt(btn.getAttribute('data-open-drawer'), 10));
         });
 
         document.getElementById('client-drawer-close') && document.getElementById('client-drawer-close').addEventListener('click', close);
@@ -90,5 +96,5 @@
         });
     }
 
-    global.clientDrawer = { init: init, open: open, close: close };
+    global.clientDrawer = { init: init, add: add, open: open, close: close };
 })(window);
@@ -99,81 +99,91 @@
         return null;
     }
 
-    function filterCards() {
+    var listState = { page: 1, seq: 0 };
+
+    function listQuery(page) {
         var search = (document.getElementById('clients-search') || {}).value || '';
         var filter = (document.getElementById('clients-filter') || {}).value || 'all';
         var sort = (document.getElementById('clients-sort') || {}).value || 'recent';
-        var q = search.trim().toLowerCase();
-        var rows = Array.from(document.querySelectorAll('.client-filter-row'));
-        var visibleCards = [];
-        var visibleCount = 0;
-        var seenIds = {};
-
-        rows.forEach(function (row) {
-            var badge = row.getAttribute('data-badge') || '';
-            var status = row.getAttribute('data-status') || '';
-            var searchText = row.getAttribute('data-search') || '';
-            var matchSearch = !q || searchText.indexOf(q) !== -1;
-            var matchFilter = true;
-            if (filter === 'new') matchFilter = badge === 'new';
-            else if (filter === 'active') matchFilter = status === 'active';
-            else if (filter === 'vip') matchFilter = badge === 'vip';
-            else if (filter === 'archive') matchFilter = badge === 'inactive' || status === 'inactive';
-            var show = matchSearch && matchFilter;
-            row.classList.toggle('is-hidden', !show);
-            if (show) {
-                var id = row.getAttribute('data-id') || '';
-                if (!seenIds[id]) {
-                    seenIds[id] = true;
-                    visibleCount += 1;
-                }
-                if (row.classList.contains('client-card')) visibleCards.push(row);
-            }
-        });
+        return '/api/clients/list/?sort=' + encodeURIComponent(sort) +
+            '&filter=' + encodeURIComponent(filter) +
+            '&q=' + encodeURIComponent(search.trim()) +
+            '&page=' + page;
+    }
 
-        visibleCards.sort(function (a, b) {
-            if (sort === 'name') {
-                return (a.getAttribute('data-name') || '').localeCompare(b.getAttribute('data-name') || '', 'ru');
+    function fetchPage(page, done) {
+        var seq = ++listState.seq;
+        var xhr = new XMLHttpRequest();
+        xhr.open('GET', listQuery(page), true);
+        xhr.onload = function () {
+            if (seq !== listState.seq) return;
+            var res = null;
+            try { res = JSON.parse(xhr.responseText); } catch (e) {}
+            if (xhr.status !== 200 || !res || !res.success) {
+                if (global.showToast) global.showToast('Не удалось загрузить клиентов', 'error');
+                done(null);
+                return;
             }
-            if (sort === 'created') {
-                return (b.getAttribute('data-created') || '').localeCompare(a.getAttribute('data-created') || '');
-            }
-            if (sort === 'last_visit') {
-                return (b.getAttribute('data-last-visit') || '').localeCompare(a.getAttribute('data-last-visit') || '');
-            }
-            return (b.getAttribute('data-updated') || '').localeCompare(a.getAttribute('data-updated') || '');
-        });
+            done(res);
+        };
+        xhr.onerror = function () {
+            if (seq === listState.seq) done(null);
+        };
+        xhr.send();
+    }
 
+    function renderPage(data, res, append) {
         var grid = document.getElementById('clients-grid');
-        if (grid) {
-            visibleCards.forEach(function (card) {
-                grid.appendChild(card);
-            });
+        if (!grid || !res) return;
+        if (append) {
+            grid.insertAdjacentHTML('beforeend', res.html);
+            data.clients = (data.clients || []).concat(res.clients);
+        } else {
+            grid.innerHTML = res.html;
+            data.clients = res.clients;
         }
+        listState.page = res.page;
+        if (global.clientDrawer) global.clientDrawer.add(res.clients);
+        initRelativeDates();
 
-        var tbody = document.getElementById('clients-table-body');
-        if (tbody) {
-            var tableRows = Array.from(tbody.querySelectorAll('.clients-table__row'));
-            tableRows.sort(function (a, b) {
-                if (sort === 'name') {
-                    return (a.getAttribute('data-name') || '').localeCompare(b.getAttribute('data-name') || '', 'ru');
-                }
-                if (sort === 'created') {
-                    return (b.getAttribute('data-created') || '').localeCompare(a.getAttribute('data-created') || '');
-                }
-                if (sort === 'last_visit') {
-                    return (b.getAttribute('data-last-visit') || '').localeCompare(a.getAttribute('data-last-visit') || '');
-                }
-                return (b.getAttribute('data-updated') || '').localeCompare(a.getAttribute('data-updated') || '');
-            });
-            tableRows.forEach(function (row) {
-                tbody.appendChild(row);
-            });
+        var more = document.getElementById('clients-load-more');
+        if (more) {
+            more.hidden = !res.next_page;
+            more.setAttribute('data-next-page', res.next_page || '');
         }
-
         var empty = document.getElementById('clients-filter-empty');
-        var hasSource = document.querySelectorAll('.client-filter-row').length > 0;
-        if (empty) empty.hidden = visibleCount > 0 || !hasSource;
+        if (empty) empty.hidden = !!(data.clients && data.clients.length);
+    }
+
+    function filterCards(data) {
+        fetchPage(1, function (res) {
+            renderPage(data, res, false);
+        });
+    }
+
+    function loadMore(data) {
+        var more = document.getElementById('clients-load-more');
+        var next = more && parseInt(more.getAttribute('data-next-page'), 10);
+        if (!next || more.disabled) return;
+        more.disabled = true;
+        fetchPage(next, function (res) {
+            more.disabled = false;
+            renderPage(data, res, true);
+        });
+    }
+
+    function exportAll(data, page, acc) {
+        // Walks every page of the current filter so the export is not limited to loaded cards.
+        fetchPage(page, function (res) {
+            if (!res) return;
+            acc = acc.concat(res.clients);
+            if (res.next_page) {
+                exportAll(data, res.next_page, acc);
+                return;
+            }
+            exportCsv(acc);
+            if (global.showToast) global.showToast('Экспорт завершён');
+        });
     }
 
     function initRelativeDates() {
@@ -210,8 +220,7 @@
         document.getElementById('btn-close-create') && document.getElementById('btn-close-create').addEventListener('click', closeCreateForm);
 
         document.getElementById('btn-export-clients') && document.getElementById('btn-export-clients').addEventListener('click', function () {
-            exportCsv(data.clients || []);
-            if (global.showToast) global.showToast('Экспорт завершён');
+            exportAll(data, 1, []);
         });
 
         document.getElementById('btn-import-clients') && document.getElementById('btn-import-clients').addEventListener('click', function () {
@@ -221,20 +230,28 @@
         var search = document.getElementById('clients-search');
         var filterEl = document.getElementById('clients-filter');
         var sortEl = document.getElementById('clients-sort');
-        if (search) search.addEventListener('input', filterCards);
-        if (filterEl) filterEl.addEventListener('change', filterCards);
-        if (sortEl) sortEl.addEventListener('change', filterCards);
-
-        document.querySelectorAll('[data-action="message"]').forEach(function (btn) {
-            btn.addEventListener('click', function () {
-                var card = btn.closest('.client-card');
-                if (!card) return;
-                var id = parseInt(card.getAttribute('data-id'), 10);
-                var client = (data.clients || []).find(function (c) { return c.id === id; });
-                if (!client) return;
-                var url = contactUrl(client);
-                if (url) window.open(url, '_blank');
+        var searchTimer = null;
+        if (search) {
+            search.addEventListener('input', function () {
+                clearTimeout(searchTimer);
+                searchTimer = setTimeout(function () { filterCards(data); }, 250);
             });
+        }
+        if (filterEl) filterEl.addEventListener('change', function () { filterCards(data); });
+        if (sortEl) sortEl.addEventListener('change', function () { filterCards(data); });
+        var more = document.getElementById('clients-load-more');
+        if (more) more.addEventListener('click', function () { loadMore(data); });
+
+        document.addEventListener('click', function (e) {
+            var btn = e.target.closest('[data-action="message"]');
+            if (!btn) return;
+            var card = btn.closest('.client-card');
+            if (!card) return;
+            var id = parseInt(card.getAttribute('data-id'), 10);
+            var client = (data.clients || []).find(function (c) { return c.id === id; });
+            if (!client) return;
+            var url = contactUrl(client);
+            if (url) window.open(url, '_blank');
         });
 
         if (global.clientDrawer) {
@@ -64,6 +64,10 @@
             client_card_id: null,
             force_new_client: false,
             matches: [],
+            // One key per modal: a retried POST replays the stored result instead of booking twice.
+            idempotency_key: window.crypto && crypto.randomUUID
+                ? crypto.randomUUID()
+                : Date.now().toString(36) + "-" + Math.random().toString(36).slice(2),
         };
 
         var steps = ["Клиент", "Календарь", "Услуга", "Дата и время", "Проверка"];
@@ -315,7 +319,11 @@
             var res = await fetch("/api/specialist/bookings/", {
                 method: "POST",
                 credentials: "same-origin",
-                headers: { "Content-Type": "application/json", "X-CSRF-Token": payload.csrf_token },
+                headers: {
+                    "Content-Type": "application/json",
+                    "X-CSRF-Token": payload.csrf_token,
+                    "Idempotency-Key": state.idempotency_key,
+                },
                 body: JSON.stringify(payload),
             });
             var data = await res.json().catch(function () {
@@ -420,6 +420,7 @@
         }
 
         initBookingsHubFilters();
+        initLoadMore();
         initNextBookingCountdown();
         initBookingsFab();
     }
@@ -490,6 +491,53 @@
         });
     }
 
+    function initLoadMore() {
+        document.querySelectorAll('[data-load-more]').forEach(function (btn) {
+            btn.addEventListener('click', function () {
+                var target = document.getElementById(btn.getAttribute('data-target'));
+                var next = btn.getAttribute('data-next');
+                if (!target || !next || btn.disabled) return;
+                btn.disabled = true;
+                var url = '/api/booking/list/?section=' + encodeURIComponent(btn.getAttribute('data-load-more')) +
+                    '&status=' + encodeURIComponent(btn.getAttribute('data-status') || 'all') +
+                    '&after=' + encodeURIComponent(next);
+                var xhr = new XMLHttpRequest();
+                xhr.open('GET', url, true);
+                xhr.onload = function () {
+                    btn.disabled = false;
+                    var data = null;
+                    try { data = JSON.parse(xhr.responseText); } catch (e) {}
+                    if (xhr.status !== 200 || !data || !data.success) {
+                        if (typeof window.showToast === 'function') window.showToast('Не удалось загрузить записи', 'error');
+                        return;
+                    }
+                    var tmp = document.createElement('div');
+                    tmp.innerHTML = data.html;
+                    Array.from(tmp.querySelectorAll('.bookings-day-group')).forEach(function (group) {
+                        // A day split across pages: append its cards to the group already on screen.
+                        var date = group.getAttribute('data-group-date');
+                        var existing = target.querySelector('.bookings-day-group[data-group-date="' + date + '"] .bookings-timeline-track');
+                        var track = group.querySelector('.bookings-timeline-track');
+                        if (existing && track) {
+                            while (track.firstChild) existing.appendChild(track.firstChild);
+                        } else {
+                            target.appendChild(group);
+                        }
+                    });
+                    if (data.next) {
+                        btn.setAttribute('data-next', data.next);
+                    } else {
+                        btn.remove();
+                    }
+                    var searchEl = document.getElementById('bookings-search');
+                    if (searchEl) searchEl.dispatchEvent(new Event('input'));
+                };
+                xhr.onerror = function () { btn.disabled = false; };
+                xhr.send();
+            });
+        });
+    }
+
     function initNextBookingCountdown() {
         var el = document.getElementById('bookings-next-countdown');
         if (!el) return;
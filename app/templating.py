@@ -1,13 +1,14 @@
+import logging
 from datetime import date, datetime, time
+from pathlib import Path
 from urllib.parse import quote
 
 from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache
 
 from app.branding import auth_provider_label, booking_status_label
 from app.config import get_settings
 from app.deps import blank_field
-from app.services.yandex_auth import yandex_oauth_configured
-from app.services.vk_auth import vk_group_write_url, vk_messaging_configured, vk_oauth_configured
 from app.content.landing_copy import (
     CTA_BLOCK,
     FEATURES,
@@ -20,10 +21,14 @@ from app.content.landing_copy import (
     faq_with_support,
     footer_with_context,
 )
+from app.content import content_version
 from app.content.apps_copy import APPS_META, APPS_PAGE, LANDING_APPS_TEASER
 from app.security.csrf import ensure_csrf_token
+from app.services.fragment_cache import FRAGMENT_CACHE, FragmentCacheExtension
+from app.services.static_assets import static_url
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 URL_MAP = {
     "home": "/",
@@ -150,7 +155,25 @@ def url_for(name: str, *args, **kwargs) -> str:
     return URL_MAP.get(name, "/")
 
 
+def _bytecode_cache() -> FileSystemBytecodeCache | None:
+    raw = settings.jinja_bytecode_cache_dir
+    if not raw:
+        return None
+    try:
+        path = Path(raw)
+        path.mkdir(parents=True, exist_ok=True)
+        return FileSystemBytecodeCache(directory=str(path), pattern="__ayc_%s.cache")
+    except OSError:
+        logger.warning("Jinja bytecode cache dir %s unavailable; compiling in memory", raw)
+        return None
+
+
 templates = Jinja2Templates(directory=str(settings.templates_dir))
+templates.env.bytecode_cache = _bytecode_cache()
+templates.env.add_extension(FragmentCacheExtension)
+templates.env.fragment_cache = FRAGMENT_CACHE
+templates.env.fragment_cache_version = content_version
+templates.env.globals["static_url"] = static_url
 templates.env.filters["cut"] = cut_filter
 templates.env.filters["blank_field"] = blank_field
 templates.env.filters["media_url"] = media_url
@@ -271,6 +294,10 @@ def _cabinet_nav_from_path(path: str) -> tuple[str, str]:
 
 
 def _page_context_base(request, user, *, has_consultant: bool, active_mode: str, header: dict, **extra):
+    # OAuth provider modules pull httpx + DB helpers; keep them off the templating import path.
+    from app.services.vk_auth import vk_group_write_url, vk_messaging_configured, vk_oauth_configured
+    from app.services.yandex_auth import yandex_oauth_configured
+
     nav_key, section_title = _cabinet_nav_from_path(getattr(request.url, "path", "/") or "/")
     ctx = {
         "request": request,
@@ -355,8 +382,16 @@ async def build_header_context_async(db, user, request=None) -> dict:
         if not account and "@" in (user.username or ""):
             account = user.username
 
+        from app.services.auth_snapshot import request_auth_snapshot
+
+        snap = request_auth_snapshot(request, user.id) if request is not None else None
+        if snap is not None:
+            # Consultant name/email and primary email come with the auth snapshot: no queries.
+            name = name or snap["consultant_name"]
+            account = account or snap["primary_email"] or snap["consultant_email"]
+
         consultant = None
-        if db is not None and (not name or not account):
+        if snap is None and db is not None and (not name or not account):
             consultant = (
                 await db.execute(select(Consultant).where(Consultant.user_id == user.id))
             ).scalar_one_or_none()
@@ -369,7 +404,7 @@ async def build_header_context_async(db, user, request=None) -> dict:
             ]
             name = " ".join(p for p in parts if p).strip()
 
-        if not account and db is not None:
+        if snap is None and not account and db is not None:
             primary = (
                 await db.execute(
                     select(EmailAddress).where(
@@ -12,6 +12,7 @@ from app.services.platform_activity import record_user_activity
 from app.services.platform_admin_analytics import analytics_snapshot
 from app.services.platform_admin_settings import integration_status, mask_secret, platform_flags
 from app.services.platform_email_log import list_email_deliveries, log_email_delivery, resend_email_delivery
+from app.services.write_buffer import flush_pending_writes
 
 
 def _session():
@@ -71,6 +72,7 @@ def test_activity_and_analytics_dau():
     db.commit()
     record_user_activity(db, u.id)
     db.commit()
+    flush_pending_writes()
     assert (
         db.query(PlatformUserActivity)
         .filter(PlatformUserActivity.user_id == u.id, PlatformUserActivity.activity_date == date.today())
@@ -79,6 +81,7 @@ def test_activity_and_analytics_dau():
     )
     record_user_activity(db, u.id)
     db.commit()
+    flush_pending_writes()
     assert (
         db.query(PlatformUserActivity)
         .filter(PlatformUserActivity.user_id == u.id, PlatformUserActivity.activity_date == date.today())
@@ -115,6 +118,7 @@ def test_login_user_records_activity():
     }
     request = Request(scope)
     login_user(request, u, db)
+    flush_pending_writes()
     db.refresh(u)
     assert u.last_login is not None
     assert (
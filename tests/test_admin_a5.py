@@ -1,4 +1,5 @@
 """Admin A5: audit, ops, export, rate limit."""
+import sqlite3
 import tempfile
 from datetime import datetime
 from pathlib import Path
@@ -88,8 +89,11 @@ def test_sqlite_backup():
     with tempfile.TemporaryDirectory() as tmp:
         base = Path(tmp)
         db_path = base / "data.db"
-        db_path.write_bytes(b"sqlite-test")
-        backups_dir = base / "media" / "backups"
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("CREATE TABLE t (x INTEGER)")
+            conn.execute("INSERT INTO t VALUES (1)")
+        conn.close()
+        backups_dir = base / "var" / "backups"
         backups_dir.mkdir(parents=True)
 
         class FakeSettings:
@@ -100,9 +104,12 @@ def test_sqlite_backup():
             db_port = ""
             db_user = ""
             db_password = ""
+            backup_keep = 10
+            backup_compression = "gzip"
 
         path, err = create_platform_backup(FakeSettings())
         assert err is None
-        assert path and path.startswith("media/backups/")
+        assert path and path.startswith("var/backups/")
         recent = list_recent_backups(backups_dir)
-        assert len(recent) == 1
+        assert len(recent) == 1  # the .sha256 sidecar is not listed
+        assert recent[0]["has_checksum"]
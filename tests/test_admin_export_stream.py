@@ -0,0 +1,131 @@
+"""Admin exports: streamed partitions, filters, NDJSON, gzip, no row cap."""
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+import json
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401
+from app.database import Base
+from app.models import Booking, Calendar, Category, Consultant, Service, User
+from app.services.platform_admin_export import (
+    encode_stream_async,
+    export_bookings_csv,
+    export_options,
+    export_users_csv,
+    iter_export,
+    iter_export_async,
+)
+
+N_BOOKINGS = 6000
+START = date(2026, 1, 1)
+STATUSES = ("pending", "confirmed", "completed", "cancelled")
+
+
+def _seed(path) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        cat = Category(name_category="General")
+        db.add(cat)
+        db.flush()
+        c = Consultant(first_name="A", last_name="B", email="a@t.c", category_of_specialist_id=cat.id)
+        db.add(c)
+        db.flush()
+        cal = Calendar(consultant_id=c.id, name="Main", color="#000", is_active=True)
+        db.add(cal)
+        db.flush()
+        svc = Service(consultant_id=c.id, calendar_id=cal.id, name="Сессия, 60 мин", duration_minutes=60, price=1)
+        db.add(svc)
+        db.add_all([
+            User(username="on", password="x", email="on@t.c", is_active=True, date_joined=datetime(2026, 1, 5)),
+            User(username="off", password="x", email="off@t.c", is_active=False, date_joined=datetime(2026, 2, 5)),
+        ])
+        db.flush()
+        db.execute(insert(Booking), [
+            {
+                "calendar_id": cal.id, "service_id": svc.id, "client_name": f"Client {i}",
+                "client_phone": "+7", "booking_date": START + timedelta(days=i % 100),
+                "booking_time": time(10, 0), "status": STATUSES[i % 4],
+            }
+            for i in range(N_BOOKINGS)
+        ])
+        db.commit()
+    engine.dispose()
+
+
+@pytest.fixture()
+def db_path(tmp_path):
+    path = tmp_path / "export.db"
+    _seed(path)
+    return path
+
+
+def test_streams_partitions_without_cap_and_filters(db_path):
+    engine = create_engine(f"sqlite:///{db_path}")
+    db = sessionmaker(bind=engine)()
+    try:
+        chunks = list(iter_export(db, "bookings", batch=1000))
+        assert len(chunks) == 1 + N_BOOKINGS // 1000
+        rows = list(csv.reader(io.StringIO("".join(chunks))))
+        assert rows[0][0] == "id" and len(rows) == N_BOOKINGS + 1
+        assert rows[1][3] in STATUSES and rows[1][-1] == "Сессия, 60 мин"
+        assert export_bookings_csv(db) == "".join(chunks)
+
+        filtered = export_bookings_csv(
+            db, date_from=START, date_to=START + timedelta(days=9), statuses=("pending", "cancelled")
+        )
+        body = list(csv.reader(io.StringIO(filtered)))[1:]
+        assert len(body) == N_BOOKINGS // 10 // 2
+        assert {r[3] for r in body} == {"pending", "cancelled"}
+
+        lines = "".join(iter_export(db, "users", fmt="ndjson", statuses=("inactive",))).splitlines()
+        assert [json.loads(line)["username"] for line in lines] == ["off"]
+        assert json.loads(lines[0])["is_active"] is False
+        assert "on@t.c" in export_users_csv(db, date_to=date(2026, 1, 5))
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def test_export_options_validation():
+    opts, err = export_options("bookings", {"format": "ndjson", "gzip": "1", "date_from": "2026-01-01", "status": "pending"})
+    assert err is None and opts["fmt"] == "ndjson" and opts["gzip"] is True
+    assert opts["filters"] == {"date_from": START, "statuses": ("pending",)}
+    assert export_options("bookings", {"status": "active"})[1]
+    assert export_options("users", {"date_to": "01.02.2026"})[1]
+    assert export_options("users", {"format": "xml"})[1]
+    assert export_options("secrets", {})[1]
+
+
+@pytest.mark.asyncio
+async def test_async_stream_gzip_matches_sync(db_path):
+    engine = create_engine(f"sqlite:///{db_path}")
+    with sessionmaker(bind=engine)() as db:
+        expected = "".join(iter_export(db, "bookings", fmt="ndjson", statuses=("completed",)))
+    engine.dispose()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", future=True)
+    factory = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with factory() as db:
+            parts = [
+                part
+                async for part in encode_stream_async(
+                    iter_export_async(db, "bookings", fmt="ndjson", batch=500, statuses=("completed",)),
+                    gzip=True,
+                )
+            ]
+        assert len(parts) > 2
+        text = gzip.decompress(b"".join(parts)).decode("utf-8")
+        assert text == expected
+        assert len(text.splitlines()) == N_BOOKINGS // 4
+    finally:
+        await async_engine.dispose()
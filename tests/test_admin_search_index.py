@@ -0,0 +1,172 @@
+"""Admin search index: write hooks, FTS5 prefix search, rebuild, global search wiring."""
+from __future__ import annotations
+
+import logging
+from datetime import date, datetime, time
+
+import pytest
+from sqlalchemy import create_engine, delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401
+from app.auth.session import AuthUser
+from app.database import Base
+from app.models import (
+    AdminSearchDocument,
+    Booking,
+    Calendar,
+    Category,
+    ClientCard,
+    Consultant,
+    Service,
+    SocialAccount,
+    SupportTicket,
+    User,
+)
+from app.services import platform_admin_search
+from app.services.admin_search_index import rebuild_search_index, search_index, search_index_async
+
+ALL_TYPES = ["user", "specialist", "client", "booking", "support"]
+
+
+def _seed(db) -> dict:
+    admin = User(username="admin", password="x", email="admin@t.c", date_joined=datetime.now(),
+                 is_staff=True, is_superuser=True)
+    ivan = User(username="ivan", password="x", email="ivan.petrov@mail.ru", first_name="Иван",
+                last_name="Петров", date_joined=datetime.now())
+    db.add_all([admin, ivan])
+    db.flush()
+    db.add(SocialAccount(provider="telegram", uid="555123", user_id=ivan.id))
+    cat = Category(name_category="General")
+    db.add(cat)
+    db.flush()
+    spec = Consultant(first_name="Ивана", last_name="Смирнова", email="spec@t.c", phone="+7 999 000-11-22",
+                      category_of_specialist_id=cat.id)
+    db.add(spec)
+    db.flush()
+    cal = Calendar(consultant_id=spec.id, name="Main", color="#000", is_active=True)
+    db.add(cal)
+    db.flush()
+    svc = Service(consultant_id=spec.id, calendar_id=cal.id, name="S", duration_minutes=60, price=100)
+    db.add(svc)
+    db.flush()
+    card = ClientCard(consultant_id=spec.id, name="Иван Петров", phone="+7 (900) 123-45-67",
+                      telegram="@ivanp", client_user_id=ivan.id)
+    orphan = ClientCard(consultant_id=spec.id, name="Ольга", email="olga@ya.ru")
+    db.add_all([card, orphan])
+    db.flush()
+    booking = Booking(calendar_id=cal.id, service_id=svc.id, client_card_id=card.id, client_user_id=ivan.id,
+                      client_name="Иван Петров", client_phone="+79001234567", booking_date=date.today(),
+                      booking_time=time(10, 0), status="pending")
+    ticket = SupportTicket(subject="Не приходит SMS", body="...", contact_email="ivan.petrov@mail.ru",
+                           contact_name="Иван")
+    db.add_all([booking, ticket])
+    db.commit()
+    return {"admin": admin, "ivan": ivan, "spec": spec, "card": card, "orphan": orphan,
+            "booking": booking, "ticket": ticket}
+
+
+def _auth(user: User) -> AuthUser:
+    return AuthUser(id=user.id, username=user.username, email=user.email, first_name="", last_name="",
+                    is_active=True, password_hash="x", is_staff=True, is_superuser=True)
+
+
+@pytest.fixture()
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def test_write_hooks_keep_ranked_prefix_search_current(db, caplog):
+    with caplog.at_level(logging.ERROR):
+        rows = _seed(db)
+    assert not [r for r in caplog.records if "admin search index" in r.getMessage()]
+
+    hits = search_index(db, "ива", ALL_TYPES)
+    assert {h["type"] for h in hits} == {"user", "specialist", "client", "booking", "support"}
+    # Two prefixes must both match (AND): only Ivan Petrov's own documents.
+    assert {(h["type"], h["id"]) for h in search_index(db, "иван петр", ["user", "client"])} == {
+        ("user", rows["ivan"].id), ("client", rows["card"].id),
+    }
+    assert search_index(db, "5551", ["user"])[0]["id"] == rows["ivan"].id
+    assert search_index(db, "79001234", ["client"])[0]["url"] == f"/platform-admin/clients/user/{rows['ivan'].id}/"
+    assert search_index(db, "olga@ya", ["client"])[0]["url"] == f"/platform-admin/clients/card/{rows['orphan'].id}/"
+
+    rows["ivan"].email = "ivan@new.example"
+    rows["ivan"].last_login = datetime.now()
+    db.delete(rows["orphan"])
+    db.commit()
+    assert search_index(db, "new.example", ["user"])[0]["id"] == rows["ivan"].id
+    assert not search_index(db, "olga", ["client"])
+    assert not search_index(db, "mail.ru", ["user"])
+
+
+def test_index_follows_commit_and_phone_fragments_match(db):
+    rows = _seed(db)
+    rows["orphan"].name = "Ольга Новикова"
+    db.flush()
+    docs = select(func.count()).select_from(AdminSearchDocument).where(AdminSearchDocument.body.contains("новикова"))
+    assert db.execute(docs).scalar_one() == 0  # nothing written inside the business transaction
+    db.rollback()
+    db.commit()
+    assert not search_index(db, "новикова", ["client"])  # leftover ids re-read the committed row
+
+    # Digits from the middle of a number: no token prefix matches, the substring fallback does.
+    assert {h["type"] for h in search_index(db, "123-45-67", ["client", "booking"])} == {"client", "booking"}
+    assert search_index(db, "0001122", ["specialist"])[0]["id"] == rows["spec"].id
+    assert not search_index(db, "4567890", ["client", "booking"])
+
+
+def test_rebuild_restores_index_and_drops_orphans(db):
+    rows = _seed(db)
+    expected = db.execute(select(func.count()).select_from(AdminSearchDocument)).scalar_one()
+    db.execute(delete(AdminSearchDocument))
+    db.add(AdminSearchDocument(entity_type="booking", entity_id=9999, title="gone", body="gone"))
+    db.commit()
+    assert not search_index(db, "петров", ALL_TYPES)
+
+    report = rebuild_search_index(db, batch=2)
+    assert report == {"user": 2, "specialist": 1, "client": 2, "booking": 1, "support": 1}
+    assert db.execute(select(func.count()).select_from(AdminSearchDocument)).scalar_one() == expected
+    assert not search_index(db, "gone", ["booking"])
+    assert search_index(db, "петров", ["booking"])[0]["id"] == rows["booking"].id
+
+
+def test_global_search_uses_index_and_permissions(db, monkeypatch):
+    rows = _seed(db)
+
+    def _no_fanout(*a, **k):
+        raise AssertionError("per-table fallback should not run")
+
+    monkeypatch.setattr(platform_admin_search, "_fanout_search", _no_fanout)
+    results = platform_admin_search.admin_global_search(db, _auth(rows["admin"]), "sms")
+    assert [(r["type"], r["id"]) for r in results] == [("support", rows["ticket"].id)]
+
+    monkeypatch.setattr(platform_admin_search, "has_permission", lambda db, user, perm: perm != "support")
+    results = platform_admin_search.admin_global_search(db, _auth(rows["admin"]), "ivan.petrov")
+    assert {r["type"] for r in results} == {"user"}
+
+
+@pytest.mark.asyncio
+async def test_async_session_writes_are_indexed(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'search_async.db'}", future=True)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        async with factory() as db:
+            user = User(username="anna", password="x", email="anna.k@example.com", date_joined=datetime.now())
+            db.add(user)
+            await db.commit()
+            hits = await search_index_async(db, "anna.k", ["user"])
+            assert [h["id"] for h in hits] == [user.id]
+            await db.delete(user)
+            await db.commit()
+            assert not await search_index_async(db, "anna", ["user"])
+    finally:
+        await engine.dispose()
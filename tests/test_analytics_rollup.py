@@ -0,0 +1,188 @@
+"""Admin analytics rollups: per-day aggregates vs raw data, re-roll, backfill, snapshot."""
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from sqlalchemy import create_engine, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401
+from app.database import Base
+from app.models import (
+    Booking,
+    Calendar,
+    Category,
+    Consultant,
+    PlatformDailyRollup,
+    PlatformSpecialistDaily,
+    PlatformUserActivity,
+    Service,
+    User,
+)
+from app.services.analytics_rollup import earliest_data_date, rollup_days, run_rollups
+from app.services.platform_admin_analytics import analytics_range, analytics_snapshot, analytics_snapshot_async
+
+TODAY = date.today()
+STATUSES = ("pending", "confirmed", "completed", "cancelled")
+
+
+def _seed(path) -> dict:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        cat = Category(name_category="General")
+        db.add(cat)
+        db.flush()
+        consultants = [
+            Consultant(first_name=f"Spec{i}", last_name="X", email=f"s{i}@t.c", category_of_specialist_id=cat.id)
+            for i in range(2)
+        ]
+        db.add_all(consultants)
+        db.flush()
+        calendars = [Calendar(consultant_id=c.id, name="Main", color="#000", is_active=True) for c in consultants]
+        db.add_all(calendars)
+        db.flush()
+        services = [
+            Service(consultant_id=c.id, calendar_id=cal.id, name="S", duration_minutes=60, price=1)
+            for c, cal in zip(consultants, calendars)
+        ]
+        db.add_all(services)
+        db.flush()
+        for i in range(40):
+            db.add(User(username=f"u{i}", password="x", email=f"u{i}@t.c",
+                        date_joined=datetime.combine(TODAY - timedelta(days=i), time(12, 0))))
+        db.flush()
+        user_ids = list(db.execute(select(User.id)).scalars())
+        for offset in range(45):
+            for uid in user_ids[: 1 + offset % 5]:
+                db.add(PlatformUserActivity(user_id=uid, activity_date=TODAY - timedelta(days=offset)))
+        for i in range(120):
+            day = TODAY - timedelta(days=i % 60)
+            db.add(Booking(
+                calendar_id=calendars[i % 3 % 2].id, service_id=services[i % 3 % 2].id,
+                client_name=f"C{i}", client_phone="+7",
+                booking_date=day, booking_time=time(10, 0), status=STATUSES[i % 4],
+                created_at=datetime.combine(day - timedelta(days=1), time(9, 0)),
+            ))
+        db.commit()
+        ids = {"consultants": [c.id for c in consultants], "calendars": [c.id for c in calendars]}
+    engine.dispose()
+    return ids
+
+
+@pytest.fixture()
+def seeded(tmp_path):
+    path = tmp_path / "rollup.db"
+    ids = _seed(path)
+    engine = create_engine(f"sqlite:///{path}")
+    db = sessionmaker(bind=engine)()
+    yield path, db, ids
+    db.close()
+    engine.dispose()
+
+
+def _raw_distinct(db, start, end) -> int:
+    return db.execute(
+        select(func.count(func.distinct(PlatformUserActivity.user_id))).where(
+            PlatformUserActivity.activity_date.between(start, end)
+        )
+    ).scalar()
+
+
+def test_rollup_matches_raw_data(seeded):
+    _, db, ids = seeded
+    start = TODAY - timedelta(days=59)
+    assert run_rollups(db, start=start)["days"] == 60
+    rows = {r.day: r for r in db.execute(select(PlatformDailyRollup)).scalars()}
+    assert len(rows) == 60
+
+    for d in (TODAY, TODAY - timedelta(days=3), TODAY - timedelta(days=31)):
+        r = rows[d]
+        assert r.active_users == _raw_distinct(db, d, d)
+        assert r.wau == _raw_distinct(db, d - timedelta(days=6), d)
+        assert r.mau == _raw_distinct(db, d - timedelta(days=29), d)
+        assert r.signups == db.execute(
+            select(func.count(User.id)).where(func.date(User.date_joined) == d.isoformat())
+        ).scalar()
+        by_status = dict(db.execute(
+            select(Booking.status, func.count(Booking.id)).where(Booking.booking_date == d).group_by(Booking.status)
+        ).all())
+        assert r.bookings_scheduled == sum(by_status.values())
+        assert r.bookings_completed == by_status.get("completed", 0)
+        assert r.bookings_cancelled == by_status.get("cancelled", 0)
+        assert r.bookings_created == db.execute(
+            select(func.count(Booking.id)).where(Booking.booking_date == d + timedelta(days=1))
+        ).scalar()
+
+    per_specialist = dict(db.execute(
+        select(PlatformSpecialistDaily.consultant_id, func.sum(PlatformSpecialistDaily.bookings))
+        .group_by(PlatformSpecialistDaily.consultant_id)
+    ).all())
+    for consultant_id, calendar_id in zip(ids["consultants"], ids["calendars"]):
+        expected = db.execute(select(func.count(Booking.id)).where(Booking.calendar_id == calendar_id)).scalar()
+        assert per_specialist[consultant_id] == expected
+
+
+def test_rerun_is_idempotent_and_backfill_chunks(seeded):
+    _, db, _ = seeded
+    start = earliest_data_date(db)
+    assert start == TODAY - timedelta(days=60)  # earliest booking was created the day before it
+    first = run_rollups(db, start=start)
+    assert first["days"] == 61
+    snapshot = [tuple(r) for r in db.execute(select(*PlatformDailyRollup.__table__.c).order_by("day")).all()]
+
+    db.execute(update(Booking).where(Booking.booking_date == TODAY - timedelta(days=2)).values(status="cancelled"))
+    db.commit()
+    assert run_rollups(db)["days"] == 7
+    assert db.execute(select(func.count()).select_from(PlatformDailyRollup)).scalar() == 61
+    moved = db.get(PlatformDailyRollup, TODAY - timedelta(days=2))
+    db.refresh(moved)
+    assert moved.bookings_cancelled == moved.bookings_scheduled
+    untouched = [tuple(r) for r in db.execute(
+        select(*PlatformDailyRollup.__table__.c).where(PlatformDailyRollup.day < TODAY - timedelta(days=6))
+        .order_by("day")
+    ).all()]
+    assert [r[:-1] for r in untouched] == [r[:-1] for r in snapshot[: len(untouched)]]
+
+
+def test_snapshot_reads_rollups_and_refreshes_today(seeded):
+    _, db, _ = seeded
+    assert analytics_range("30") == 30 and analytics_range("13") == 7 and analytics_range("x") == 7
+    run_rollups(db, start=TODAY - timedelta(days=89))
+    stale = datetime.utcnow() - timedelta(hours=1)
+    db.execute(update(PlatformDailyRollup).where(PlatformDailyRollup.day == TODAY).values(active_users=0, updated_at=stale))
+    db.commit()
+
+    snap = analytics_snapshot(db, days=90)
+    assert len(snap["daily_bookings"]) == 90 and snap["days"] == 90
+    assert snap["dau"] == _raw_distinct(db, TODAY, TODAY)  # stale row re-rolled on read
+    assert snap["mau"] == _raw_distinct(db, TODAY - timedelta(days=29), TODAY)
+    assert snap["bookings_total"] == 120
+    assert sum(snap["status_totals"].values()) == 120
+    assert snap["series_max"]["daily_bookings"] == max(p["value"] for p in snap["daily_bookings"])
+    assert [s["bookings"] for s in snap["top_specialists"]] == [80, 40]
+
+    week = analytics_snapshot(db, days=7)
+    assert len(week["daily_active"]) == 7
+    assert week["signups_week"] == 7 and week["signups_today"] == 1
+
+
+@pytest.mark.asyncio
+async def test_async_snapshot_matches_sync(seeded):
+    path, db, _ = seeded
+    run_rollups(db, start=TODAY - timedelta(days=29))
+    expected = analytics_snapshot(db, days=30)
+    db.execute(update(PlatformDailyRollup).where(PlatformDailyRollup.day == TODAY).values(updated_at=datetime(2000, 1, 1)))
+    db.commit()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", future=True)
+    factory = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with factory() as adb:
+            snap = await analytics_snapshot_async(adb, days=30)
+        assert snap == expected
+    finally:
+        await async_engine.dispose()
+    assert rollup_days(db, TODAY, TODAY - timedelta(days=1)) == 0
@@ -126,7 +126,7 @@ async def test_async_crm_and_profile_helpers_sqlite(tmp_path):
         db.add(card)
         await db.commit()
 
-        crm = await build_crm_payload_async(db, consultant.id, [card])
+        crm = await build_crm_payload_async(db, consultant.id)
         assert crm["dashboard"]["total"] == 1
         assert crm["clients"][0]["name"] == "Client"
 
@@ -0,0 +1,129 @@
+"""Auth snapshot: identity resolved from the shared cache, dropped on profile edits, invalidation and mode switch."""
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from starlette.requests import Request
+
+import app.models  # noqa: F401
+from app.auth.session import get_current_user_async
+from app.database import Base
+from app.deps import require_specialist_mode_async
+from app.models import Category, Consultant, EmailAddress, User
+from app.services.active_mode import MODE_CLIENT, MODE_SPECIALIST, set_active_mode
+import app.services.auth_snapshot as auth_snapshot
+from app.services.auth_snapshot import AUTH_SNAPSHOT_CACHE
+from app.services.session_invalidation import invalidate_user_sessions_async
+from app.templating import build_header_context_async
+
+
+def _request(session: dict) -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": [], "session": session})
+
+
+@pytest.fixture()
+async def factory(tmp_path, monkeypatch):
+    # Stand-in for Redis: the snapshot is only cached when a shared cache exists.
+    monkeypatch.setattr(auth_snapshot, "get_redis", lambda: object())
+    AUTH_SNAPSHOT_CACHE.clear()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'auth.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as db:
+        cat = Category(name_category="General")
+        user = User(username="anna", email="", password="!", is_active=True, first_name="", last_name="")
+        db.add_all([cat, user])
+        await db.flush()
+        db.add(EmailAddress(email="anna@example.com", primary=True, verified=True, user_id=user.id))
+        db.add(
+            Consultant(user_id=user.id, first_name="Anna", last_name="K", email="", category_of_specialist_id=cat.id)
+        )
+        await db.commit()
+    factory.queries = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *a: factory.queries.append(a[2]))
+    yield factory
+    AUTH_SNAPSHOT_CACHE.clear()
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_cabinet_request_resolves_identity_without_queries(factory):
+    session = {"user_id": 1, "session_version": 0, "active_mode": MODE_SPECIALIST}
+    async with factory() as db:
+        user = await get_current_user_async(_request(session), db)  # cold: one joined query
+    assert user.username == "anna" and not user.has_usable_password
+    assert len(factory.queries) == 1
+
+    factory.queries.clear()
+    request = _request(session)
+    async with factory() as db:
+        user = await get_current_user_async(request, db)
+        header = await build_header_context_async(db, user, request)
+        consultant = await require_specialist_mode_async(request, db, user)
+    assert header == {"header_consultant_name": "Anna K", "header_account_display": "anna@example.com"}
+    assert consultant.first_name == "Anna"
+    assert len(factory.queries) == 1  # only the Consultant row the route needs, by primary key
+
+
+@pytest.mark.asyncio
+async def test_writes_and_session_invalidation_drop_the_snapshot(factory):
+    session = {"user_id": 1, "session_version": 0}
+    async with factory() as db:
+        await get_current_user_async(_request(session), db)
+        consultant = (await db.execute(select(Consultant))).scalar_one()
+        consultant.first_name = "Hanna"
+        await db.commit()
+    request = _request(session)
+    async with factory() as db:
+        user = await get_current_user_async(request, db)
+        header = await build_header_context_async(db, user, request)
+    assert header["header_consultant_name"] == "Hanna K"
+
+    async with factory() as db:
+        await invalidate_user_sessions_async(db, 1)
+        assert await get_current_user_async(_request(session), db) is None  # old cookie is out at once
+        assert await get_current_user_async(_request({**session, "session_version": 1}), db) is not None
+
+
+@pytest.mark.asyncio
+async def test_mode_switch_drops_the_snapshot(factory):
+    session = {"user_id": 1, "session_version": 0, "active_mode": MODE_SPECIALIST}
+    async with factory() as db:
+        await get_current_user_async(_request(session), db)
+    assert AUTH_SNAPSHOT_CACHE.get("1") is not None
+    set_active_mode(_request(session), MODE_SPECIALIST, has_consultant=True)
+    assert AUTH_SNAPSHOT_CACHE.get("1") is not None  # unchanged mode keeps it
+    set_active_mode(_request(session), MODE_CLIENT, has_consultant=True)
+    assert AUTH_SNAPSHOT_CACHE.get("1") is None
+
+
+@pytest.mark.asyncio
+async def test_primary_email_change_through_bulk_update_drops_the_snapshot(factory):
+    from app.services.email_verification import ensure_email_address_async
+
+    session = {"user_id": 1, "session_version": 0}
+    async with factory() as db:
+        await get_current_user_async(_request(session), db)
+        user = await db.get(User, 1)
+        await ensure_email_address_async(db, user, "new@example.com", verified=True)
+        await db.commit()
+    request = _request(session)
+    async with factory() as db:
+        await get_current_user_async(request, db)
+    assert request.state._auth_snapshot["primary_email"] == "new@example.com"
+
+
+@pytest.mark.asyncio
+async def test_without_shared_cache_every_request_rechecks_the_db(factory, monkeypatch):
+    monkeypatch.setattr(auth_snapshot, "get_redis", lambda: None)
+    session = {"user_id": 1, "session_version": 0}
+    async with factory() as db:
+        assert await get_current_user_async(_request(session), db) is not None
+        assert AUTH_SNAPSHOT_CACHE.get("1") is None
+        user = await db.get(User, 1)
+        user.is_active = False  # e.g. blocked by an admin in another worker
+        await db.commit()
+    async with factory() as db:
+        assert await get_current_user_async(_request(session), db) is None
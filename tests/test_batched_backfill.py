@@ -0,0 +1,116 @@
+"""Batched backfill runner: keyset chunks, per-chunk checkpoint commits, resume, throttle."""
+from __future__ import annotations
+
+from datetime import date, datetime, time
+
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401
+import app.services.batched_backfill as batched
+from app.database import Base
+from app.models import Booking, Calendar, Category, Consultant, SocialAccount, User
+from app.services.app_counters import get_counter
+from app.services.batched_backfill import checkpoint_key, run_batched
+from app.services.dual_role_backfill import backfill_booking_client_user_ids
+from app.services.dual_role_inventory import collect_dual_role_inventory
+
+
+@pytest.fixture()
+def engine(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 'backfill.db'}")
+    Base.metadata.create_all(eng)
+    with sessionmaker(bind=eng)() as db:
+        cat = Category(name_category="General")
+        db.add(cat)
+        db.flush()
+        users = [User(username=f"u{i}", password="x", email=f"u{i}@t.c", date_joined=datetime.now()) for i in range(3)]
+        db.add_all(users)
+        db.flush()
+        c = Consultant(first_name="A", last_name="B", email="c@t.c", category_of_specialist_id=cat.id)
+        db.add(c)
+        db.flush()
+        cal = Calendar(consultant_id=c.id, name="Cal", color="#000")
+        db.add(cal)
+        db.flush()
+        db.add(SocialAccount(provider="telegram", uid="111", user_id=users[0].id, extra_data="{}"))
+        db.add(SocialAccount(provider="telegram", uid="222", user_id=users[1].id, extra_data="{}"))
+        db.add(SocialAccount(provider="telegram", uid="222", user_id=users[2].id, extra_data="{}"))
+        # 10 linkable, 3 ambiguous, 2 unknown
+        tg_ids = [111] * 10 + [222] * 3 + [333] * 2
+        db.add_all([
+            Booking(service_id=1, calendar_id=cal.id, client_name=f"C{i}", client_phone="+7",
+                    booking_date=date(2026, 5, 1), booking_time=time(10, 0), status="pending", telegram_id=tg)
+            for i, tg in enumerate(tg_ids)
+        ])
+        db.commit()
+    yield eng
+    eng.dispose()
+
+
+def test_runner_checkpoints_each_chunk_and_resumes(engine):
+    db = sessionmaker(bind=engine)()
+    seen: list[int] = []
+
+    def failing(rows):
+        if len(seen) >= 8:
+            raise RuntimeError("worker killed")
+        seen.extend(r[0] for r in rows)
+
+    stmt = select(Booking.id)
+    with pytest.raises(RuntimeError):
+        run_batched(db, name="demo", stmt=stmt, id_column=Booking.id, handle_chunk=failing, chunk_size=4, commit=True)
+    db.rollback()
+    assert get_counter(db, checkpoint_key("demo")) == 8  # two committed chunks
+
+    rest: list[int] = []
+    run = run_batched(db, name="demo", stmt=stmt, id_column=Booking.id,
+                      handle_chunk=lambda rows: rest.extend(r[0] for r in rows), chunk_size=4, resume=True, commit=True)
+    assert rest == list(range(9, 16))
+    assert run["resumed_from"] == 8 and run["chunks"] == 2 and run["last_id"] == 15
+    assert get_counter(db, checkpoint_key("demo")) == 15
+    db.close()
+
+
+def test_runner_throttles_and_reports(engine, monkeypatch):
+    sleeps: list[float] = []
+    monkeypatch.setattr(batched.time, "sleep", sleeps.append)
+    progress: list[dict] = []
+    db = sessionmaker(bind=engine)()
+    run = run_batched(db, name="slow", stmt=select(Booking.id), id_column=Booking.id,
+                      handle_chunk=lambda rows: None, chunk_size=5, rows_per_sec=10, limit=12,
+                      progress=progress.append)
+    assert run["rows"] == 12 and run["chunks"] == 3
+    assert [p["rows"] for p in progress] == [5, 10, 12]
+    assert sleeps == pytest.approx([0.5, 1.0, 1.2], abs=0.1)  # paced to rows / rows_per_sec since start
+    assert get_counter(db, checkpoint_key("slow")) == 0  # commit=False never writes a checkpoint
+    db.close()
+
+
+def test_dual_role_backfill_in_chunks(engine):
+    db = sessionmaker(bind=engine)()
+    statements: list[str] = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    dry = backfill_booking_client_user_ids(db, dry_run=True, chunk_size=4)
+    assert (dry["candidates"], dry["updated"], dry["skipped_ambiguous"], dry["skipped_no_user"]) == (15, 10, 3, 2)
+    assert dry["chunks"] == 4
+    social = [s for s in statements if "FROM socialaccount_socialaccount" in s]
+    assert len(social) == 4 and all(" IN (" in s for s in social)  # per-chunk lookup, no full map
+
+    applied = backfill_booking_client_user_ids(db, dry_run=False, chunk_size=4, limit=6)
+    assert applied["updated"] == 6 and get_counter(db, checkpoint_key("dual_role_backfill")) == 6
+    resumed = backfill_booking_client_user_ids(db, dry_run=False, chunk_size=4, resume=True)
+    assert resumed["resumed_from"] == 6 and resumed["updated"] == 4
+    linked = db.execute(select(Booking.client_user_id).where(Booking.client_user_id.isnot(None))).all()
+    assert len(linked) == 10
+
+    data = collect_dual_role_inventory(db, chunk_size=4)
+    assert data["bookings_with_telegram_id"] == 15
+    assert data["bookings_tg_linkable_via_social"] == 13
+    assert data["bookings_with_client_user_id"] == 10
+    db.close()
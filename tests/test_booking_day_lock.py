@@ -0,0 +1,188 @@
+"""Booking commit path: per-day lock row, no double bookings under parallel writers."""
+from __future__ import annotations
+
+import asyncio
+import threading
+from contextlib import nullcontext
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.dialects import mysql
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401
+from app.database import Base
+from app.models import Booking, BookingDayLock, Calendar, Category, Consultant, Service, TimeSlot
+from app.services.booking_locks import _day_bookings_stmt, _lock_statements, lock_booking_day, prune_day_locks
+from app.services.booking_sweeper import sweep_completed_bookings
+from app.services.bookings import create_public_booking, create_specialist_booking_async
+
+DAY = date.today() + timedelta(days=7)
+# 60-minute service: 10:30 overlaps both 10:00 and 11:00, which fit side by side.
+STARTS = ["10:00", "10:30", "11:00", "10:00", "10:30", "11:00", "10:00", "11:00"]
+
+
+@pytest.fixture()
+def db_path(tmp_path, monkeypatch):
+    import app.services.bookings as bookings
+    import app.services.notify_bridge as bridge
+
+    monkeypatch.setattr(bookings, "on_booking_created", lambda *a, **k: None)
+    monkeypatch.setattr(bridge, "schedule_on_booking_created", lambda *a, **k: None)
+    path = tmp_path / "locks.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        cat = Category(name_category="General")
+        db.add(cat)
+        db.flush()
+        consultant = Consultant(first_name="A", last_name="B", email="l@t.c", category_of_specialist_id=cat.id)
+        db.add(consultant)
+        db.flush()
+        cal = Calendar(consultant_id=consultant.id, name="Main", color="#000", is_active=True)
+        db.add(cal)
+        db.flush()
+        db.add(TimeSlot(calendar_id=cal.id, day_of_week=DAY.weekday(), start_time=time(9, 0),
+                        end_time=time(18, 0), is_available=True))
+        db.add(Service(consultant_id=consultant.id, calendar_id=cal.id, name="S",
+                       duration_minutes=60, price=Decimal("100"), is_active=True))
+        db.commit()
+    engine.dispose()
+    yield path
+
+
+def _end(start: str) -> str:
+    return (datetime.strptime(start, "%H:%M") + timedelta(hours=1)).strftime("%H:%M")
+
+
+def _assert_no_overlaps(engine) -> list:
+    with sessionmaker(bind=engine)() as db:
+        rows = db.execute(
+            select(Booking.booking_time, Booking.booking_end_time).where(Booking.booking_date == DAY)
+        ).all()
+    rows.sort()
+    for (_, prev_end), (start, _) in zip(rows, rows[1:]):
+        assert prev_end <= start
+    return rows
+
+
+def test_parallel_public_writers_never_double_book(db_path):
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"timeout": 30})
+    factory = sessionmaker(bind=engine)
+    barrier = threading.Barrier(len(STARTS), timeout=30)
+    results: list[tuple[str, str | None]] = []
+
+    def writer(i: int, start: str) -> None:
+        db = factory()
+        try:
+            cal = db.get(Calendar, 1)
+            _ = cal.consultant  # loaded before the race
+            barrier.wait()
+            booking, err = create_public_booking(
+                db, cal, 1, DAY, start, _end(start), f"Client {i}", f"7900000000{i}", "", "",
+            )
+            results.append((start, err))
+        except Exception as exc:  # e.g. "database is locked": must fail the test, not vanish
+            results.append((start, f"{type(exc).__name__}: {exc}"))
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=writer, args=(i, s)) for i, s in enumerate(STARTS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    try:
+        rows = _assert_no_overlaps(engine)
+        assert len(results) == len(STARTS)
+        assert len([r for r in results if r[1] is None]) == len(rows) >= 1
+        assert all("занято" in err for _, err in results if err), results
+        with sessionmaker(bind=engine)() as db:
+            lock = db.get(BookingDayLock, (1, DAY))
+            assert lock.version == len(rows)  # bumped once per committed booking; rejected writers rolled back
+    finally:
+        engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_parallel_specialist_writers_never_double_book(db_path):
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", connect_args={"timeout": 30})
+    factory = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+    seen: list[str] = []
+
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, *args):
+        seen.append(statement)
+
+    async def writer(i: int, start: str):
+        async with factory() as db:
+            consultant = await db.get(Consultant, 1)
+            booking, err, _ = await create_specialist_booking_async(
+                db, consultant, calendar_id=1, service_id=1, booking_date=DAY,
+                booking_time_str=start, booking_end_time_str=_end(start),
+                client_name=f"Client {i}", force_new_client=True,
+            )
+            if booking is not None:
+                assert booking.service.name == "S" and booking.calendar.id == 1
+            return err
+
+    try:
+        errors = await asyncio.gather(*(writer(i, s) for i, s in enumerate(STARTS)))
+    finally:
+        await async_engine.dispose()
+    engine = create_engine(f"sqlite:///{db_path}")
+    try:
+        rows = _assert_no_overlaps(engine)
+        assert errors.count(None) == len(rows) >= 1
+    finally:
+        engine.dispose()
+    day_reads = [s for s in seen if "FROM bookings" in s]
+    assert day_reads and all("bookings.link_token" not in s for s in day_reads)  # columns only, no re-select
+
+
+def test_lock_statements_and_past_day_prune(db_path):
+    upsert = _lock_statements("mysql", 1, DAY)
+    assert len(upsert) == 1
+    assert "ON DUPLICATE KEY UPDATE" in str(upsert[0].compile(dialect=mysql.dialect()))
+    assert "LOCK IN SHARE MODE" in str(_day_bookings_stmt(1, DAY, None).compile(dialect=mysql.dialect()))
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    try:
+        with sessionmaker(bind=engine)() as db:
+            db.add_all([
+                BookingDayLock(calendar_id=1, booking_date=DAY - timedelta(days=30), version=1),
+                BookingDayLock(calendar_id=1, booking_date=DAY, version=1),
+            ])
+            db.commit()
+            sweep_completed_bookings(db)
+            assert db.query(BookingDayLock).count() == 2  # the booking sweeper leaves locks alone
+            assert db.execute(prune_day_locks(DAY - timedelta(days=1))).rowcount == 1
+            assert [r.booking_date for r in db.query(BookingDayLock).all()] == [DAY]
+    finally:
+        engine.dispose()
+
+
+def test_generic_dialect_retries_update_after_losing_the_insert_race():
+    calls: list[str] = []
+
+    class _Db:
+        def get_bind(self):
+            return SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))
+
+        def begin_nested(self):
+            return nullcontext()
+
+        def execute(self, stmt):
+            kind = stmt.__visit_name__
+            calls.append(kind)
+            if kind == "insert":
+                raise IntegrityError("INSERT booking_day_locks", {}, Exception("duplicate key"))
+            return SimpleNamespace(rowcount=calls.count("update") - 1, all=lambda: [])
+
+    assert lock_booking_day(_Db(), 1, DAY) == []
+    assert calls == ["update", "insert", "update", "select"]
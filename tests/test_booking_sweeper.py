@@ -0,0 +1,128 @@
+"""Booking sweeper: one set-based UPDATE completes ended confirmed bookings."""
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401
+from app.database import Base
+from app.models import Booking, Calendar, Category, Consultant, Service, User
+from app.services.booking_sweeper import sweep_completed_bookings, sweep_completed_bookings_async
+
+TODAY = date(2026, 3, 10)
+NOW = datetime.combine(TODAY, time(12, 0))
+
+
+def _seed(db) -> dict:
+    cat = Category(name_category="General")
+    db.add(cat)
+    db.flush()
+    user = User(username="sw", email="sw@example.com", password="x", is_active=True)
+    db.add(user)
+    db.flush()
+    consultant = Consultant(
+        user_id=user.id, first_name="A", last_name="B", email="sw@example.com",
+        category_of_specialist_id=cat.id,
+    )
+    db.add(consultant)
+    db.flush()
+    cals = []
+    for name in ("Main", "Other"):
+        cal = Calendar(consultant_id=consultant.id, name=name, is_active=True, color="#000")
+        db.add(cal)
+        db.flush()
+        cals.append(cal)
+    svc = Service(
+        consultant_id=consultant.id, calendar_id=cals[0].id, name="S",
+        duration_minutes=60, price=Decimal("100"),
+    )
+    db.add(svc)
+    db.flush()
+    rows = {
+        "past": (cals[0], TODAY - timedelta(days=1), time(9, 0), time(10, 0), "confirmed"),
+        "today_ended": (cals[0], TODAY, time(10, 0), time(11, 0), "confirmed"),
+        "today_running": (cals[0], TODAY, time(11, 30), time(12, 30), "confirmed"),
+        "today_no_end": (cals[0], TODAY, time(11, 0), None, "confirmed"),
+        "later_no_end": (cals[0], TODAY, time(13, 0), None, "confirmed"),
+        "future": (cals[0], TODAY + timedelta(days=1), time(9, 0), time(10, 0), "confirmed"),
+        "past_pending": (cals[0], TODAY - timedelta(days=2), time(9, 0), time(10, 0), "pending"),
+        "past_cancelled": (cals[0], TODAY - timedelta(days=2), time(9, 0), time(10, 0), "cancelled"),
+        "other_cal_past": (cals[1], TODAY - timedelta(days=1), time(9, 0), time(10, 0), "confirmed"),
+    }
+    ids = {}
+    for key, (cal, d, start, end, status) in rows.items():
+        b = Booking(
+            calendar_id=cal.id, service_id=svc.id, client_name=key, client_phone="+7",
+            booking_date=d, booking_time=start, booking_end_time=end, status=status,
+        )
+        db.add(b)
+        db.flush()
+        ids[key] = b.id
+    db.commit()
+    return {"ids": ids, "main": cals[0].id, "other": cals[1].id}
+
+
+def _statuses(db, ids: dict) -> dict:
+    by_id = {b.id: b.status for b in db.execute(select(Booking)).scalars().all()}
+    return {key: by_id[i] for key, i in ids.items()}
+
+
+def test_sweep_completes_only_ended_confirmed(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'sweep.db'}")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        seeded = _seed(db)
+        assert sweep_completed_bookings(db, now=NOW) == 4
+        db.expire_all()
+        st = _statuses(db, seeded["ids"])
+        assert st["past"] == "completed"
+        assert st["today_ended"] == "completed"
+        assert st["today_no_end"] == "completed"
+        assert st["other_cal_past"] == "completed"
+        assert st["today_running"] == "confirmed"
+        assert st["later_no_end"] == "confirmed"
+        assert st["future"] == "confirmed"
+        assert st["past_pending"] == "pending"
+        assert st["past_cancelled"] == "cancelled"
+        assert sweep_completed_bookings(db, now=NOW) == 0
+    finally:
+        db.close()
+        engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_async_sweep_scoped_to_calendar(tmp_path):
+    path = tmp_path / "sweep_async.db"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(sync_engine)
+    with sessionmaker(bind=sync_engine)() as db:
+        seeded = _seed(db)
+    sync_engine.dispose()
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", future=True)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with factory() as db:
+            assert await sweep_completed_bookings_async(db, calendar_id=seeded["other"], now=NOW) == 1
+            rows = (await db.execute(select(Booking.client_name, Booking.status))).all()
+            st = dict(rows)
+            assert st["other_cal_past"] == "completed"
+            assert st["past"] == "confirmed"
+            assert await sweep_completed_bookings_async(db, calendar_id=seeded["main"], now=NOW) == 3
+    finally:
+        await engine.dispose()
+
+
+def test_booking_page_does_not_sweep():
+    import inspect
+
+    from app.routers import pages
+
+    assert "sweep_completed_bookings" not in inspect.getsource(pages)
+    assert "mark_past_bookings_completed" not in inspect.getsource(pages)
@@ -0,0 +1,143 @@
+"""Bookings hub: keyset pages, SQL status filter, aggregate dashboard counters."""
+from __future__ import annotations
+
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.models  # noqa: F401
+from app.database import Base
+from app.models import Booking, Calendar, Category, Consultant, Service, User
+from app.services.bookings_hub import (
+    build_bookings_hub_async,
+    dashboard_stats,
+    dashboard_stats_async,
+    decode_cursor,
+    fetch_bookings_page_async,
+)
+
+TODAY = date(2026, 3, 10)
+NOW = time(12, 0)
+
+
+async def _seed(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'hub.db'}", future=True)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with factory() as db:
+        cat = Category(name_category="General")
+        db.add(cat)
+        await db.flush()
+        user = User(username="hub", email="hub@example.com", password="x", is_active=True)
+        db.add(user)
+        await db.flush()
+        consultant = Consultant(
+            user_id=user.id, first_name="A", last_name="B", email="hub@example.com",
+            category_of_specialist_id=cat.id,
+        )
+        db.add(consultant)
+        await db.flush()
+        cal = Calendar(consultant_id=consultant.id, name="Main", is_active=True, color="#000")
+        db.add(cal)
+        await db.flush()
+        svc = Service(consultant_id=consultant.id, calendar_id=cal.id, name="S", duration_minutes=60, price=Decimal("100"))
+        db.add(svc)
+        await db.flush()
+        statuses = ["pending", "confirmed", "completed", "cancelled"]
+        for day in range(-20, 20):
+            for hour in (9, 15):
+                d = TODAY + timedelta(days=day)
+                status = statuses[(day + hour) % 4]
+                if d > TODAY and status == "completed":
+                    status = "confirmed"
+                db.add(
+                    Booking(
+                        calendar_id=cal.id, service_id=svc.id, client_name=f"c{day}-{hour}",
+                        client_phone="+7", booking_date=d, booking_time=time(hour, 0), status=status,
+                    )
+                )
+        await db.commit()
+    return engine, factory, cal.id
+
+
+async def _walk(db, cal_ids, section, status, limit):
+    seen, cursor, pages = [], None, 0
+    while True:
+        rows, cursor = await fetch_bookings_page_async(
+            db, cal_ids, section, TODAY, NOW, status=status, after=cursor, limit=limit
+        )
+        seen.extend(rows)
+        pages += 1
+        assert len(rows) <= limit
+        if cursor is None:
+            return seen, pages
+
+
+@pytest.mark.asyncio
+async def test_keyset_pages_cover_every_row_once(tmp_path):
+    engine, factory, cal_id = await _seed(tmp_path)
+    async with factory() as db:
+        full, _ = await fetch_bookings_page_async(db, [cal_id], "past", TODAY, NOW, limit=1000)
+        paged, pages = await _walk(db, [cal_id], "past", "all", 7)
+        assert [b.id for b in paged] == [b.id for b in full]
+        assert pages > 3
+        keys = [(b.booking_date, b.booking_time, b.id) for b in paged]
+        assert keys == sorted(keys, reverse=True)
+
+        upcoming, _ = await _walk(db, [cal_id], "upcoming", "all", 5)
+        keys = [(b.booking_date, b.booking_time, b.id) for b in upcoming]
+        assert keys == sorted(keys)
+        assert {b.status for b in upcoming} <= {"pending", "confirmed"}
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_status_filter_runs_in_sql(tmp_path):
+    engine, factory, cal_id = await _seed(tmp_path)
+    async with factory() as db:
+        completed_up, _ = await _walk(db, [cal_id], "upcoming", "completed", 10)
+        assert completed_up == []
+        completed_past, _ = await _walk(db, [cal_id], "past", "completed", 10)
+        assert completed_past and {b.status for b in completed_past} == {"completed"}
+        cancelled, _ = await _walk(db, [cal_id], "upcoming", "cancelled", 10)
+        assert cancelled and {b.status for b in cancelled} == {"cancelled"}
+        assert (await fetch_bookings_page_async(db, [cal_id], "past", TODAY, NOW, status="cancelled"))[0] == []
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_dashboard_aggregate_matches_python_counters(tmp_path):
+    engine, factory, cal_id = await _seed(tmp_path)
+    async with factory() as db:
+        from sqlalchemy import select
+        from sqlalchemy.orm import selectinload
+
+        rows = list(
+            (
+                await db.execute(
+                    select(Booking)
+                    .options(selectinload(Booking.service))
+                    .where(Booking.status.in_(["pending", "confirmed", "completed"]))
+                )
+            ).scalars().all()
+        )
+        assert await dashboard_stats_async(db, [cal_id], TODAY) == dashboard_stats(rows, TODAY)
+
+        hub = await build_bookings_hub_async(db, [cal_id], TODAY, NOW, limit=4)
+        assert sum(len(g["bookings"]) for g in hub["upcoming_groups"]) == 4
+        assert decode_cursor(hub["upcoming_next"]) is not None
+        assert hub["sidebar"]["next_booking"] is not None
+    await engine.dispose()
+
+
+def test_day_groups_partial_renders():
+    from app.templating import templates
+
+    html = templates.get_template("components/booking_day_groups.html").render(
+        groups=[{"date": "2026-03-10", "label": "Сегодня", "bookings": []}], is_past=True, csrf_token="t"
+    )
+    assert 'data-group-date="2026-03-10"' in html
+    assert "bookings-day-group--past" in html
@@ -0,0 +1,127 @@
+"""Normalized contact keys: find_or_create_client_card matches by indexed equality."""
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401
+from app.database import Base
+from app.models import Category, ClientCard, Consultant, User
+from app.services.bookings import find_or_create_client_card, find_or_create_client_card_async
+from app.services.client_contacts import (
+    backfill_contact_keys,
+    email_key,
+    phone_key,
+    telegram_key,
+)
+
+
+def test_key_normalizers():
+    assert phone_key("+7 (900) 123-45-67") == "79001234567"
+    assert phone_key("  ") is None
+    assert email_key("  Ivan@Example.COM ") == "ivan@example.com"
+    assert email_key(None) is None
+    for raw in ("@Ivan_P", "ivan_p", "https://t.me/Ivan_P", "t.me/ivan_p?start=1", "https://t.me/ivan_p/"):
+        assert telegram_key(raw) == "ivan_p"
+    assert telegram_key("@") is None
+
+
+def _seed(db) -> tuple[Consultant, int]:
+    cat = Category(name_category="General")
+    db.add(cat)
+    db.flush()
+    users = [User(username=f"u{i}", email=f"u{i}@example.com", password="x", is_active=True) for i in range(2)]
+    db.add_all(users)
+    db.flush()
+    consultant = Consultant(
+        user_id=users[0].id, first_name="A", last_name="B", email="u0@example.com",
+        category_of_specialist_id=cat.id,
+    )
+    db.add(consultant)
+    db.flush()
+    return consultant, users[1].id
+
+
+def test_find_or_create_matches_normalized_contacts(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'keys.db'}")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        consultant, other_user_id = _seed(db)
+        by_phone = find_or_create_client_card(db, consultant, "Иван", "+7 (900) 123-45-67", "", "")
+        by_email = find_or_create_client_card(db, consultant, "Пётр", "", "Petr@Example.com", "")
+        by_tg = find_or_create_client_card(db, consultant, "Анна", "", "", "https://t.me/Anna_K")
+        db.commit()
+        assert (by_phone.phone_key, by_email.email_key, by_tg.telegram_key) == (
+            "79001234567", "petr@example.com", "anna_k",
+        )
+
+        assert find_or_create_client_card(db, consultant, "", "79001234567", "", "").id == by_phone.id
+        assert find_or_create_client_card(db, consultant, "", "", "petr@example.com", "").id == by_email.id
+        assert find_or_create_client_card(db, consultant, "", "", "", "@anna_k").id == by_tg.id
+        # Equality on the canonical handle: a substring is a different client.
+        assert find_or_create_client_card(db, consultant, "Ann", "", "", "@anna").id != by_tg.id
+
+        # Never merge into a card owned by another auth user.
+        by_phone.client_user_id = other_user_id
+        db.commit()
+        mine = find_or_create_client_card(db, consultant, "Иван", "79001234567", "", "", client_user_id=consultant.user_id)
+        assert mine.id != by_phone.id
+        assert mine.client_user_id == consultant.user_id
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def test_backfill_fills_legacy_rows_without_touching_updated_at(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'backfill.db'}")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        consultant, _ = _seed(db)
+        stamp = datetime(2025, 1, 1, 12, 0)
+        for i in range(7):
+            db.add(ClientCard(
+                consultant_id=consultant.id, name=f"c{i}", phone=f"+7 900 000-00-0{i}",
+                email=f"C{i}@Mail.RU", telegram=f"@Handle{i}", updated_at=stamp,
+            ))
+        db.commit()
+        assert backfill_contact_keys(db, batch=3) == {"scanned": 7, "updated": 7}
+        assert backfill_contact_keys(db, batch=3) == {"scanned": 7, "updated": 0}
+        rows = db.execute(
+            select(ClientCard.phone_key, ClientCard.email_key, ClientCard.telegram_key, ClientCard.updated_at)
+            .order_by(ClientCard.id)
+        ).all()
+        assert rows[3] == ("79000000003", "c3@mail.ru", "handle3", stamp)
+    finally:
+        db.close()
+        engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_async_twin_matches_by_keys(tmp_path):
+    path = tmp_path / "keys_async.db"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(sync_engine)
+    with sessionmaker(bind=sync_engine)() as db:
+        consultant, _ = _seed(db)
+        card = find_or_create_client_card(db, consultant, "Иван", "", "Ivan@Example.com", "")
+        db.commit()
+        consultant_id, card_id = consultant.id, card.id
+    sync_engine.dispose()
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", future=True)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with factory() as db:
+            consultant = await db.get(Consultant, consultant_id)
+            found = await find_or_create_client_card_async(db, consultant, "", "89001112233", "IVAN@example.com", "")
+            await db.commit()
+            assert found.id == card_id
+            assert found.phone_key == "89001112233"
+    finally:
+        await engine.dispose()
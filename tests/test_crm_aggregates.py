@@ -0,0 +1,312 @@
+"""CRM aggregates: per-card booking stats, consultant counter row, paged SQL list."""
+from __future__ import annotations
+
+from contextlib import nullcontext
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.models  # noqa: F401
+from app.database import Base
+from app.models import Booking, Calendar, Category, ClientCard, Consultant, Service, TimeSlot, User
+from app.services.clients_crm import (
+    FILTERS,
+    card_completeness,
+    completeness_sql,
+    crm_dashboard_async,
+    fetch_clients_page_async,
+    serialize_card,
+)
+from app.services.crm_aggregates import (
+    _counter_delta_statements,
+    local_today,
+    read_crm_counter_async,
+    record_card_change,
+    refresh_card_aggregates_async,
+    refresh_crm_counter,
+    refresh_stale_next_bookings_async,
+)
+
+TODAY = local_today()
+
+
+async def _setup(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'crm.db'}", future=True)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with factory() as db:
+        cat = Category(name_category="General")
+        db.add(cat)
+        await db.flush()
+        user = User(username="crm", email="crm@example.com", password="x", is_active=True)
+        db.add(user)
+        await db.flush()
+        consultant = Consultant(
+            user_id=user.id, first_name="A", last_name="B", email="crm@example.com",
+            category_of_specialist_id=cat.id,
+        )
+        db.add(consultant)
+        await db.flush()
+        cal = Calendar(consultant_id=consultant.id, name="Main", is_active=True, color="#000")
+        db.add(cal)
+        await db.flush()
+        svc = Service(
+            consultant_id=consultant.id, calendar_id=cal.id, name="S",
+            duration_minutes=60, price=Decimal("100"), is_active=True,
+        )
+        db.add(svc)
+        await db.commit()
+        ids = {"consultant": consultant.id, "calendar": cal.id, "service": svc.id}
+    return engine, factory, ids
+
+
+def _booking(ids, card_id, day, status="confirmed", hour=10):
+    return Booking(
+        calendar_id=ids["calendar"], service_id=ids["service"], client_card_id=card_id,
+        client_name="c", client_phone="+7", booking_date=day, booking_time=time(hour, 0),
+        booking_end_time=time(hour + 1, 0), status=status,
+    )
+
+
+async def _seed_cards(db, ids, n=40):
+    """Cards spread across every badge: new, vip, regular, inactive, no bookings."""
+    old = datetime.utcnow() - timedelta(days=200)
+    cards = []
+    for i in range(n):
+        created = datetime.utcnow() - timedelta(days=3) if i % 5 == 0 else old
+        card = ClientCard(
+            consultant_id=ids["consultant"],
+            name=f"Client {i:02d}",
+            phone=f"+7900{i:07d}" if i % 2 else None,
+            email=f"c{i}@example.com" if i % 3 else None,
+            notes="vip" if i % 7 == 0 else None,
+            created_at=created,
+            updated_at=created + timedelta(minutes=i),
+        )
+        db.add(card)
+        await db.flush()
+        kind = i % 5
+        if kind == 1:
+            days = [TODAY - timedelta(days=d) for d in (1, 10, 20, 30, 40, 50)]
+        elif kind == 2:
+            days = [TODAY - timedelta(days=5), TODAY + timedelta(days=3)]
+        elif kind == 3:
+            days = [TODAY - timedelta(days=150)]
+        else:
+            days = []
+        for d in days:
+            db.add(_booking(ids, card.id, d))
+        cards.append(card)
+    await db.flush()
+    await refresh_card_aggregates_async(db, [c.id for c in cards])
+    await db.run_sync(refresh_crm_counter, ids["consultant"])
+    await db.commit()
+    return cards
+
+
+@pytest.mark.asyncio
+async def test_card_aggregates_match_bookings_and_keep_updated_at(tmp_path):
+    engine, factory, ids = await _setup(tmp_path)
+    try:
+        async with factory() as db:
+            card = ClientCard(consultant_id=ids["consultant"], name="X")
+            db.add(card)
+            await db.commit()
+            stamp = card.updated_at
+            for d, status in (
+                (TODAY - timedelta(days=9), "completed"),
+                (TODAY + timedelta(days=2), "cancelled"),
+                (TODAY + timedelta(days=4), "pending"),
+                (TODAY + timedelta(days=8), "confirmed"),
+            ):
+                db.add(_booking(ids, card.id, d, status))
+            await refresh_card_aggregates_async(db, [card.id, None])
+            await db.commit()
+            row = (await db.execute(
+                select(ClientCard.booking_count, ClientCard.last_booking_date,
+                       ClientCard.next_booking_date, ClientCard.updated_at)
+                .where(ClientCard.id == card.id)
+            )).one()
+            assert row.booking_count == 4
+            assert row.last_booking_date == TODAY + timedelta(days=8)
+            assert row.next_booking_date == TODAY + timedelta(days=4)
+            assert row.updated_at == stamp
+
+            # The pending visit passes: the sweeper follow-up moves next to the confirmed one.
+            later = TODAY + timedelta(days=5)
+            assert await refresh_stale_next_bookings_async(db, today=later) == 1
+            await db.commit()
+            nxt = (await db.execute(
+                select(ClientCard.next_booking_date).where(ClientCard.id == card.id)
+            )).scalar_one()
+            assert nxt == TODAY + timedelta(days=8)
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_counter_row_and_dashboard(tmp_path):
+    engine, factory, ids = await _setup(tmp_path)
+    try:
+        async with factory() as db:
+            cards = await _seed_cards(db, ids)
+            db.add(_booking(ids, cards[1].id, TODAY, "pending", hour=15))
+            await db.commit()
+
+            sql_pct = dict((await db.execute(select(ClientCard.id, completeness_sql()))).all())
+            assert sql_pct == {c.id: card_completeness(c)["percent"] for c in cards}
+
+            dash = await crm_dashboard_async(db, ids["consultant"], TODAY)
+            assert dash["total"] == len(cards)
+            assert dash["new_count"] == sum(1 for i in range(len(cards)) if i % 5 == 0)
+            assert dash["avg_completeness"] == round(sum(sql_pct.values()) / len(cards))
+            assert dash["today_bookings"] == 1
+            assert dash["upcoming"] == 1 + sum(1 for i in range(len(cards)) if i % 5 == 2)
+
+            from app.services.entity_delete import delete_client_card_async
+
+            ok, _ = await delete_client_card_async(db, cards[0])
+            assert ok
+            dash = await crm_dashboard_async(db, ids["consultant"], TODAY)
+            assert dash["total"] == len(cards) - 1
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_card_writes_apply_deltas_that_match_a_recount(tmp_path):
+    from sqlalchemy.dialects import mysql
+
+    from app.services.bookings import find_or_create_client_card_async
+    from app.services.entity_delete import delete_client_card_async
+
+    (upsert,) = _counter_delta_statements("mysql", 1, "created", 20)
+    compiled = str(upsert.compile(dialect=mysql.dialect()))
+    assert "ON DUPLICATE KEY UPDATE" in compiled and "count(" not in compiled.lower()
+
+    engine, factory, ids = await _setup(tmp_path)
+    try:
+        async with factory() as db:
+            consultant = await db.get(Consultant, ids["consultant"])
+            first = await find_or_create_client_card_async(db, consultant, "Anna", "+79000000001", "", "")
+            await find_or_create_client_card_async(db, consultant, "Boris", "", "b@example.com", "")
+            # Same phone: the existing card gains an email (update, +25 completeness).
+            await find_or_create_client_card_async(db, consultant, "Anna", "+79000000001", "a@example.com", "")
+            await db.commit()
+            counter = await read_crm_counter_async(db, ids["consultant"])
+            assert (counter["cards_total"], counter["completeness_sum"]) == (2, 70 + 45)
+            assert counter["last_card_updated_at"] >= counter["last_card_created_at"]
+
+            ok, _ = await delete_client_card_async(db, first)
+            assert ok
+            stored = await read_crm_counter_async(db, ids["consultant"])
+            await db.run_sync(refresh_crm_counter, ids["consultant"])
+            await db.commit()
+            recount = await read_crm_counter_async(db, ids["consultant"])
+            assert (stored["cards_total"], stored["completeness_sum"]) == (1, 45)
+            assert (recount["cards_total"], recount["completeness_sum"]) == (1, 45)
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_sql_filters_match_python_badges_and_pages_cover_once(tmp_path):
+    engine, factory, ids = await _setup(tmp_path)
+    try:
+        async with factory() as db:
+            await _seed_cards(db, ids)
+            cards = list((await db.execute(select(ClientCard))).scalars().all())
+            badges = {c.id: serialize_card(c, TODAY) for c in cards}
+            expected = {
+                "all": set(badges),
+                "new": {i for i, s in badges.items() if s["badge"] == "new"},
+                "vip": {i for i, s in badges.items() if s["badge"] == "vip"},
+                "archive": {i for i, s in badges.items() if s["badge"] == "inactive"},
+                "active": {i for i, s in badges.items() if s["status"] == "active"},
+            }
+            assert all(expected[f] for f in FILTERS)
+            for flt in FILTERS:
+                for sort in ("recent", "name", "created", "last_visit"):
+                    seen, page = [], 1
+                    while True:
+                        rows, more = await fetch_clients_page_async(
+                            db, ids["consultant"], sort=sort, flt=flt, page=page, limit=7, today=TODAY
+                        )
+                        seen.extend(r.id for r in rows)
+                        if not more:
+                            break
+                        page += 1
+                    assert len(seen) == len(set(seen))
+                    assert set(seen) == expected[flt], (flt, sort)
+
+            rows, _ = await fetch_clients_page_async(db, ids["consultant"], sort="name", limit=3)
+            assert [r.name for r in rows] == ["Client 00", "Client 01", "Client 02"]
+            rows, _ = await fetch_clients_page_async(db, ids["consultant"], q="client 1", limit=50)
+            assert {r.name for r in rows} == {f"Client {i}" for i in range(10, 20)}
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_specialist_booking_and_reschedule_maintain_aggregates(tmp_path, monkeypatch):
+    import app.services.notify_bridge as bridge
+    from app.services.bookings import create_specialist_booking_async, reschedule_booking_async
+
+    monkeypatch.setattr(bridge, "schedule_on_booking_created", lambda *a, **k: None)
+    monkeypatch.setattr(bridge, "schedule_rescheduled", lambda *a, **k: None)
+    engine, factory, ids = await _setup(tmp_path)
+    try:
+        async with factory() as db:
+            for dow in range(7):
+                db.add(TimeSlot(calendar_id=ids["calendar"], day_of_week=dow,
+                                start_time=time(9, 0), end_time=time(18, 0), is_available=True))
+            await db.commit()
+            consultant = await db.get(Consultant, ids["consultant"])
+            day = TODAY + timedelta(days=3)
+            booking, err, _ = await create_specialist_booking_async(
+                db, consultant, calendar_id=ids["calendar"], service_id=ids["service"],
+                booking_date=day, booking_time_str="10:00", booking_end_time_str="11:00",
+                client_name="Иванов Иван", client_phone="+7 900 000 00 01", force_new_client=True,
+            )
+            assert err is None
+            card_id = booking.client_card_id
+            row = (await db.execute(
+                select(ClientCard.booking_count, ClientCard.next_booking_date).where(ClientCard.id == card_id)
+            )).one()
+            assert tuple(row) == (1, day)
+            assert (await crm_dashboard_async(db, ids["consultant"]))["total"] == 1
+
+            assert await reschedule_booking_async(db, booking, day + timedelta(days=2), "12:00") is None
+            nxt = (await db.execute(
+                select(ClientCard.next_booking_date).where(ClientCard.id == card_id)
+            )).scalar_one()
+            assert nxt == day + timedelta(days=2)
+    finally:
+        await engine.dispose()
+
+
+def test_generic_dialect_counter_delta_creates_row_or_retries_update():
+    calls: list[str] = []
+
+    class _Db:
+        def get_bind(self):
+            return SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))
+
+        def begin_nested(self):
+            return nullcontext()
+
+        def execute(self, stmt):
+            kind = stmt.__visit_name__
+            calls.append(kind)
+            if kind == "insert":
+                raise IntegrityError("INSERT consultant_crm_counters", {}, Exception("duplicate key"))
+            return SimpleNamespace(rowcount=calls.count("update") - 1)
+
+    record_card_change(_Db(), 1, "created", 20)
+    assert calls == ["update", "insert", "update"]
@@ -0,0 +1,71 @@
+"""Jinja2 fragment cache extension + bytecode cache wiring."""
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+from jinja2 import DictLoader, Environment
+
+from app.services.fragment_cache import FRAGMENT_CACHE, FragmentCacheExtension
+from app.services.ttl_cache import TtlCache
+
+
+def _env(source: str, cache: TtlCache, version: str = "v1") -> Environment:
+    env = Environment(loader=DictLoader({"page.html": source}), autoescape=True, extensions=[FragmentCacheExtension])
+    env.fragment_cache = cache
+    env.fragment_cache_version = lambda: version
+    return env
+
+
+def test_fragment_rendered_once_then_served_from_cache():
+    cache = TtlCache(default_ttl=60)
+    calls = {"n": 0}
+
+    def expensive():
+        calls["n"] += 1
+        return "<b>copy</b>"
+
+    env = _env('{% cache "sec" %}[{{ expensive() }}]{% endcache %}-{{ who }}', cache)
+    env.globals["expensive"] = expensive
+    tpl = env.get_template("page.html")
+    assert tpl.render(who="a") == "[&lt;b&gt;copy&lt;/b&gt;]-a"
+    assert tpl.render(who="b") == "[&lt;b&gt;copy&lt;/b&gt;]-b"
+    assert calls["n"] == 1
+
+
+def test_fragment_key_varies_by_parts_and_version():
+    cache = TtlCache(default_ttl=60)
+    source = '{% cache ("footer", year), 30 %}{{ year }}{% endcache %}'
+    tpl = _env(source, cache).get_template("page.html")
+    assert tpl.render(year=2026) == "2026"
+    assert tpl.render(year=2027) == "2027"
+    # New content version must not see the old fragment.
+    assert _env(source, cache, version="v2").get_template("page.html").render(year=2028) == "2028"
+
+
+def test_fragment_key_changes_with_template_source():
+    cache = TtlCache(default_ttl=60)
+    old = _env('{% cache "x" %}old{% endcache %}', cache).get_template("page.html")
+    assert old.render() == "old"
+    new = _env('{% cache "x" %}new{% endcache %}', cache).get_template("page.html")
+    assert new.render() == "new"
+
+
+def test_fragment_cache_disabled_renders_body():
+    env = _env('{% cache "x" %}{{ v }}{% endcache %}', None)
+    assert env.get_template("page.html").render(v=1) == "1"
+
+
+def test_landing_pages_use_fragment_cache():
+    from app.main import app
+    from app.services.page_cache import PAGE_CACHE
+    from app.templating import templates
+
+    assert templates.env.fragment_cache is FRAGMENT_CACHE
+    FRAGMENT_CACHE.clear()
+    PAGE_CACHE.clear()
+    client = TestClient(app)
+    first = client.get("/guide/")
+    assert first.status_code == 200
+    assert len(FRAGMENT_CACHE._data) >= 2  # guide body + footer
+    PAGE_CACHE.clear()
+    second = client.get("/guide/")
+    assert second.text == first.text
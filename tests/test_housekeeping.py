@@ -0,0 +1,42 @@
+"""Housekeeping: registered prunes run together in one commit and report deleted rows."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, delete
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401
+from app.database import Base
+from app.models import IdempotencyKey
+from app.services import housekeeping
+
+
+def test_registered_prunes_run_with_utc_now(tmp_path, monkeypatch):
+    monkeypatch.setattr(housekeeping, "_PRUNES", {})
+    now = datetime(2026, 5, 1, 12, 0)
+    seen: list[datetime] = []
+
+    def keys(at: datetime):
+        seen.append(at)
+        return delete(IdempotencyKey).where(IdempotencyKey.expires_at < at)
+
+    housekeeping.register_prune("keys", keys)
+    engine = create_engine(f"sqlite:///{tmp_path / 'hk.db'}")
+    Base.metadata.create_all(engine)
+    try:
+        with sessionmaker(bind=engine)() as db:
+            db.add_all([
+                IdempotencyKey(key="old", scope="s", expires_at=now - timedelta(seconds=1)),
+                IdempotencyKey(key="live", scope="s", expires_at=now + timedelta(hours=1)),
+            ])
+            db.commit()
+            assert housekeeping.prune_expired(db, now=now) == {"keys": 1}
+            assert seen == [now]
+            assert [k.key for k in db.query(IdempotencyKey).all()] == ["live"]
+    finally:
+        engine.dispose()
+
+
+def test_default_registry_covers_the_expiring_tables():
+    assert set(housekeeping._prune_statements(None)) == {"day_locks", "idempotency_keys", "web_sessions"}
@@ -0,0 +1,114 @@
+"""Idempotency keys: one execution per key, stored replay, busy/expired/released claims."""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from starlette.responses import JSONResponse
+
+import app.models  # noqa: F401
+from app.database import Base
+from app.models import IdempotencyKey
+from app.services import idempotency
+
+
+@pytest.fixture()
+async def factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'idem.db'}", connect_args={"timeout": 30})
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+def test_key_from_header_or_form():
+    req = SimpleNamespace(headers={"Idempotency-Key": "abc-123-XYZ"})
+    assert idempotency.request_idempotency_key(req) == "abc-123-XYZ"
+    req = SimpleNamespace(headers={})
+    assert idempotency.request_idempotency_key(req, {"idempotency_key": "f" * 32}) == "f" * 32
+    assert idempotency.request_idempotency_key(req, {"idempotency_key": "bad key!"}) is None
+    assert idempotency.request_idempotency_key(req) is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_run_once_and_replay(factory):
+    runs: list[int] = []
+
+    async def handler(i: int):
+        async with factory() as db:
+            claim = await idempotency.begin(db, "specialist_booking", "u1", "retry-key-0001")
+            if claim.state == "replay":
+                return claim.stored.to_response()
+            assert claim.state == "claimed"
+            runs.append(i)
+            await asyncio.sleep(0.3)  # the booking transaction
+            response = JSONResponse({"ok": True, "booking": {"id": 42}})
+            await claim.store(db, response)
+            return response
+
+    responses = await asyncio.gather(*(handler(i) for i in range(5)))
+    assert len(runs) == 1
+    assert {r.body for r in responses} == {b'{"ok":true,"booking":{"id":42}}'}
+    assert sum(r.headers.get("Idempotent-Replayed") == "true" for r in responses) == 4
+
+    async with factory() as db:
+        seen: list[str] = []
+
+        @event.listens_for(db.bind.sync_engine, "before_cursor_execute")
+        def _record(conn, cursor, statement, *args):
+            seen.append(statement)
+
+        claim = await idempotency.begin(db, "specialist_booking", "u1", "retry-key-0001")
+        assert claim.state == "replay" and claim.stored.status_code == 200
+        assert seen and not any("bookings" in s for s in seen)
+        # Same key from another user or endpoint is a different claim.
+        assert (await idempotency.begin(db, "specialist_booking", "u2", "retry-key-0001")).state == "claimed"
+        assert (await idempotency.begin(db, "public_booking:1", "u1", "retry-key-0001")).state == "claimed"
+
+
+@pytest.mark.asyncio
+async def test_release_busy_and_takeover(factory, monkeypatch):
+    monkeypatch.setattr(idempotency, "WAIT_SEC", 0.3)
+    async with factory() as db:
+        first = await idempotency.begin(db, "s", "u1", "key-00000001")
+        assert first.state == "claimed"
+        assert (await idempotency.begin(db, "s", "u1", "key-00000001")).state == "busy"
+
+        await first.release(db)  # failed attempt: the retry runs for real
+        retry = await idempotency.begin(db, "s", "u1", "key-00000001")
+        assert retry.state == "claimed"
+
+        # Abandoned pending claim (crashed worker) is taken over after the lease.
+        await db.execute(
+            update(IdempotencyKey).values(created_at=datetime.utcnow() - timedelta(seconds=idempotency.LEASE_SEC + 1))
+        )
+        await db.commit()
+        assert (await idempotency.begin(db, "s", "u1", "key-00000001")).state == "claimed"
+
+        # Expired stored response is replaced, not replayed.
+        await retry.store(db, JSONResponse({"ok": True}))
+        await db.execute(update(IdempotencyKey).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+        await db.commit()
+        assert (await idempotency.begin(db, "s", "u1", "key-00000001")).state == "claimed"
+
+        assert (await idempotency.begin(db, "s", "u1", None)).state == "off"
+        await db.execute(idempotency.prune_idempotency_keys(datetime.utcnow() + timedelta(days=30)))
+        await db.commit()
+        assert (await db.get(IdempotencyKey, first.digest)) is None
+
+
+@pytest.mark.asyncio
+async def test_raising_attempt_releases_key_without_committing_its_writes(factory):
+    async with factory() as db:
+        claim = await idempotency.begin(db, "s", "u1", "key-00000002")
+        with pytest.raises(RuntimeError):
+            async with claim.releasing(db):
+                db.add(IdempotencyKey(key="half-done", scope="s", expires_at=datetime.utcnow()))
+                await db.flush()
+                raise RuntimeError("booking failed")
+        assert (await db.get(IdempotencyKey, "half-done")) is None
+        assert (await idempotency.begin(db, "s", "u1", "key-00000002")).state == "claimed"
@@ -0,0 +1,34 @@
+"""Worker cold-start: import budget for app.main + lazy heavy integrations."""
+from __future__ import annotations
+
+from app.config import get_settings
+from app.services.import_profile import HEAVY_OPTIONAL_MODULES, parse_importtime, run_import_profile
+
+
+def test_parse_importtime_rows():
+    stderr = "\n".join(
+        [
+            "import time: self [us] | cumulative | imported package",
+            "import time:       120 |        120 |   zipimport",
+            "import time:      3000 |       5000 |     app.templating",
+            "import time:      1000 |      90000 | app.main",
+            "unrelated noise",
+        ]
+    )
+    rows = parse_importtime(stderr)
+    assert [r["module"] for r in rows] == ["zipimport", "app.templating", "app.main"]
+    assert rows[-1]["cumulative_us"] == 90000
+    assert rows[0]["depth"] == 1
+    assert rows[-1]["depth"] == 0
+
+
+def test_cold_import_app_main_within_budget():
+    data = run_import_profile("app.main", top_n=10)
+    assert data["error"] is None, data["error"]
+    # Deterministic guard: integrations stay lazy no matter how fast the machine is.
+    assert data["heavy_loaded"] == [], f"eager heavy imports: {data['heavy_loaded']}"
+    assert data["total_ms"] <= get_settings().import_budget_ms, data["top_direct"]
+
+
+def test_heavy_module_list_covers_integrations():
+    assert {"aiogram", "googleapiclient", "PIL", "cryptography"} <= set(HEAVY_OPTIONAL_MODULES)
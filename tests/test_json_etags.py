@@ -0,0 +1,160 @@
+"""Conditional GET (ETag / 304) for cabinet JSON payloads."""
+from __future__ import annotations
+
+import json
+from datetime import time
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from starlette.requests import Request
+
+import app.models  # noqa: F401
+from app.database import Base
+from app.models import Calendar, Category, Consultant, EmailAddress, Service, TimeSlot, User
+from app.services.calendar_schedule import schedule_version_stmt
+from app.services.profile_hub import profile_version_stmt
+from app.services.response_cache import (
+    catalog_key,
+    invalidate_calendar,
+    data_version_async,
+    invalidate_profile,
+    profile_key,
+    schedule_key,
+    version_key,
+    versioned_json,
+)
+from app.services.services_catalog import catalog_version_stmt
+from app.services.ttl_cache import CACHE
+
+
+def setup_function():
+    CACHE.clear()
+
+
+def _request(etag: str | None = None) -> Request:
+    headers = [(b"if-none-match", etag.encode())] if etag else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+@pytest.fixture()
+async def factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'etags.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as db:
+        db.add_all(
+            [
+                Service(consultant_id=4, name="S1", is_active=True),
+                Calendar(id=77, consultant_id=4, name="Main", is_active=True, color="#000"),
+                TimeSlot(calendar_id=77, day_of_week=0, start_time=time(9), end_time=time(10)),
+            ]
+        )
+        await db.commit()
+    yield factory
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_catalog_etag_is_shared_across_workers_and_follows_data(factory):
+    calls = {"n": 0}
+
+    async def build():
+        calls["n"] += 1
+        return {"services": calls["n"]}
+
+    async def get(etag=None):
+        async with factory() as db:
+            return await versioned_json(_request(etag), db, catalog_key(4), catalog_version_stmt(4), build)
+
+    r1 = await get()
+    etag = r1.headers["etag"]
+    assert r1.status_code == 200 and r1.headers["cache-control"] == "private, no-cache"
+
+    CACHE.clear()  # another worker: no shared token, same rows -> same ETag
+    r2 = await get(etag)
+    assert r2.status_code == 304 and r2.headers["etag"] == etag
+    assert calls["n"] == 1
+
+    async with factory() as db:
+        db.add(Service(consultant_id=4, name="S2", is_active=True))
+        await db.commit()
+    r3 = await get(etag)
+    assert r3.status_code == 200 and r3.headers["etag"] != etag
+    assert calls["n"] == 2
+
+    async with factory() as db:  # other consultants' rows do not touch this ETag
+        db.add(Service(consultant_id=5, name="X", is_active=True))
+        await db.commit()
+    assert (await get(r3.headers["etag"])).status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_schedule_change_drops_payload_cached_from_older_rows(factory):
+    async def build():
+        return CACHE.get(schedule_key(77)) or {"week": "fresh"}
+
+    async def get(etag=None):
+        async with factory() as db:
+            return await versioned_json(_request(etag), db, schedule_key(77), schedule_version_stmt(77), build)
+
+    etag = (await get()).headers["etag"]
+    CACHE.set(schedule_key(77), {"week": "cached"})
+    assert json.loads((await get()).body) == {"week": "cached"}  # same rows: cached copy is current
+
+    async with factory() as db:  # slot edit handled elsewhere: no invalidation reached this worker
+        slot = await db.get(TimeSlot, 1)
+        slot.end_time = time(11)
+        await db.commit()
+    response = await get(etag)
+    assert response.status_code == 200 and response.headers["etag"] != etag
+    assert json.loads(response.body) == {"week": "fresh"}
+
+
+def test_invalidators_drop_payload_and_version():
+    for key in (schedule_key(3), profile_key(9, 1), profile_key(9, 2)):
+        CACHE.set(key, {"x": 1})
+        CACHE.set(version_key(key), "v")
+    invalidate_calendar(3)
+    assert CACHE.get(schedule_key(3)) is None and CACHE.get(version_key(schedule_key(3))) is None
+    assert CACHE.get(profile_key(9, 1)) is not None
+
+    invalidate_profile(9, 1)
+    assert CACHE.get(profile_key(9, 1)) is None
+    assert CACHE.get(profile_key(9, 2)) is not None
+
+    invalidate_profile(9)
+    assert CACHE.get(profile_key(9, 2)) is None
+
+
+@pytest.mark.asyncio
+async def test_profile_version_follows_same_length_email_and_category_edits(factory):
+    async with factory() as db:
+        cat = Category(name_category="Coach")
+        user = User(username="anna", email="", password="x", is_active=True, first_name="", last_name="")
+        db.add_all([cat, user])
+        await db.flush()
+        consultant = Consultant(
+            user_id=user.id, first_name="A", last_name="K", email="", category_of_specialist_id=cat.id
+        )
+        db.add_all([consultant, EmailAddress(email="a1@example.com", primary=True, verified=True, user_id=user.id)])
+        await db.commit()
+        ids = (consultant.id, user.id)
+
+    async def version():
+        async with factory() as db:
+            return await data_version_async(db, profile_version_stmt(*ids))
+
+    v1 = await version()
+    assert await version() == v1
+    async with factory() as db:
+        email = (await db.execute(select(EmailAddress))).scalar_one()
+        email.email = "a2@example.com"  # same length as before
+        await db.commit()
+    v2 = await version()
+    assert v2 != v1
+    async with factory() as db:
+        (await db.get(Category, cat.id)).name_category = "Mentor"
+        await db.commit()
+    assert await version() != v2
@@ -0,0 +1,167 @@
+"""Landing counters: app_counters rows kept by buffered commit deltas, reconcile, TTL cache, no COUNT on bookings."""
+from __future__ import annotations
+
+from datetime import date, time
+
+import pytest
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401
+from app.database import Base
+from app.models import Booking, Calendar, Category, Consultant, Service
+from app.services.app_counters import get_counter
+from app.services.landing_stats import (
+    MIN_DISPLAY,
+    STATS_CACHE,
+    landing_stats,
+    landing_stats_async,
+    reconcile_landing_counters,
+)
+from app.services.write_buffer import flush_pending_writes
+
+
+@pytest.fixture()
+def db_path(tmp_path):
+    STATS_CACHE.clear()
+    path = tmp_path / "landing.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    yield path
+    STATS_CACHE.clear()
+
+
+def _seed_calendar(db):
+    cat = Category(name_category="General")
+    db.add(cat)
+    db.flush()
+    c = Consultant(first_name="A", last_name="B", email="a@t.c", category_of_specialist_id=cat.id)
+    db.add(c)
+    db.flush()
+    cal = Calendar(consultant_id=c.id, name="Main", color="#000", is_active=True)
+    db.add(cal)
+    db.flush()
+    svc = Service(consultant_id=c.id, calendar_id=cal.id, name="S", duration_minutes=60, price=1)
+    db.add(svc)
+    db.commit()
+    return cal, svc
+
+
+def _booking(cal, svc, i=0):
+    return Booking(
+        calendar_id=cal.id, service_id=svc.id, client_name=f"C{i}", client_phone="+7",
+        booking_date=date(2026, 5, 1), booking_time=time(10, 0), status="pending",
+    )
+
+
+def _bookings_statements(engine) -> list[str]:
+    seen: list[str] = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, *args):
+        if "FROM bookings" in statement:
+            seen.append(statement)
+
+    return seen
+
+
+def test_hooks_keep_counters_and_cache_hides_bookings(db_path):
+    engine = create_engine(f"sqlite:///{db_path}")
+    db = sessionmaker(bind=engine)()
+    try:
+        cal, svc = _seed_calendar(db)
+        first = landing_stats(db)  # seeds the counter rows once
+        assert first["calendars_real"] == 1 and first["bookings_real"] == 0
+        assert first["bookings"] == MIN_DISPLAY["bookings"]
+
+        db.add_all([_booking(cal, svc, i) for i in range(3)])
+        db.commit()
+        assert get_counter(db, "landing_bookings_total") == 0  # not inside the booking transaction
+        flush_pending_writes()
+        assert get_counter(db, "landing_bookings_total") == 3
+        db.delete(db.query(Booking).first())
+        db.commit()
+        flush_pending_writes()
+        assert get_counter(db, "landing_bookings_total") == 2
+
+        db.add(_booking(cal, svc, 9))
+        db.flush()
+        db.rollback()
+        db.commit()
+        flush_pending_writes()
+        assert get_counter(db, "landing_bookings_total") == 2
+
+        seen = _bookings_statements(engine)
+        assert landing_stats(db)["bookings_real"] == 0  # still the cached snapshot
+        STATS_CACHE.clear()
+        assert landing_stats(db)["bookings_real"] == 2
+        assert seen == []
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def test_first_read_seeds_rows_without_committing_the_request_session(db_path):
+    engine = create_engine(f"sqlite:///{db_path}")
+    db = sessionmaker(bind=engine, autoflush=False)()
+    try:
+        cal, svc = _seed_calendar(db)
+        db.add(_booking(cal, svc))
+        assert landing_stats(db)["calendars_real"] == 1  # rows seeded in a session of their own
+        db.rollback()
+        assert db.query(Booking).count() == 0
+        assert get_counter(db, "landing_calendars_total") == 1
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def test_reconcile_fixes_drift_from_bulk_writes(db_path):
+    engine = create_engine(f"sqlite:///{db_path}")
+    db = sessionmaker(bind=engine)()
+    try:
+        cal, svc = _seed_calendar(db)
+        reconcile_landing_counters(db)
+        db.execute(insert(Booking), [
+            {"calendar_id": cal.id, "service_id": svc.id, "client_name": "Bulk", "client_phone": "+7",
+             "booking_date": date(2026, 5, 2), "booking_time": time(11, 0), "status": "pending"}
+            for _ in range(200)
+        ])
+        db.commit()
+        assert get_counter(db, "landing_bookings_total") == 0
+        assert reconcile_landing_counters(db) == {"bookings": 200, "specialists": 1, "calendars": 1}
+        stats = landing_stats(db)
+        assert stats["bookings"] == 200 and stats["specialists"] == MIN_DISPLAY["specialists"]
+    finally:
+        db.close()
+        engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_async_reads_counters(db_path):
+    engine = create_engine(f"sqlite:///{db_path}")
+    with sessionmaker(bind=engine)() as db:
+        cal, svc = _seed_calendar(db)
+        db.add(_booking(cal, svc))
+        db.commit()
+        ids = (cal.id, svc.id)
+    engine.dispose()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", future=True)
+    factory = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with factory() as adb:
+            stats = await landing_stats_async(adb)  # missing rows seeded on first read
+            assert stats["bookings_real"] == 1 and stats["calendars_real"] == 1
+            adb.add(Booking(
+                calendar_id=ids[0], service_id=ids[1], client_name="Async", client_phone="+7",
+                booking_date=date(2026, 5, 3), booking_time=time(12, 0), status="pending",
+            ))
+            await adb.commit()
+            flush_pending_writes()
+            STATS_CACHE.clear()
+            assert (await landing_stats_async(adb))["bookings_real"] == 2
+    finally:
+        await async_engine.dispose()
@@ -0,0 +1,86 @@
+"""Anonymous full-page cache: ETag / 304 / bypass / invalidation."""
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from app.services.page_cache import (
+    PAGE_CACHE,
+    etag_matches,
+    make_etag,
+    specialist_page_key,
+)
+from app.services.response_cache import invalidate_consultant, invalidate_profile
+
+
+def setup_function():
+    PAGE_CACHE.clear()
+
+
+def _req(if_none_match: str | None):
+    headers = {"if-none-match": if_none_match} if if_none_match is not None else {}
+    return SimpleNamespace(headers=headers)
+
+
+def test_etag_matching_rules():
+    etag = make_etag(b"<html></html>")
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag_matches(_req(etag), etag)
+    assert etag_matches(_req(f'"other", W/{etag}'), etag)
+    assert etag_matches(_req("*"), etag)
+    assert not etag_matches(_req('"nope"'), etag)
+    assert not etag_matches(_req(None), etag)
+
+
+def test_guest_page_served_from_cache_with_304():
+    from app.main import app
+
+    client = TestClient(app)
+    first = client.get("/terms/")
+    assert first.status_code == 200
+    assert first.headers["x-page-cache"] == "miss"
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"].startswith("public")
+    assert "Cookie" in first.headers["vary"]
+
+    second = TestClient(app).get("/terms/")
+    assert second.headers["x-page-cache"] == "hit"
+    assert second.headers["etag"] == etag
+    assert second.text == first.text
+
+    revalidate = TestClient(app).get("/terms/", headers={"If-None-Match": etag})
+    assert revalidate.status_code == 304
+    assert revalidate.content == b""
+    assert revalidate.headers["etag"] == etag
+
+
+def test_sitemap_has_etag():
+    from app.main import app
+
+    r = TestClient(app).get("/sitemap.xml")
+    assert r.status_code == 200
+    assert r.headers["etag"]
+    assert "application/xml" in r.headers["content-type"]
+
+
+def test_session_user_bypasses_cache(monkeypatch):
+    from app.main import app
+
+    monkeypatch.setattr("app.services.page_cache.get_session_user_id", lambda request: 7)
+    r = TestClient(app).get("/apps/")
+    assert "etag" not in r.headers
+    assert r.headers["cache-control"] == "no-store"
+    assert PAGE_CACHE.get("page:/apps/:") is None
+
+
+def test_specialist_pages_invalidated_by_profile_and_catalog_changes():
+    PAGE_CACHE.set(specialist_page_key(5, "slug:a"), {"body": "x", "media_type": "text/html", "etag": '"1"'})
+    PAGE_CACHE.set(specialist_page_key(6, "other:a"), {"body": "y", "media_type": "text/html", "etag": '"2"'})
+    invalidate_profile(5, 1)
+    assert PAGE_CACHE.get(specialist_page_key(5, "slug:a")) is None
+    assert PAGE_CACHE.get(specialist_page_key(6, "other:a")) is not None
+
+    PAGE_CACHE.set(specialist_page_key(5, "slug:b"), {"body": "z", "media_type": "text/html", "etag": '"3"'})
+    invalidate_consultant(5)
+    assert PAGE_CACHE.get(specialist_page_key(5, "slug:b")) is None
@@ -25,6 +25,7 @@ from app.services.bookings import find_or_create_client_card, reschedule_booking
 from app.services.dual_role_inventory import collect_dual_role_inventory
 from app.services.integration_telegram import claim_integration_telegram_chat, clear_integration_telegram_chat
 from app.services.telegram import format_booking_rescheduled_client
+from app.services.write_buffer import flush_pending_writes
 
 
 def _session():
@@ -239,6 +240,7 @@ def test_inventory_dual_and_dedup_counter():
     db.commit()
     record_notify_dedup_hit(db)
     db.commit()
+    flush_pending_writes()
 
     data = collect_dual_role_inventory(db)
     assert data["dual_users_count"] >= 1
@@ -0,0 +1,156 @@
+"""Platform backups: online SQLite copy, streamed compressed mysqldump, checksums, rotation, job state."""
+from __future__ import annotations
+
+import gzip
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+import pytest
+
+import app.services.platform_backup as platform_backup
+from app.services.platform_backup import (
+    BackupError,
+    backups_dir,
+    is_backup_file,
+    move_legacy_backups,
+    read_backup_job,
+    rotate_backups,
+    run_backup,
+    sqlite_backup,
+    start_backup_job,
+    verify_backup,
+)
+
+
+def _settings(base, **overrides):
+    class FakeSettings:
+        base_dir = base
+        database_url = f"sqlite:///{base / 'data.db'}"
+        db_name = None
+        db_host = "localhost"
+        db_port = "3306"
+        db_user = "u"
+        db_password = "secret"
+        backup_keep = 10
+        backup_compression = "gzip"
+
+    for key, value in overrides.items():
+        setattr(FakeSettings, key, value)
+    return FakeSettings()
+
+
+def _make_db(path, rows: int = 2000) -> None:
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, payload TEXT)")
+        conn.executemany("INSERT INTO t (payload) VALUES (?)", [("x" * 200,)] * rows)
+    conn.close()
+
+
+def test_sqlite_online_backup_is_consistent_under_writes(tmp_path):
+    src = tmp_path / "data.db"
+    _make_db(src)
+    stop = threading.Event()
+
+    def writer():
+        conn = sqlite3.connect(src, timeout=30)
+        while not stop.is_set():
+            conn.execute("INSERT INTO t (payload) VALUES (?)", ("y" * 200,))
+            conn.commit()
+        conn.close()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    steps = []
+    try:
+        sqlite_backup(src, tmp_path / "copy.db", pages=8, progress=lambda done, total, unit: steps.append(done))
+    finally:
+        stop.set()
+        thread.join()
+    assert len(steps) > 1  # copied in page batches
+    with sqlite3.connect(tmp_path / "copy.db") as conn:
+        assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+        assert conn.execute("SELECT count(*) FROM t").fetchone()[0] >= 2000
+    conn.close()
+
+    (tmp_path / "junk.db").write_bytes(b"not a database")
+    with pytest.raises(BackupError):
+        sqlite_backup(tmp_path / "junk.db", tmp_path / "junk_copy.db")
+    assert not list(tmp_path.glob("junk_copy.db*"))
+
+
+def test_mysql_dump_is_streamed_compressed_and_checksummed(tmp_path, monkeypatch):
+    dump = "".join(f"INSERT INTO t VALUES ({i});\n" for i in range(50000))
+    script = "import sys\nfor i in range(50000): sys.stdout.write(f'INSERT INTO t VALUES ({i});\\n')"
+    monkeypatch.setattr(platform_backup, "_mysqldump_cmd", lambda s: [sys.executable, "-c", script])
+    monkeypatch.setattr(platform_backup, "STREAM_CHUNK", 64 * 1024)
+    s = _settings(tmp_path, database_url="mysql+pymysql://u@localhost/app", db_name="app")
+
+    result = run_backup(s)
+    path = tmp_path / result["path"]
+    assert path.name.endswith(".sql.gz") and is_backup_file(path)
+    assert gzip.decompress(path.read_bytes()).decode() == dump
+    assert verify_backup(path) == (True, f"{path.name}: sha256 OK")
+
+    data = path.read_bytes()
+    path.write_bytes(data[:100] + bytes([data[100] ^ 0xFF]) + data[101:])
+    assert verify_backup(path)[0] is False
+
+    monkeypatch.setattr(platform_backup, "_mysqldump_cmd", lambda s: [
+        sys.executable, "-c", "import sys; sys.stdout.write('partial'); sys.stderr.write('Access denied'); sys.exit(2)",
+    ])
+    with pytest.raises(BackupError, match="Access denied"):
+        run_backup(s)
+    assert [p.name for p in (tmp_path / "var" / "backups").iterdir() if p.name.endswith(".part")] == []
+
+
+def test_rotation_and_background_job(tmp_path):
+    _make_db(tmp_path / "data.db", rows=10)
+    directory = tmp_path / "var" / "backups"
+    directory.mkdir(parents=True)
+    for i in range(4):
+        old = directory / f"data_2026010{i}_000000.db"
+        old.write_bytes(b"old")
+        (directory / f"{old.name}.sha256").write_text("0  x\n")
+        os.utime(old, (1_000_000 + i, 1_000_000 + i))
+    (directory / "notes.txt").write_text("keep me")
+
+    assert rotate_backups(directory, 2) == ["data_20260101_000000.db", "data_20260100_000000.db"]
+    assert not (directory / "data_20260100_000000.db.sha256").exists()
+    assert (directory / "notes.txt").exists()
+
+    s = _settings(tmp_path, backup_keep=2)
+    job, err = start_backup_job(s)
+    assert err is None and job["status"] == "running"
+    deadline = time.time() + 10
+    while (read_backup_job(s) or {}).get("status") == "running" and time.time() < deadline:
+        time.sleep(0.05)
+    state = read_backup_job(s)
+    assert state["status"] == "done" and state["id"] == job["id"]
+    assert verify_backup(tmp_path / state["path"])[0]
+    assert state["removed"] == ["data_20260102_000000.db"]
+    assert not (directory / platform_backup.JOB_LOCK).exists()
+
+    (directory / platform_backup.JOB_LOCK).touch()
+    platform_backup._write_job(directory, {**state, "status": "running", "heartbeat": time.time()})
+    assert start_backup_job(s)[1] == "Backup уже выполняется."
+    platform_backup._write_job(directory, {**state, "status": "running", "heartbeat": 0})
+    assert read_backup_job(s)["status"] == "failed"  # dead worker: no heartbeat
+
+
+def test_backups_stay_out_of_public_media_and_legacy_files_move(tmp_path):
+    s = _settings(tmp_path)
+    assert backups_dir(s) == tmp_path / "var" / "backups"
+
+    legacy = tmp_path / "media" / "backups"
+    legacy.mkdir(parents=True)
+    (legacy / "data_20260101_000000.db").write_bytes(b"db")
+    (legacy / "data_20260101_000000.db.sha256").write_text("0  x\n")
+    (legacy / platform_backup.JOB_FILE).write_text("{}")
+    (legacy / "avatar.png").write_bytes(b"png")
+
+    assert move_legacy_backups(s) == ["data_20260101_000000.db"]
+    assert sorted(p.name for p in legacy.iterdir()) == ["avatar.png"]
+    assert (backups_dir(s) / "data_20260101_000000.db.sha256").is_file()
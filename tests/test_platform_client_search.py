@@ -0,0 +1,121 @@
+"""Platform client search: grouped counts keep the query count independent of page size."""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from datetime import date, datetime, time
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401
+from app.database import Base
+from app.models import Booking, Calendar, Category, ClientCard, Consultant, Service, User
+from app.services.platform_admin_domain import search_platform_clients, search_platform_clients_async
+
+
+def _seed(db, n: int) -> None:
+    """n users with two bookings each, n cards owned by booking-less users, n orphan cards."""
+    cat = Category(name_category="General")
+    db.add(cat)
+    db.flush()
+    c = Consultant(first_name="Ann", last_name="Spec", email="spec@t.c", category_of_specialist_id=cat.id)
+    db.add(c)
+    db.flush()
+    cal = Calendar(consultant_id=c.id, name="Main", color="#000", is_active=True)
+    db.add(cal)
+    db.flush()
+    svc = Service(consultant_id=c.id, calendar_id=cal.id, name="S", duration_minutes=60, price=100)
+    db.add(svc)
+    db.flush()
+    for i in range(n):
+        booker = User(username=f"b{i}", password="x", email=f"b{i}@t.c", date_joined=datetime.now())
+        owner = User(username=f"o{i}", password="x", email=f"o{i}@t.c", date_joined=datetime.now())
+        db.add_all([booker, owner])
+        db.flush()
+        card = ClientCard(consultant_id=c.id, name=f"Booker {i}", client_user_id=booker.id)
+        db.add_all([
+            card,
+            ClientCard(consultant_id=c.id, name=f"Owned {i}", client_user_id=owner.id),
+            ClientCard(consultant_id=c.id, name=f"Orphan {i}", phone=f"+7{i}"),
+        ])
+        db.flush()
+        for hour in (10, 12):
+            db.add(Booking(
+                service_id=svc.id, calendar_id=cal.id, client_card_id=card.id, client_user_id=booker.id,
+                client_name="x", client_phone="+7", booking_date=date.today(),
+                booking_time=time(hour, 0), status="pending",
+            ))
+    db.commit()
+
+
+@contextmanager
+def _count_queries(engine):
+    statements: list[str] = []
+
+    def _on_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _on_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _on_execute)
+
+
+def _sync_count(tmp_path, n: int) -> tuple[int, list[dict]]:
+    engine = create_engine(f"sqlite:///{tmp_path / f'sync_{n}.db'}")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        _seed(db, n)
+        db.expunge_all()
+        with _count_queries(engine) as statements:
+            rows = search_platform_clients(db, "", limit=3 * n)
+        return len(statements), rows
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def test_query_count_constant_and_counts_correct(tmp_path):
+    small, small_rows = _sync_count(tmp_path, 2)
+    large, rows = _sync_count(tmp_path, 20)
+    assert small == large
+    assert len(small_rows) == 6 and len(rows) == 60
+
+    bookers = [r for r in rows if (r["user"] and r["user"].username.startswith("b"))]
+    owners = [r for r in rows if (r["user"] and r["user"].username.startswith("o"))]
+    orphans = [r for r in rows if r["key"].startswith("card-")]
+    assert len(bookers) == len(owners) == len(orphans) == 20
+    assert all(r["cards_count"] == 1 and r["bookings_count"] == 2 for r in bookers)
+    assert all(r["cards_count"] == 1 and r["bookings_count"] == 0 for r in owners)
+    assert all(r["name"].startswith("Owned") for r in owners)
+    assert all(r["bookings_count"] == 0 and r["consultant"] is not None for r in orphans)
+    assert len({r["key"] for r in rows}) == len(rows)
+
+
+@pytest.mark.asyncio
+async def test_async_twin_matches_sync_with_constant_queries(tmp_path):
+    counts = []
+    for n in (2, 15):
+        path = tmp_path / f"async_{n}.db"
+        sync_engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(sync_engine)
+        with sessionmaker(bind=sync_engine)() as db:
+            _seed(db, n)
+            expected = [(r["key"], r["cards_count"], r["bookings_count"]) for r in search_platform_clients(db, "", limit=3 * n)]
+        sync_engine.dispose()
+
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}", future=True)
+        factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        try:
+            async with factory() as db:
+                with _count_queries(engine.sync_engine) as statements:
+                    rows = await search_platform_clients_async(db, "", limit=3 * n)
+                counts.append(len(statements))
+                assert [(r["key"], r["cards_count"], r["bookings_count"]) for r in rows] == expected
+        finally:
+            await engine.dispose()
+    assert counts[0] == counts[1]
@@ -0,0 +1,117 @@
+"""DB pool metrics (checkouts, saturation, checkout time, invalidations) and budget-based sizing."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.config import get_settings
+from app.database import pooled_engines
+from app.services.pool_metrics import instrument_engine, plan_pool_size, pool_snapshot, timed_pool_class
+
+
+class _Settings:
+    db_pool_size = 5
+    db_max_overflow = 10
+    db_connection_budget = 0
+    web_workers = 1
+    database_url = "mysql+pymysql://u:p@db/app"
+    async_database_url = "mysql+asyncmy://u:p@db/app"
+    db_read_url = ""
+
+
+def test_plan_sizes_pools_from_budget(caplog):
+    s = _Settings()
+    assert pooled_engines(s) == ["primary", "primary_async"]  # the async URL's sync twin is the primary
+    assert plan_pool_size(s, engines=2)["source"] == "static"
+    assert plan_pool_size(s, engines=2)["max_connections"] == 30
+
+    s.db_connection_budget, s.web_workers = 100, 4
+    plan = plan_pool_size(s, engines=2)
+    assert (plan["pool_size"], plan["max_overflow"]) == (8, 4)
+    assert plan["max_connections"] == 96 <= 100
+    assert pool_snapshot()["plan"] == plan
+
+    s.db_read_url = "mysql+pymysql://ro:p@replica/app"  # replica pair: the budget is split four ways
+    plan = plan_pool_size(s, engines=len(pooled_engines(s)))
+    assert (plan["engines_per_worker"], plan["pool_size"], plan["max_overflow"]) == (4, 4, 2)
+    assert plan["max_connections"] == 96 <= 100
+
+    s.db_connection_budget = 3
+    with caplog.at_level(logging.WARNING, logger="app.services.pool_metrics"):
+        plan = plan_pool_size(s, engines=2)
+    assert (plan["pool_size"], plan["max_overflow"]) == (1, 0)
+    assert "below 4 workers" in caplog.text
+    plan_pool_size(get_settings(), engines=len(pooled_engines(get_settings())))  # restore the app's plan
+
+
+def test_sync_pool_saturation_timeouts_and_invalidations(tmp_path, caplog):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=timed_pool_class(QueuePool),
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.2,
+    )
+    stats = instrument_engine(engine, "test_sync")
+    try:
+        with caplog.at_level(logging.WARNING, logger="app.services.pool_metrics"):
+            held = engine.connect()
+        errors = []
+
+        def second():
+            try:
+                engine.connect()
+            except exc.TimeoutError as e:
+                errors.append(e)
+
+        t = threading.Thread(target=second)
+        t.start()
+        t.join()
+        snap = stats.as_dict()
+        assert errors and snap["timeouts"] == 1
+        assert snap["checked_out"] == 1 and snap["limit"] == 1 and snap["saturated_checkouts"] == 1
+        assert "saturated" in caplog.text
+        assert snap["checkout_ms_max"] >= 150 and snap["slow_checkouts"] == 1
+
+        held.invalidate()
+        held.close()
+        assert stats.as_dict()["invalidations"] == 1 and stats.checked_out == 0
+
+        engine.dispose()  # recreated pool keeps reporting into the same stats
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        snap = stats.as_dict()
+        assert snap["checkouts"] == 2 and snap["connects"] == 2 and snap["timeouts"] == 1
+        assert "test_sync" in pool_snapshot()["engines"]
+    finally:
+        engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_async_pool_records_checkout_wait(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=timed_pool_class(AsyncAdaptedQueuePool),
+        pool_size=1,
+        max_overflow=0,
+    )
+    stats = instrument_engine(engine.sync_engine, "test_async")
+
+    async def worker():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await asyncio.sleep(0.05)
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(3)))
+    finally:
+        await engine.dispose()
+    snap = stats.as_dict()
+    assert snap["checkouts"] == 3 and snap["peak_checked_out"] == 1 and snap["checked_out"] == 0
+    assert snap["checkout_ms_max"] >= 40  # the last task waited for two holders
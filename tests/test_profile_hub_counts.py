@@ -0,0 +1,100 @@
+"""Profile hub: one grouped counts query per payload, light public preview."""
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401
+from app.database import Base
+from app.models import Calendar, Category, ClientCard, Consultant, Service, User
+from app.services.profile_hub import (
+    ProfileCounts,
+    build_profile_payload_async,
+    build_profile_preview_async,
+    load_profile_counts,
+)
+
+
+async def _seed(db) -> int:
+    cat = Category(name_category="Психолог")
+    user = User(username="p1", email="p1@example.com", password="x", is_active=True)
+    db.add_all([cat, user])
+    await db.flush()
+    consultant = Consultant(
+        user_id=user.id, first_name="A", last_name="B", email="p1@example.com", category_of_specialist_id=cat.id
+    )
+    db.add(consultant)
+    await db.flush()
+    db.add_all(
+        [
+            Service(consultant_id=consultant.id, name="S1", is_active=True),
+            Service(consultant_id=consultant.id, name="S2", is_active=True),
+            Service(consultant_id=consultant.id, name="S3", is_active=False),
+            Calendar(consultant_id=consultant.id, name="Main", is_active=True, color="#000"),
+            ClientCard(consultant_id=consultant.id, name="C1", phone="+7001"),
+            ClientCard(consultant_id=consultant.id, name="C2", phone="+7002"),
+        ]
+    )
+    await db.commit()
+    return consultant.id
+
+
+@pytest.mark.asyncio
+async def test_payload_counts_in_one_query_and_light_preview(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'profile.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as db:
+        consultant_id = await _seed(db)
+
+    async def payload():
+        async with factory() as db:
+            consultant = await db.get(Consultant, consultant_id)
+            return await build_profile_payload_async(
+                db,
+                consultant,
+                await db.get(User, consultant.user_id),
+                connected_providers=set(),
+                primary_email="p1@example.com",
+                primary_email_verified=True,
+                has_usable_password=True,
+                yandex_oauth_enabled=False,
+                use_cache=False,
+            )
+
+    await payload()  # assigns and caches the public slug
+    seen: list[str] = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *a: seen.append(a[2].lower()))
+    data = await payload()
+    counts = [q for q in seen if "count(" in q]
+    assert len(counts) == 1  # services, calendars and clients in a single statement
+    # 2x get, slug lookup, consultant + category reload, counts, preview services: fixed, not per builder
+    assert len(seen) <= 7
+    assert data["dashboard"] == {
+        "services_total": 3,
+        "services_active": 2,
+        "calendars_total": 1,
+        "calendars_active": 1,
+        "clients_total": 2,
+        "completeness": data["completeness"]["percent"],
+    }
+    assert data["completion_meta"]["services_active"] == 2
+
+    seen.clear()
+    async with factory() as db:
+        preview = await build_profile_preview_async(db, await db.get(Consultant, consultant_id))
+    assert preview == data["preview"]
+    assert [s["name"] for s in preview["services"]] == ["S1", "S2"]
+    assert not any("count(" in q for q in seen) and len(seen) <= 5  # get, slug, reload + category, services
+    await engine.dispose()
+
+
+def test_sync_loader_and_empty_consultant(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'profile_sync.db'}")
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        assert load_profile_counts(db, 12345) == ProfileCounts()
+    engine.dispose()
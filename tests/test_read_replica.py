@@ -0,0 +1,104 @@
+"""DB_READ_URL: read-only routes use the replica, writers' browsers are pinned to the primary."""
+from __future__ import annotations
+
+import pytest
+from fastapi import Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.database as database
+import app.models  # noqa: F401
+from app.config import Settings
+from app.database import Base, get_async_db, get_async_read_db, pin_primary_after_write
+from app.models import Category
+
+
+def _make_db(path, label: str) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        db.add(Category(name_category=label))
+        db.commit()
+    engine.dispose()
+
+
+@pytest.fixture()
+def replica(tmp_path, monkeypatch):
+    primary_path, replica_path = tmp_path / "primary.db", tmp_path / "replica.db"
+    _make_db(primary_path, "primary")
+    _make_db(replica_path, "replica")
+    primary_engine = create_async_engine(f"sqlite+aiosqlite:///{primary_path}")
+    monkeypatch.setattr(database, "_AsyncSessionLocal", database._async_session_factory(primary_engine))
+    monkeypatch.setattr(database, "_AsyncReadSessionLocal", None)
+    monkeypatch.setattr(database, "_async_read_engine", None)
+    monkeypatch.setattr(database.settings, "db_read_url", f"sqlite:///{replica_path}")
+    monkeypatch.setattr(database.settings, "db_read_after_write_sec", 30)
+    monkeypatch.setattr(database.settings, "session_same_site", "lax")
+    monkeypatch.setattr(database.settings, "site_url", "http://testserver")
+    yield primary_engine
+
+
+def _app() -> FastAPI:
+    api = FastAPI()
+
+    @api.middleware("http")
+    async def _pin(request: Request, call_next):
+        response = await call_next(request)
+        pin_primary_after_write(request, response)
+        return response
+
+    @api.get("/label/")
+    async def label(db=Depends(get_async_read_db)):
+        return {"label": (await db.execute(select(Category.name_category))).scalar_one()}
+
+    @api.post("/write/")
+    async def write(db=Depends(get_async_db)):
+        return {"ok": True}
+
+    @api.post("/write-replica/")
+    async def write_replica(db=Depends(get_async_read_db)):
+        await db.execute(update(Category).values(name_category="oops"))
+        return {"ok": True}
+
+    return api
+
+
+def test_reads_go_to_replica_until_the_browser_writes(replica):
+    with TestClient(_app()) as client:
+        try:
+            assert client.get("/label/").json() == {"label": "replica"}
+            response = client.post("/write/")
+            assert database.PRIMARY_PIN_COOKIE in response.cookies
+            assert client.get("/label/").json() == {"label": "primary"}  # read-your-writes
+
+            other = TestClient(client.app)
+            assert other.get("/label/").json() == {"label": "replica"}  # other browsers stay on the replica
+            with pytest.raises(OperationalError, match="readonly|read-only"):
+                other.post("/write-replica/")
+        finally:
+            client.portal.call(replica.dispose)
+            if database._async_read_engine is not None:
+                client.portal.call(database._async_read_engine.dispose)
+
+
+def test_no_replica_configured_routes_everything_to_primary(replica, monkeypatch):
+    monkeypatch.setattr(database.settings, "db_read_url", "")
+    with TestClient(_app()) as client:
+        try:
+            assert client.get("/label/").json() == {"label": "primary"}
+            assert database.PRIMARY_PIN_COOKIE not in client.post("/write/").cookies
+        finally:
+            client.portal.call(replica.dispose)
+
+
+def test_async_read_url_uses_async_driver(monkeypatch):
+    s = Settings()
+    monkeypatch.setattr(s, "db_read_url", "sqlite:////tmp/replica.db")
+    assert s.async_read_database_url == "sqlite+aiosqlite:////tmp/replica.db"
+    monkeypatch.setattr(s, "db_read_url", "mysql+pymysql://ro:pw@replica:3306/app?charset=utf8mb4")
+    assert s.async_read_database_url == "mysql+asyncmy://ro:pw@replica:3306/app?charset=utf8mb4"
+    monkeypatch.setattr(s, "db_read_url", "")
+    assert s.async_read_database_url == ""
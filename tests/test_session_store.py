@@ -0,0 +1,170 @@
+"""Server-side sessions: opaque signed id in the cookie, threadpool load, write-on-change, legacy cookie migration."""
+from __future__ import annotations
+
+import json
+import threading
+from base64 import b64encode
+from datetime import datetime, timedelta
+
+import itsdangerous
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, select, update
+
+import app.models  # noqa: F401
+from app.auth.session_store import DbSessionStore, ServerSessionMiddleware, prune_web_sessions
+from app.database import Base
+from app.models import WebSession
+
+SECRET = "test-secret"
+
+
+@pytest.fixture()
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'sessions.db'}")
+    Base.metadata.create_all(engine, tables=[WebSession.__table__])
+    yield engine
+    engine.dispose()
+
+
+def _client(engine) -> TestClient:
+    api = FastAPI()
+    api.add_middleware(ServerSessionMiddleware, secret_key=SECRET, store=DbSessionStore(engine))
+
+    @api.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @api.get("/get")
+    async def get(request: Request):
+        return dict(request.session)
+
+    @api.get("/set")
+    async def set_(request: Request, key: str, value: str):
+        request.session[key] = value
+        return {"ok": True}
+
+    @api.get("/login")
+    async def login(request: Request, uid: int):
+        request.session["user_id"] = uid
+        return {"ok": True}
+
+    @api.get("/clear")
+    async def clear(request: Request):
+        request.session.clear()
+        return {"ok": True}
+
+    return TestClient(api)
+
+
+def _rows(engine) -> list:
+    with engine.connect() as conn:
+        return conn.execute(select(WebSession.id, WebSession.data)).all()
+
+
+def _statements(engine) -> list[str]:
+    seen: list[str] = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, *args):
+        seen.append(statement)
+
+    return seen
+
+
+def test_cookie_holds_only_an_id_and_store_is_written_on_change(engine):
+    client = _client(engine)
+    seen = _statements(engine)
+    assert client.get("/ping").status_code == 200 and seen == []  # no cookie: store never touched
+    client.get("/set", params={"key": "header_account_display", "value": "x" * 500})
+    cookie = client.cookies["session"]
+    assert len(cookie) < 100  # signed id, not the 500-char payload
+    [(sid, data)] = _rows(engine)
+    assert cookie.startswith(sid) and json.loads(data) == {"header_account_display": "x" * 500}
+
+    seen.clear()
+    response = client.get("/ping")
+    assert len(seen) == 1 and seen[0].startswith("SELECT")  # preloaded by PK, never written
+    assert "set-cookie" not in response.headers
+
+    seen.clear()
+    response = client.get("/get")
+    assert response.json() == {"header_account_display": "x" * 500}
+    assert len(seen) == 1 and "set-cookie" not in response.headers
+
+    seen.clear()
+    client.get("/set", params={"key": "header_account_display", "value": "x" * 500})
+    assert len(seen) == 1  # same value again: read only
+
+
+def test_store_load_runs_off_the_event_loop(engine):
+    threads: dict[str, int] = {}
+
+    class _Store(DbSessionStore):
+        def load(self, sid):
+            threads["load"] = threading.get_ident()
+            return super().load(sid)
+
+    api = FastAPI()
+    api.add_middleware(ServerSessionMiddleware, secret_key=SECRET, store=_Store(engine))
+
+    @api.get("/set")
+    async def set_(request: Request):
+        request.session["k"] = "v"
+        threads["loop"] = threading.get_ident()
+        return {"ok": True}
+
+    client = TestClient(api)
+    client.get("/set")
+    client.get("/set")
+    assert threads["load"] != threads["loop"]
+
+
+def test_login_rotates_id_and_clear_deletes(engine):
+    client = _client(engine)
+    client.get("/set", params={"key": "active_mode", "value": "client"})
+    [(anonymous_sid, _)] = _rows(engine)
+    client.get("/login", params={"uid": 7})
+    [(sid, data)] = _rows(engine)
+    assert sid != anonymous_sid and json.loads(data) == {"active_mode": "client", "user_id": 7}
+    assert client.get("/get").json()["user_id"] == 7
+
+    response = client.get("/clear")
+    assert _rows(engine) == []
+    assert "expires=Thu, 01 Jan 1970" in response.headers["set-cookie"]
+
+    client.cookies.set("session", "forged.value")
+    assert client.get("/get").json() == {}
+
+
+def test_legacy_cookie_is_migrated(engine):
+    payload = b64encode(json.dumps({"user_id": 3, "active_mode": "specialist"}).encode())
+    legacy = itsdangerous.TimestampSigner(SECRET).sign(payload).decode()
+    client = _client(engine)
+    client.cookies.set("session", legacy)
+    response = client.get("/ping")
+    assert response.json() == {"ok": True}
+    assert json.loads(_rows(engine)[0].data) == {"active_mode": "specialist", "user_id": 3}
+    migrated = response.cookies["session"]
+    assert migrated != legacy and len(migrated) < 100
+    client.cookies.clear()
+    client.cookies.set("session", migrated)
+    assert client.get("/get").json() == {"active_mode": "specialist", "user_id": 3}
+
+
+def test_sliding_expiry_and_prune(engine):
+    client = _client(engine)
+    client.get("/set", params={"key": "k", "value": "v"})
+    with engine.begin() as conn:
+        conn.execute(update(WebSession).values(expires_at=datetime.utcnow() + timedelta(days=1)))
+    response = client.get("/get")
+    assert "Max-Age=1209600" in response.headers["set-cookie"]
+    with engine.connect() as conn:
+        expires = conn.execute(select(WebSession.expires_at)).scalar_one()
+    assert expires > datetime.utcnow() + timedelta(days=13)
+
+    with engine.begin() as conn:
+        conn.execute(update(WebSession).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+        conn.execute(prune_web_sessions())
+    assert _rows(engine) == []
@@ -0,0 +1,131 @@
+"""Public slug registry: one-query resolution, cached slug<->id, single-scan slug allocation."""
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401
+from app.database import Base
+from app.models import Category, Consultant
+from app.services.public_client import (
+    SLUG_CACHE,
+    ensure_public_slug,
+    resolve_consultant_by_slug,
+    resolve_consultant_by_slug_async,
+)
+from app.services.response_cache import invalidate_profile
+
+
+@pytest.fixture()
+def db_path(tmp_path):
+    SLUG_CACHE.clear()
+    path = tmp_path / "slugs.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        # Optional column added by app/db_schema patches, not mapped on the model.
+        conn.execute(text("ALTER TABLE consultants ADD COLUMN public_slug VARCHAR(64) NULL"))
+        conn.execute(text("CREATE UNIQUE INDEX ix_consultants_public_slug ON consultants (public_slug)"))
+    with sessionmaker(bind=engine)() as db:
+        cat = Category(name_category="General")
+        db.add(cat)
+        db.flush()
+        db.add_all([
+            Consultant(first_name="Ivan", last_name="Petrov", email=f"i{i}@t.c", category_of_specialist_id=cat.id)
+            for i in range(4)
+        ])
+        db.commit()
+    engine.dispose()
+    yield path
+    SLUG_CACHE.clear()
+
+
+def _count(engine) -> list[str]:
+    seen: list[str] = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, *args):
+        seen.append(statement)
+
+    return seen
+
+
+def test_allocation_is_one_scan_and_cached(db_path):
+    engine = create_engine(f"sqlite:///{db_path}")
+    db = sessionmaker(bind=engine)()
+    try:
+        consultants = db.query(Consultant).order_by(Consultant.id).all()
+        with engine.begin() as conn:
+            conn.execute(text("UPDATE consultants SET public_slug = 'ivan-petrov-7' WHERE id = :id"),
+                         {"id": consultants[3].id})
+        seen = _count(engine)
+        assert ensure_public_slug(db, consultants[0]) == "ivan-petrov"
+        assert len(seen) == 3  # read own slug, one prefix scan, update
+        db.refresh(consultants[1])  # commit() expired it
+        seen.clear()
+        assert ensure_public_slug(db, consultants[1]) == "ivan-petrov-8"
+        assert len(seen) == 3
+        db.refresh(consultants[1])
+        db.refresh(consultants[3])
+        seen.clear()
+        assert ensure_public_slug(db, consultants[1]) == "ivan-petrov-8"
+        assert ensure_public_slug(db, consultants[3]) == "ivan-petrov-7"
+        assert len(seen) == 1  # first call was cached; the pre-set slug is read once
+        seen.clear()
+        assert ensure_public_slug(db, consultants[3]) == "ivan-petrov-7"
+        assert seen == []
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def test_resolution_is_one_query_and_invalidates(db_path):
+    engine = create_engine(f"sqlite:///{db_path}")
+    db = sessionmaker(bind=engine)()
+    try:
+        first = db.query(Consultant).order_by(Consultant.id).first()
+        with engine.begin() as conn:
+            conn.execute(text("UPDATE consultants SET public_slug = 'ivan' WHERE id = :id"), {"id": first.id})
+        db.expunge_all()
+        seen = _count(engine)
+        assert resolve_consultant_by_slug(db, "ivan").id == first.id
+        assert len(seen) == 1 and "public_slug" in seen[0]
+        assert SLUG_CACHE.get("s:ivan") == first.id and SLUG_CACHE.get(f"i:{first.id}") == "ivan"
+
+        db.expunge_all()
+        seen.clear()
+        assert resolve_consultant_by_slug(db, "ivan").id == first.id
+        assert len(seen) == 1 and "public_slug" not in seen[0]  # registry hit: primary-key lookup
+        assert resolve_consultant_by_slug(db, "missing") is None
+        assert resolve_consultant_by_slug(db, f"id-{first.id}").id == first.id
+
+        invalidate_profile(first.id)
+        assert SLUG_CACHE.get("s:ivan") is None and SLUG_CACHE.get(f"i:{first.id}") is None
+
+        SLUG_CACHE.set("s:gone", 999)
+        assert resolve_consultant_by_slug(db, "gone") is None
+        assert SLUG_CACHE.get("s:gone") is None
+    finally:
+        db.close()
+        engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_async_resolution_single_query(db_path):
+    engine = create_engine(f"sqlite:///{db_path}")
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE consultants SET public_slug = 'petrov' WHERE id = 2"))
+    engine.dispose()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    seen = _count(async_engine.sync_engine)
+    try:
+        async with AsyncSession(async_engine) as adb:
+            consultant = await resolve_consultant_by_slug_async(adb, "petrov")
+            assert consultant.id == 2 and consultant.first_name == "Ivan"
+            assert len(seen) == 1
+            assert (await resolve_consultant_by_slug_async(adb, "id-3")).id == 3
+    finally:
+        await async_engine.dispose()
@@ -96,6 +96,17 @@ def test_health_endpoint():
     body = r.json()
     assert body["status"] in ("ok", "degraded")
     assert "schema" in body
+    assert "db_pool" not in body  # pool plan and limits only behind the cron secret
+
+
+def test_internal_metrics_reports_db_pool_behind_secret(monkeypatch):
+    import app.main as main
+
+    client = TestClient(main.app)
+    monkeypatch.setattr(main.settings, "cron_secret", "s3cret")
+    assert client.get("/internal/metrics/").status_code == 403
+    body = client.get("/internal/metrics/", headers={"X-Cron-Secret": "s3cret"}).json()
+    assert "primary" in body["db_pool"]["engines"] and body["db_pool"]["plan"]["pool_size"] >= 1
 
 
 def test_yandex_redirect_uri(monkeypatch):
@@ -104,14 +104,12 @@ async def test_specialist_booking_slot_taken():
         end_time=time(18, 0),
         is_available=True,
     )
-    taken = MagicMock(id=10)
-
     calls = {"n": 0}
 
     async def execute(stmt):
         calls["n"] += 1
         result = MagicMock()
-        # calendar, service, lock calendar, time_slot, slot_taken
+        # calendar, service, time_slot, day lock upsert, day bookings
         n = calls["n"]
         if n == 1:
             result.scalar_one_or_none.return_value = calendar
@@ -119,11 +117,9 @@ async def test_specialist_booking_slot_taken():
         elif n == 2:
             result.scalar_one_or_none.return_value = service
         elif n == 3:
-            result.scalar_one.return_value = calendar
-        elif n == 4:
             result.scalar_one_or_none.return_value = time_slot
         elif n == 5:
-            result.scalar_one_or_none.return_value = taken
+            result.all.return_value = [(time(10, 0), time(11, 0))]
         else:
             result.scalar_one_or_none.return_value = None
             result.scalars.return_value.all.return_value = []
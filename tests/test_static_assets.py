@@ -0,0 +1,132 @@
+"""Fingerprinted + precompressed static build and negotiated serving."""
+from __future__ import annotations
+
+import json
+
+from PIL import Image
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+from app.services import static_assets
+from app.services.static_assets import (
+    MANIFEST_NAME,
+    PrecompressedStaticFiles,
+    build_static_assets,
+    is_fingerprinted,
+    page_savings,
+    static_url,
+)
+
+CSS = "body { background: url('/static/img/bg.png?v=3'); }\n" + ".x { color: red; }\n" * 80
+JS = "console.log('hello static pipeline');\n" * 60
+
+
+def _src(tmp_path):
+    src = tmp_path / "src"
+    (src / "css").mkdir(parents=True)
+    (src / "js").mkdir()
+    (src / "img").mkdir()
+    (src / "css" / "site.css").write_text(CSS)
+    (src / "js" / "app.js").write_text(JS)
+    Image.effect_noise((400, 400), 64).convert("RGB").save(src / "img" / "bg.png")
+    return src
+
+
+def _client(out, src):
+    app = Starlette(routes=[Mount("/static", PrecompressedStaticFiles(directory=str(out), fallback_directory=str(src)))])
+    return TestClient(app)
+
+
+def test_build_writes_fingerprints_variants_and_rewrites_css(tmp_path, monkeypatch):
+    monkeypatch.setattr(static_assets, "IMAGE_MIN_BYTES", 1024)
+    src = _src(tmp_path)
+    out = tmp_path / "build"
+    data = build_static_assets(src, out)
+    assets = data["assets"]
+
+    css = assets["css/site.css"]
+    assert is_fingerprinted(css["file"])
+    assert css["gz"] < css["size"]
+    assert (out / css["file"]).exists() and (out / (css["file"] + ".gz")).exists()
+    built_css = (out / css["file"]).read_text()
+    assert f"/static/{assets['img/bg.png']['file']}" in built_css
+    assert "?v=3" not in built_css
+    assert assets["img/bg.png"].get("webp")
+    manifest = json.loads((out / MANIFEST_NAME).read_text())
+    assert manifest["assets"]["js/app.js"]["file"] == assets["js/app.js"]["file"]
+
+
+def test_rebuild_keeps_previous_generation(tmp_path):
+    src = _src(tmp_path)
+    out = tmp_path / "build"
+    first = build_static_assets(src, out)["assets"]["js/app.js"]["file"]
+    (src / "js" / "app.js").write_text(JS + "console.log('v2');\n")
+    second = build_static_assets(src, out)
+    assert second["assets"]["js/app.js"]["file"] != first
+    assert (out / first).exists()
+    assert second["kept_previous"] >= 1
+
+
+def test_serving_negotiates_encoding_and_image_format(tmp_path, monkeypatch):
+    monkeypatch.setattr(static_assets, "IMAGE_MIN_BYTES", 1024)
+    src = _src(tmp_path)
+    out = tmp_path / "build"
+    assets = build_static_assets(src, out)["assets"]
+    client = _client(out, src)
+    js = "/static/" + assets["js/app.js"]["file"]
+
+    gz = client.get(js, headers={"Accept-Encoding": "gzip"})
+    assert gz.status_code == 200
+    assert gz.headers["content-encoding"] == "gzip"
+    assert gz.headers["vary"] == "Accept-Encoding"
+    assert "javascript" in gz.headers["content-type"]
+    assert gz.text == JS
+
+    plain = client.get(js, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["etag"] != gz.headers["etag"]
+
+    again = client.get(js, headers={"Accept-Encoding": "gzip", "If-None-Match": gz.headers["etag"]})
+    assert again.status_code == 304
+
+    webp = client.get("/static/img/bg.png", headers={"Accept": "image/webp,*/*"})
+    assert webp.headers["content-type"] == "image/webp"
+    assert webp.headers["vary"] == "Accept"
+    png = client.get("/static/img/bg.png", headers={"Accept": "*/*"})
+    assert png.headers["content-type"] == "image/png"
+
+    (src / "js" / "late.js").write_text("1")
+    assert client.get("/static/js/late.js").text == "1"
+
+
+def test_static_url_uses_manifest_or_content_hash(tmp_path, monkeypatch):
+    src = _src(tmp_path)
+    out = tmp_path / "build"
+    settings = static_assets.get_settings()
+    monkeypatch.setattr(settings, "static_dir", src)
+    monkeypatch.setattr(settings, "static_build_dir", str(out))
+    static_assets.reload_manifest()
+    try:
+        dev = static_url("js/app.js")
+        assert dev.startswith("/static/js/app.js?v=")
+        assets = build_static_assets(src, out)["assets"]
+        assert static_url("/static/js/app.js") == "/static/" + assets["js/app.js"]["file"]
+        assert static_url("js/missing.js") == "/static/js/missing.js"
+    finally:
+        monkeypatch.undo()
+        static_assets.reload_manifest()
+
+
+def test_page_savings_follows_extends(tmp_path):
+    tpl = tmp_path / "templates"
+    (tpl / "layouts").mkdir(parents=True)
+    (tpl / "layouts" / "base.html").write_text("<link href=\"{{ static_url('css/site.css') }}\">")
+    (tpl / "page.html").write_text('{% extends "layouts/base.html" %}<script src="{{ static_url(\'js/app.js\') }}"></script>')
+    assets = {
+        "css/site.css": {"file": "css/site.1.css", "size": 1000, "gz": 200, "br": 150},
+        "js/app.js": {"file": "js/app.1.js", "size": 500, "gz": 100},
+    }
+    rows = page_savings(assets, tpl)
+    assert [r["page"] for r in rows] == ["page.html"]
+    assert rows[0]["raw_bytes"] == 1500 and rows[0]["served_bytes"] == 250
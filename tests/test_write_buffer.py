@@ -0,0 +1,117 @@
+"""Write buffer: coalesced counter / activity upserts, no DB work on the request path."""
+from __future__ import annotations
+
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401
+from app.database import Base
+from app.database import engine as app_engine
+from app.models import AppCounter, PlatformUserActivity, User
+from app.services.app_counters import get_counter, increment_counter
+from app.services.platform_activity import record_user_activity
+from app.services.write_buffer import MAX_FLUSH_ATTEMPTS, WRITE_BUFFER, WriteBuffer, _sync_bind
+
+DAY = date(2026, 3, 2)
+
+
+@pytest.fixture()
+def engine(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 'buffer.db'}")
+    Base.metadata.create_all(eng)
+    yield eng
+    eng.dispose()
+
+
+def _statements(eng) -> list[str]:
+    seen: list[str] = []
+
+    @event.listens_for(eng, "before_cursor_execute")
+    def _record(conn, cursor, statement, *args):
+        seen.append(statement)
+
+    return seen
+
+
+def test_coalesces_increments_and_activity_marks(engine):
+    with sessionmaker(bind=engine)() as db:
+        db.add(AppCounter(key="hits", value=5, updated_at=datetime.utcnow()))
+        db.commit()
+
+    buf = WriteBuffer(interval=3600)
+    for _ in range(100):
+        buf.add_counter(engine, "hits")
+    buf.add_counter(engine, "fresh", 2)
+    for _ in range(3):
+        buf.mark_activity(engine, 1, DAY, "login")
+    buf.mark_activity(engine, 2, DAY, "webapp")
+    assert buf.pending() == {"counters": 2, "activity": 2}
+
+    seen = _statements(engine)
+    assert buf.flush() == {"counters": 2, "activity": 2}
+    assert len([s for s in seen if s.lstrip().upper().startswith("INSERT")]) == 2  # one executemany per table
+    assert buf.pending() == {"counters": 0, "activity": 0}
+
+    buf.mark_activity(engine, 1, DAY, "late")
+    buf.add_counter(engine, "hits", 3)
+    buf.flush()
+    with sessionmaker(bind=engine)() as db:
+        assert get_counter(db, "hits") == 108 and get_counter(db, "fresh") == 2
+        rows = db.execute(select(PlatformUserActivity.user_id, PlatformUserActivity.source)).all()
+        assert sorted(rows) == [(1, "login"), (2, "webapp")]
+
+
+def test_request_path_only_enqueues(engine):
+    db = sessionmaker(bind=engine)()
+    try:
+        user = User(username="u", password="x", email="u@t.c", date_joined=datetime.now())
+        db.add(user)
+        db.commit()
+        uid = user.id
+        seen = _statements(engine)
+        for _ in range(5):
+            record_user_activity(db, uid)
+        assert seen == []
+        WRITE_BUFFER.flush()
+        count = db.execute(
+            select(func.count()).select_from(PlatformUserActivity).where(PlatformUserActivity.user_id == uid)
+        ).scalar()
+        assert count == 1
+
+        assert increment_counter(db, "direct", by=4, commit=True) == 4
+        assert increment_counter(db, "direct", commit=True) == 5
+    finally:
+        db.close()
+
+
+def test_failed_flush_retries_then_drops(tmp_path):
+    broken = create_engine(f"sqlite:///{tmp_path / 'empty.db'}")  # no tables
+    buf = WriteBuffer(interval=3600)
+    buf.add_counter(broken, "hits")
+    for _ in range(MAX_FLUSH_ATTEMPTS - 1):
+        assert buf.flush() == {"counters": 0, "activity": 0}
+        assert buf.pending()["counters"] == 1
+    buf.flush()
+    assert buf.pending()["counters"] == 0
+    broken.dispose()
+
+
+@pytest.mark.asyncio
+async def test_async_sessions_flush_through_a_sync_engine_on_the_same_database(tmp_path):
+    from app.database import _ensure_async_engine
+
+    async with _ensure_async_engine()() as adb:
+        assert _sync_bind(adb) is app_engine
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'a.db'}")
+    try:
+        async with AsyncSession(async_engine) as adb:
+            twin = _sync_bind(adb)
+            assert twin is not app_engine and twin.url.database == str(tmp_path / "a.db")
+            assert not twin.dialect.is_async and _sync_bind(adb) is twin
+    finally:
+        await async_engine.dispose()
+    assert _sync_bind(None) is None